@@ -1499,34 +1499,31 @@ class AccountingDB(DB):
     for sqlQuery in sqlQueries:
       self.log.info("[REBUCKET] Executing query #%s..." % queryNum)
       queryNum += 1
-      retVal = self._query(sqlQuery)
-      if not retVal['OK']:
-        self.log.error("[REBUCKET] Can't retrieve data for rebucketing", retVal['Message'])
-        #self.__rollbackTransaction( connObj )
-        return retVal
-      rawData = retVal['Value']
-      self.log.info("[REBUCKET] Retrieved %s records" % len(rawData))
       rebucketedRecords = 0
       startQuery = time.time()
       startBlock = time.time()
-      numRecords = len(rawData)
-      for entry in rawData:
-        startT = entry[0]
-        endT = entry[1]
-        values = entry[2:]
-        retVal = self.__splitInBuckets(typeName, startT, endT, values)
+      # The raw tables can be huge, the records are streamed instead of being loaded at once
+      for retVal in self._queryIter(sqlQuery):
         if not retVal['OK']:
+          self.log.error("[REBUCKET] Can't retrieve data for rebucketing", retVal['Message'])
           #self.__rollbackTransaction( connObj )
           return retVal
-        rebucketedRecords += 1
-        if rebucketedRecords % 1000 == 0:
-          queryAvg = rebucketedRecords / float(time.time() - startQuery)
-          blockAvg = 1000 / float(time.time() - startBlock)
-          startBlock = time.time()
-          perDone = 100 * rebucketedRecords / float(numRecords)
-          expectedEnd = str(datetime.timedelta(seconds=int((numRecords - rebucketedRecords) / blockAvg)))
-          self.log.info("[REBUCKET] Rebucketed %.2f%% %s (%.2f r/s block %.2f r/s query | ETA %s )..." %
-                        (perDone, typeName, blockAvg, queryAvg, expectedEnd))
+        for entry in retVal['Value']:
+          startT = entry[0]
+          endT = entry[1]
+          values = entry[2:]
+          retVal = self.__splitInBuckets(typeName, startT, endT, values)
+          if not retVal['OK']:
+            #self.__rollbackTransaction( connObj )
+            return retVal
+          rebucketedRecords += 1
+          if rebucketedRecords % 1000 == 0:
+            queryAvg = rebucketedRecords / float(time.time() - startQuery)
+            blockAvg = 1000 / float(time.time() - startBlock)
+            startBlock = time.time()
+            self.log.info("[REBUCKET] Rebucketed %s records of %s (%.2f r/s block %.2f r/s query)..." %
+                          (rebucketedRecords, typeName, blockAvg, queryAvg))
+      self.log.info("[REBUCKET] Rebucketed %s records" % rebucketedRecords)
     # return self.__commitTransaction( connObj )
     return S_OK()
 
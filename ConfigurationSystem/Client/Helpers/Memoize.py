@@ -0,0 +1,124 @@
+""" Memoization of the helper functions deriving their results from the configuration
+
+    Functions like Resources.getQueues or SiteSEMapping.getSEsForSite go through many
+    CS sections at every call, while their result only changes with the configuration.
+    The csMemoized decorator keeps their successful results per arguments until the
+    configuration changes::
+
+      @csMemoized()
+      def getQueues(siteList=None, ceList=None, ...):
+
+    The results are copied before being returned, so that callers can modify them.
+    The number of results kept per function is bounded, the oldest are dropped first.
+    When the result also depends on something else than the arguments and the
+    configuration, e.g. the VO of the proxy, extraKey gives it.
+"""
+
+__RCSID__ = "$Id$"
+
+import collections
+import copy
+import functools
+import threading
+
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.ConfigurationSystem.private.Refresher import gRefresher
+
+# name of the function -> its CSMemoizer
+gMemoizers = {}
+
+
+def _hashable(value):
+  """ Turn the lists, sets and dicts in the arguments into tuples so that they can be keys """
+  if isinstance(value, (list, tuple)):
+    return tuple([_hashable(item) for item in value])
+  if isinstance(value, (set, frozenset)):
+    return tuple(sorted([_hashable(item) for item in value]))
+  if isinstance(value, dict):
+    return tuple(sorted([(key, _hashable(item)) for key, item in value.iteritems()]))
+  return value
+
+
+class CSMemoizer(object):
+  """ Results of a function for the current configuration """
+
+  def __init__(self, func, maxSize, extraKey=None):
+    self.func = func
+    self.maxSize = maxSize
+    self.extraKey = extraKey
+    self.__lock = threading.Lock()
+    self.__results = collections.OrderedDict()
+    # The results are valid as long as the configuration is the one of this snapshot
+    self.__snapshot = None
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def __call__(self, *args, **kwargs):
+    gRefresher.refreshConfigurationIfNeeded()
+    snapshot = gConfigurationData.getSnapshot()
+    try:
+      key = (_hashable(args), _hashable(kwargs), self.extraKey() if self.extraKey else None)
+      hash(key)
+    except TypeError:
+      with self.__lock:
+        self.misses += 1
+      return self.func(*args, **kwargs)
+
+    with self.__lock:
+      if snapshot is not self.__snapshot:
+        self.__results.clear()
+        self.__snapshot = snapshot
+      result = self.__results.get(key)
+      if result is not None:
+        self.hits += 1
+        return copy.deepcopy(result)
+      self.misses += 1
+
+    result = self.func(*args, **kwargs)
+    # Errors are not kept, they may be solved by the next call
+    if isinstance(result, dict) and not result.get('OK'):
+      return result
+    with self.__lock:
+      if snapshot is self.__snapshot:
+        if len(self.__results) >= self.maxSize:
+          self.__results.popitem(last=False)
+          self.evictions += 1
+        self.__results[key] = result
+    return copy.deepcopy(result)
+
+  def clear(self):
+    with self.__lock:
+      self.__results.clear()
+      self.__snapshot = None
+
+  def getStats(self):
+    """ :returns: dict with the number of Hits, Misses, Evictions and the number of results kept (Size) """
+    with self.__lock:
+      return {'Hits': self.hits,
+              'Misses': self.misses,
+              'Evictions': self.evictions,
+              'Size': len(self.__results)}
+
+
+def csMemoized(maxSize=1000, extraKey=None):
+  """ Decorator keeping the results of a function until the configuration changes
+
+      :param int maxSize: maximum number of results kept
+      :param extraKey: function without arguments returning what else the results depend on
+  """
+  def decorator(func):
+    memoizer = CSMemoizer(func, maxSize, extraKey=extraKey)
+    gMemoizers["%s.%s" % (func.__module__, func.__name__)] = memoizer
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      return memoizer(*args, **kwargs)
+    wrapper.memoizer = memoizer
+    return wrapper
+  return decorator
+
+
+def getMemoizationStats():
+  """ :returns: dict with the stats (see CSMemoizer.getStats) of each memoized function """
+  return dict([(name, memoizer.getStats()) for name, memoizer in gMemoizers.iteritems()])
@@ -87,7 +87,8 @@ class Operations(object):
   """
 
   __cache = {}
-  __cacheVersion = 0
+  # The cache is valid as long as the configuration is the one of this snapshot
+  __cacheSnapshot = None
   __cacheLock = LockRing.LockRing().getLock()
 
   def __init__(self, vo=False, group=False, setup=False):
@@ -127,21 +128,27 @@ class Operations(object):
       self.__setup = CSGlobals.getSetup()
 
   def __getCache(self):
+    snapshot = gConfigurationData.getSnapshot()
+    cacheKey = (self.__vo, self.__setup)
+    # Without locking when the cache is up to date
+    if snapshot is Operations.__cacheSnapshot:
+      cachedCFG = Operations.__cache.get(cacheKey)
+      if cachedCFG is not None:
+        return cachedCFG
+
     Operations.__cacheLock.acquire()
     try:
-      currentVersion = gConfigurationData.getVersion()
-      if currentVersion != Operations.__cacheVersion:
+      if snapshot is not Operations.__cacheSnapshot:
         Operations.__cache = {}
-        Operations.__cacheVersion = currentVersion
+        Operations.__cacheSnapshot = snapshot
 
-      cacheKey = (self.__vo, self.__setup)
       if cacheKey in Operations.__cache:
         return Operations.__cache[cacheKey]
 
       mergedCFG = CFG.CFG()
 
       for path in self.__getSearchPaths():
-        pathCFG = gConfigurationData.mergedCFG[path]
+        pathCFG = snapshot.cfg[path]
         if pathCFG:
           mergedCFG = mergedCFG.mergeWith(pathCFG)
 
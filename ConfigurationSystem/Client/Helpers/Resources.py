@@ -9,11 +9,13 @@ from DIRAC import S_OK, S_ERROR, gConfig
 from DIRAC.ConfigurationSystem.Client.Helpers.Path import cfgPath
 from DIRAC.Core.Utilities.List import uniqueElements, fromChar
 from DIRAC.Core.Utilities.Decorators import deprecated
+from DIRAC.ConfigurationSystem.Client.Helpers.Memoize import csMemoized
 
 
 gBaseResourcesSection = "/Resources"
 
 
+@csMemoized()
 def getSites():
   """ Get the list of all the sites defined in the CS
   """
@@ -84,6 +86,7 @@ def getSiteGrid(site):
   return S_OK(sitetuple[0])
 
 
+@csMemoized()
 def getQueue(site, ce, queue):
   """ Get parameters of the specified queue
   """
@@ -116,6 +119,7 @@ def getQueue(site, ce, queue):
   return S_OK(resultDict)
 
 
+@csMemoized()
 def getQueues(siteList=None, ceList=None, ceTypeList=None, community=None, mode=None):
   """ Get CE/queue options according to the specified selection
   """
@@ -188,6 +192,7 @@ def getQueues(siteList=None, ceList=None, ceTypeList=None, community=None, mode=
   return S_OK(resultDict)
 
 
+@csMemoized()
 def getCompatiblePlatforms(originalPlatforms):
   """ Get a list of platforms compatible with the given list
   """
@@ -220,6 +225,7 @@ def getCompatiblePlatforms(originalPlatforms):
   return S_OK(uniqueElements(resultList))
 
 
+@csMemoized()
 def getDIRACPlatform(OSList):
   """ Get standard DIRAC platform(s) compatible with the argument.
 
@@ -266,6 +272,7 @@ def getDIRACPlatform(OSList):
   return S_OK(platforms)
 
 
+@csMemoized()
 def getDIRACPlatforms():
   """ just returns list of platforms defined in the CS
   """
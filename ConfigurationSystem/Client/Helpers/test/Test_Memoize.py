@@ -0,0 +1,70 @@
+""" Test the memoization of the results derived from the configuration
+"""
+
+# pylint: disable=missing-docstring
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import ConfigurationData
+from DIRAC.ConfigurationSystem.Client.Helpers.Memoize import csMemoized, getMemoizationStats
+
+CS = """
+Resources
+{
+  Computing
+  {
+    OSCompatibility
+    {
+      plat1 = OS1, OS2
+    }
+  }
+}
+"""
+
+computations = []
+
+
+@csMemoized(maxSize=2)
+def getPlatformOSs(platform, options=None):
+  computations.append(platform)
+  if platform == 'unknown':
+    return S_ERROR('Unknown platform')
+  return S_OK({'Platform': platform, 'OSs': ['OS1', 'OS2'], 'Options': options})
+
+
+@patch("DIRAC.ConfigurationSystem.Client.Helpers.Memoize.gRefresher", new=MagicMock())
+def test_memoization():
+  confData = ConfigurationData(False)
+  confData.loadRemoteCFGFromMem(CS)
+  with patch("DIRAC.ConfigurationSystem.Client.Helpers.Memoize.gConfigurationData", new=confData):
+    del computations[:]
+    getPlatformOSs.memoizer.clear()
+    result = getPlatformOSs('plat1')
+    assert result['OK']
+    # The caller can modify its result
+    result['Value']['OSs'].append('OS3')
+    assert getPlatformOSs('plat1')['Value']['OSs'] == ['OS1', 'OS2']
+    assert getPlatformOSs('plat1', options={'a': [1, 2]})['Value']['Options'] == {'a': [1, 2]}
+    assert getPlatformOSs('plat1', options={'a': [1, 2]})['OK']
+    assert computations == ['plat1', 'plat1']
+
+    # Errors are computed again
+    assert not getPlatformOSs('unknown')['OK']
+    assert not getPlatformOSs('unknown')['OK']
+    assert computations == ['plat1', 'plat1', 'unknown', 'unknown']
+
+    # The oldest result is dropped
+    getPlatformOSs('plat2')
+    getPlatformOSs('plat1')
+    assert computations[-2:] == ['plat2', 'plat1']
+
+    # Until the configuration changes
+    del computations[:]
+    getPlatformOSs('plat2')
+    confData.setOptionInCFG('/Resources/Computing/OSCompatibility/plat2', 'OS3')
+    getPlatformOSs('plat2')
+    assert computations == ['plat2']
+
+    stats = getMemoizationStats()['Test_Memoize.getPlatformOSs']
+    assert stats == {'Hits': 3, 'Misses': 7, 'Evictions': 2, 'Size': 1}
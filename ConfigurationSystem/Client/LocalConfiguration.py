@@ -299,6 +299,10 @@ class LocalConfiguration(object):
       retVal = self.syncRemoteConfiguration()
       if not retVal['OK']:
         return retVal
+      # Long lived components get the new versions pushed by a configuration server,
+      # the configuration servers themselves subscribe to the master if they are slaves
+      if self.componentType in ("service", "agent", "executor") and self.componentName != "Configuration/Server":
+        gRefresher.subscribeToNewVersions()
     else:
       gLogger.warn("Running without remote configuration")
 
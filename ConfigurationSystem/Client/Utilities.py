@@ -503,8 +503,8 @@ def getDBParameters(fullname):
   defaultQueueSize is the QueueSize to return if the option is not found in the
   CS
 
-  Returns a dictionary with the keys: 'host', 'port', 'user', 'password',
-  'db' and 'queueSize'
+  Returns a dictionary with the keys: 'Host', 'Port', 'User', 'Password',
+  'DBName', 'MinIdleConnections' and 'MaxIdleConnections'
   """
 
   cs_path = getDatabaseSection(fullname)
@@ -561,6 +561,11 @@ def getDBParameters(fullname):
   dbName = result['Value']
   parameters['DBName'] = dbName
 
+  # Optional: number of connections kept open by the pool when they are not used
+  for option, default in (('MinIdleConnections', 0), ('MaxIdleConnections', 10)):
+    value = gConfig.getValue('/Systems/Databases/%s' % option, default)
+    parameters[option] = gConfig.getValue('%s/%s' % (cs_path, option), value)
+
   return S_OK(parameters)
 
 
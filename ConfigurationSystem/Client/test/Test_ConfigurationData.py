@@ -0,0 +1,140 @@
+""" Test the propagation of the configuration modifications from a server to its clients
+"""
+
+# pylint: disable=missing-docstring
+
+from mock import patch
+
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import ConfigurationData
+
+CS_V1 = """
+DIRAC
+{
+  Configuration
+  {
+    Name = Test
+    Version = 2019-01-01 00:00:00
+    Servers = dips://server1:9135/Configuration/Server
+  }
+}
+Resources
+{
+  Sites
+  {
+    LCG
+    {
+      # The first site
+      LCG.CERN.ch
+      {
+        CE = ce1.cern.ch, ce2.cern.ch
+      }
+    }
+  }
+}
+"""
+
+
+def getServer():
+  server = ConfigurationData(False)
+  server.setAsService()
+  server.loadRemoteCFGFromMem(CS_V1)
+  return server
+
+
+def getClient():
+  client = ConfigurationData(False)
+  client.loadRemoteCFGFromMem(CS_V1)
+  return client
+
+
+def test_modifications():
+  server = getServer()
+  client = getClient()
+  v1 = server.getVersion()
+  assert server.getCompressedModifications(v1) is None
+
+  server.setOptionInCFG('/Resources/Sites/LCG/LCG.CERN.ch/CE', 'ce3.cern.ch', server.remoteCFG)
+  server.setOptionInCFG('/Resources/Sites/LCG/LCG.IN2P3.fr/CE', 'ce.in2p3.fr', server.remoteCFG)
+  server.setVersion('2019-01-02 00:00:00')
+  v2 = server.getVersion()
+  server.deleteOptionInCFG('/DIRAC/Configuration/Servers', server.remoteCFG)
+  server.setVersion('2019-01-03 00:00:00')
+  v3 = server.getVersion()
+
+  newestVersion, data = server.getCompressedModifications(v1)
+  assert newestVersion == v3
+  assert server.getCompressedModifications(v2)[0] == v3
+  assert server.getCompressedModifications('2018-12-31 00:00:00') is None
+
+  result = client.applyRemoteCompressedModifications(data, newestVersion)
+  assert result['OK'], result
+  assert client.getVersion() == v3
+  assert str(client.getRemoteCFG()) == str(server.getRemoteCFG())
+  assert client.getServers() == []
+
+
+def test_historySize():
+  server = getServer()
+  server.setOptionInCFG('/DIRAC/Configuration/ModificationsHistorySize', '1', server.localCFG)
+  v1 = server.getVersion()
+  server.setVersion('2019-01-02 00:00:00')
+  v2 = server.getVersion()
+  server.setVersion('2019-01-03 00:00:00')
+  assert server.getCompressedModifications(v1) is None
+  assert server.getCompressedModifications(v2) is not None
+
+
+def test_failedModifications():
+  server = getServer()
+  client = getClient()
+  v1 = server.getVersion()
+  server.setOptionInCFG('/Resources/Sites/LCG/LCG.IN2P3.fr/CE', 'ce.in2p3.fr', server.remoteCFG)
+  server.setVersion('2019-01-02 00:00:00')
+  newestVersion, data = server.getCompressedModifications(v1)
+
+  # The client does not have the configuration the modifications apply to
+  client.setOptionInCFG('/Resources/Sites/LCG/LCG.IN2P3.fr/CE', 'ce.in2p3.fr', client.remoteCFG)
+  result = client.applyRemoteCompressedModifications(data, newestVersion)
+  assert not result['OK']
+  # Next time, the whole configuration is downloaded
+  assert client.getVersion() == '0'
+
+
+def test_snapshot():
+  confData = getClient()
+  snapshot = confData.getSnapshot()
+  assert confData.getSnapshot() is snapshot
+  assert confData.extractOptionFromCFG('/Resources/Sites/LCG/LCG.CERN.ch/CE') == 'ce1.cern.ch, ce2.cern.ch'
+  assert confData.extractOptionFromCFG('Resources//Sites/ LCG /LCG.CERN.ch/CE/') == 'ce1.cern.ch, ce2.cern.ch'
+  assert confData.extractOptionFromCFG('/Resources/Sites/LCG') is None
+  assert confData.extractOptionFromCFG('/') is None
+  assert confData.getSectionsFromCFG('/') == ['DIRAC', 'Resources']
+  assert confData.getSectionsFromCFG('/Resources/Sites/LCG') == ['LCG.CERN.ch']
+  assert confData.getOptionsFromCFG('/Resources/Sites/LCG/LCG.CERN.ch') == ['CE']
+  assert confData.getOptionsFromCFG('/Resources/Sites/LCG/LCG.CERN.ch/CE') is None
+  assert snapshot.getOptionsDict('/DIRAC/Configuration')['Name'] == 'Test'
+
+  # A new snapshot for the new configuration
+  confData.setOptionInCFG('/Resources/Sites/LCG/LCG.CERN.ch/SE', 'CERN-DST')
+  assert confData.getSnapshot() is not snapshot
+  assert confData.getOptionsFromCFG('/Resources/Sites/LCG/LCG.CERN.ch') == ['CE', 'SE']
+  assert snapshot.getOption('/Resources/Sites/LCG/LCG.CERN.ch/SE') is None
+
+
+def test_typedValues():
+  from DIRAC.ConfigurationSystem.private.ConfigurationClient import ConfigurationClient
+  confData = getClient()
+  with patch('DIRAC.ConfigurationSystem.private.ConfigurationClient.gConfigurationData', new=confData):
+    client = ConfigurationClient()
+    path = '/Resources/Sites/LCG/LCG.CERN.ch/CE'
+    ceList = client.getValue(path, [])
+    assert ceList == ['ce1.cern.ch', 'ce2.cern.ch']
+    # The memoized value is not modified by the caller
+    ceList.append('ce3.cern.ch')
+    assert client.getValue(path, []) == ['ce1.cern.ch', 'ce2.cern.ch']
+    assert client.getValue(path, 'default') == 'ce1.cern.ch, ce2.cern.ch'
+    assert client.getValue(path, 0) == 0
+    assert not client.getOption(path, 0)['OK']
+
+    confData.setOptionInCFG(path, 'ce3.cern.ch')
+    assert client.getValue(path, []) == ['ce3.cern.ch']
@@ -0,0 +1,129 @@
+""" Test the new versions of the configuration pushed by the servers
+"""
+
+# pylint: disable=missing-docstring,protected-access
+
+import time
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import ConfigurationData
+from DIRAC.ConfigurationSystem.private.Refresher import Refresher, SUBSCRIBED_REFRESH_FACTOR
+from DIRAC.ConfigurationSystem.Service.ConfigurationHandler import ConfigurationHandler
+
+CS = """
+DIRAC
+{
+  Configuration
+  {
+    Name = Test
+    Version = 2019-01-01 00:00:00
+    Servers = dips://server1:9135/Configuration/Server
+  }
+}
+"""
+
+
+def getConfigurationData():
+  confData = ConfigurationData(False)
+  confData.loadRemoteCFGFromMem(CS)
+  return confData
+
+
+def waitFor(condition):
+  for _ in range(50):
+    if condition():
+      return True
+    time.sleep(0.1)
+  return False
+
+
+@patch("DIRAC.ConfigurationSystem.private.Refresher.getGatewayURLs", new=MagicMock(return_value=[]))
+@patch("DIRAC.ConfigurationSystem.private.Refresher.gConfigurationData", new_callable=getConfigurationData)
+def test_subscription(confData):
+  refresher = Refresher()
+  refresher._Refresher__refresh = MagicMock(return_value=S_OK())
+  msgClient = MagicMock()
+  msgClient.connect.return_value = S_OK()
+  with patch("DIRAC.Core.DISET.MessageClient.MessageClient", return_value=msgClient):
+    assert refresher.subscribeToNewVersions()['OK']
+  cbNewVersion = msgClient.subscribeToMessage.call_args[0][1]
+  cbDisconnect = msgClient.subscribeToDisconnect.call_args[0][0]
+
+  # Polling until the server sends its version, then much less often
+  refresher.refreshConfigurationIfNeeded()
+  assert refresher._Refresher__lastUpdateTime
+  lastUpdateTime = time.time() - 2 * confData.getRefreshTime()
+  refresher._Refresher__lastUpdateTime = lastUpdateTime
+  assert cbNewVersion(MagicMock(msgClient=msgClient, version=confData.getVersion()))['OK']
+  refresher.refreshConfigurationIfNeeded()
+  assert refresher._Refresher__lastUpdateTime == lastUpdateTime
+
+  # Getting the new version from the server that notified it
+  msgClient.serviceURL = 'dips://server1:9135/Configuration/Server'
+  with patch("DIRAC.ConfigurationSystem.private.Refresher._updateFromRemoteLocation",
+             return_value=S_OK()) as updateMock, \
+          patch("DIRAC.Core.DISET.RPCClient.RPCClient") as rpcMock:
+    assert cbNewVersion(MagicMock(msgClient=msgClient, version='2019-01-02 00:00:00'))['OK']
+    assert waitFor(lambda: updateMock.called)
+    rpcMock.assert_called_once()
+    assert rpcMock.call_args[0][0] == msgClient.serviceURL
+
+  # Back to polling when the connection drops
+  refresher._Refresher__lastUpdateTime = 0
+  cbDisconnect(msgClient)
+  msgClient.connected = False
+  msgClient.connect.return_value = S_ERROR("Connection refused")
+  with patch("DIRAC.Core.DISET.MessageClient.MessageClient", return_value=msgClient):
+    refresher.refreshConfigurationIfNeeded()
+    assert refresher._Refresher__lastUpdateTime
+    # Subscribing again after the refresh
+    assert waitFor(lambda: msgClient.connect.call_count == 2)
+
+
+@patch("DIRAC.ConfigurationSystem.private.Refresher.getGatewayURLs", new=MagicMock(return_value=[]))
+@patch("DIRAC.ConfigurationSystem.private.Refresher.gConfigurationData", new_callable=getConfigurationData)
+def test_silentSubscription(confData):
+  """ A subscription that stays connected but silent does not stop the polling """
+  refresher = Refresher()
+  refresher._Refresher__refresh = MagicMock(return_value=S_OK())
+  msgClient = MagicMock()
+  msgClient.connect.return_value = S_OK()
+  msgClient.connected = True
+  with patch("DIRAC.Core.DISET.MessageClient.MessageClient", return_value=msgClient):
+    assert refresher.subscribeToNewVersions()['OK']
+    cbNewVersion = msgClient.subscribeToMessage.call_args[0][1]
+    assert cbNewVersion(MagicMock(msgClient=msgClient, version=confData.getVersion()))['OK']
+
+    refresher._Refresher__lastUpdateTime = time.time() - (SUBSCRIBED_REFRESH_FACTOR + 1) * confData.getRefreshTime()
+    refresher.refreshConfigurationIfNeeded()
+    assert waitFor(lambda: refresher._Refresher__refresh.called)
+  assert time.time() - refresher._Refresher__lastUpdateTime < confData.getRefreshTime()
+
+
+@patch("DIRAC.ConfigurationSystem.private.Refresher.gConfigurationData", new_callable=getConfigurationData)
+def test_subscriptionDisabled(confData):
+  confData.setOptionInCFG('/DIRAC/Configuration/EnableNewVersionNotifications', 'no', confData.localCFG)
+  refresher = Refresher()
+  with patch("DIRAC.Core.DISET.MessageClient.MessageClient") as msgClientMock:
+    assert refresher.subscribeToNewVersions()['OK']
+    msgClientMock.assert_not_called()
+
+
+def test_notifyNewVersion():
+  sentTo = []
+
+  def msgSend(trid, msgObj):
+    if trid == 2:
+      return S_ERROR("Connection closed")
+    sentTo.append((trid, msgObj.version))
+    return S_OK()
+
+  ConfigurationHandler._ConfigurationHandler__subscribers.update([1, 2])
+  with patch.object(ConfigurationHandler, "srv_msgCreate", return_value=S_OK(MagicMock())), \
+          patch.object(ConfigurationHandler, "srv_msgSend", side_effect=msgSend):
+    assert ConfigurationHandler.notifyNewVersion("CSNewVersion", '2019-01-02 00:00:00')['OK']
+  assert sentTo == [(1, '2019-01-02 00:00:00')]
+  # The clients that cannot be notified are forgotten
+  assert ConfigurationHandler._ConfigurationHandler__subscribers == set([1])
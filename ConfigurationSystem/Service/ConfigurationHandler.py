@@ -3,8 +3,12 @@
 
 __RCSID__ = "$Id$"
 
+import threading
+
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
+from DIRAC.FrameworkSystem.Client.Logger import gLogger
 from DIRAC.ConfigurationSystem.private.ServiceInterface import ServiceInterface
+from DIRAC.ConfigurationSystem.private.Refresher import gRefresher
 from DIRAC.Core.DISET.RequestHandler import RequestHandler
 from DIRAC.Core.Utilities import DErrno
 
@@ -15,6 +19,7 @@ gPilotSynchronizer = None
 def initializeConfigurationHandler(serviceInfo):
   global gServiceInterface
   gServiceInterface = ServiceInterface(serviceInfo['URL'])
+  gRefresher.addListenerToNewVersionEvent(ConfigurationHandler.notifyNewVersion)
   return S_OK()
 
 
@@ -22,6 +27,56 @@ class ConfigurationHandler(RequestHandler):
   """ The CS handler
   """
 
+  MSG_DEFINITIONS = {'NewVersion': {'version': (str, unicode)}}
+
+  # Transport IDs of the clients subscribed to the new versions of the configuration
+  __subscribers = set()
+  __subscribersLock = threading.Lock()
+
+  @classmethod
+  def notifyNewVersion(cls, _eventName, version):
+    """ Push the new version of the configuration to the subscribed clients,
+        listener of the CSNewVersion event
+    """
+    with cls.__subscribersLock:
+      subscribers = list(cls.__subscribers)
+    if subscribers:
+      gLogger.info("Notifying the new configuration version", "%s to %s clients" % (version, len(subscribers)))
+    for trid in subscribers:
+      cls.__sendNewVersion(trid, version)
+    return S_OK()
+
+  @classmethod
+  def __sendNewVersion(cls, trid, version):
+    result = cls.srv_msgCreate("NewVersion")
+    if not result['OK']:
+      return result
+    msgObj = result['Value']
+    msgObj.version = str(version)
+    result = cls.srv_msgSend(trid, msgObj)
+    if not result['OK']:
+      gLogger.verbose("Cannot notify the new configuration version", result['Message'])
+      with cls.__subscribersLock:
+        cls.__subscribers.discard(trid)
+    return result
+
+  auth_conn_connected = ['authenticated']
+
+  def conn_connected(self, trid, identity, kwargs):
+    """ A client subscribes to the new versions. It gets the current one right away,
+        in case it changed while the client was not connected
+    """
+    with self.__subscribersLock:
+      self.__subscribers.add(trid)
+    return self.__sendNewVersion(trid, gServiceInterface.getVersion())
+
+  auth_conn_drop = ['authenticated']
+
+  def conn_drop(self, trid):
+    with self.__subscribersLock:
+      self.__subscribers.discard(trid)
+    return S_OK()
+
   types_getVersion = []
 
   def export_getVersion(self):
@@ -42,6 +97,22 @@ class ConfigurationHandler(RequestHandler):
       retDict['data'] = gServiceInterface.getCompressedConfigurationData()
     return S_OK(retDict)
 
+  types_getCompressedModificationsIfNewer = [basestring]
+
+  def export_getCompressedModificationsIfNewer(self, sClientVersion):
+    """ Like getCompressedDataIfNewer, but sends only the modifications since the version of the client
+        when they are known
+    """
+    sVersion = gServiceInterface.getVersion()
+    retDict = {'newestVersion': sVersion}
+    if sClientVersion < sVersion:
+      modifications = gServiceInterface.getCompressedModifications(sClientVersion)
+      if modifications:
+        retDict['newestVersion'], retDict['modifications'] = modifications
+      else:
+        retDict['data'] = gServiceInterface.getCompressedConfigurationData()
+    return S_OK(retDict)
+
   types_publishSlaveServer = [basestring]
 
   def export_publishSlaveServer(self, sURL):
@@ -13,6 +13,9 @@ from DIRAC.ConfigurationSystem.private.Refresher import gRefresher
 
 __RCSID__ = "$Id$"
 
+# Types of the default values whose conversions are memoized
+MEMOIZED_TYPES = (str, unicode, int, long, float, bool, list, tuple, set, dict)
+
 
 class ConfigurationClient(object):
 
@@ -70,7 +73,8 @@ class ConfigurationClient(object):
 
   def getOption(self, optionPath, typeValue=None):
     gRefresher.refreshConfigurationIfNeeded()
-    optionValue = gConfigurationData.extractOptionFromCFG(optionPath)
+    snapshot = gConfigurationData.getSnapshot()
+    optionValue = snapshot.getOption(optionPath)
 
     if optionValue is None:
       return S_ERROR("Path %s does not exist or it's not an option" % optionPath)
@@ -86,6 +90,29 @@ class ConfigurationClient(object):
     else:
       requestedType = typeValue
 
+    if requestedType not in MEMOIZED_TYPES:
+      return self.__convertValue(optionValue, requestedType, typeValue)
+    # The conversion is done once per version of the configuration
+    value = snapshot.getTypedValue(optionPath, requestedType)
+    if value is None:
+      result = self.__convertValue(optionValue, requestedType, typeValue)
+      if not result['OK']:
+        return result
+      value = result['Value']
+      snapshot.setTypedValue(optionPath, requestedType, value)
+    # Copy the containers, the caller may modify them
+    if requestedType in (list, set, dict):
+      value = requestedType(value)
+    return S_OK(value)
+
+  @staticmethod
+  def __convertValue(optionValue, requestedType, typeValue):
+    """ Convert the value of an option to the requested type
+
+        :param str optionValue: value in the configuration
+        :param type requestedType: type to convert to
+        :param typeValue: default value or type asked by the caller, for the error messages
+    """
     if requestedType in (list, tuple, set):
       try:
         return S_OK(requestedType(List.fromChar(optionValue, ',')))
@@ -137,11 +164,8 @@ class ConfigurationClient(object):
 
   def getOptionsDict(self, sectionPath):
     gRefresher.refreshConfigurationIfNeeded()
-    optionsDict = {}
-    optionList = gConfigurationData.getOptionsFromCFG(sectionPath)
-    if isinstance(optionList, list):
-      for option in optionList:
-        optionsDict[option] = gConfigurationData.extractOptionFromCFG("%s/%s" % (sectionPath, option))
+    optionsDict = gConfigurationData.getSnapshot().getOptionsDict(sectionPath)
+    if isinstance(optionsDict, dict):
       return S_OK(optionsDict)
     else:
       return S_ERROR("Path %s does not exist or it's not a section" % sectionPath)
@@ -9,10 +9,11 @@ import time
 import DIRAC
 
 from DIRAC.Core.Utilities.File import mkDir
-from DIRAC.Core.Utilities import List, Time
+from DIRAC.Core.Utilities import List, Time, DEncode
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.Core.Utilities.CFG import CFG
 from DIRAC.Core.Utilities.LockRing import LockRing
+from DIRAC.ConfigurationSystem.private.ConfigurationSnapshot import ConfigurationSnapshot
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 
 __RCSID__ = "$Id$"
@@ -26,12 +27,21 @@ class ConfigurationData( object ):
     self.threadingLock = lr.getLock()
     self.runningThreadsNumber = 0
     self.__compressedConfigurationData = None
+    # Modifications of the remote CFG between its last versions, kept by the configuration servers
+    self.__historyLock = lr.getLock()
+    self.__lastRemoteVersion = None
+    self.__lastRemoteCFG = None
+    self.__modificationsHistory = []
+    self.__compressedModifications = {}
     self.configurationPath = "/DIRAC/Configuration"
     self.backupsDir = os.path.join( DIRAC.rootPath, "etc", "csbackup" )
     self._isService = False
     self.localCFG = CFG()
     self.remoteCFG = CFG()
     self.mergedCFG = CFG()
+    # Compiled mergedCFG, see getSnapshot
+    self.__snapshot = None
+    self.__snapshotLock = lr.getLock()
     self.remoteServerList = []
     if loadDefaultCFG:
       defaultCFGFile = os.path.join( DIRAC.rootPath, "etc", "dirac.cfg" )
@@ -47,6 +57,7 @@ class ConfigurationData( object ):
   def sync( self ):
     gLogger.debug( "Updating configuration internals" )
     self.mergedCFG = self.remoteCFG.mergeWith( self.localCFG )
+    self.__snapshot = None
     self.remoteServerList = []
     localServers = self.extractOptionFromCFG( "%s/Servers" % self.configurationPath,
                                               self.localCFG,
@@ -60,6 +71,57 @@ class ConfigurationData( object ):
       self.remoteServerList.extend( List.fromChar( remoteServers, "," ) )
     self.remoteServerList = List.uniqueElements( self.remoteServerList )
     self.__compressedConfigurationData = None
+    if self._isService:
+      self.__recordModifications()
+
+  def __recordModifications( self ):
+    """
+    Keep the modifications of the remote CFG since the previous version, so that clients
+    only get what changed since their version
+    """
+    version = self.extractOptionFromCFG( "%s/Version" % self.configurationPath, self.remoteCFG,
+                                         disableDangerZones = True ) or "0"
+    self.__historyLock.acquire()
+    try:
+      if version == self.__lastRemoteVersion:
+        return
+      if self.__lastRemoteCFG is not None:
+        modList = self.__lastRemoteCFG.getModifications( self.remoteCFG )
+        self.__modificationsHistory.append( ( self.__lastRemoteVersion, version, modList ) )
+        historySize = self.getModificationsHistorySize()
+        self.__modificationsHistory = self.__modificationsHistory[ -historySize: ] if historySize else []
+      self.__lastRemoteVersion = version
+      self.__lastRemoteCFG = self.remoteCFG.clone()
+      self.__compressedModifications = {}
+    finally:
+      self.__historyLock.release()
+
+  def getCompressedModifications( self, fromVersion ):
+    """
+    Get the modifications of the remote CFG since a version
+
+    :param str fromVersion: version of the client
+    :return: ( newest version, compressed list of modification lists to apply in order ),
+             or None if the modifications since fromVersion are not known
+    """
+    self.__historyLock.acquire()
+    try:
+      if fromVersion not in self.__compressedModifications:
+        modLists = []
+        version = fromVersion
+        for prevVersion, newVersion, modList in self.__modificationsHistory:
+          if prevVersion == version:
+            modLists.append( modList )
+            version = newVersion
+          elif modLists:
+            # Hole in the history
+            return None
+        if not modLists or version != self.__lastRemoteVersion:
+          return None
+        self.__compressedModifications[ fromVersion ] = ( version, zlib.compress( DEncode.encode( modLists ), 9 ) )
+      return self.__compressedModifications[ fromVersion ]
+    finally:
+      self.__historyLock.release()
 
   def loadFile( self, fileName ):
     try:
@@ -92,6 +154,38 @@ class ConfigurationData( object ):
     self.unlock()
     self.sync()
 
+  def applyRemoteCompressedModifications( self, data, newestVersion ):
+    """
+    Apply to the remote CFG the modifications sent by a configuration server
+
+    :param data: compressed modifications, see getCompressedModifications
+    :param str newestVersion: version the modifications lead to
+    :return: S_OK/S_ERROR, the remote CFG has then to be downloaded again
+    """
+    try:
+      modLists = DEncode.decode( zlib.decompress( data ) )[0]
+    except Exception as e:
+      return S_ERROR( "Cannot decode the configuration modifications: %s" % repr( e ) )
+    versionPath = "%s/Version" % self.configurationPath
+    self.lock()
+    try:
+      result = S_OK()
+      for modList in modLists:
+        result = self.remoteCFG.applyModifications( modList )
+        if not result[ 'OK' ]:
+          break
+      version = self.extractOptionFromCFG( versionPath, self.remoteCFG, disableDangerZones = True )
+      if result[ 'OK' ] and version != newestVersion:
+        result = S_ERROR( "Version is %s after applying the modifications instead of %s" % ( version,
+                                                                                             newestVersion ) )
+      if not result[ 'OK' ]:
+        # The remote CFG may be partially modified, make sure it is fully downloaded next time
+        self.setOptionInCFG( versionPath, "0", self.remoteCFG, disableDangerZones = True )
+    finally:
+      self.unlock()
+    self.sync()
+    return result
+
   def loadConfigurationData( self, fileName = False ):
     name = self.getName()
     self.lock()
@@ -106,6 +200,25 @@ class ConfigurationData( object ):
     self.unlock()
     self.sync()
 
+  def getSnapshot( self ):
+    """
+    Read-only view of the merged CFG, compiled on the first access after it changed.
+    Reading from it does not need the danger zones.
+    """
+    snapshot = self.__snapshot
+    if snapshot is not None and snapshot.cfg is self.mergedCFG:
+      return snapshot
+    # Compiled by only one thread, the others wait for it
+    self.__snapshotLock.acquire()
+    try:
+      snapshot = self.__snapshot
+      if snapshot is None or snapshot.cfg is not self.mergedCFG:
+        snapshot = ConfigurationSnapshot( self.mergedCFG )
+        self.__snapshot = snapshot
+      return snapshot
+    finally:
+      self.__snapshotLock.release()
+
   def getCommentFromCFG( self, path, cfg = False ):
     if not cfg:
       cfg = self.mergedCFG
@@ -121,7 +234,7 @@ class ConfigurationData( object ):
 
   def getSectionsFromCFG( self, path, cfg = False, ordered = False ):
     if not cfg:
-      cfg = self.mergedCFG
+      return self.getSnapshot().getSections( path )
     self.dangerZoneStart()
     try:
       levelList = [ level.strip() for level in path.split( "/" ) if level.strip() != "" ]
@@ -134,7 +247,7 @@ class ConfigurationData( object ):
 
   def getOptionsFromCFG( self, path, cfg = False, ordered = False ):
     if not cfg:
-      cfg = self.mergedCFG
+      return self.getSnapshot().getOptions( path )
     self.dangerZoneStart()
     try:
       levelList = [ level.strip() for level in path.split( "/" ) if level.strip() != "" ]
@@ -147,7 +260,7 @@ class ConfigurationData( object ):
 
   def extractOptionFromCFG( self, path, cfg = False, disableDangerZones = False ):
     if not cfg:
-      cfg = self.mergedCFG
+      return self.getSnapshot().getOption( path )
     if not disableDangerZones:
       self.dangerZoneStart()
     try:
@@ -229,6 +342,13 @@ class ConfigurationData( object ):
     except:
       return 300
 
+  def getModificationsHistorySize( self ):
+    try:
+      return int( self.extractOptionFromCFG( "%s/ModificationsHistorySize" % self.configurationPath, self.mergedCFG,
+                                             disableDangerZones = True ) )
+    except:
+      return 20
+
   def getSlavesGraceTime( self ):
     try:
       return int( self.extractOptionFromCFG( "%s/SlavesGraceTime" % self.configurationPath, self.mergedCFG ) )
@@ -242,6 +362,12 @@ class ConfigurationData( object ):
     except:
       return False
 
+  def newVersionNotificationsEnabled( self ):
+    value = self.extractOptionFromCFG( "%s/EnableNewVersionNotifications" % self.configurationPath, self.mergedCFG )
+    if value and value.lower() in ( "no", "false", "n" ):
+      return False
+    return True
+
   def getAutoPublish( self ):
     value = self.extractOptionFromCFG( "%s/AutoPublish" % self.configurationPath, self.localCFG )
     if value and value.lower() in ( "no", "false", "n" ):
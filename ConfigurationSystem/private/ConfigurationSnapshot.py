@@ -0,0 +1,90 @@
+""" Read-only view of a configuration, compiled once per version
+
+    Looking up an option in a CFG splits its path and walks the nested sections on
+    every call. The snapshot indexes all the options and sections of the CFG by their
+    full path instead, so that a lookup is a dictionary access. The values converted
+    to the type of a default (see ConfigurationClient.getOption) are memoized as well.
+
+    A snapshot is never modified: ConfigurationData compiles a new one from the merged
+    CFG after it changes, and replaces the previous one, so reading needs no locking.
+"""
+
+__RCSID__ = "$Id$"
+
+
+def normalizePath(path):
+  """ :returns: the path with a leading / and without empty levels nor blanks around the levels """
+  return "/" + "/".join([level.strip() for level in path.split("/") if level.strip()])
+
+
+class ConfigurationSnapshot(object):
+
+  def __init__(self, cfg):
+    """
+      :param cfg: CFG object to compile, it must not be modified afterwards
+    """
+    self.cfg = cfg
+    # full path -> value
+    self.__options = {}
+    # full path -> ( names of the sections, names of the options ), in order
+    self.__sections = {}
+    # ( full path, type ) -> converted value
+    self.__typedValues = {}
+    self.__compile(cfg, "")
+
+  def __compile(self, cfg, path):
+    sections = []
+    options = []
+    for key in cfg.listAll():
+      value = cfg[key]
+      keyPath = "%s/%s" % (path, key)
+      if isinstance(value, basestring):
+        options.append(key)
+        self.__options[keyPath] = value
+      else:
+        sections.append(key)
+        self.__compile(value, keyPath)
+    self.__sections[path or "/"] = (tuple(sections), tuple(options))
+
+  def __getSection(self, path):
+    sectionData = self.__sections.get(path)
+    if sectionData is None:
+      sectionData = self.__sections.get(normalizePath(path))
+    return sectionData
+
+  def getOption(self, path):
+    """ :returns: the value of the option, None if it does not exist """
+    value = self.__options.get(path)
+    if value is None:
+      value = self.__options.get(normalizePath(path))
+    return value
+
+  def getSections(self, path):
+    """ :returns: list of the names of the subsections, None if the section does not exist """
+    sectionData = self.__getSection(path)
+    if sectionData is None:
+      return None
+    return list(sectionData[0])
+
+  def getOptions(self, path):
+    """ :returns: list of the names of the options, None if the section does not exist """
+    sectionData = self.__getSection(path)
+    if sectionData is None:
+      return None
+    return list(sectionData[1])
+
+  def getOptionsDict(self, path):
+    """ :returns: dict with the options of the section, None if the section does not exist """
+    sectionData = self.__getSection(path)
+    if sectionData is None:
+      return None
+    path = normalizePath(path).rstrip("/")
+    return dict([(option, self.__options["%s/%s" % (path, option)]) for option in sectionData[1]])
+
+  def getTypedValue(self, path, requestedType):
+    """ :returns: the value of the option already converted to requestedType, None if it was not """
+    return self.__typedValues.get((path, requestedType))
+
+  def setTypedValue(self, path, requestedType, value):
+    """ Memoize the value of the option converted to requestedType """
+    self.__typedValues[(path, requestedType)] = value
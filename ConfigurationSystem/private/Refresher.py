@@ -4,6 +4,7 @@
 
 __RCSID__ = "$Id$"
 
+import os
 import threading
 import thread
 import time
@@ -15,16 +16,34 @@ from DIRAC.Core.Utilities import List, LockRing
 from DIRAC.Core.Utilities.EventDispatcher import gEventDispatcher
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 
+# While subscribed to the new versions, the servers are still polled every that many RefreshTime:
+# a connection dropped silently (e.g. by a firewall) would otherwise never be noticed
+SUBSCRIBED_REFRESH_FACTOR = 5
+
 
 def _updateFromRemoteLocation(serviceClient):
   gLogger.debug("", "Trying to refresh from %s" % serviceClient.serviceURL)
   localVersion = gConfigurationData.getVersion()
-  retVal = serviceClient.getCompressedDataIfNewer(localVersion)
+  retVal = serviceClient.getCompressedModificationsIfNewer(localVersion)
+  if not retVal['OK'] and retVal['Message'].startswith("Unknown method"):
+    # Server not sending the modifications only
+    retVal = serviceClient.getCompressedDataIfNewer(localVersion)
   if retVal['OK']:
     dataDict = retVal['Value']
     if localVersion < dataDict['newestVersion']:
       gLogger.debug("New version available", "Updating to version %s..." % dataDict['newestVersion'])
-      gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict['data'])
+      if 'modifications' in dataDict:
+        result = gConfigurationData.applyRemoteCompressedModifications(dataDict['modifications'],
+                                                                       dataDict['newestVersion'])
+        if not result['OK']:
+          gLogger.warn("Cannot apply the configuration modifications, getting the whole configuration",
+                       result['Message'])
+          result = serviceClient.getCompressedData()
+          if not result['OK']:
+            return result
+          dataDict['data'] = result['Value']
+      if 'data' in dataDict:
+        gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict['data'])
       gLogger.debug("Updated to version %s" % gConfigurationData.getVersion())
       gEventDispatcher.triggerEvent("CSNewVersion", dataDict['newestVersion'], threaded=True)
     return S_OK()
@@ -44,6 +63,13 @@ class Refresher(threading.Thread):
     gEventDispatcher.registerEvent("CSNewVersion")
     random.seed()
     self.__triggeredRefreshLock = LockRing.LockRing().getLock()
+    # Subscription to the new versions pushed by a configuration server
+    self.__subscriptionEnabled = False
+    self.__subscriptionLock = threading.Lock()
+    self.__msgClient = None
+    self.__subscribed = False
+    self.__subscriberPid = None
+    self.__newVersionEvent = threading.Event()
 
   def disable(self):
     self.__refreshEnabled = False
@@ -64,16 +90,101 @@ class Refresher(threading.Thread):
     retVal = self.__refresh()
     if not retVal['OK']:
       gLogger.error("Error while updating the configuration", retVal['Message'])
+    if self.__subscriptionEnabled:
+      self.__subscribe()
+
+  def subscribeToNewVersions(self):
+    """ Get the new versions of the configuration pushed by a configuration server instead
+        of polling the servers every RefreshTime. Meant for the long lived components: the
+        connection to the server is kept open. Polling goes on while it is not established.
+    """
+    if not gConfigurationData.newVersionNotificationsEnabled():
+      return S_OK()
+    self.__subscriptionEnabled = True
+    return self.__subscribe()
+
+  def __subscribe(self):
+    """ Connect to a configuration server (the master for a slave server) to get its new versions """
+    with self.__subscriptionLock:
+      if self.__msgClient and self.__msgClient.connected:
+        return S_OK()
+      self.__msgClient = None
+      self.__subscribed = False
+      if self.__automaticUpdate:
+        serverList = [gConfigurationData.getMasterServer()]
+      elif getGatewayURLs("Configuration/Server"):
+        return S_ERROR("New versions are not notified through a gateway")
+      else:
+        serverList = gConfigurationData.getServers()
+      errorsList = []
+      from DIRAC.Core.DISET.MessageClient import MessageClient
+      for sServer in List.randomize([server for server in serverList if server]):
+        msgClient = MessageClient(sServer,
+                                  useCertificates=gConfigurationData.useServerCertificate(),
+                                  skipCACheck=gConfigurationData.skipCACheck())
+        msgClient.subscribeToMessage("NewVersion", self.__cbNewVersion)
+        msgClient.subscribeToDisconnect(self.__cbSubscriptionDropped)
+        # Set before connecting, the server sends its version right away
+        self.__msgClient = msgClient
+        result = msgClient.connect()
+        if result['OK']:
+          gLogger.verbose("Subscribed to the new configuration versions", sServer)
+          return S_OK()
+        self.__msgClient = None
+        errorsList.append("%s: %s" % (sServer, result['Message']))
+    gLogger.verbose("Cannot subscribe to the new configuration versions", "; ".join(errorsList))
+    return S_ERROR("Cannot subscribe to the new configuration versions")
+
+  def __cbNewVersion(self, msgObj):
+    """ A server has a new version, or tells its current version when subscribing """
+    if msgObj.msgClient is not self.__msgClient:
+      return S_OK()
+    # Only trust the subscription once the server has sent something: older servers accept the
+    # connection but never notify
+    self.__subscribed = True
+    self.__subscriberPid = os.getpid()
+    if msgObj.version <= gConfigurationData.getVersion():
+      return S_OK()
+    gLogger.verbose("New configuration version notified", msgObj.version)
+    if self.__automaticUpdate:
+      # Wake up the slave server thread
+      self.__newVersionEvent.set()
+    else:
+      thd = threading.Thread(target=self.__refreshFromNotifyingServer, args=(msgObj.msgClient.serviceURL,))
+      thd.setDaemon(1)
+      thd.start()
+    return S_OK()
+
+  def __refreshFromNotifyingServer(self, sServer):
+    """ The server that notified the new version already has it, unlike maybe the others """
+    from DIRAC.Core.DISET.RPCClient import RPCClient
+    self.__lastUpdateTime = time.time()
+    oClient = RPCClient(sServer,
+                        useCertificates=gConfigurationData.useServerCertificate(),
+                        skipCACheck=gConfigurationData.skipCACheck())
+    retVal = _updateFromRemoteLocation(oClient)
+    if not retVal['OK']:
+      gLogger.warn("Can't update from server", "Error while updating from %s: %s" % (sServer, retVal['Message']))
+      self.__refreshInThread()
+
+  def __cbSubscriptionDropped(self, msgClient):
+    """ Go back to polling, the subscription is renewed on the next refresh """
+    if msgClient is self.__msgClient:
+      gLogger.verbose("Subscription to the new configuration versions dropped")
+      self.__subscribed = False
+    return S_OK()
 
-  def __lastRefreshExpired(self):
-    return time.time() - self.__lastUpdateTime >= gConfigurationData.getRefreshTime()
+  def __lastRefreshExpired(self, factor=1):
+    return time.time() - self.__lastUpdateTime >= factor * gConfigurationData.getRefreshTime()
 
   def refreshConfigurationIfNeeded(self):
     if not self.__refreshEnabled or self.__automaticUpdate or not gConfigurationData.getServers():
       return
+    # The server tells when there is a new version, not to the forked processes though
+    subscribed = self.__subscribed and self.__subscriberPid == os.getpid()
     self.__triggeredRefreshLock.acquire()
     try:
-      if not self.__lastRefreshExpired():
+      if not self.__lastRefreshExpired(SUBSCRIBED_REFRESH_FACTOR if subscribed else 1):
         return
       self.__lastUpdateTime = time.time()
     finally:
@@ -100,16 +211,21 @@ class Refresher(threading.Thread):
       DIRAC.abort(10, "Missing configuration name!")
     self.__url = sURL
     self.__automaticUpdate = True
+    self.subscribeToNewVersions()
     self.setDaemon(1)
     self.start()
 
   def run(self):
     while self.__automaticUpdate:
       iWaitTime = gConfigurationData.getPropagationTime()
-      time.sleep(iWaitTime)
+      # Woken up earlier when the master notifies a new version
+      self.__newVersionEvent.wait(iWaitTime)
+      self.__newVersionEvent.clear()
       if self.__refreshEnabled:
         if not self.__refreshAndPublish():
           gLogger.error("Can't refresh configuration from any source")
+        if self.__subscriptionEnabled:
+          self.__subscribe()
 
   def __refreshAndPublish(self):
     self.__lastUpdateTime = time.time()
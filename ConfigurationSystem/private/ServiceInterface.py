@@ -15,6 +15,7 @@ from DIRAC.Core.Utilities.File import mkDir
 from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData, ConfigurationData
 from DIRAC.ConfigurationSystem.private.Refresher import gRefresher
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
+from DIRAC.Core.Utilities.EventDispatcher import gEventDispatcher
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.Core.DISET.RPCClient import RPCClient
 
@@ -72,6 +73,13 @@ class ServiceInterface(threading.Thread):
     if gConfigurationData.isMaster():
       gConfigurationData.generateNewVersion()
       gConfigurationData.writeRemoteConfigurationToDisk()
+      self.__notifyNewVersion()
+
+  def __notifyNewVersion(self):
+    """ Let the listeners know about the new version, the slaves and clients subscribed to this server
+        are notified by the handler
+    """
+    gEventDispatcher.triggerEvent("CSNewVersion", gConfigurationData.getVersion(), threaded=True)
 
   def publishSlaveServer(self, sSlaveURL):
     if not gConfigurationData.isMaster():
@@ -152,11 +160,15 @@ class ServiceInterface(threading.Thread):
     gLogger.info("Writing new version to disk!")
     retVal = gConfigurationData.writeRemoteConfigurationToDisk("%s@%s" % (commiter, gConfigurationData.getVersion()))
     gLogger.info("New version it is!")
+    self.__notifyNewVersion()
     return retVal
 
   def getCompressedConfigurationData(self):
     return gConfigurationData.getCompressedData()
 
+  def getCompressedModifications(self, sFromVersion):
+    return gConfigurationData.getCompressedModifications(sFromVersion)
+
   def getVersion(self):
     return gConfigurationData.getVersion()
 
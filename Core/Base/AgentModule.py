@@ -9,6 +9,7 @@
 __RCSID__ = "$Id$"
 
 import os
+import Queue
 import threading
 import time
 import signal
@@ -58,6 +59,12 @@ class AgentModule(object):
       - beginExecution()     before each execution cycle
       - endExecution()       at the end of each execution cycle
 
+      Instead of execute(), agents whose cycle consists of independent pieces of work
+      may implement:
+      - getWorkItems()       returning (or yielding) the work items of the cycle
+      - processWorkItem()    processing one of them, called concurrently by a pool of threads
+      see am_executeWorkItems()
+
       The agent can be stopped either by a signal or by creating a 'stop_agent' file
       in the controlDirectory defined in the agent configuration
 
@@ -79,6 +86,10 @@ class AgentModule(object):
       - PollingTime            default = 120
       - MaxCycles              default = 500
       - WatchdogTime           default = 0 (disabled)
+      - MaxWorkers             default = 10
+      - MaxPendingWorkItems    default = 20
+      - WorkItemTimeout        default = 0 (disabled)
+      - AdaptivePolling        default = False
       - ControlDirectory       control/SystemName/AgentName
       - WorkDirectory          work/SystemName/AgentName
       - shifterProxy           ''
@@ -119,6 +130,8 @@ class AgentModule(object):
                                'standalone': standaloneModule,
                                'cyclesDone': 0,
                                'totalElapsedTime': 0,
+                               'runNextCycleNow': False,
+                               'workItemsStats': {},
                                'setup': gConfig.getValue("/DIRAC/Setup", "Unknown"),
                                'alive': True}
     self.__moduleProperties['system'], self.__moduleProperties['agentName'] = agentName.split("/")
@@ -128,6 +141,10 @@ class AgentModule(object):
     self.__configDefaults['PollingTime'] = self.am_getOption("PollingTime", 120)
     self.__configDefaults['MaxCycles'] = self.am_getOption("MaxCycles", 500)
     self.__configDefaults['WatchdogTime'] = self.am_getOption("WatchdogTime", 0)
+    self.__configDefaults['MaxWorkers'] = 10
+    self.__configDefaults['MaxPendingWorkItems'] = 20
+    self.__configDefaults['WorkItemTimeout'] = 0
+    self.__configDefaults['AdaptivePolling'] = False
     self.__configDefaults['ControlDirectory'] = os.path.join(self.__basePath,
                                                              'control',
                                                              *agentName.split("/"))
@@ -149,6 +166,14 @@ class AgentModule(object):
     self.__initializeMonitor()
     self.__initialized = False
 
+    # Pool of threads processing the work items
+    self.__workItemsCondition = threading.Condition()
+    self.__workItemsQueue = Queue.Queue()
+    self.__workItemsThreads = 0
+    # Work items queued or being processed, including the ones that timed out
+    self.__pendingWorkItems = 0
+    self.__workItemsMonitored = False
+
   def __getCodeInfo(self):
     versionVar = "__RCSID__"
     docVar = "__doc__"
@@ -299,6 +324,10 @@ class AgentModule(object):
   def am_stopExecution(self):
     self.am_setModuleParam('alive', False)
 
+  def am_runNextCycleNow(self):
+    """ With AdaptivePolling, the next cycle starts right away after a cycle that had work to do """
+    return self.am_getModuleParam('runNextCycleNow')
+
   def __initializeMonitor(self):
     """
     Initialize the system monitor client
@@ -355,6 +384,7 @@ class AgentModule(object):
       cD = self.__moduleProperties['cyclesDone']
       self.log.notice("Remaining %s of %s cycles" % (mD - cD, mD))
     self.log.notice("-" * 40)
+    self.__moduleProperties['runNextCycleNow'] = False
     # use SIGALARM as a watchdog interrupt if enabled
     watchdogInt = self.am_getWatchdogTime()
     if watchdogInt > 0:
@@ -440,6 +470,133 @@ class AgentModule(object):
     # Execute the endExecution function
     return self.am_secureCall(self.endExecution, name="endExecution")
 
+  def am_executeWorkItems(self, workItems=None):
+    """ Process work items concurrently with processWorkItem()
+
+        The work items are processed by a pool of MaxWorkers threads. At most MaxPendingWorkItems
+        are queued or being processed at the same time: the next items are only taken from
+        workItems when there is room for them, so that it can be a generator producing them
+        as they are needed. The cycle stops waiting for an item after WorkItemTimeout seconds
+        of processing, its result is ignored. Its thread cannot be stopped though, so the item
+        keeps counting in MaxPendingWorkItems until it finishes.
+
+        With AdaptivePolling, the next cycle starts as soon as this one is over if at least
+        one work item was successfully processed, instead of waiting for the PollingTime.
+
+        :param workItems: iterable of work items, by default the ones from getWorkItems()
+        :returns: S_OK(dict) with the number of work items Processed, Failed and TimedOut,
+                  and their total WaitTime in the queue and RunTime, in seconds
+                  S_ERROR if some of them failed or timed out
+    """
+    maxWorkers = max(1, int(self.am_getOption('MaxWorkers')))
+    maxPending = max(maxWorkers, int(self.am_getOption('MaxPendingWorkItems')))
+    timeout = float(self.am_getOption('WorkItemTimeout'))
+    self.__adjustWorkItemsThreads(maxWorkers)
+
+    stats = {'Processed': 0, 'Failed': 0, 'TimedOut': 0, 'WaitTime': 0., 'RunTime': 0.}
+    records = []
+    error = ''
+    try:
+      if workItems is None:
+        workItems = self.getWorkItems()
+      for workItem in workItems:
+        with self.__workItemsCondition:
+          self.__collectWorkItems(records, stats, timeout)
+          while self.__pendingWorkItems >= maxPending:
+            self.__waitForWorkItems(records, stats, timeout)
+          self.__pendingWorkItems += 1
+        record = {'workItem': workItem, 'queued': time.time()}
+        records.append(record)
+        self.__workItemsQueue.put(record)
+    except Exception as excp:  # pylint: disable=broad-except
+      self.log.exception("Exception while getting the work items", lException=excp)
+      error = "Exception while getting the work items: %s" % excp
+    with self.__workItemsCondition:
+      self.__collectWorkItems(records, stats, timeout)
+      while records:
+        self.__waitForWorkItems(records, stats, timeout)
+
+    self.__moduleProperties['workItemsStats'] = stats
+    self.__reportWorkItems(stats, maxWorkers)
+    if stats['Processed'] and self.am_getOption('AdaptivePolling'):
+      self.__moduleProperties['runNextCycleNow'] = True
+    if error:
+      return S_ERROR(error)
+    if stats['Failed'] or stats['TimedOut']:
+      return S_ERROR("%s work items failed and %s timed out, %s were processed" % (stats['Failed'],
+                                                                                    stats['TimedOut'],
+                                                                                    stats['Processed']))
+    return S_OK(stats)
+
+  def __adjustWorkItemsThreads(self, maxWorkers):
+    while self.__workItemsThreads < maxWorkers:
+      thread = threading.Thread(target=self.__workItemsThread)
+      thread.setDaemon(1)
+      thread.start()
+      self.__workItemsThreads += 1
+    while self.__workItemsThreads > maxWorkers:
+      # Stops the first thread getting it
+      self.__workItemsQueue.put(None)
+      self.__workItemsThreads -= 1
+
+  def __workItemsThread(self):
+    while True:
+      record = self.__workItemsQueue.get()
+      if record is None:
+        return
+      with self.__workItemsCondition:
+        record['start'] = time.time()
+      result = self.am_secureCall(self.processWorkItem, (record['workItem'],), name="processWorkItem")
+      with self.__workItemsCondition:
+        record['end'] = time.time()
+        record['result'] = result
+        self.__pendingWorkItems -= 1
+        self.__workItemsCondition.notifyAll()
+
+  def __waitForWorkItems(self, records, stats, timeout):
+    """ Wait for work items to finish, the condition must be acquired """
+    self.__workItemsCondition.wait(min(timeout, 1) if timeout > 0 else 1)
+    self.__collectWorkItems(records, stats, timeout)
+
+  def __collectWorkItems(self, records, stats, timeout):
+    """ Account for the work items that finished or timed out, the condition must be acquired """
+    now = time.time()
+    for record in list(records):
+      if 'result' in record:
+        records.remove(record)
+        stats['WaitTime'] += record['start'] - record['queued']
+        stats['RunTime'] += record['end'] - record['start']
+        if record['result']['OK']:
+          stats['Processed'] += 1
+        else:
+          stats['Failed'] += 1
+          self.log.warn("Failed to process work item", "%s: %s" % (record['workItem'], record['result']['Message']))
+      elif timeout > 0 and 'start' in record and now - record['start'] > timeout:
+        records.remove(record)
+        stats['TimedOut'] += 1
+        self.log.warn("Work item timed out", "%s after %s seconds" % (record['workItem'], timeout))
+
+  def __reportWorkItems(self, stats, maxWorkers):
+    finished = stats['Processed'] + stats['Failed']
+    self.log.notice("Work items: %s processed, %s failed, %s timed out with %s threads" % (stats['Processed'],
+                                                                                         stats['Failed'],
+                                                                                         stats['TimedOut'],
+                                                                                         maxWorkers))
+    if finished:
+      self.log.notice("Work items: average wait of %.2f seconds, average run of %.2f seconds" %
+                      (stats['WaitTime'] / finished, stats['RunTime'] / finished))
+    if not self.__workItemsMonitored:
+      for activity, description in (('WorkItemsProcessed', "Work items processed"),
+                                    ('WorkItemsFailed', "Work items failed"),
+                                    ('WorkItemsTimedOut', "Work items timed out")):
+        self.monitor.registerActivity(activity, description, 'Framework', "Items", self.monitor.OP_SUM)
+      self.__workItemsMonitored = True
+    for activity, key in (('WorkItemsProcessed', 'Processed'),
+                          ('WorkItemsFailed', 'Failed'),
+                          ('WorkItemsTimedOut', 'TimedOut')):
+      if stats[key]:
+        self.monitor.addMark(activity, stats[key])
+
   def initialize(self, *args, **kwargs):
     """ Agents should override this method for specific initialization.
         Executed at every agent (re)start.
@@ -456,4 +613,20 @@ class AgentModule(object):
     return S_OK()
 
   def execute(self):
+    if getattr(self.getWorkItems, 'im_func', None) is not AgentModule.getWorkItems.im_func:
+      return self.am_executeWorkItems()
     return S_ERROR("Execute method has to be overwritten by agent module")
+
+  def getWorkItems(self):
+    """ Agents processing work items override this method instead of execute()
+
+        :returns: iterable of the work items of the cycle, possibly a generator
+    """
+    return []
+
+  def processWorkItem(self, workItem):
+    """ Process one of the work items, called concurrently by several threads
+
+        :returns: S_OK/S_ERROR
+    """
+    return S_ERROR("processWorkItem method has to be overwritten by agent module")
@@ -147,11 +147,32 @@ class AgentReactor( object ):
         if timeToNext is None:
           gLogger.info( "No more agent modules to execute. Exiting" )
           break
+        if self.__rescheduleAdaptiveAgents():
+          timeToNext = 0
         time.sleep( min( max( timeToNext, 0.5 ), 5 ) )
     finally:
       self.__running = False
     self.__finalize()
 
+  def __rescheduleAdaptiveAgents( self ):
+    """
+      Start right away the next cycle of the agents that asked for it (see AgentModule.am_executeWorkItems)
+    """
+    rescheduled = False
+    for agentName in self.__agentModules:
+      agentData = self.__agentModules[ agentName ]
+      if not agentData[ 'running' ]:
+        continue
+      agent = agentData[ 'instanceObj' ]
+      if not agent.am_runNextCycleNow():
+        continue
+      agent.am_setModuleParam( 'runNextCycleNow', False )
+      result = self.__scheduler.rescheduleTask( agentData[ 'taskId' ] )
+      if result[ 'OK' ]:
+        gLogger.verbose( "Starting the next cycle of %s right away" % agentName )
+        rescheduled = True
+    return rescheduled
+
   def setAgentModuleCyclesToExecute( self, agentName, maxCycles = 1 ):
     """
       Set number of cycles to execute for a given agent (previously defined)
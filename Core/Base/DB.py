@@ -4,11 +4,15 @@
 
 from DIRAC import gLogger, gConfig
 from DIRAC.Core.Utilities.MySQL import MySQL
+from DIRAC.Core.Utilities.DBProfiler import gDBProfiler
+from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
 from DIRAC.ConfigurationSystem.Client.Utilities import getDBParameters
 from DIRAC.ConfigurationSystem.Client.PathFinder import getDatabaseSection
 
 __RCSID__ = "$Id$"
 
+gDBProfiler.ignoreCallerFile(__file__)
+
 
 class DB(MySQL):
   """ All DIRAC DB classes should inherit from this one (unless using sqlalchemy)
@@ -36,7 +40,9 @@ class DB(MySQL):
                              passwd=self.dbPass,
                              dbName=self.dbName,
                              port=self.dbPort,
-                             debug=debug)
+                             debug=debug,
+                             minIdleConnections=dbParameters['MinIdleConnections'],
+                             maxIdleConnections=dbParameters['MaxIdleConnections'])
 
     if not self._connected:
       raise RuntimeError("Can not connect to DB '%s', exiting..." % self.dbName)
@@ -49,6 +55,13 @@ class DB(MySQL):
     self.log.info("DBName:         " + self.dbName)
     self.log.info("==================================================")
 
+    # Profile all the statements of this DB with QueryProfileSampling = 1, or a fraction of them
+    gDBProfiler.setSampling(self.dbName, self.getCSOption('QueryProfileSampling', 0.))
+    # Log the most expensive statements of this DB every QueryProfileDumpPeriod seconds
+    dumpPeriod = self.getCSOption('QueryProfileDumpPeriod', 0)
+    if dumpPeriod and gDBProfiler.isEnabled(self.dbName):
+      gThreadScheduler.addPeriodicTask(dumpPeriod, gDBProfiler.dump, taskArgs=(self.dbName,))
+
 #############################################################################
   def getCSOption(self, optionName, defaultValue=None):
     cs_path = getDatabaseSection(self.fullname)
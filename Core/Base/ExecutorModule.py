@@ -36,6 +36,7 @@ class ExecutorModule( object ):
                                                       *exeName.split( "/" ) )
     cls.__defaults[ 'ReconnectRetries' ] = 10
     cls.__defaults[ 'ReconnectSleep' ] = 5
+    cls.__defaults[ 'MaxTasks' ] = 1
     cls.__defaults[ 'shifterProxy' ] = ''
     cls.__defaults[ 'shifterProxyLocation' ] = os.path.join( cls.__defaults[ 'WorkDirectory' ],
                                                              '.shifterCred' )
@@ -25,6 +25,7 @@ import time
 import threading
 from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.Core.DISET.MessageClient import MessageClient
+from DIRAC.Core.Utilities.ThreadPool import getGlobalThreadPool
 from DIRAC.ConfigurationSystem.Client import PathFinder
 from DIRAC.Core.Base.private.ModuleLoader import ModuleLoader
 from DIRAC.Core.Base.ExecutorModule import ExecutorModule
@@ -84,9 +85,11 @@ class ExecutorReactor( object ):
     def connect( self ):
       self.__msgClient = MessageClient( self.__mindName )
       self.__msgClient.subscribeToMessage( 'ProcessTask', self.__processTask )
+      self.__msgClient.subscribeToMessage( 'ProcessTasks', self.__processTasks )
       self.__msgClient.subscribeToDisconnect( self.__disconnected )
       result = self.__msgClient.connect( executorTypes = list( self.__modules.keys() ),
                                          maxTasks = self.__maxTasks,
+                                         batchTasks = True,
                                          extraArgs = self.__extraArgs )
       if result[ 'OK' ]:
         self.__aliveLock.alive()
@@ -99,6 +102,7 @@ class ExecutorReactor( object ):
         gLogger.notice( "Trying to reconnect to %s" % self.__mindName )
         result = self.__msgClient.connect( executorTypes = list( self.__modules.keys() ),
                                            maxTasks = self.__maxTasks,
+                                           batchTasks = True,
                                            extraArgs = self.__extraArgs )
 
         if result[ 'OK' ]:
@@ -149,10 +153,26 @@ class ExecutorReactor( object ):
       return self.__msgClient.sendMessage( msgObj )
 
     def __processTask( self, msgObj ):
-      eType = msgObj.eType
-      taskId = msgObj.taskId
-      taskStub = msgObj.taskStub
+      return self.__doTask( msgObj.eType, msgObj.taskId, msgObj.taskStub )
+
+    def __processTasks( self, msgObj ):
+      #Each task is processed in its own thread and answered as if it had come alone,
+      #so that up to MaxTasks tasks run at the same time as with ProcessTask
+      for taskId, taskStub in zip( msgObj.taskIds, msgObj.taskStubs ):
+        result = getGlobalThreadPool().generateJobAndQueueIt( self.__doTask,
+                                                              args = ( msgObj.eType, taskId, taskStub ),
+                                                              sTJId = taskId,
+                                                              oCallback = self.__taskDone )
+        if not result[ 'OK' ]:
+          self.__sendExecutorError( msgObj.eType, taskId, "Can't process task: %s" % result[ 'Message' ] )
+      return S_OK()
+
+    @staticmethod
+    def __taskDone( threadedJob, result ):
+      if not result[ 'OK' ]:
+        gLogger.error( "Error while answering task", "%s: %s" % ( threadedJob.jobId(), result[ 'Message' ] ) )
 
+    def __doTask( self, eType, taskId, taskStub ):
       result = self.__moduleProcess( eType, taskId, taskStub )
       if not result[ 'OK' ]:
         return self.__sendExecutorError( eType, taskId, result[ 'Message' ] )
@@ -0,0 +1,80 @@
+""" Test the concurrent processing of the work items of the agents
+"""
+
+# pylint: disable=missing-docstring,protected-access
+
+__RCSID__ = "$Id$"
+
+import threading
+import time
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.Base.AgentModule import AgentModule
+from DIRAC.Core.Utilities.ThreadScheduler import ThreadScheduler
+
+
+class WorkItemsAgent(AgentModule):
+
+  def __init__(self, *args, **kwargs):
+    AgentModule.__init__(self, *args, **kwargs)
+    self.lock = threading.Lock()
+    self.running = 0
+    self.maxRunning = 0
+    self.produced = []
+
+  def getWorkItems(self):
+    for item in range(20):
+      self.produced.append(item)
+      yield item
+
+  def processWorkItem(self, workItem):
+    with self.lock:
+      self.running += 1
+      self.maxRunning = max(self.maxRunning, self.running)
+      # Back-pressure: the items are taken from the generator as they are needed
+      assert len(self.produced) <= workItem + 1 + self.am_getOption('MaxPendingWorkItems')
+    time.sleep(0.05)
+    with self.lock:
+      self.running -= 1
+    if workItem == 13:
+      return S_ERROR("Unlucky")
+    if workItem == 17:
+      time.sleep(1)
+    return S_OK()
+
+
+@patch("DIRAC.Core.Base.AgentModule.PathFinder", new=MagicMock())
+@patch("DIRAC.Core.Base.AgentModule.MonitoringClient", new=MagicMock())
+def getAgent():
+  agent = WorkItemsAgent("Test/WorkItemsAgent", "Test/WorkItemsAgent")
+  agent.am_setOption('MaxWorkers', 4)
+  agent.am_setOption('MaxPendingWorkItems', 6)
+  agent.am_setOption('WorkItemTimeout', 0.5)
+  agent.am_setOption('AdaptivePolling', True)
+  return agent
+
+
+def test_workItems():
+  agent = getAgent()
+  result = agent.execute()
+  assert not result['OK']
+  stats = agent.am_getModuleParam('workItemsStats')
+  assert (stats['Processed'], stats['Failed'], stats['TimedOut']) == (18, 1, 1)
+  assert agent.maxRunning == 4
+  assert agent.am_runNextCycleNow()
+
+  # Nothing to do
+  result = agent.am_executeWorkItems([])
+  assert result['OK']
+  assert result['Value']['Processed'] == 0
+
+
+def test_reschedule():
+  scheduler = ThreadScheduler(enableReactorThread=False, minPeriod=30)
+  taskId = scheduler.addPeriodicTask(120, MagicMock())['Value']
+  assert scheduler.executeNextTask() > 100
+  assert scheduler.rescheduleTask(taskId)['OK']
+  assert scheduler.executeNextTask() > 100
+  assert not scheduler.rescheduleTask('unknown')['OK']
@@ -0,0 +1,40 @@
+""" Test the processing of the tasks by the ExecutorReactor
+"""
+
+# pylint: disable=protected-access
+
+import threading
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK
+from DIRAC.Core.Base.ExecutorReactor import ExecutorReactor
+from DIRAC.Core.Utilities.ThreadPool import ThreadPool
+
+
+def test_processTasks():
+  """ The tasks of a batch run at the same time, each in its own thread """
+  mindCluster = ExecutorReactor.MindCluster('WorkloadManagement/OptimizationMind', MagicMock())
+  running = []
+  overlapped = []
+  allRunning = threading.Event()
+  lock = threading.Lock()
+
+  def doTask(_eType, taskId, _taskStub):
+    with lock:
+      running.append(taskId)
+      if len(running) == 3:
+        allRunning.set()
+    overlapped.append(allRunning.wait(2))
+    return S_OK()
+
+  mindCluster._MindCluster__doTask = doTask
+  threadPool = ThreadPool(1, 3)
+  threadPool.daemonize()
+  with patch('DIRAC.Core.Base.ExecutorReactor.getGlobalThreadPool', return_value=threadPool):
+    assert mindCluster._MindCluster__processTasks(MagicMock(eType='JobPath', taskIds=[1, 2, 3],
+                                                            taskStubs=['a', 'b', 'c']))['OK']
+  assert allRunning.wait(5)
+  assert sorted(running) == [1, 2, 3]
+  threadPool.processAllResults()
+  assert overlapped == [True, True, True]
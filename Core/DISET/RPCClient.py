@@ -45,6 +45,57 @@ class _MagicMethod( object ):
   def __str__( self ):
     return "<RPCClient method %s>" % self.__remoteFuncName
 
+class RPCBatch( object ):
+  """ This object collects RPC calls and sends them to the service all at once,
+      in a single round trip. It is obtained with :meth:`RPCClient.batch`::
+
+        with rpc.batch() as batch:
+          for jobID in jobIDs:
+            batch.setJobStatus( jobID, 'Done' )
+        # batch.results is S_OK( [ result of each call ] ) or S_ERROR
+        # if the batch could not be sent at all
+
+      Calling a method on the batch only records the call, and returns the
+      position of its result in the list.
+  """
+
+  def __init__( self, rpcClient ):
+    """ Constructor
+
+        :param rpcClient: RPCClient used to send the calls
+    """
+    self.__rpcClient = rpcClient
+    self.__calls = []
+    self.results = None
+
+  def __addCall( self, sFunctionName, args ):
+    """ Record a call. This is given as an attribute to MagicMethod
+    """
+    self.__calls.append( ( sFunctionName, args ) )
+    return len( self.__calls ) - 1
+
+  def __getattr__( self, attrName ):
+    return _MagicMethod( self.__addCall, attrName )
+
+  def execute( self ):
+    """ Send the calls recorded so far
+
+        :return: S_OK with the list of results of the calls, or S_ERROR
+    """
+    calls = self.__calls
+    self.__calls = []
+    self.results = self.__rpcClient.executeBatch( calls )
+    return self.results
+
+  def __enter__( self ):
+    return self
+
+  def __exit__( self, excType, excValue, traceback ):
+    # Do not send anything if the calls could not be all recorded
+    if excType is None:
+      self.execute()
+    return False
+
 class RPCClient( object ):
   """ This class contains the mechanism to convert normal calls to RPC calls.
 
@@ -89,6 +140,12 @@ class RPCClient( object ):
     """
     return self.__innerRPCClient.executeRPC( sFunctionName, args )
 
+  def batch( self ):
+    """ Collect calls to send them to the service in one round trip
+
+        :return: :class:`RPCBatch` object
+    """
+    return RPCBatch( self )
 
 
   def __getattr__( self, attrName ):
@@ -12,6 +12,7 @@ import DIRAC
 from DIRAC.Core.DISET.private.FileHelper import FileHelper
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR, isReturnStructure
 from DIRAC.Core.Utilities import Time
+from DIRAC.Core.Utilities.DBProfiler import gDBProfiler
 from DIRAC.ConfigurationSystem.Client.Config import gConfig
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 
@@ -121,6 +122,8 @@ class RequestHandler(object):
     try:
       if actionType == "RPC":
         retVal = self.__doRPC(actionTuple[1])
+      elif actionType == "BatchRPC":
+        retVal = self.__doBatchRPC(actionTuple[1])
       elif actionType == "FileTransfer":
         retVal = self.__doFileTransfer(actionTuple[1])
       elif actionType == "Connection":
@@ -237,6 +240,44 @@ class RequestHandler(object):
     self.__logRemoteQuery("RPC/%s" % method, args)
     return self.__RPCCallFunction(method, args)
 
+  def __doBatchRPC(self, methods):
+    """
+    Execute a batch of RPC calls with this handler instance.
+    All the methods called have been authorized when the batch was proposed.
+
+    :type methods: string
+    :param methods: comma separated names of the methods that can be called in the batch
+    :return: S_OK with the list of S_OK/S_ERROR results of each call, in the same order
+    """
+    retVal = self.__trPool.receive(self.__trid)
+    if not retVal['OK']:
+      raise RequestHandler.ConnectionError("Error while receiving batch %s %s" %
+                                           (self.srv_getFormattedRemoteCredentials(), retVal['Message']))
+    calls = retVal['Value']
+    if not isinstance(calls, (list, tuple)):
+      return S_ERROR("A batch must be a list of (method, arguments)")
+    allowedMethods = methods.split(",")
+    self.__logRemoteQuery("BatchRPC/%s" % methods, calls)
+    results = []
+    for call in calls:
+      if not isinstance(call, (list, tuple)) or len(call) != 2 or not isinstance(call[1], (list, tuple)):
+        results.append(S_ERROR("Invalid call in batch: expected (method, arguments)"))
+        continue
+      method, args = call
+      if method not in allowedMethods:
+        results.append(S_ERROR("Method %s was not proposed for this batch" % method))
+        continue
+      # Let the handler know which call it is serving
+      self.serviceInfoDict['actionTuple'] = ("RPC", method)
+      retVal = self.__RPCCallFunction(method, args)
+      if not isReturnStructure(retVal):
+        message = "Method %s for action RPC does not return a S_OK/S_ERROR!" % method
+        gLogger.error(message)
+        retVal = S_ERROR(message)
+      results.append(retVal)
+    self.serviceInfoDict['actionTuple'] = ("BatchRPC", methods)
+    return S_OK(results)
+
   def __RPCCallFunction(self, method, args):
     """
       Check the arguments then call the RPC function
@@ -491,6 +532,30 @@ class RequestHandler(object):
 
     return S_OK(dInfo)
 
+  types_getDBProfile = []
+  auth_getDBProfile = ['ServiceAdministrator']
+
+  def export_getDBProfile(self):
+    """
+    Statistics of the database statements executed by the service process
+    (for the databases with a QueryProfileSampling option),
+    the most expensive first
+    """
+    return S_OK(gDBProfiler.getProfile())
+
+  types_getThreadPoolStats = []
+  auth_getThreadPoolStats = ['ServiceAdministrator']
+
+  def export_getThreadPoolStats(self):
+    """
+    Statistics of the pool of threads of the service: for each lane, the number of
+    requests and the histograms of the time they waited and ran
+    """
+    threadPool = self.serviceInfoDict.get('threadPool')
+    if not threadPool:
+      return S_ERROR("The service has no thread pool")
+    return S_OK(threadPool.getStats())
+
   types_echo = [basestring]
 
   @staticmethod
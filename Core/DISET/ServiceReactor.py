@@ -158,7 +158,9 @@ class ServiceReactor(object):
       This method just gets the incoming connection, checks IP address
       and generates job. SSL/TLS handshake and execution of the remote call
       are made by Service._processInThread() (in another thread) so
-      the service can accept other clients while another thread handling remote call
+      the service can accept other clients while another thread handling remote call.
+      Event driven services (EventDriven option) only use a thread once the client
+      sent its data, so that slow clients do not keep threads busy.
 
       :param str svcName=False: Name of a service if you use multiple
                                 services at the same time
@@ -111,6 +111,47 @@ class TransferClient( BaseClient ):
     finally:
       self._disconnect( trid )
 
+  def receiveChunks( self, fileId, token = "" ):
+    """
+    Receive data from the server chunk by chunk, as each chunk is sent by the service
+    with FileHelper.sendData, instead of writing it to a file
+
+    It is a generator of S_OK( chunk ): an S_ERROR is yielded and the iteration stops upon
+    error, the final result of the transfer is only yielded if it is not OK.
+    The connection is closed when the iteration ends or is abandoned.
+
+    :type fileId: any
+    :param fileId: Identification of the data being received
+    :type token: string
+    :param token: Optional token for the data
+    """
+    retVal = self._sendTransferHeader( "ToClient", ( fileId, token ) )
+    if not retVal[ 'OK' ]:
+      yield retVal
+      return
+    trid, transport = retVal[ 'Value' ]
+    try:
+      fileHelper = FileHelper( transport )
+      if "NoCheckSum" in token:
+        fileHelper.disableCheckSum()
+      fileHelper.setDirection( "receive" )
+      while True:
+        retVal = fileHelper.receiveData()
+        if not retVal[ 'OK' ]:
+          yield retVal
+          return
+        if fileHelper.receivedEOF():
+          break
+        yield retVal
+      if fileHelper.errorInTransmission():
+        yield S_ERROR( "Error in the data CRC" )
+        return
+      retVal = transport.receiveData()
+      if not retVal[ 'OK' ]:
+        yield retVal
+    finally:
+      self._disconnect( trid )
+
   def __checkFileList( self, fileList ):
     bogusEntries = []
     for entry in fileList:
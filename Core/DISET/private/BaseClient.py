@@ -4,8 +4,11 @@
 
 __RCSID__ = "$Id$"
 
+import os
 import time
 import thread
+from hashlib import md5
+
 import DIRAC
 from DIRAC.Core.DISET.private.Protocols import gProtocolDict
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
@@ -14,7 +17,9 @@ from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.ConfigurationSystem.Client.Config import gConfig
 from DIRAC.ConfigurationSystem.Client.PathFinder import getServiceURL, getServiceFailoverURL
 from DIRAC.Core.Security import CS
+from DIRAC.Core.Security import Locations
 from DIRAC.Core.DISET.private.TransportPool import getGlobalTransportPool
+from DIRAC.Core.DISET.private.ConnectionPool import getGlobalConnectionPool
 from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
 
 
@@ -38,6 +43,10 @@ class BaseClient(object):
   KW_PROXY_CHAIN = "proxyChain"
   KW_SKIP_CA_CHECK = "skipCACheck"
   KW_KEEP_ALIVE_LAPSE = "keepAliveLapse"
+  KW_REUSE_CONNECTION = "reuseConnection"
+
+  # Pooled connections expire this many seconds before the service would close them
+  IDLE_CONNECTION_MARGIN = 5
 
   __threadConfig = ThreadConfig()
 
@@ -57,6 +66,7 @@ class BaseClient(object):
       :param proxyChain: Specify the proxy chain
       :param skipCACheck: Do not check the CA
       :param keepAliveLapse: Duration for keepAliveLapse (heartbeat like)
+      :param reuseConnection: Keep the connection open for the next RPC call (default True)
     """
 
     if not isinstance(serviceName, basestring):
@@ -80,10 +90,11 @@ class BaseClient(object):
     self.__nbOfRetry = 3  # by default we try try times
     self.__retryCounter = 1
     self.__bannedUrls = []
+    self.__reuseConnection = False
     for initFunc in (self.__discoverSetup, self.__discoverVO, self.__discoverTimeout,
                      self.__discoverURL, self.__discoverCredentialsToUse,
                      self.__checkTransportSanity,
-                     self.__setKeepAliveLapse):
+                     self.__setKeepAliveLapse, self.__discoverConnectionReuse):
       result = initFunc()
       if not result['OK'] and self.__initStatus['OK']:
         self.__initStatus = result
@@ -414,13 +425,58 @@ and this is thread %s
       gLogger.error("DISET client thread safety error", msgTxt)
       # raise Exception( msgTxt )
 
-  def _connect(self):
+  def __discoverConnectionReuse(self):
+    """ Discover whether the connections can be kept open between RPC calls,
+        and stores it in self.__reuseConnection.
+        It is looked for:
+           * kwargs of the constructor (see KW_REUSE_CONNECTION), which includes /DIRAC/ConnConf/<host>:<port>
+           * in the CS /DIRAC/ReuseConnections
+           * default to True
+    """
+    reuse = self.kwargs.get(self.KW_REUSE_CONNECTION, gConfig.getValue("/DIRAC/ReuseConnections", True))
+    if isinstance(reuse, basestring):
+      reuse = reuse.lower() in ("y", "yes", "true", "1")
+    self.__reuseConnection = bool(reuse)
+    return S_OK()
+
+  def __getConnectionKey(self):
+    """ Key of the connection in the ConnectionPool: two clients can share connections only
+        if they talk to the same URL with the same credentials.
+        The modification time of the credentials file is part of it, so that the connections
+        opened with a proxy are not reused once it was renewed in place.
+    """
+    proxyString = self.kwargs.get(self.KW_PROXY_STRING)
+    if proxyString:
+      proxyString = md5(proxyString).hexdigest()
+      credentialsLocation = None
+    elif self.__useCertificates:
+      certKeyTuple = Locations.getHostCertificateAndKeyLocation()
+      credentialsLocation = certKeyTuple[0] if certKeyTuple else None
+    else:
+      credentialsLocation = self.kwargs.get(self.KW_PROXY_LOCATION) or Locations.getProxyLocation()
+    modificationTime = None
+    if credentialsLocation:
+      try:
+        modificationTime = os.stat(credentialsLocation).st_mtime
+      except OSError:
+        pass
+    return (self.serviceURL,
+            bool(self.__useCertificates),
+            credentialsLocation,
+            modificationTime,
+            proxyString,
+            bool(self.kwargs.get(self.KW_SKIP_CA_CHECK)),
+            self.timeout,
+            str(self.__extraCredentials))
+
+  def _connect(self, reuse=False):
     """ Establish the connection.
         It uses the URL discovered in __discoverURL.
         In case the connection cannot be established, __discoverURL
         is called again, and _connect calls itself.
         We stop after trying self.__nbOfRetry * self.__nbOfUrls
 
+        :param reuse: if True, take an idle connection from the ConnectionPool if there is one
     """
     # Check if the useServerCertificate configuration changed
     # Note: I am not really sure that  all this block makes
@@ -442,6 +498,14 @@ and this is thread %s
     if self.__enableThreadCheck:
       self.__checkThreadID()
 
+    # The key of the credentials used to open the connection, it is parked with it
+    connectionKey = self.__getConnectionKey()
+    if reuse and self.__reuseConnection:
+      transport = getGlobalConnectionPool().get(connectionKey)
+      if transport:
+        gLogger.debug("Reusing connection to: %s" % self.serviceURL)
+        return S_OK((getGlobalTransportPool().add(transport), transport))
+
     gLogger.debug("Trying to connect to: %s" % self.serviceURL)
     try:
       # Calls the transport method of the apropriate protocol.
@@ -485,16 +549,34 @@ and this is thread %s
       return S_ERROR("Can't connect to %s: %s" % (self.serviceURL, repr(e)))
     # We add the connection to the transport pool
     gLogger.debug("Connected to: %s" % self.serviceURL)
+    transport.connectionKey = connectionKey
     trid = getGlobalTransportPool().add(transport)
 
     return S_OK((trid, transport))
 
-  def _disconnect(self, trid):
+  def _disconnect(self, trid, idleTimeout=0):
     """ Disconnect the connection.
 
         :param trid: Transport ID in the transportPool
+        :param idleTimeout: if set, the service agreed to keep the connection open
+                            for that many seconds, so it is put in the ConnectionPool
+                            instead of being closed
+    """
+    transportPool = getGlobalTransportPool()
+    if idleTimeout > self.IDLE_CONNECTION_MARGIN and self.__reuseConnection:
+      transport = transportPool.get(trid)
+      if transport:
+        transportPool.remove(trid)
+        getGlobalConnectionPool().put(transport.connectionKey or self.__getConnectionKey(), transport,
+                                      idleTimeout - self.IDLE_CONNECTION_MARGIN)
+        return
+    transportPool.close(trid)
+
+  def _discardIdleConnections(self):
+    """ Close the idle connections to the service in the ConnectionPool.
+        To be called when a reused connection turned out to be broken.
     """
-    getGlobalTransportPool().close(trid)
+    getGlobalConnectionPool().discard(self.__getConnectionKey())
 
   def _proposeAction(self, transport, action):
     """ Proposes an action by sending a tuple containing
@@ -504,6 +586,7 @@ and this is thread %s
           * VO
           * action
           * extraCredentials
+          * connection options (only for RPC, if the connection can be reused)
 
         It is kind of a handshake.
 
@@ -523,6 +606,9 @@ and this is thread %s
     stConnectionInfo = ((self.__URLTuple[3], self.setup, self.vo),
                         action,
                         self.__extraCredentials)
+    if self.__reuseConnection and action[0] in ("RPC", "BatchRPC"):
+      # Services that do not know about it just ignore it, and close the connection after the call
+      stConnectionInfo += ({'keepConnection': True}, )
 
     # Send the connection info and get the answer back
     retVal = transport.sendData(S_OK(stConnectionInfo))
@@ -0,0 +1,169 @@
+""" ConnectionPool keeps the client connections to DISET services open between RPC calls,
+    so that the TCP connection and the SSL handshake can be reused by the next call
+    to the same service with the same credentials.
+
+    A connection is only kept if the service agreed to it when the action was proposed,
+    and it is never used by two calls at the same time: concurrent calls to the same
+    service simply use several pooled connections. Before being reused, a connection
+    is checked: it must not have been idle for longer than the service allows, must not
+    be older than the maximum connection age, and must not have been closed by the peer.
+"""
+
+__RCSID__ = "$Id$"
+
+import os
+import select
+import threading
+import time
+
+from DIRAC.FrameworkSystem.Client.Logger import gLogger
+from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
+
+
+class ConnectionPool(object):
+
+  def __init__(self, maxIdlePerKey=5, maxAge=600):
+    """
+      :param maxIdlePerKey: maximum number of idle connections kept for each (URL, credentials) key
+      :param maxAge: connections opened more than maxAge seconds ago are not reused
+    """
+    self.log = gLogger.getSubLogger("ConnectionPool")
+    self.__lock = threading.Lock()
+    # key -> list of [ transport, openingTime, expirationTime ]
+    self.__idle = {}
+    self.__maxIdlePerKey = maxIdlePerKey
+    self.__maxAge = maxAge
+    self.__pid = os.getpid()
+    self.__stats = {'reused': 0, 'parked': 0, 'discarded': 0}
+    result = gThreadScheduler.addPeriodicTask(60, self.__evictExpired)
+    if not result['OK']:
+      self.log.error("Cannot add task to thread scheduler", result['Message'])
+
+  def __checkProcess(self):
+    """ Forget all the connections inherited from a parent process.
+        They are not closed because the parent is still using them.
+        Must be called with the lock held.
+    """
+    if self.__pid != os.getpid():
+      self.__idle = {}
+      self.__pid = os.getpid()
+
+  @staticmethod
+  def __isHealthy(transport):
+    """ A connection waiting for the next request must not have anything to read.
+        If it does, the peer either closed it or is talking nonsense.
+    """
+    try:
+      if transport.byteStream:
+        return False
+      inList, _outList, _exList = select.select([transport.getSocket()], [], [], 0)
+      return not inList
+    except Exception:
+      return False
+
+  def get(self, key):
+    """ Get an idle connection for a key
+
+        :param key: tuple identifying the service URL and the credentials
+        :returns: transport object or None
+    """
+    now = time.time()
+    toClose = []
+    transport = None
+    with self.__lock:
+      self.__checkProcess()
+      connections = self.__idle.get(key, [])
+      # Take the most recently used connection first
+      while connections:
+        candidate, openingTime, expirationTime = connections.pop()
+        if now < expirationTime and now - openingTime < self.__maxAge:
+          transport = candidate
+          break
+        toClose.append(candidate)
+      if not connections:
+        self.__idle.pop(key, None)
+    # Checking the health may mean checking the socket, do not do it with the lock held
+    if transport and not self.__isHealthy(transport):
+      toClose.append(transport)
+      transport = None
+    self.__close(toClose)
+    if transport:
+      with self.__lock:
+        self.__stats['reused'] += 1
+    return transport
+
+  def put(self, key, transport, idleTimeout):
+    """ Keep a connection for later use
+
+        :param key: tuple identifying the service URL and the credentials
+        :param transport: transport that just finished a call
+        :param idleTimeout: seconds the connection can stay idle before the service closes it
+    """
+    now = time.time()
+    toClose = []
+    with self.__lock:
+      self.__checkProcess()
+      connections = self.__idle.setdefault(key, [])
+      if len(connections) >= self.__maxIdlePerKey or not transport.isStreamInSync():
+        toClose.append(transport)
+      else:
+        connections.append([transport, transport.getCreationTimestamp(), now + idleTimeout])
+        self.__stats['parked'] += 1
+    self.__close(toClose)
+
+  def discard(self, key):
+    """ Close all the idle connections for a key. Used when one of them turned out to be stale,
+        as the others most likely are too (e.g. the service was restarted).
+    """
+    with self.__lock:
+      self.__checkProcess()
+      toClose = [connection[0] for connection in self.__idle.pop(key, [])]
+    self.__close(toClose)
+
+  def getStats(self):
+    """ Number of idle connections, and counters of reused, parked and discarded connections """
+    with self.__lock:
+      stats = dict(self.__stats)
+      stats['idle'] = sum([len(connections) for connections in self.__idle.itervalues()])
+    return stats
+
+  def __evictExpired(self):
+    """ Periodically close the connections the service would close anyway """
+    now = time.time()
+    toClose = []
+    with self.__lock:
+      self.__checkProcess()
+      for key in list(self.__idle):
+        kept = []
+        for connection in self.__idle[key]:
+          if now < connection[2] and now - connection[1] < self.__maxAge:
+            kept.append(connection)
+          else:
+            toClose.append(connection[0])
+        if kept:
+          self.__idle[key] = kept
+        else:
+          del self.__idle[key]
+    self.__close(toClose)
+
+  def __close(self, transports):
+    """ Close connections. Must be called without the lock held """
+    if not transports:
+      return
+    with self.__lock:
+      self.__stats['discarded'] += len(transports)
+    for transport in transports:
+      try:
+        transport.close()
+      except Exception as e:
+        self.log.debug("Error while closing idle connection", repr(e))
+
+
+gConnectionPool = None
+
+
+def getGlobalConnectionPool():
+  global gConnectionPool
+  if not gConnectionPool:
+    gConnectionPool = ConnectionPool()
+  return gConnectionPool
@@ -0,0 +1,167 @@
+""" ConnectionWatcher waits for data on client connections without using a thread per connection.
+
+    Services put in the watcher the connections on which they expect the client to send
+    something (a new connection, the action proposal after the handshake, the next proposal
+    on a connection kept open between RPCs). A single thread polls all of them and calls back
+    the service when the data is there, so that the service only uses a thread of its pool
+    once the request can be read, or when the connection has waited for too long.
+"""
+
+__RCSID__ = "$Id$"
+
+import os
+import select
+import threading
+import time
+
+from DIRAC.FrameworkSystem.Client.Logger import gLogger
+
+
+class ConnectionWatcher(object):
+
+  def __init__(self, readyCallback, expiredCallback):
+    """
+      :param readyCallback: function called with ( transport, data ) when the client sent something
+      :param expiredCallback: function called with ( transport, data ) when the connection timed out
+    """
+    self.log = gLogger.getSubLogger("ConnectionWatcher")
+    self.__readyCallback = readyCallback
+    self.__expiredCallback = expiredCallback
+    self.__lock = threading.Lock()
+    # fd -> ( transport, expiration time, data, group )
+    self.__connections = {}
+    # group -> number of connections watched
+    self.__groupSizes = {}
+    self.__poller = None
+    self.__wakeUpPipe = None
+
+  def __len__(self):
+    return len(self.__connections)
+
+  def count(self, group):
+    """ :returns: number of connections watched in a group """
+    return self.__groupSizes.get(group, 0)
+
+  def add(self, transport, timeout, data=None, group=None):
+    """ Watch a connection
+
+        :param transport: transport of the client connection
+        :param timeout: seconds after which the connection is given back to expiredCallback
+        :param data: anything, given back to the callbacks
+        :param group: the connections of a group are counted, see count()
+    """
+    fd = transport.getSocket().fileno()
+    with self.__lock:
+      if not self.__wakeUpPipe:
+        self.__start()
+      if fd in self.__connections:
+        self.__remove(fd)
+      self.__connections[fd] = (transport, time.time() + timeout, data, group)
+      self.__groupSizes[group] = self.__groupSizes.get(group, 0) + 1
+      self.__poller.register(fd)
+    # Data may already be waiting in the transport buffers, make the watching thread check it
+    os.write(self.__wakeUpPipe[1], "c")
+
+  def __start(self):
+    """ Start the watching thread. Must be called with the lock held """
+    self.__wakeUpPipe = os.pipe()
+    self.__poller = _Poller()
+    self.__poller.register(self.__wakeUpPipe[0])
+    watchThread = threading.Thread(target=self.__watch)
+    watchThread.setDaemon(True)
+    watchThread.start()
+
+  @staticmethod
+  def __hasBufferedData(transport):
+    """ The data may have been read from the socket already, by the transport or the SSL layer """
+    if transport.byteStream:
+      return True
+    pending = getattr(transport.oSocket, 'pending', None)
+    try:
+      return bool(pending and pending())
+    except Exception:
+      return False
+
+  def __watch(self):
+    wakeUpFD = self.__wakeUpPipe[0]
+    checkBuffers = True
+    nextExpirationCheck = 0
+    while True:
+      try:
+        readyFDs = self.__poller.poll(1)
+      except (select.error, IOError, OSError) as e:
+        self.log.debug("Error while polling connections", repr(e))
+        time.sleep(0.001)
+        continue
+      if wakeUpFD in readyFDs:
+        os.read(wakeUpFD, 1024)
+        readyFDs.remove(wakeUpFD)
+        checkBuffers = True
+      now = time.time()
+      ready = []
+      expired = []
+      with self.__lock:
+        if checkBuffers:
+          readyFDs.extend([fd for fd in self.__connections
+                           if fd not in readyFDs and self.__hasBufferedData(self.__connections[fd][0])])
+          checkBuffers = False
+        for fd in readyFDs:
+          if fd in self.__connections:
+            ready.append(self.__remove(fd))
+        if now >= nextExpirationCheck:
+          nextExpirationCheck = now + 1
+          for fd in [fd for fd in self.__connections if self.__connections[fd][1] < now]:
+            expired.append(self.__remove(fd))
+      for transport, data in ready:
+        self.__callback(self.__readyCallback, transport, data)
+      for transport, data in expired:
+        self.__callback(self.__expiredCallback, transport, data)
+
+  def __remove(self, fd):
+    """ Stop watching a connection. Must be called with the lock held """
+    transport, _expiration, data, group = self.__connections.pop(fd)
+    self.__groupSizes[group] -= 1
+    self.__poller.unregister(fd)
+    return transport, data
+
+  def __callback(self, callback, transport, data):
+    try:
+      callback(transport, data)
+    except Exception as e:
+      self.log.exception("Exception in connection callback", lException=e)
+
+
+class _Poller(object):
+  """ poll when the platform has it, select otherwise.
+      select can only watch file descriptors below FD_SETSIZE (usually 1024).
+  """
+
+  def __init__(self):
+    if hasattr(select, 'poll'):
+      self.__poll = select.poll()
+      self.__fds = None
+    else:
+      self.__poll = None
+      self.__fds = set()
+
+  def register(self, fd):
+    if self.__poll:
+      self.__poll.register(fd, select.POLLIN | select.POLLPRI)
+    else:
+      self.__fds.add(fd)
+
+  def unregister(self, fd):
+    if self.__poll:
+      try:
+        self.__poll.unregister(fd)
+      except KeyError:
+        pass
+    else:
+      self.__fds.discard(fd)
+
+  def poll(self, timeout):
+    """ :returns: list of the file descriptors that can be read (or were closed) """
+    if self.__poll:
+      return [fd for fd, _event in self.__poll.poll(timeout * 1000)]
+    inList, _outList, _exList = select.select(list(self.__fds), [], [], timeout)
+    return inList
@@ -23,6 +23,7 @@ class FileHelper(object):
     self.__oMD5 = hashlib.md5()
     self.bFinishedTransmission = False
     self.bReceivedEOF = False
+    self.bErrorInMD5 = False
     self.direction = False
     self.packetSize = 1048576
     self.__fileBytes = 0
@@ -111,11 +111,17 @@ class GatewayService(Service):
     clientInitArgs = result['Value']
     # Execute the action
     result = self._processProposal(trid, proposalTuple, clientInitArgs)
-    # Close the connection if required
-    if result['closeTransport']:
+    # Close the connection if required. The gateway never keeps it open for the next proposal
+    if result['closeTransport'] or result.get('keepConnection'):
       self._transportPool.close(trid)
     return result
 
+  def _canKeepConnection(self, proposalTuple):
+    """ Nothing waits for the next proposal of the clients of the gateway,
+        their connections are closed after each call
+    """
+    return False
+
   def _receiveAndCheckProposal(self, trid):
     clientTransport = self._transportPool.get(trid)
     # Get the peer credentials
@@ -238,19 +244,24 @@ class GatewayService(Service):
 
   def __forwardRPCCall(self, targetService, clientInitArgs, method, params):
     if targetService == "Configuration/Server":
-      if method == "getCompressedDataIfNewer":
-        # Relay CS data directly
-        serviceVersion = gConfigurationData.getVersion()
-        retDict = {'newestVersion': serviceVersion}
-        clientVersion = params[0]
-        if clientVersion < serviceVersion:
-          retDict['data'] = gConfigurationData.getCompressedData()
-        return S_OK(retDict)
+      # The gateway does not keep the history of the modifications,
+      # getCompressedModificationsIfNewer is answered with the whole CS data too
+      if method in ("getCompressedDataIfNewer", "getCompressedModificationsIfNewer"):
+        return self.__relayCSDataIfNewer(params[0])
     # Default
     rpcClient = RPCClient(targetService, **clientInitArgs)
     methodObj = getattr(rpcClient, method)
     return methodObj(*params)
 
+  @staticmethod
+  def __relayCSDataIfNewer(clientVersion):
+    """ Relay CS data directly """
+    serviceVersion = gConfigurationData.getVersion()
+    retDict = {'newestVersion': serviceVersion}
+    if clientVersion < serviceVersion:
+      retDict['data'] = gConfigurationData.getCompressedData()
+    return S_OK(retDict)
+
   def __forwardFileTransferCall(self, targetService, clientInitArgs, method,
                                 params, clientTransport):
     transferRelay = TransferRelay(targetService, **clientInitArgs)
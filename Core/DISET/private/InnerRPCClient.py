@@ -11,19 +11,25 @@ class InnerRPCClient( BaseClient ):
   """ This class instruments the BaseClient to perform RPC calls.
       At every RPC call, this class:
 
-        * connects
+        * connects, or reuses an idle connection to the service
         * proposes the action
         * sends the method parameters
         * retrieve the result
-        * disconnect
+        * disconnect, or keeps the connection for the next call if the service agreed
+
+      Several calls can also be sent in one go with executeBatch.
   """
 
   # Number of times we retry the call.
   # The connection retry is handled by BaseClient
   __retry = 0
 
+  # The names of the methods called in a batch travel in the action proposal,
+  # whose size is limited by the service
+  MAX_BATCH_METHODS_LENGTH = 512
+
   def executeRPC( self, functionName, args ):
-    """ Perform the RPC call, connect before and disconnect after.
+    """ Perform the RPC call, connect before and disconnect (or keep the connection) after.
 
         :param functionName: name of the function
         :param args: arguments to the function
@@ -33,31 +39,96 @@ class InnerRPCClient( BaseClient ):
 
 
     """
-    retVal = self._connect()
-
     # Generate the stub which contains all the connection and call options
     stub = ( self._getBaseStub(), functionName, args )
+    return self.__executeAction( ( "RPC", functionName ), args, stub )
+
+  def executeBatch( self, calls ):
+    """ Perform several RPC calls in one round trip. The calls are authorized once
+        and executed one after the other by the same handler instance of the service.
+        Services that do not support batches get the calls one by one.
+
+        :param calls: list of ( functionName, args ) tuples
+
+        :return: S_OK with the list of the results of each call, in the same order,
+                 or S_ERROR if the batch could not be sent.
+    """
+    calls = [ ( functionName, tuple( args ) ) for functionName, args in calls ]
+    results = []
+    for batch in self.__splitBatch( calls ):
+      methods = ",".join( sorted( set( [ functionName for functionName, _args in batch ] ) ) )
+      stub = ( self._getBaseStub(), "executeBatch", ( batch, ) )
+      retVal = self.__executeAction( ( "BatchRPC", methods ), batch, stub )
+      if not retVal[ 'OK' ] and self.__isUnknownAction( retVal ):
+        retVal = S_OK( [ self.executeRPC( functionName, args ) for functionName, args in batch ] )
+      if not retVal[ 'OK' ]:
+        return retVal
+      results.extend( retVal[ 'Value' ] )
+    return S_OK( results )
+
+  def __splitBatch( self, calls ):
+    """ Split the calls in batches whose method names fit in an action proposal
+    """
+    batches = []
+    batch = []
+    methods = set()
+    for call in calls:
+      if call[0] not in methods:
+        if batch and len( ",".join( methods | set( [ call[0] ] ) ) ) > self.MAX_BATCH_METHODS_LENGTH:
+          batches.append( batch )
+          batch = []
+          methods = set()
+        methods.add( call[0] )
+      batch.append( call )
+    if batch:
+      batches.append( batch )
+    return batches
+
+  @staticmethod
+  def __isUnknownAction( retVal ):
+    """ Services (and gateways) not knowing an action type refuse the proposal
+    """
+    message = retVal.get( 'Message', '' )
+    return "not a known action type" in message or "Unknown type of action" in message
+
+  def __executeAction( self, action, args, stub ):
+    """ Connect, propose the action, send the arguments and get the result back
+
+        :param action: tuple ( <action type>, <action name> )
+        :param args: what the service expects once the action is accepted
+        :param stub: connection stub to add to the result
+    """
+    retVal = self._connect( reuse = True )
+
     if not retVal[ 'OK' ]:
       retVal[ 'rpcStub' ] = stub
       return retVal
     # Get the transport connection ID as well as the Transport object
     trid, transport = retVal[ 'Value' ]
+    # Seconds the service keeps the connection open after the call, if it agreed to
+    idleTimeout = 0
     try:
-      # Handshake to perform the RPC call for functionName
-      retVal = self._proposeAction( transport, ( "RPC", functionName ) )
+      # Handshake to perform the action
+      retVal = self._proposeAction( transport, action )
       if not retVal['OK']:
-        if cmpError( retVal, ENOAUTH ):  # This query is unauthorized
+        if cmpError( retVal, ENOAUTH ) or self.__isUnknownAction( retVal ):  # This query is refused
           retVal[ 'rpcStub' ] = stub
           return retVal
         else:  # we have network problem or the service is not responding
+          # If it was a reused connection, the others to the same service are probably broken too
+          self._discardIdleConnections()
           if self.__retry < 3:
             self.__retry += 1
-            return self.executeRPC( functionName, args )
+            return self.__executeAction( action, args, stub )
           else:
             retVal[ 'rpcStub' ] = stub
             return retVal
 
-      # Send the arguments to the function
+      serverIdleTimeout = 0
+      if isinstance( retVal.get( 'Value' ), dict ):
+        serverIdleTimeout = retVal[ 'Value' ].get( 'keepConnection', 0 )
+
+      # Send the arguments to the function, the connection is closed if it fails
       retVal = transport.sendData( S_OK( args ) )
       if not retVal[ 'OK' ]:
         return retVal
@@ -66,6 +137,10 @@ class InnerRPCClient( BaseClient ):
       receivedData = transport.receiveData()
       if isinstance( receivedData, dict ):
         receivedData[ 'rpcStub' ] = stub
+        # Only a connection which received a whole result can be reused: after an error or a timeout,
+        # the rest of the result would be read by the next call
+        if 'OK' in receivedData and transport.isStreamInSync():
+          idleTimeout = serverIdleTimeout
       return receivedData
     finally:
-      self._disconnect( trid )
+      self._disconnect( trid, idleTimeout = idleTimeout )
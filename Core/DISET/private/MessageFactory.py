@@ -6,6 +6,8 @@ from DIRAC import S_OK, S_ERROR
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 from DIRAC.Core.Utilities import List
 from DIRAC.ConfigurationSystem.Client.Helpers import CSGlobals
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.ConfigurationSystem.Client.PathFinder import getServiceSection
 
 class MessageFactory:
 
@@ -39,12 +41,21 @@ class MessageFactory:
     return msgName in result[ 'Value' ]
 
   def __loadHandler( self, serviceName ):
-    #TODO: Load handlers as the Service does (1. CS 2. SysNameSystem/Service/servNameHandler.py)
+    #Load handlers as the Service does (1. CS 2. SysNameSystem/Service/servNameHandler.py)
     sL = List.fromChar( serviceName, "/" )
     if len( sL ) != 2:
       return S_ERROR( "Service name is not valid: %s" % serviceName )
     sysName = sL[0]
     svcHandlerName = "%sHandler" % sL[1]
+    try:
+      handlerPath = gConfigurationData.extractOptionFromCFG( "%s/HandlerPath" % getServiceSection( serviceName ) )
+    except Exception:
+      handlerPath = None
+    if handlerPath:
+      # e.g. DIRAC/ConfigurationSystem/Service/ConfigurationHandler.py
+      hL = List.fromChar( handlerPath.replace( ".py", "" ), "/" )
+      if len( hL ) == 4 and hL[1] == "%sSystem" % sysName and hL[2] == "Service":
+        svcHandlerName = hL[3]
     loadedObjs = loadObjects( "%sSystem/Service" % sysName,
                               reFilter = re.compile( r"^%s\.py$" % svcHandlerName ) )
     if svcHandlerName not in loadedObjs:
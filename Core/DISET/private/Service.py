@@ -20,10 +20,11 @@ from DIRAC.Core.Utilities import Time, MemStat
 from DIRAC.Core.DISET.private.LockManager import LockManager
 from DIRAC.FrameworkSystem.Client.MonitoringClient import MonitoringClient
 from DIRAC.Core.DISET.private.ServiceConfiguration import ServiceConfiguration
+from DIRAC.Core.DISET.private.ConnectionWatcher import ConnectionWatcher
 from DIRAC.Core.DISET.private.TransportPool import getGlobalTransportPool
 from DIRAC.Core.DISET.private.MessageBroker import MessageBroker, MessageSender
 from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
-from DIRAC.Core.Utilities.ThreadPool import ThreadPool
+from DIRAC.Core.Utilities.ThreadExecutor import ThreadExecutor
 from DIRAC.Core.Utilities.ReturnValues import isReturnStructure
 from DIRAC.Core.DISET.AuthManager import AuthManager
 from DIRAC.FrameworkSystem.Client.SecurityLogClient import SecurityLogClient
@@ -36,7 +37,8 @@ class Service( object ):
   SVC_VALID_ACTIONS = { 'RPC' : 'export',
                         'FileTransfer': 'transfer',
                         'Message' : 'msg',
-                        'Connection' : 'Message' }
+                        'Connection' : 'Message',
+                        'BatchRPC' : 'RPC' }
   SVC_SECLOG_CLIENT = SecurityLogClient()
 
   def __init__( self, serviceData ):
@@ -70,6 +72,8 @@ class Service( object ):
     self._transportPool = getGlobalTransportPool()
     self.__cloneId = 0
     self.__maxFD = 0
+    # Connections waiting for the client to send something, without using a thread
+    self.__connectionWatcher = ConnectionWatcher( self.__connectionReady, self.__connectionExpired )
 
   def setCloneProcessId( self, cloneId ):
     self.__cloneId = cloneId
@@ -95,10 +99,16 @@ class Service( object ):
     #Initialize lock manager
     self._lockManager = LockManager( self._cfg.getMaxWaitingPetitions() )
     self._initMonitoring()
-    self._threadPool = ThreadPool( max( 1, self._cfg.getMinThreads() ),
-                                   max( 0, self._cfg.getMaxThreads() ),
-                                   self._cfg.getMaxWaitingPetitions() )
-    self._threadPool.daemonize()
+    # The connections are handled first: the priority actions are executed right away,
+    # the others wait in the Requests lane. The messages of the stable connections are not limited,
+    # queueing them must not block the threads of the pool.
+    self._threadPool = ThreadExecutor( max( 1, self._cfg.getMinThreads() ),
+                                       max( 0, self._cfg.getMaxThreads() ),
+                                       lanes = ( ( 'Connections', self._cfg.getMaxWaitingPetitions() ),
+                                                 ( 'Messages', 0 ),
+                                                 ( 'Requests', self._cfg.getMaxWaitingPetitions() ) ),
+                                       defaultLane = 'Messages' )
+    self.__priorityActions = self._cfg.getPriorityActions()
     self._msgBroker = MessageBroker( "%sMSB" % self._name, threadPool = self._threadPool )
     #Create static dict
     self._serviceInfoDict = { 'serviceName' : self._name,
@@ -106,6 +116,7 @@ class Service( object ):
                               'URL' : self._cfg.getURL(),
                               'messageSender' : MessageSender( self._name, self._msgBroker ),
                               'validNames' : self._validNames,
+                              'threadPool' : self._threadPool,
                               'csPaths' : [ PathFinder.getServiceSection( svcName ) for svcName in self._validNames ]
                             }
     #Call static initialization function
@@ -248,6 +259,8 @@ class Service( object ):
     self._monitor.registerActivity( 'ActiveQueries', "Active queries", 'Framework', 'threads', MonitoringClient.OP_MEAN )
     self._monitor.registerActivity( 'RunningThreads', "Running threads", 'Framework', 'threads', MonitoringClient.OP_MEAN )
     self._monitor.registerActivity( 'MaxFD', "Max File Descriptors", 'Framework', 'fd', MonitoringClient.OP_MEAN )
+    self._monitor.registerActivity( 'IdleConnections', "Idle connections", 'Framework', 'connections',
+                                    MonitoringClient.OP_MEAN )
 
     self._monitor.setComponentExtraParam( 'DIRACVersion', DIRAC.version )
     self._monitor.setComponentExtraParam( 'platform', DIRAC.getPlatform() )
@@ -270,6 +283,7 @@ class Service( object ):
     self._monitor.addMark( 'ActiveQueries', self._threadPool.numWorkingThreads() )
     self._monitor.addMark( 'RunningThreads', threading.activeCount() )
     self._monitor.addMark( 'MaxFD', self.__maxFD )
+    self._monitor.addMark( 'IdleConnections', len( self.__connectionWatcher ) )
     self.__maxFD = 0
 
 
@@ -283,16 +297,19 @@ class Service( object ):
       This method may be called by ServiceReactor.
       The method stacks openened connection in a queue, another thread
       read this queue and handle connection.
+      If the service is event driven, the connection is only queued once the client sent something.
 
       :param clientTransport: Object wich describe opened connection (PlainTransport or SSLTransport)
     """
     self._stats[ 'connections' ] += 1
     self._monitor.setComponentExtraParam( 'queries', self._stats[ 'connections' ] )
-    self._threadPool.generateJobAndQueueIt( self._processInThread,
-                                            args = ( clientTransport, ) )
+    if self._cfg.isEventDriven():
+      self.__connectionWatcher.add( clientTransport, self._cfg.getNewConnectionTimeout() )
+      return
+    self._threadPool.submit( self._processInThread, args = ( clientTransport, ), lane = 'Connections' )
 
   #Threaded process function
-  def _processInThread( self, clientTransport ):
+  def _processInThread( self, clientTransport, reusedConnection = None ):
     """
     This method handles a RPC, FileTransfer or Connection.
     Connection may be opened via ServiceReactor.__acceptIncomingConnection
@@ -312,9 +329,12 @@ class Service( object ):
     - Executing the action asked by the client
 
     :param clientTransport: Object who describe the opened connection (SSLTransport or PlainTransport)
+    :param reusedConnection: tuple (trid, credentials after the handshake) if the connection was kept
+                             open after a previous RPC, or if the handshake was already done
+                             by an event driven service. In that case there is no handshake.
 
     :return: S_OK with "closeTransport" a boolean to indicate if th connection have to be closed
-            e.g. after RPC, closeTransport=True
+            e.g. after RPC, closeTransport=True, unless the client asked to keep the connection
 
     """
     self.__maxFD = max( self.__maxFD, clientTransport.oSocket.fileno() )
@@ -324,20 +344,31 @@ class Service( object ):
     except Exception:
       monReport = False
     try:
-      #Handshake
-      try:
-        result = clientTransport.handshake()
-        if not result[ 'OK' ]:
-          clientTransport.close()
+      if reusedConnection:
+        trid, handshakeCredentials = reusedConnection
+        # Authorizing a proposal modifies the credentials, start again from the original ones
+        clientTransport.peerCredentials = dict( handshakeCredentials )
+      else:
+        #Handshake
+        try:
+          result = clientTransport.handshake()
+          if not result[ 'OK' ]:
+            clientTransport.close()
+            return
+        except:
+          return
+        handshakeCredentials = dict( clientTransport.getConnectingCredentials() )
+        #Add to the transport pool
+        trid = self._transportPool.add( clientTransport )
+        if not trid:
+          return
+        if self._cfg.isEventDriven():
+          #Do not keep the thread while the client sends the proposal
+          self.__connectionWatcher.add( clientTransport, self._cfg.getNewConnectionTimeout(),
+                                        ( trid, handshakeCredentials ) )
           return
-      except:
-        return
-      #Add to the transport pool
-      trid = self._transportPool.add( clientTransport )
-      if not trid:
-        return
       #Receive and check proposal
-      result = self._receiveAndCheckProposal( trid )
+      result = self._receiveAndCheckProposal( trid, idleConnection = bool( reusedConnection ) )
       if not result[ 'OK' ]:
         self._transportPool.sendAndClose( trid, result )
         return
@@ -348,19 +379,83 @@ class Service( object ):
         self._transportPool.sendAndClose( trid, result )
         return
       handlerObj = result[ 'Value' ]
-      #Execute the action
-      result = self._processProposal( trid, proposalTuple, handlerObj )
-      #Close the connection if required
-      if result[ 'closeTransport' ] or not result[ 'OK' ]:
-        if not result[ 'OK' ]:
-          gLogger.error( "Error processing proposal", result[ 'Message' ] )
-        self._transportPool.close( trid )
-      return result
+      #Execute the action. When other tasks are waiting, it waits as well in the Requests lane,
+      #after the connections and the priority actions, if there is room for it.
+      if self._threadPool.pendingJobs() and not self.__isPriorityAction( proposalTuple ):
+        result = self._threadPool.submit( self.__executeQueuedProposal,
+                                          args = ( trid, proposalTuple, handlerObj, handshakeCredentials ),
+                                          lane = 'Requests', blocking = False )
+        if result[ 'OK' ]:
+          return result
+      return self._executeProposal( trid, proposalTuple, handlerObj, handshakeCredentials )
     finally:
       self._lockManager.unlockGlobal()
       if monReport:
         self.__endReportToMonitoring( *monReport )
 
+  def __isPriorityAction( self, proposalTuple ):
+    actionType, method = proposalTuple[1]
+    return actionType == 'Connection' or ( actionType == 'RPC' and method in self.__priorityActions )
+
+  def __executeQueuedProposal( self, trid, proposalTuple, handlerObj, handshakeCredentials ):
+    self._lockManager.lockGlobal()
+    try:
+      return self._executeProposal( trid, proposalTuple, handlerObj, handshakeCredentials )
+    finally:
+      self._lockManager.unlockGlobal()
+
+  def _executeProposal( self, trid, proposalTuple, handlerObj, handshakeCredentials ):
+    """
+    Execute the action of a proposal, then close the connection or keep it open
+    """
+    result = self._processProposal( trid, proposalTuple, handlerObj )
+    #Close the connection if required
+    if result[ 'closeTransport' ] or not result[ 'OK' ]:
+      if not result[ 'OK' ]:
+        gLogger.error( "Error processing proposal", result[ 'Message' ] )
+      self._transportPool.close( trid )
+    elif result.get( 'keepConnection' ):
+      self.__addIdleConnection( trid, handshakeCredentials )
+    return result
+
+  #Connections kept open between RPCs
+
+  def _canKeepConnection( self, proposalTuple ):
+    """ The connection is kept open after an RPC if the client asked for it
+        (older clients send only 3 elements in the proposal) and there is room for it
+    """
+    if proposalTuple[1][0] not in ( 'RPC', 'BatchRPC' ) or len( proposalTuple ) < 4:
+      return False
+    if not isinstance( proposalTuple[3], dict ) or not proposalTuple[3].get( 'keepConnection' ):
+      return False
+    if self._cfg.getIdleConnectionTimeout() <= 0:
+      return False
+    return self.__connectionWatcher.count( 'Idle' ) < self._cfg.getMaxIdleConnections()
+
+  def __addIdleConnection( self, trid, handshakeCredentials ):
+    """ Watch the connection until the client sends the next proposal or the connection expires
+    """
+    clientTransport = self._transportPool.get( trid )
+    if not clientTransport:
+      return
+    self.__connectionWatcher.add( clientTransport, self._cfg.getIdleConnectionTimeout(),
+                                  ( trid, handshakeCredentials ), group = 'Idle' )
+
+  def __connectionReady( self, clientTransport, handshakeInfo ):
+    """ The client sent something: process it in the thread pool.
+        This way, connections waiting for the client do not use a thread.
+    """
+    self._threadPool.submit( self._processInThread, args = ( clientTransport, handshakeInfo ),
+                             lane = 'Connections' )
+
+  def __connectionExpired( self, clientTransport, handshakeInfo ):
+    """ The client did not send anything in time
+    """
+    if handshakeInfo:
+      gLogger.debug( "Closing idle connection", handshakeInfo[0] )
+      self._transportPool.close( handshakeInfo[0] )
+    else:
+      clientTransport.close()
 
   def _createIdentityString( self, credDict, clientTransport = None ):
     if 'username' in credDict:
@@ -378,12 +473,17 @@ class Service( object ):
       identity += "(%s)" % credDict[ 'DN' ]
     return identity
 
-  def _receiveAndCheckProposal( self, trid ):
+  def _receiveAndCheckProposal( self, trid, idleConnection = False ):
     clientTransport = self._transportPool.get( trid )
     #Get the peer credentials
     credDict = clientTransport.getConnectingCredentials()
     #Receive the action proposal
     retVal = clientTransport.receiveData( 1024 )
+    if not retVal[ 'OK' ] and idleConnection:
+      #Clients close their idle connections when they do not need them anymore
+      gLogger.debug( "Idle connection closed", retVal[ 'Message' ] )
+      self._transportPool.close( trid )
+      return retVal
     if not retVal[ 'OK' ]:
       gLogger.error( "Invalid action proposal", "%s %s" % ( self._createIdentityString( credDict,
                                                                                         clientTransport ),
@@ -410,6 +510,13 @@ class Service( object ):
     return S_OK( proposalTuple )
 
   def _authorizeProposal( self, actionTuple, trid, credDict ):
+    #A batch is authorized if all the methods it calls are
+    if actionTuple[0] == 'BatchRPC':
+      for method in actionTuple[1].split( "," ):
+        result = self._authorizeProposal( ( 'RPC', method ), trid, credDict )
+        if not result[ 'OK' ]:
+          return result
+      return S_OK()
     #Find CS path for the Auth rules
     referedAction = self._isMetaAction( actionTuple[0] )
     if referedAction:
@@ -487,8 +594,13 @@ class Service( object ):
     return S_OK( handlerInstance )
 
   def _processProposal( self, trid, proposalTuple, handlerObj ):
-    #Notify the client we're ready to execute the action
-    retVal = self._transportPool.send( trid, S_OK() )
+    #Notify the client we're ready to execute the action,
+    #and how long it can keep the connection open afterwards if it asked to
+    keepConnection = self._canKeepConnection( proposalTuple )
+    if keepConnection:
+      retVal = self._transportPool.send( trid, S_OK( { 'keepConnection' : self._cfg.getIdleConnectionTimeout() } ) )
+    else:
+      retVal = self._transportPool.send( trid, S_OK() )
     if not retVal[ 'OK' ]:
       return retVal
 
@@ -516,7 +628,8 @@ class Service( object ):
       if not result[ 'OK' ]:
         self._msgBroker.removeTransport( trid )
 
-    result[ 'closeTransport' ] = not messageConnection or not result[ 'OK' ]
+    result[ 'closeTransport' ] = not ( messageConnection or keepConnection ) or not result[ 'OK' ]
+    result[ 'keepConnection' ] = keepConnection and result[ 'OK' ]
     return result
 
   def _mbConnect( self, trid, handlerObj = None ):
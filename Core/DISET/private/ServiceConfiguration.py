@@ -68,12 +68,41 @@ class ServiceConfiguration:
     except:
       return 500
 
+  def getPriorityActions( self ):
+    """ RPC actions executed as soon as they are received, before the other queued ones """
+    priorityActions = self.getOption( "PriorityActions" )
+    if priorityActions is None:
+      return [ 'ping', 'echo', 'getDBProfile', 'getThreadPoolStats' ]
+    return List.fromChar( priorityActions )
+
   def getMaxMessagingConnections( self ):
     try:
       return int( self.getOption( "MaxMessagingConnections" ) )
     except:
       return 20
 
+  def getIdleConnectionTimeout( self ):
+    try:
+      return int( self.getOption( "IdleConnectionTimeout" ) )
+    except:
+      return 60
+
+  def getMaxIdleConnections( self ):
+    try:
+      return int( self.getOption( "MaxIdleConnections" ) )
+    except:
+      return 100
+
+  def isEventDriven( self ):
+    optionValue = self.getOption( "EventDriven" )
+    return str( optionValue ).lower() in ( "yes", "true", "y", "1" )
+
+  def getNewConnectionTimeout( self ):
+    try:
+      return int( self.getOption( "NewConnectionTimeout" ) )
+    except:
+      return 30
+
   def getMaxThreadsForMethod( self, actionType, method ):
     try:
       return int( self.getOption( "ThreadLimit/%s/%s" % ( actionType, method ) ) )
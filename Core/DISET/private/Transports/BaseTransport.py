@@ -22,7 +22,6 @@ __RCSID__ = "$Id$"
 
 import time
 import select
-import cStringIO
 from hashlib import md5
 
 from DIRAC.Core.Utilities.ReturnValues import S_ERROR, S_OK
@@ -54,10 +53,14 @@ class BaseTransport(object):
     self.startedKeepAlives = set()
     self.keepAliveId = md5(str(stServerAddress) + str(bServerMode)).hexdigest()
     self.receivedMessages = []
+    # False when the last message could not be received as a whole: the stream is out of sync
+    self.__streamInSync = True
     self.sentKeepAlives = 0
     self.waitingForKeepAlivePong = False
     self.__keepAliveLapse = 0
     self.oSocket = None
+    # Key of the client connection in the ConnectionPool, set by the client that opened it
+    self.connectionKey = None
     if 'keepAliveLapse' in kwargs:
       try:
         self.__keepAliveLapse = max(150, int(kwargs['keepAliveLapse']))
@@ -66,6 +69,7 @@ class BaseTransport(object):
     self.iListenQueueSize = max(self.iListenQueueSize, int(kwargs.get('SocketBacklog', 0)))
     self.__lastActionTimestamp = time.time()
     self.__lastServerRenewTimestamp = self.__lastActionTimestamp
+    self.__creationTimestamp = self.__lastActionTimestamp
 
   def __updateLastActionTimestamp(self):
     self.__lastActionTimestamp = time.time()
@@ -73,6 +77,15 @@ class BaseTransport(object):
   def getLastActionTimestamp(self):
     return self.__lastActionTimestamp
 
+  def getCreationTimestamp(self):
+    return self.__creationTimestamp
+
+  def isStreamInSync(self):
+    """ :return: False if the last message was not received as a whole (error, timeout, partial read),
+        the next bytes of the stream being then not the beginning of a message
+    """
+    return self.__streamInSync
+
   def getKeepAliveLapse(self):
     return self.__keepAliveLapse
 
@@ -188,6 +201,7 @@ class BaseTransport(object):
       return self.receivedMessages.pop(0)
     # Buffer size can't be less than 0
     maxBufferSize = max(maxBufferSize, 0)
+    self.__streamInSync = False
     try:
       # Look either for message length of keep alive magic string
       iSeparatorPosition = self.byteStream.find(":", 0, 10)
@@ -225,10 +239,16 @@ class BaseTransport(object):
         # If we already have all the data we need
         data = pkgData[:pkgSize]
         self.byteStream = pkgData[pkgSize:]
+        try:
+          data = DEncode.decode(data)[0]
+        except Exception as e:
+          return S_ERROR("Could not decode received data: %s" % str(e))
       else:
-        # If we still need to read stuff
-        pkgMem = cStringIO.StringIO()
-        pkgMem.write(pkgData)
+        # If we still need to read stuff, decode it as it arrives instead of
+        # keeping the whole package in memory
+        decoder = DEncode.StreamDecoder()
+        decodeError = self.__feedDecoder(decoder, pkgData)
+        self.byteStream = ""
         # Receive while there's still data to be received
         while readSize < pkgSize:
           retVal = self._read(pkgSize - readSize, skipReadyCheck=True)
@@ -237,22 +257,24 @@ class BaseTransport(object):
           if not retVal['Value']:
             return S_ERROR("Peer closed connection")
           rcvData = retVal['Value']
+          if readSize + len(rcvData) > pkgSize:
+            self.byteStream = rcvData[pkgSize - readSize:]
+            rcvData = rcvData[:pkgSize - readSize]
           readSize += len(rcvData)
-          pkgMem.write(rcvData)
+          # Keep reading the package even if it can't be decoded, not to mess up the stream
+          if not decodeError:
+            decodeError = self.__feedDecoder(decoder, rcvData)
           if maxBufferSize and readSize > maxBufferSize:
             return S_ERROR("Read limit exceeded (%s chars)" % maxBufferSize)
-        # Data is here! take it out from the bytestream, dencode and return
-        if readSize == pkgSize:
-          data = pkgMem.getvalue()
-          self.byteStream = ""
-        else:  # readSize > pkgSize:
-          pkgMem.seek(0, 0)
-          data = pkgMem.read(pkgSize)
-          self.byteStream = pkgMem.read()
-      try:
-        data = DEncode.decode(data)[0]
-      except Exception as e:
-        return S_ERROR("Could not decode received data: %s" % str(e))
+        # Data is here! take it out from the decoder and return
+        if not decodeError:
+          try:
+            data = decoder.finish()[0]
+          except Exception as e:
+            decodeError = str(e)
+        if decodeError:
+          return S_ERROR("Could not decode received data: %s" % decodeError)
+      self.__streamInSync = True
       if idleReceive:
         self.receivedMessages.append(data)
         return S_OK()
@@ -261,6 +283,18 @@ class BaseTransport(object):
       gLogger.exception("Network error while receiving data")
       return S_ERROR("Network error while receiving data: %s" % str(e))
 
+  @staticmethod
+  def __feedDecoder(decoder, data):
+    """ Feed received data to a DEncode.StreamDecoder
+
+        :returns: the decoding error message, or None if everything went fine
+    """
+    try:
+      decoder.feed(data)
+    except Exception as e:
+      return str(e)
+    return None
+
   def __processKeepAlive(self, maxBufferSize, blockAfterKeepAlive=True):
     gLogger.debug("Received Keep Alive")
     # Next message down the stream will be the ka data
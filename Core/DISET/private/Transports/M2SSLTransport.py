@@ -10,8 +10,11 @@ import socket
 from M2Crypto import SSL, threading as M2Threading
 
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
+from DIRAC.Core.Security import Locations
 from DIRAC.Core.DISET.private.Transports.BaseTransport import BaseTransport
 from DIRAC.Core.DISET.private.Transports.SSL.M2Utils import getM2SSLContext, getM2PeerInfo
+from DIRAC.Core.DISET.private.Transports.SSL.PeerCredentialsCache import gPeerCredentialsCache
+from DIRAC.Core.DISET.private.Transports.SSL.ClientSessionCache import ClientSessionCache
 
 # TODO: For now we have to set an environment variable for proxy support in OpenSSL
 # Eventually we may need to add API support for this to M2Crypto...
@@ -27,6 +30,11 @@ M2Threading.init()
 
 # TODO: Log useful messages to the logger
 
+# SSL sessions of the client connections, resumed by the next connections to the same
+# server with the same credentials to skip the full handshake
+# (host, port, credentials file, modification time of the file) -> M2Crypto.SSL.Session
+gClientSessions = ClientSessionCache()
+
 
 class SSLTransport(BaseTransport):
   """ SSL Transport implementaiton using the M2Crypto library. """
@@ -59,6 +67,26 @@ class SSLTransport(BaseTransport):
     self.__kwargs = kwargs
     BaseTransport.__init__(self, *args, **kwargs)
 
+  def __getSessionKey(self):
+    """ Key of the client sessions to resume, or None if sessions should not be resumed.
+        A renewed proxy in the same file must not resume the session of the previous one,
+        the server would not see the new credentials.
+    """
+    if not self.__kwargs.get('enableSessions', True):
+      return None
+    if self.__kwargs.get('useCertificates', False):
+      certKeyTuple = Locations.getHostCertificateAndKeyLocation()
+      credentialsLocation = certKeyTuple[0] if certKeyTuple else None
+    else:
+      credentialsLocation = self.__kwargs.get('proxyLocation') or Locations.getProxyLocation()
+    if not credentialsLocation:
+      return None
+    try:
+      modificationTime = os.stat(credentialsLocation).st_mtime
+    except OSError:
+      return None
+    return self.stServerAddress[0], self.stServerAddress[1], credentialsLocation, modificationTime
+
   def setSocketTimeout(self, timeout):
     """ Set the timeout for socket operations.
         The timeout parameter is in seconds (float).
@@ -89,9 +117,18 @@ class SSLTransport(BaseTransport):
         # set SNI server name since we know it at this point
         self.oSocket.set_tlsext_host_name(host)
 
+        # Offer the session of a previous connection, the server will resume it if it still knows it
+        sessionKey = self.__getSessionKey()
+        session = gClientSessions.get(sessionKey) if sessionKey else None
+        if session is not None:
+          self.oSocket.set_session(session)
+
         self.oSocket.connect((host, port))
         self.remoteAddress = self.oSocket.getpeername()
 
+        if sessionKey:
+          gClientSessions.set(sessionKey, self.oSocket.get_session())
+
         return S_OK()
       except socket.error as e:
         # Other exception are probably SSL-related, in that case we
@@ -146,6 +183,8 @@ class SSLTransport(BaseTransport):
     if not self.serverMode():
       raise RuntimeError("SSLTransport is in client mode.")
     self.__ctx = getM2SSLContext(self.__ctx, **self.__kwargs)
+    # The CAs may have changed, verify the chains again
+    gPeerCredentialsCache.purge()
     return S_OK()
 
   def handshake(self):
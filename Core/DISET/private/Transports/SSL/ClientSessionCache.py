@@ -0,0 +1,47 @@
+""" Cache of the SSL sessions of the client connections
+
+    The session of a connection is offered by the next connection to the same server with
+    the same credentials, to skip the full handshake. The keys include the modification time
+    of the credentials file, so each renewal of a proxy adds a new key: the cache keeps the
+    most recently used sessions only, and forgets the sessions older than their lifetime,
+    that the servers would not resume anyway.
+"""
+
+__RCSID__ = "$Id$"
+
+import collections
+import threading
+import time
+
+
+class ClientSessionCache(object):
+
+  def __init__(self, maxSize=100, lifetime=86400):
+    """ :param int maxSize: maximum number of sessions kept
+        :param int lifetime: seconds after which a session is not offered anymore
+    """
+    self.maxSize = maxSize
+    self.lifetime = lifetime
+    self.__lock = threading.Lock()
+    # key -> ( session, expiration time ), the least recently used first
+    self.__sessions = collections.OrderedDict()
+
+  def __len__(self):
+    return len(self.__sessions)
+
+  def get(self, key):
+    """ :returns: the session stored for the key, or None """
+    with self.__lock:
+      entry = self.__sessions.pop(key, None)
+      if not entry or entry[1] < time.time():
+        return None
+      self.__sessions[key] = entry
+      return entry[0]
+
+  def set(self, key, session):
+    """ Store the session of a connection, for the next connection with the same key """
+    with self.__lock:
+      self.__sessions.pop(key, None)
+      self.__sessions[key] = (session, time.time() + self.lifetime)
+      while len(self.__sessions) > self.maxSize:
+        self.__sessions.popitem(last=False)
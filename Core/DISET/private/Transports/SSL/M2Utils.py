@@ -8,6 +8,7 @@ from M2Crypto import SSL, m2
 
 from DIRAC.Core.Security import Locations
 from DIRAC.Core.Security.m2crypto.X509Chain import X509Chain
+from DIRAC.Core.DISET.private.Transports.SSL.PeerCredentialsCache import gPeerCredentialsCache
 
 # Default ciphers to use if unspecified
 # Cipher line should be as readable as possible, sorry pylint
@@ -67,6 +68,8 @@ def getM2SSLContext(ctx=None, **kwargs):
                               cipher format, e.g. "SSLv3:TLSv1".
         - sslCiphers: String, OpenSSL style cipher string of ciphers to allow
                               on this connection.
+        - SSLSessionTimeout: Integer, server mode only, seconds during which clients
+                             can resume their SSL session.
 
       If an existing context "ctx" is provided, it is just reconfigured with
       the selected arguments.
@@ -127,6 +130,11 @@ def getM2SSLContext(ctx=None, **kwargs):
   ciphers = kwargs.get('sslCiphers', DEFAULT_SSL_CIPHERS)
   ctx.set_cipher_list(ciphers)
 
+  # Resumed sessions skip the certificate verification
+  sessionTimeout = kwargs.get('SSLSessionTimeout', None)
+  if sessionTimeout and kwargs.get('bServerMode', False):
+    ctx.set_session_timeout(int(sessionTimeout))
+
   # log the debug messages
   # ctx.set_info_callback()
 
@@ -144,8 +152,16 @@ def getM2PeerInfo(conn):
          isLimitedProxy - Boolean, True if chain ends with limited proxy
          group - String, DIRAC group for this peer, if known
 
+      The details are cached for chains already seen, see PeerCredentialsCache.
+
       Returns a dict of details.
   """
+  certList = [conn.get_peer_cert()] + list(conn.get_peer_cert_chain() or [])
+  fingerprint = gPeerCredentialsCache.getFingerprint([cert.as_der() for cert in certList])
+  peer = gPeerCredentialsCache.get(fingerprint)
+  if peer:
+    return peer
+
   chain = X509Chain.generateX509ChainFromSSLConnection(conn)
   creds = chain.getCredentials()
   if not creds['OK']:
@@ -168,4 +184,8 @@ def getM2PeerInfo(conn):
     raise RuntimeError("Failed to get SSL peer isProxy (%s)." % isLimited['Message'])
   peer['isLimitedProxy'] = isLimited['Value']
 
+  remainingSecs = chain.getRemainingSecs()
+  if remainingSecs['OK']:
+    gPeerCredentialsCache.add(fingerprint, peer, remainingSecs['Value'])
+
   return peer
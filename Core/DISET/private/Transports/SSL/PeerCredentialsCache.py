@@ -0,0 +1,83 @@
+""" Cache of the credentials extracted from the certificate chains presented by the peers.
+
+    Extracting the credentials from a chain (DN, proxy type, DIRAC group...) is done at every
+    new connection, while the same clients connect over and over with the same proxy.
+    The credentials are cached keyed by the fingerprint of all the certificates the peer
+    presented, so a chain is only analysed once. Only chains the SSL layer verified
+    (or accepted, when the CA check is skipped) are looked up here.
+
+    Entries expire after /DIRAC/Security/PeerCredentialsCacheLifeTime seconds (0 disables
+    the cache), or when the chain expires, whichever comes first. The whole cache is
+    invalidated when the CAs and CRLs are reloaded, so that revocations are taken into account.
+"""
+
+__RCSID__ = "$Id$"
+
+import hashlib
+
+from DIRAC.Core.Utilities.DictCache import DictCache
+from DIRAC.ConfigurationSystem.Client.Config import gConfig
+
+
+class PeerCredentialsCache(object):
+
+  def __init__(self):
+    self.__cache = DictCache()
+    self.__hits = 0
+    self.__misses = 0
+    self.__adds = 0
+
+  @staticmethod
+  def getLifeTime():
+    return gConfig.getValue("/DIRAC/Security/PeerCredentialsCacheLifeTime", 300)
+
+  @staticmethod
+  def getFingerprint(derCertList):
+    """ Fingerprint of a chain
+
+        :param derCertList: list of the certificates of the chain, DER encoded
+        :returns: string
+    """
+    sha = hashlib.sha256()
+    for derCert in derCertList:
+      sha.update(hashlib.sha256(derCert).digest())
+    return sha.hexdigest()
+
+  def get(self, fingerprint):
+    """ Get the credentials of a chain
+
+        :param fingerprint: fingerprint of the chain, see getFingerprint
+        :returns: copy of the credentials dictionary, or None
+    """
+    credDict = self.__cache.get(fingerprint)
+    if credDict is None:
+      self.__misses += 1
+      return None
+    self.__hits += 1
+    return dict(credDict)
+
+  def add(self, fingerprint, credDict, remainingSecs):
+    """ Cache the credentials of a chain
+
+        :param fingerprint: fingerprint of the chain, see getFingerprint
+        :param credDict: credentials extracted from the chain
+        :param remainingSecs: seconds before the chain expires
+    """
+    lifeTime = min(self.getLifeTime(), remainingSecs)
+    if lifeTime <= 0:
+      return
+    self.__cache.add(fingerprint, lifeTime, dict(credDict))
+    # Expired entries are only removed when looked up, clean the ones of the peers that did not come back
+    self.__adds += 1
+    if self.__adds % 1000 == 0:
+      self.__cache.purgeExpired()
+
+  def purge(self):
+    """ Forget all the credentials, e.g. because the CRLs changed """
+    self.__cache.purgeAll()
+
+  def getStats(self):
+    return {'hits': self.__hits, 'misses': self.__misses, 'size': len(self.__cache.getKeys())}
+
+
+gPeerCredentialsCache = PeerCredentialsCache()
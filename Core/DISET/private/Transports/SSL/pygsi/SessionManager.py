@@ -3,26 +3,33 @@ __RCSID__ = "$Id$"
 
 import GSI
 
+from DIRAC.Core.DISET.private.Transports.SSL.ClientSessionCache import ClientSessionCache
+
 class SessionManager:
 
   def __init__( self ):
-    self.sessionsDict = {}
+    self.sessionsCache = ClientSessionCache()
 
   def __generateSession( self ):
     return GSI.SSL.Session()
 
   def get( self, sessionId ):
-    if sessionId not in self.sessionsDict:
-      self.sessionsDict[ sessionId ] = self.__generateSession()
-    return self.sessionsDict[ sessionId ]
+    session = self.sessionsCache.get( sessionId )
+    if session is None:
+      session = self.__generateSession()
+      self.sessionsCache.set( sessionId, session )
+    return session
 
   def isValid( self, sessionId ):
-    return sessionId in self.sessionsDict and self.sessionsDict[ sessionId ].valid()
+    session = self.sessionsCache.get( sessionId )
+    return session is not None and session.valid()
 
   def free( self, sessionId ):
-    self.sessionsDict[ sessionId ].free()
+    session = self.sessionsCache.get( sessionId )
+    if session is not None:
+      session.free()
 
   def set( self, sessionId, sessionObject ):
-    self.sessionsDict[ sessionId ] = sessionObject
+    self.sessionsCache.set( sessionId, sessionObject )
 
-gSessionManager = SessionManager()
\ No newline at end of file
+gSessionManager = SessionManager()
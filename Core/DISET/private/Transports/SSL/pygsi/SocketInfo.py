@@ -13,6 +13,7 @@ from DIRAC.Core.Utilities.LockRing import LockRing
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 from DIRAC.Core.Security import Locations
 from DIRAC.Core.Security.pygsi.X509Chain import X509Chain
+from DIRAC.Core.DISET.private.Transports.SSL.PeerCredentialsCache import gPeerCredentialsCache
 
 # pylint: disable=line-too-long
 DEFAULT_SSL_CIPHERS = "ECDH+AESGCM:DH+AESGCM:ECDH+AES256:DH+AES256:ECDH+AES128:DH+AES:ECDH+3DES:DH+3DES:RSA+AESGCM:RSA+AES:RSA+3DES:!aNULL:!MD5:!DSS"  # noqa
@@ -61,6 +62,18 @@ class SocketInfo:
     # Servers don't receive the whole chain, the last cert comes alone
     if not self.infoDict['clientMode']:
       certList.insert(0, self.sslSocket.get_peer_certificate())
+    # The same peers come back with the same chain, do not analyse it again
+    try:
+      fingerprint = gPeerCredentialsCache.getFingerprint([GSI.crypto.dump_certificate(GSI.crypto.FILETYPE_ASN1, cert)
+                                                          for cert in certList])
+    except Exception as e:
+      gLogger.debug("Cannot get the fingerprint of the peer chain", repr(e))
+      fingerprint = None
+    if fingerprint:
+      credDict = gPeerCredentialsCache.get(fingerprint)
+      if credDict:
+        self.infoDict['peerCredentials'] = credDict
+        return credDict
     peerChain = X509Chain(certList=certList)
     isProxyChain = peerChain.isProxy()['Value']
     isLimitedProxyChain = peerChain.isLimitedProxy()['Value']
@@ -83,6 +96,10 @@ class SocketInfo:
     diracGroup = peerChain.getDIRACGroup()
     if diracGroup['OK'] and diracGroup['Value']:
       credDict['group'] = diracGroup['Value']
+    if fingerprint:
+      remainingSecs = peerChain.getRemainingSecs()
+      if remainingSecs['OK']:
+        gPeerCredentialsCache.add(fingerprint, credDict, remainingSecs['Value'])
     self.infoDict['peerCredentials'] = credDict
     return credDict
 
@@ -196,6 +213,8 @@ class SocketInfo:
         SocketInfo.__cachedCAsCRLs = ([casDict[k][1] for k in casDict],
                                       [crlsDict[k] for k in crlsDict])
         SocketInfo.__cachedCAsCRLsLastLoaded = time.time()
+        # Credentials of chains that were revoked in the meantime must not be used anymore
+        gPeerCredentialsCache.purge()
     except BaseException:
       gLogger.exception("Failed to init CA store")
     finally:
@@ -92,6 +92,26 @@ class SocketInfoFactory(object):
         return S_ERROR("Can't connect: %s" % str((errno, os.strerror(errno))))
     return S_OK(osSocket)
 
+  def __getSessionId(self, socketInfo, hostAddress):
+    """ Id of the SSL sessions to a host with some credentials.
+        A renewed proxy in the same file must not resume the session of the previous one,
+        the server would not see the new credentials.
+    """
+    sessionHash = hashlib.md5()
+    sessionHash.update(str(hostAddress))
+    credentialsLocation = socketInfo.getLocalCredentialsLocation()
+    sessionHash.update("|%s" % str(credentialsLocation))
+    try:
+      sessionHash.update("|%s" % os.stat(credentialsLocation[0]).st_mtime)
+    except (OSError, TypeError):
+      pass
+    for key in ('proxyLocation', 'proxyString'):
+      if key in socketInfo.infoDict:
+        sessionHash.update("|%s" % str(socketInfo.infoDict[key]))
+    if 'proxyChain' in socketInfo.infoDict:
+      sessionHash.update("|%s" % socketInfo.infoDict['proxyChain'].dumpAllToString()['Value'])
+    return sessionHash.hexdigest()
+
   def __connect(self, socketInfo, hostAddress):
     # Connect baby!
     result = self.__socketConnect(hostAddress, socketInfo.infoDict['timeout'])
@@ -101,15 +121,7 @@ class SocketInfoFactory(object):
     # SSL MAGIC
     sslSocket = GSI.SSL.Connection(socketInfo.getSSLContext(), osSocket)
     # Generate sessionId
-    sessionHash = hashlib.md5()
-    sessionHash.update(str(hostAddress))
-    sessionHash.update("|%s" % str(socketInfo.getLocalCredentialsLocation()))
-    for key in ('proxyLocation', 'proxyString'):
-      if key in socketInfo.infoDict:
-        sessionHash.update("|%s" % str(socketInfo.infoDict[key]))
-    if 'proxyChain' in socketInfo.infoDict:
-      sessionHash.update("|%s" % socketInfo.infoDict['proxyChain'].dumpAllToString()['Value'])
-    sessionId = sessionHash.hexdigest()
+    sessionId = self.__getSessionId(socketInfo, hostAddress)
     socketInfo.sslContext.set_session_id(str(hash(sessionId)))
     socketInfo.setSSLSocket(sslSocket)
     if gSessionManager.isValid(sessionId):
@@ -151,9 +163,9 @@ class SocketInfoFactory(object):
     # Did the auth or the connection fail?
     if not retVal['OK']:
       return retVal
-    if 'enableSessions' in kwargs and kwargs['enableSessions']:
-      sessionId = hash(hostAddress)
-      gSessionManager.set(sessionId, sslSocket.get_session())
+    if socketInfo.infoDict.get('enableSessions'):
+      # Store the session under the id __connect looks for, so that the next connection resumes it
+      gSessionManager.set(self.__getSessionId(socketInfo, ipAddress), sslSocket.get_session())
     return S_OK(socketInfo)
 
   def getListeningSocket(self, hostAddress, listeningQueueSize=128, reuseAddress=True, **kwargs):
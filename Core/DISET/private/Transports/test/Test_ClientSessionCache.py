@@ -0,0 +1,28 @@
+""" Test the cache of the SSL sessions of the client connections """
+
+import time
+
+from DIRAC.Core.DISET.private.Transports.SSL.ClientSessionCache import ClientSessionCache
+
+
+def test_lru():
+  """ The least recently used sessions are forgotten first """
+  cache = ClientSessionCache(maxSize=2)
+  cache.set('a', 'sessionA')
+  cache.set('b', 'sessionB')
+  assert cache.get('a') == 'sessionA'
+  cache.set('c', 'sessionC')
+  assert len(cache) == 2
+  assert cache.get('b') is None
+  assert cache.get('a') == 'sessionA'
+  assert cache.get('c') == 'sessionC'
+
+
+def test_lifetime():
+  """ The sessions are not offered after their lifetime """
+  cache = ClientSessionCache(lifetime=0.05)
+  cache.set('a', 'sessionA')
+  assert cache.get('a') == 'sessionA'
+  time.sleep(0.1)
+  assert cache.get('a') is None
+  assert len(cache) == 0
@@ -0,0 +1,60 @@
+""" Test the cache of the credentials of the peers """
+
+from pytest import fixture
+
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.Core.Utilities.CFG import CFG
+from DIRAC.Core.DISET.private.Transports.SSL.PeerCredentialsCache import PeerCredentialsCache
+
+CREDENTIALS = {'DN': '/C=ch/O=DIRAC/OU=DIRAC CI/CN=ciuser', 'isProxy': True, 'group': 'dirac_user'}
+
+
+@fixture
+def credentialsCache():
+  """ Empty cache with the default configuration """
+  gConfigurationData.localCFG = CFG()
+  gConfigurationData.remoteCFG = CFG()
+  gConfigurationData.mergedCFG = CFG()
+  gConfigurationData.generateNewVersion()
+  yield PeerCredentialsCache()
+
+
+def test_fingerprint():
+  """ The fingerprint depends on all the certificates of the chain, in order """
+  fingerprint = PeerCredentialsCache.getFingerprint(['proxy', 'user'])
+  assert fingerprint == PeerCredentialsCache.getFingerprint(['proxy', 'user'])
+  assert fingerprint != PeerCredentialsCache.getFingerprint(['proxy'])
+  assert fingerprint != PeerCredentialsCache.getFingerprint(['user', 'proxy'])
+  assert fingerprint != PeerCredentialsCache.getFingerprint(['proxyuser'])
+
+
+def test_cache(credentialsCache):
+  """ Credentials are given back as copies """
+  fingerprint = PeerCredentialsCache.getFingerprint(['proxy', 'user'])
+  assert credentialsCache.get(fingerprint) is None
+  credentialsCache.add(fingerprint, CREDENTIALS, 3600)
+
+  credDict = credentialsCache.get(fingerprint)
+  assert credDict == CREDENTIALS
+  # The AuthManager adds information to the credentials of each connection
+  credDict['username'] = 'ciuser'
+  assert 'username' not in credentialsCache.get(fingerprint)
+  assert credentialsCache.getStats() == {'hits': 2, 'misses': 1, 'size': 1}
+
+  credentialsCache.purge()
+  assert credentialsCache.get(fingerprint) is None
+
+
+def test_expiredChain(credentialsCache):
+  """ Credentials of expired chains are not cached """
+  fingerprint = PeerCredentialsCache.getFingerprint(['proxy', 'user'])
+  credentialsCache.add(fingerprint, CREDENTIALS, 0)
+  assert credentialsCache.get(fingerprint) is None
+
+
+def test_disabled(credentialsCache):
+  """ The cache can be disabled from the configuration """
+  gConfigurationData.setOptionInCFG('/DIRAC/Security/PeerCredentialsCacheLifeTime', '0')
+  fingerprint = PeerCredentialsCache.getFingerprint(['proxy', 'user'])
+  credentialsCache.add(fingerprint, CREDENTIALS, 3600)
+  assert credentialsCache.get(fingerprint) is None
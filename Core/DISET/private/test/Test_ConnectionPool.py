@@ -0,0 +1,116 @@
+""" Test the ConnectionPool keeping client connections open between RPC calls """
+
+import os
+import socket
+import time
+
+from pytest import fixture
+
+from DIRAC.Core.DISET.private.Transports.PlainTransport import PlainTransport
+from DIRAC.Core.DISET.private.ConnectionPool import ConnectionPool
+from DIRAC.Core.DISET.private.BaseClient import BaseClient
+
+
+KEY = ('dip://server:9135/Framework/Dummy', False, None, None, False, 600, '')
+
+
+@fixture
+def connectedTransports():
+  """ Client transport connected to a peer socket """
+  clientSocket, serverSocket = socket.socketpair()
+  transport = PlainTransport(("server", 9135))
+  transport.oSocket = clientSocket
+  yield transport, serverSocket
+  clientSocket.close()
+  serverSocket.close()
+
+
+def test_reuse(connectedTransports):
+  """ A parked connection is given back for the same key only """
+  transport, _serverSocket = connectedTransports
+  pool = ConnectionPool()
+  assert pool.get(KEY) is None
+  pool.put(KEY, transport, 60)
+  assert pool.get(KEY[:-1] + ('hosts',)) is None
+  assert pool.get(KEY) is transport
+  # Only one call at a time on a connection
+  assert pool.get(KEY) is None
+  assert pool.getStats()['reused'] == 1
+
+
+def test_expired(connectedTransports):
+  """ Connections the service already closed are not given back """
+  transport, _serverSocket = connectedTransports
+  pool = ConnectionPool()
+  pool.put(KEY, transport, 0.01)
+  time.sleep(0.02)
+  assert pool.get(KEY) is None
+  assert pool.getStats()['discarded'] == 1
+
+
+def test_maxAge(connectedTransports):
+  """ Old connections are not reused, even if used recently """
+  transport, _serverSocket = connectedTransports
+  pool = ConnectionPool(maxAge=0)
+  pool.put(KEY, transport, 60)
+  assert pool.get(KEY) is None
+
+
+def test_closedByPeer(connectedTransports):
+  """ Connections closed by the service, or with unexpected data, are not given back """
+  transport, serverSocket = connectedTransports
+  pool = ConnectionPool()
+  pool.put(KEY, transport, 60)
+  serverSocket.close()
+  assert pool.get(KEY) is None
+
+
+def test_maxIdlePerKey():
+  """ Connections beyond the limit are closed """
+  pool = ConnectionPool(maxIdlePerKey=1)
+  sockets = []
+  for _i in range(2):
+    clientSocket, serverSocket = socket.socketpair()
+    sockets.append(serverSocket)
+    transport = PlainTransport(("server", 9135))
+    transport.oSocket = clientSocket
+    pool.put(KEY, transport, 60)
+  stats = pool.getStats()
+  assert stats['idle'] == 1
+  assert stats['discarded'] == 1
+  pool.discard(KEY)
+  assert pool.getStats()['idle'] == 0
+
+
+def test_outOfSync(connectedTransports):
+  """ Connections which did not receive a whole message are not parked """
+  transport, serverSocket = connectedTransports
+  pool = ConnectionPool()
+  serverSocket.sendall('%d:%s' % (len('i1e'), 'i1e'))
+  assert transport.receiveData() == 1
+  pool.put(KEY, transport, 60)
+  assert pool.get(KEY) is transport
+
+  # The peer goes away in the middle of a message
+  serverSocket.sendall('10:i1')
+  serverSocket.close()
+  assert not transport.receiveData()['OK']
+  assert not transport.isStreamInSync()
+  pool.put(KEY, transport, 60)
+  assert pool.getStats()['idle'] == 0
+
+
+def test_renewedProxy(tmpdir):
+  """ The connections opened with a proxy are not reused once it is renewed in place """
+  proxyFile = tmpdir.join('proxy')
+  proxyFile.write('proxy')
+  client = BaseClient.__new__(BaseClient)
+  client.kwargs = {BaseClient.KW_PROXY_LOCATION: str(proxyFile)}
+  client.serviceURL = 'dips://server:9135/Framework/Dummy'
+  client.timeout = 600
+  client._BaseClient__useCertificates = False
+  client._BaseClient__extraCredentials = ''
+  key = client._BaseClient__getConnectionKey()
+  assert client._BaseClient__getConnectionKey() == key
+  os.utime(str(proxyFile), (time.time() + 10, time.time() + 10))
+  assert client._BaseClient__getConnectionKey() != key
@@ -0,0 +1,92 @@
+""" Test the ConnectionWatcher waiting for data on client connections """
+
+import socket
+import threading
+
+from pytest import fixture
+
+from DIRAC.Core.DISET.private.Transports.PlainTransport import PlainTransport
+from DIRAC.Core.DISET.private.ConnectionWatcher import ConnectionWatcher
+
+
+class Callbacks(object):
+  """ Record the callbacks of the watcher """
+
+  def __init__(self):
+    self.ready = []
+    self.expired = []
+    self.event = threading.Event()
+
+  def readyCallback(self, transport, data):
+    self.ready.append((transport, data))
+    self.event.set()
+
+  def expiredCallback(self, transport, data):
+    self.expired.append((transport, data))
+    self.event.set()
+
+
+@fixture
+def connectedTransports():
+  """ Server transport connected to a client socket """
+  serverSocket, clientSocket = socket.socketpair()
+  transport = PlainTransport(("", 9135))
+  transport.oSocket = serverSocket
+  yield transport, clientSocket
+  serverSocket.close()
+  clientSocket.close()
+
+
+def test_ready(connectedTransports):
+  """ The connection is given back when the client sends something """
+  transport, clientSocket = connectedTransports
+  callbacks = Callbacks()
+  watcher = ConnectionWatcher(callbacks.readyCallback, callbacks.expiredCallback)
+  watcher.add(transport, 60, 'data')
+  assert len(watcher) == 1
+  assert not callbacks.event.wait(0.1)
+
+  clientSocket.send("10:")
+  assert callbacks.event.wait(5)
+  assert callbacks.ready == [(transport, 'data')]
+  assert not callbacks.expired
+  assert len(watcher) == 0
+
+
+def test_bufferedData(connectedTransports):
+  """ Data already read by the transport does not need to wait for the socket """
+  transport, _clientSocket = connectedTransports
+  transport.byteStream = "10:"
+  callbacks = Callbacks()
+  watcher = ConnectionWatcher(callbacks.readyCallback, callbacks.expiredCallback)
+  watcher.add(transport, 60)
+  assert callbacks.event.wait(5)
+  assert callbacks.ready == [(transport, None)]
+
+
+def test_expired(connectedTransports):
+  """ The connection is given back when the client did not send anything in time """
+  transport, _clientSocket = connectedTransports
+  callbacks = Callbacks()
+  watcher = ConnectionWatcher(callbacks.readyCallback, callbacks.expiredCallback)
+  watcher.add(transport, 0)
+  assert callbacks.event.wait(5)
+  assert callbacks.expired == [(transport, None)]
+  assert not callbacks.ready
+
+
+def test_groups(connectedTransports):
+  """ The connections of a group are counted until they are given back """
+  transport, clientSocket = connectedTransports
+  callbacks = Callbacks()
+  watcher = ConnectionWatcher(callbacks.readyCallback, callbacks.expiredCallback)
+  watcher.add(transport, 60, group='Idle')
+  assert watcher.count('Idle') == 1
+  assert watcher.count(None) == 0
+  # Watching it again does not count it twice
+  watcher.add(transport, 60, group='Idle')
+  assert watcher.count('Idle') == 1
+
+  clientSocket.send("10:")
+  assert callbacks.event.wait(5)
+  assert watcher.count('Idle') == 0
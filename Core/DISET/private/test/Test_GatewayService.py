@@ -0,0 +1,25 @@
+""" Test the handling of the proposals by the gateway
+"""
+
+# pylint: disable=protected-access
+
+from mock import MagicMock, call
+
+from DIRAC import S_OK
+from DIRAC.Core.DISET.private.GatewayService import GatewayService
+
+
+def test_keepConnection():
+  """ The gateway does not grant keepConnection, the connection is closed after the call """
+  gateway = GatewayService.__new__(GatewayService)
+  gateway._transportPool = MagicMock()
+  gateway._transportPool.send.return_value = S_OK()
+  gateway._executeAction = MagicMock(return_value=S_OK())
+  proposalTuple = (('Framework/Dummy', 'Setup', 'vo'), ('RPC', 'echo'), None, {'keepConnection': True})
+
+  result = gateway._processProposal(1, proposalTuple, {})
+
+  assert gateway._transportPool.send.call_args_list == [call(1, S_OK())]
+  assert result['OK']
+  assert result['closeTransport']
+  assert not result['keepConnection']
@@ -0,0 +1,94 @@
+""" Test the batches of RPC calls of the InnerRPCClient
+"""
+
+# pylint: disable=protected-access
+
+from mock import MagicMock
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.DISET.RPCClient import RPCBatch
+from DIRAC.Core.DISET.private.InnerRPCClient import InnerRPCClient
+
+
+def getClient(executeAction):
+  """ InnerRPCClient that does not connect anywhere """
+  client = InnerRPCClient.__new__(InnerRPCClient)
+  client._getBaseStub = MagicMock(return_value=('Framework/Dummy', {}))
+  client._InnerRPCClient__executeAction = executeAction
+  return client
+
+
+def test_executeBatch():
+  """ The calls are sent in one batch, proposing the methods they call """
+  executeAction = MagicMock(side_effect=lambda action, calls, stub: S_OK([S_OK(args) for _method, args in calls]))
+  client = getClient(executeAction)
+
+  result = client.executeBatch([('echo', [1]), ('ping', ()), ('echo', (2,))])
+
+  assert result['OK']
+  assert result['Value'] == [S_OK((1,)), S_OK(()), S_OK((2,))]
+  assert executeAction.call_count == 1
+  assert executeAction.call_args[0][0] == ('BatchRPC', 'echo,ping')
+
+
+def test_executeBatchSplit():
+  """ Batches calling many methods are split, and the results kept in order """
+  executeAction = MagicMock(side_effect=lambda action, calls, stub: S_OK([S_OK(method) for method, _args in calls]))
+  client = getClient(executeAction)
+  methods = ['method%03d' % i for i in range(200)]
+
+  result = client.executeBatch([(method, ()) for method in methods])
+
+  assert result['OK']
+  assert [res['Value'] for res in result['Value']] == methods
+  assert executeAction.call_count > 1
+  for call in executeAction.call_args_list:
+    assert len(call[0][0][1]) <= InnerRPCClient.MAX_BATCH_METHODS_LENGTH
+
+
+def test_executeBatchFallback():
+  """ Services not supporting batches get the calls one by one """
+  executeAction = MagicMock(return_value=S_ERROR("BatchRPC is not a known action type"))
+  client = getClient(executeAction)
+  client.executeRPC = MagicMock(side_effect=lambda method, args: S_OK(args))
+
+  result = client.executeBatch([('echo', (1,)), ('echo', (2,))])
+
+  assert result['OK']
+  assert result['Value'] == [S_OK((1,)), S_OK((2,))]
+  assert client.executeRPC.call_count == 2
+
+
+def test_executeBatchError():
+  """ If the batch cannot be sent, the error is returned """
+  client = getClient(MagicMock(return_value=S_ERROR("Unauthorized query")))
+
+  assert not client.executeBatch([('echo', (1,))])['OK']
+
+
+def test_rpcBatch():
+  """ Calls made on a batch are only sent when leaving the context """
+  rpcClient = MagicMock()
+  rpcClient.executeBatch.return_value = S_OK([S_OK(1), S_OK(2)])
+
+  with RPCBatch(rpcClient) as batch:
+    assert batch.echo(1) == 0
+    assert batch.setJobStatus(2, 'Done') == 1
+    rpcClient.executeBatch.assert_not_called()
+
+  rpcClient.executeBatch.assert_called_once_with([('echo', (1,)), ('setJobStatus', (2, 'Done'))])
+  assert batch.results['Value'] == [S_OK(1), S_OK(2)]
+
+
+def test_rpcBatchException():
+  """ Nothing is sent if recording the calls failed """
+  rpcClient = MagicMock()
+  try:
+    with RPCBatch(rpcClient) as batch:
+      batch.echo(1)
+      raise ValueError()
+  except ValueError:
+    pass
+
+  rpcClient.executeBatch.assert_not_called()
+  assert batch.results is None
@@ -0,0 +1,182 @@
+""" Per statement instrumentation of the database queries
+
+    The statements executed through the MySQL class are recorded by gDBProfiler,
+    aggregated by database, statement fingerprint (the statement with its values
+    replaced by ?) and calling DIRAC method. For each of them the profile keeps
+    the number of executions and errors, the total and maximum latency, the number
+    of rows returned or affected and a latency histogram.
+
+    The profiling is off by default: it is enabled for a database, for all its
+    statements or a random fraction of them, by its QueryProfileSampling option.
+    With a fraction, the counts are those of the statements sampled.
+
+    The profile of a service process is returned by its getDBProfile action, and
+    can be dumped periodically in the logs (see the QueryProfileDumpPeriod option
+    of the databases).
+"""
+
+__RCSID__ = "$Id$"
+
+import os
+import random
+import re
+import sys
+import threading
+
+from DIRAC.FrameworkSystem.Client.Logger import gLogger
+
+# Upper bounds of the latency histogram bins, in seconds
+HISTOGRAM_BOUNDS = (0.001, 0.01, 0.1, 1., 10.)
+HISTOGRAM_LABELS = ('<1ms', '<10ms', '<100ms', '<1s', '<10s', '>=10s')
+
+# A string cut by the truncation of the statement ends it
+_stringRE = re.compile(r"'(?:[^'\\]|\\.)*(?:'|\\?$)|\"(?:[^\"\\]|\\.)*(?:\"|\\?$)")
+_numberRE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_listRE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_rowsRE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_spacesRE = re.compile(r"\s+")
+
+
+def getFingerprint(cmd, maxLength=1024):
+  """ Normalized form of a statement: values are replaced by ?, lists of values and
+      the rows of multi-row INSERTs are collapsed, so that all the executions of the
+      same statement have the same fingerprint
+
+      :param str cmd: SQL statement
+      :param int maxLength: the fingerprint is truncated to this length, the statement
+                            is truncated to 4 times that length before being normalized
+      :returns: str
+  """
+  fingerprint = _stringRE.sub('?', cmd[:4 * maxLength])
+  fingerprint = _numberRE.sub('?', fingerprint)
+  fingerprint = _listRE.sub('(...)', fingerprint)
+  fingerprint = _rowsRE.sub('(...), ...', fingerprint)
+  fingerprint = _spacesRE.sub(' ', fingerprint).strip()
+  return fingerprint[:maxLength]
+
+
+class DBProfiler(object):
+
+  def __init__(self, maxStatements=1000):
+    """
+      :param int maxStatements: maximum number of (db, fingerprint, caller) entries,
+                                the statements beyond are accounted together
+    """
+    self.log = gLogger.getSubLogger("DBProfiler")
+    self.__maxStatements = maxStatements
+    self.__lock = threading.Lock()
+    # dbName -> fraction of its statements recorded, the other databases are not profiled
+    self.__sampling = {}
+    # ( dbName, fingerprint, caller ) -> [ count, errors, totalTime, maxTime, rows, histogram ]
+    self.__statements = {}
+    # Files of the DB layer, the caller is the first frame outside of them
+    self.__ignoredFiles = set([os.path.splitext(__file__)[0]])
+
+  def setSampling(self, dbName, sampling):
+    """ Profile the statements of a database
+
+        :param str dbName: name of the database
+        :param float sampling: fraction of the statements recorded, 1 for all of them, 0 for none
+    """
+    with self.__lock:
+      if sampling > 0:
+        self.__sampling[dbName] = min(1., float(sampling))
+      else:
+        self.__sampling.pop(dbName, None)
+
+  def isEnabled(self, dbName):
+    """ :returns: whether the statements of the database are profiled """
+    return dbName in self.__sampling
+
+  def ignoreCallerFile(self, fileName):
+    """ Do not consider the functions of this file as callers, e.g. the DB base classes
+
+        :param str fileName: __file__ of a module
+    """
+    self.__ignoredFiles.add(os.path.splitext(fileName)[0])
+
+  def getCaller(self):
+    """ :returns: 'Module.function' of the first frame outside of the DB layer """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame:
+      fileName = os.path.splitext(frame.f_code.co_filename)[0]
+      if fileName not in self.__ignoredFiles:
+        return "%s.%s" % (os.path.basename(fileName), frame.f_code.co_name)
+      frame = frame.f_back
+    return 'Unknown'
+
+  def record(self, dbName, cmd, elapsedTime, rows=0, error=False):
+    """ Account a statement execution
+
+        :param str dbName: name of the database
+        :param str cmd: SQL statement
+        :param float elapsedTime: seconds it took
+        :param int rows: number of rows returned or affected
+        :param bool error: whether the execution failed
+    """
+    sampling = self.__sampling.get(dbName)
+    if not sampling or (sampling < 1 and random.random() >= sampling):
+      return
+    key = (dbName, getFingerprint(cmd), self.getCaller())
+    with self.__lock:
+      data = self.__statements.get(key)
+      if data is None:
+        if len(self.__statements) >= self.__maxStatements:
+          key = (dbName, 'Other statements', 'Unknown')
+          data = self.__statements.get(key)
+        if data is None:
+          data = [0, 0, 0., 0., 0, [0] * len(HISTOGRAM_LABELS)]
+          self.__statements[key] = data
+      data[0] += 1
+      if error:
+        data[1] += 1
+      data[2] += elapsedTime
+      data[3] = max(data[3], elapsedTime)
+      data[4] += rows or 0
+      for iBin, bound in enumerate(HISTOGRAM_BOUNDS):
+        if elapsedTime < bound:
+          break
+      else:
+        iBin = len(HISTOGRAM_BOUNDS)
+      data[5][iBin] += 1
+
+  def getProfile(self, dbName=None, limit=None):
+    """ Get the statistics of the statements, the most expensive first
+
+        :param str dbName: only the statements of this database
+        :param int limit: only the limit most expensive statements
+        :returns: list of dictionaries
+    """
+    with self.__lock:
+      items = [(key, list(data[:5]) + [list(data[5])]) for key, data in self.__statements.iteritems()
+               if dbName is None or key[0] == dbName]
+    items.sort(key=lambda item: item[1][2], reverse=True)
+    if limit:
+      items = items[:limit]
+    profile = []
+    for (db, fingerprint, caller), (count, errors, totalTime, maxTime, rows, histogram) in items:
+      profile.append({'DB': db,
+                      'Statement': fingerprint,
+                      'Caller': caller,
+                      'Count': count,
+                      'Errors': errors,
+                      'TotalTime': totalTime,
+                      'AverageTime': totalTime / count,
+                      'MaxTime': maxTime,
+                      'Rows': rows,
+                      'Histogram': dict(zip(HISTOGRAM_LABELS, histogram))})
+    return profile
+
+  def reset(self):
+    with self.__lock:
+      self.__statements = {}
+
+  def dump(self, dbName=None, limit=10):
+    """ Log the most expensive statements """
+    for entry in self.getProfile(dbName, limit):
+      self.log.info("%(DB)s %(Caller)s" % entry,
+                    "%(Count)s calls, %(Errors)s errors, %(TotalTime).3fs total, %(AverageTime).4fs average, "
+                    "%(MaxTime).3fs max, %(Rows)s rows: %(Statement)s" % entry)
+
+
+gDBProfiler = DBProfiler()
@@ -375,6 +375,267 @@ g_dEncodeFunctions[types.DictType] = encodeDict
 g_dDecodeFunctions["d"] = decodeDict
 
 
+# Marker for a dictionary frame waiting for its next key
+_noKey = object()
+
+
+def _decodeStream(data, i, stack, final):
+  """ Non recursive decoding loop shared by :func:`decode` and :class:`StreamDecoder`.
+
+      Instead of dispatching recursively through g_dDecodeFunctions, it keeps the
+      containers being built in an explicit stack, so the decoding can be suspended
+      at any token boundary and resumed once more data is available. The input is
+      never re-sliced: only the bytes of ints, floats and strings are copied out.
+
+      :param data: string holding the encoded data
+      :param i: position of the first token to decode
+      :param stack: list of partially decoded containers [kind, container, key], updated in place
+      :param final: if True, no more data will come after data
+
+      :returns: tuple (done, value, position, needed). If done, value is the decoded object
+                and position the index after its last character. Otherwise, position is the
+                start of the first incomplete token and needed the length data must reach
+                before it is worth retrying.
+  """
+  dataLen = len(data)
+  # Local names are much faster to look up than globals and builtins
+  find = data.find
+  noKey = _noKey
+  toInt = int
+  # The innermost container is kept in local variables, the outer ones in the stack
+  if stack:
+    kind, cont, key = stack.pop()
+  else:
+    kind, cont, key = None, None, noKey
+  needed = 0
+  while True:
+    try:
+      token = data[i]
+    except IndexError:
+      needed = dataLen + 1
+      break
+    if token == 's':
+      colon = find(':', i + 1)
+      if colon == -1:
+        needed = dataLen + 1
+        break
+      end = colon + 1 + toInt(data[i + 1:colon])
+      if end > dataLen and not final:
+        needed = end
+        break
+      value = data[colon + 1:end]
+      i = end
+    elif token == 'e':
+      if kind is None or kind == 'z':
+        raise ValueError("Unexpected end of container at position %s" % i)
+      if kind == 'd':
+        if key is not noKey:
+          raise ValueError("Missing value for key %r at position %s" % (key, i))
+        value = cont
+      elif kind == 't':
+        value = tuple(cont)
+      else:
+        value = cont
+      if stack:
+        kind, cont, key = stack.pop()
+      else:
+        kind, cont, key = None, None, noKey
+      i += 1
+    elif token == 'i':
+      end = find('e', i + 1)
+      if end == -1:
+        needed = dataLen + 1
+        break
+      value = toInt(data[i + 1:end])
+      i = end + 1
+    elif token == 'd' or token == 'l' or token == 't':
+      if kind is not None:
+        stack.append([kind, cont, key])
+      kind, key = token, noKey
+      cont = {} if token == 'd' else []
+      i += 1
+      continue
+    elif token == 'b':
+      if i + 1 >= dataLen:
+        needed = i + 2
+        break
+      value = data[i + 1] != '0'
+      i += 2
+    elif token == 'n':
+      value = None
+      i += 1
+    elif token == 'u':
+      colon = find(':', i + 1)
+      if colon == -1:
+        needed = dataLen + 1
+        break
+      end = colon + 1 + toInt(data[i + 1:colon])
+      if end > dataLen and not final:
+        needed = end
+        break
+      value = unicode(data[colon + 1:end], 'utf-8')
+      i = end
+    elif token == 'I':
+      end = find('e', i + 1)
+      if end == -1:
+        needed = dataLen + 1
+        break
+      value = long(data[i + 1:end])
+      i = end + 1
+    elif token == 'f':
+      end = find('e', i + 1)
+      # The exponent sign can only be checked once the character after the 'e' is there
+      if end == -1 or (end + 1 == dataLen and not final):
+        needed = dataLen + 1
+        break
+      if end + 1 < dataLen and data[end + 1] in ('+', '-'):
+        expEnd = find('e', end + 1)
+        if expEnd == -1:
+          needed = dataLen + 1
+          break
+        value = float(data[i + 1:end]) * 10 ** int(data[end + 1:expEnd])
+        i = expEnd + 1
+      else:
+        value = float(data[i + 1:end])
+        i = end + 1
+    elif token == 'z':
+      if i + 1 >= dataLen:
+        needed = i + 2
+        break
+      if kind is not None:
+        stack.append([kind, cont, key])
+      # For datetimes, the container is the type of object to build from the next tuple
+      kind, cont, key = 'z', data[i + 1], noKey
+      i += 2
+      continue
+    elif final and token in g_dDecodeFunctions:
+      # Types registered by someone else than this module
+      value, i = g_dDecodeFunctions[token](data, i)
+    else:
+      raise KeyError(token)
+
+    # Attach the value to the innermost container, if any
+    while True:
+      if kind == 'd':
+        if key is noKey:
+          key = value
+        else:
+          cont[key] = value
+          key = noKey
+      elif kind == 'l' or kind == 't':
+        cont.append(value)
+      elif kind is None:
+        return (True, value, i, 0)
+      else:
+        # Datetime: the value is the tuple with its fields, and is then attached to the parent
+        if cont == 'a':
+          value = datetime.datetime(*value)
+        elif cont == 'd':
+          value = datetime.date(*value)
+        elif cont == 't':
+          value = datetime.time(*value)
+        else:
+          raise Exception("Unexpected type %s while decoding a datetime object" % cont)
+        if stack:
+          kind, cont, key = stack.pop()
+        else:
+          kind, cont, key = None, None, noKey
+        continue
+      break
+
+  # Not enough data to decode the next token
+  if final:
+    raise ValueError("Unexpected end of data at position %s" % i)
+  if kind is not None:
+    stack.append([kind, cont, key])
+  return (False, None, i, needed)
+
+
+class StreamDecoder(object):
+  """ Incremental decoder: the encoded data is fed chunk by chunk, as it arrives
+      from the network, and decoded as soon as the chunks are received. This avoids
+      concatenating the full message before decoding it.
+
+      Usage::
+
+        decoder = StreamDecoder()
+        for chunk in chunks:
+          decoder.feed(chunk)
+        value, length = decoder.finish()
+  """
+
+  def __init__(self):
+    self.__data = ""
+    self.__pos = 0
+    # Chunks not yet appended to self.__data
+    self.__pending = []
+    # Bytes available after self.__pos, including the pending chunks
+    self.__available = 0
+    # Bytes needed after self.__pos before the next token can be decoded
+    self.__needed = 1
+    # Bytes dropped from the beginning of self.__data
+    self.__consumed = 0
+    self.__stack = []
+    self.__done = False
+    self.__value = None
+    self.__length = 0
+
+  def feed(self, chunk):
+    """ Add a chunk of encoded data, and decode as much as possible.
+
+        :param chunk: string, buffer, bytearray or memoryview with the next bytes of the data
+
+        :returns: True if the whole object has been decoded
+    """
+    if isinstance(chunk, (buffer, bytearray, memoryview)):
+      chunk = memoryview(chunk).tobytes()
+    if not chunk:
+      return self.__done
+    self.__pending.append(chunk)
+    self.__available += len(chunk)
+    if self.__done or self.__available < self.__needed:
+      return self.__done
+    self.__process(False)
+    return self.__done
+
+  def finish(self):
+    """ Signal that no more data will come, and return the decoded object
+
+        :returns: tuple (decoded object, length of its encoded form), like :func:`decode`
+    """
+    if not self.__done:
+      self.__process(True)
+    return (self.__value, self.__length)
+
+  def isDone(self):
+    """ True if the whole object has been decoded """
+    return self.__done
+
+  def getTrailingData(self):
+    """ Data received after the end of the decoded object """
+    if not self.__done:
+      return ""
+    return self.__data[self.__pos:] + "".join(self.__pending)
+
+  def __process(self, final):
+    """ Merge the pending chunks with what was left undecoded, and resume the decoding """
+    if self.__pending:
+      self.__consumed += self.__pos
+      self.__pending.insert(0, self.__data[self.__pos:])
+      self.__data = "".join(self.__pending)
+      self.__pos = 0
+      self.__pending = []
+    done, value, pos, needed = _decodeStream(self.__data, self.__pos, self.__stack, final)
+    self.__pos = pos
+    self.__available = len(self.__data) - pos
+    if done:
+      self.__done = True
+      self.__value = value
+      self.__length = self.__consumed + pos
+    else:
+      self.__needed = needed - pos
+
+
 # Encode function
 def encode(uObject):
   """ Generic encoding function """
@@ -389,14 +650,21 @@ def encode(uObject):
 
 
 def decode(data):
-  """ Generic decoding function """
+  """ Generic decoding function
+
+      :param data: encoded string
+
+      :returns: tuple (decoded object, length of its encoded form)
+  """
   if not data:
     return data
-  try:
-    # print "DECODE FUNCTION : %s" % g_dDecodeFunctions[ sStream [ iIndex ] ]
+  if DIRAC_DEBUG_DENCODE_CALLSTACK:
+    # Only the recursive functions know how to print the call stack
     return g_dDecodeFunctions[data[0]](data, 0)
-  except Exception:
-    raise
+  if isinstance(data, (buffer, bytearray, memoryview)):
+    data = memoryview(data).tobytes()
+  _done, value, length, _needed = _decodeStream(data, 0, [], True)
+  return (value, length)
 
 
 if __name__ == "__main__":
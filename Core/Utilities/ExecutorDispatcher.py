@@ -1,12 +1,15 @@
 """ Used by the executors for dispatching events (IIUC)
 """
 
+import heapq
+import itertools
 import threading
 import time
 
 from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.Core.Utilities.ReturnValues import isReturnStructure
 from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
+from DIRAC.Core.Utilities.ThreadExecutor import Histogram
 
 
 class ExecutorState(object):
@@ -19,20 +22,27 @@ class ExecutorState(object):
     self.__lock = threading.Lock()
     self.__typeToId = {}
     self.__maxTasks = {}
+    self.__minFreeSlots = {}
     self.__execTasks = {}
     self.__taskInExec = {}
 
   def _internals(self):
     return {'type2id': dict(self.__typeToId),
             'maxTasks': dict(self.__maxTasks),
+            'minFreeSlots': dict(self.__minFreeSlots),
             'execTasks': dict(self.__execTasks),
             'tasksInExec': dict(self.__taskInExec),
             'locked': self.__lock.locked()}  # pylint: disable=no-member
 
-  def addExecutor(self, eId, eTypes, maxTasks=1):
+  def addExecutor(self, eId, eTypes, maxTasks=1, batchTasks=False):
     self.__lock.acquire()
     try:
       self.__maxTasks[eId] = max(1, maxTasks)
+      # The executors taking several tasks per message get new tasks once half of their slots are free
+      if batchTasks:
+        self.__minFreeSlots[eId] = max(1, maxTasks // 2)
+      else:
+        self.__minFreeSlots[eId] = 1
       if eId not in self.__execTasks:
         self.__execTasks[eId] = set()
       if not isinstance(eTypes, (list, tuple)):
@@ -56,6 +66,7 @@ class ExecutorState(object):
         tasks.append(taskId)
       self.__execTasks.pop(eId)
       self.__maxTasks.pop(eId)
+      self.__minFreeSlots.pop(eId)
       return tasks
     finally:
       self.__lock.release()
@@ -78,6 +89,12 @@ class ExecutorState(object):
     except KeyError:
       return 0
 
+  def wantsTasks(self, eId):
+    try:
+      return self.freeSlots(eId) >= self.__minFreeSlots[eId]
+    except KeyError:
+      return False
+
   def getFreeExecutors(self, eType):
     execs = {}
     try:
@@ -98,6 +115,8 @@ class ExecutorState(object):
     maxFreeSlots = 0
     try:
       for eId in self.__typeToId[eType]:
+        if not self.wantsTasks(eId):
+          continue
         freeSlots = self.freeSlots(eId)
         if freeSlots > maxFreeSlots:
           maxFreeSlots = freeSlots
@@ -140,6 +159,15 @@ class ExecutorState(object):
 
 
 class ExecutorQueues:
+  """ Waiting queues of the tasks, one per executor type
+
+      Each queue is a heap ordered by priority and then by arrival, the tasks pushed
+      ahead going first. Deleting a task only marks its heap entry as removed, the entry
+      is dropped when it reaches the top of the heap.
+  """
+
+  # Marks the heap entries of the deleted tasks
+  __REMOVED = object()
 
   def __init__(self, log=False):
     if log:
@@ -148,60 +176,80 @@ class ExecutorQueues:
       self.__log = gLogger
     self.__lock = threading.Lock()
     self.__queues = {}
+    self.__queueLen = {}
     self.__lastUse = {}
     self.__taskInQueue = {}
+    self.__sequence = itertools.count()
+    self.__aheadSequence = itertools.count(-1, -1)
 
   def _internals(self):
-    return {'queues': dict(self.__queues),
+    return {'queues': self.getState(),
             'lastUse': dict(self.__lastUse),
-            'taskInQueue': dict(self.__taskInQueue),
+            'taskInQueue': dict((taskId, self.__taskInQueue[taskId][0]) for taskId in self.__taskInQueue),
             'locked': self.__lock.locked()}  # pylint: disable=no-member
 
   def getExecutorList(self):
     return [eType for eType in self.__queues]
 
-  def pushTask(self, eType, taskId, ahead=False):
+  def pushTask(self, eType, taskId, ahead=False, priority=0):
     self.__log.verbose("Pushing task %s into waiting queue for executor %s" % (taskId, eType))
     self.__lock.acquire()
     try:
       if taskId in self.__taskInQueue:
-        if self.__taskInQueue[taskId] != eType:
+        if self.__taskInQueue[taskId][0] != eType:
           errMsg = "Task %s cannot be queued because it's already queued for %s" % (taskId,
-                                                                                    self.__taskInQueue[taskId])
+                                                                                    self.__taskInQueue[taskId][0])
           self.__log.fatal(errMsg)
           return 0
-        return len(self.__queues[eType])
+        return self.__queueLen[eType]
       if eType not in self.__queues:
         self.__queues[eType] = []
+        self.__queueLen[eType] = 0
       self.__lastUse[eType] = time.time()
+      # Entries are [ sort key, taskId ]. Among the tasks pushed ahead, the last one goes first
       if ahead:
-        self.__queues[eType].insert(0, taskId)
+        entry = [(-priority, next(self.__aheadSequence)), taskId]
       else:
-        self.__queues[eType].append(taskId)
-      self.__taskInQueue[taskId] = eType
-      return len(self.__queues[eType])
+        entry = [(-priority, next(self.__sequence)), taskId]
+      heapq.heappush(self.__queues[eType], entry)
+      self.__taskInQueue[taskId] = (eType, entry)
+      self.__queueLen[eType] += 1
+      return self.__queueLen[eType]
     finally:
       self.__lock.release()
 
   def popTask(self, eTypes):
+    pData = self.popTasks(eTypes, 1)
+    if pData is None:
+      return None
+    eType, taskIds = pData
+    return (taskIds[0], eType)
+
+  def popTasks(self, eTypes, maxTasks):
+    """ Pops up to maxTasks tasks of the first executor type of eTypes having waiting tasks
+
+        :return: ( eType, list of taskIds ) or None if there is no waiting task
+    """
     if not isinstance(eTypes, (list, tuple)):
       eTypes = [eTypes]
     self.__lock.acquire()
-    for eType in eTypes:
-      try:
-        taskId = self.__queues[eType].pop(0)
-        del self.__taskInQueue[taskId]
-        # Found! release and return!
-        self.__lock.release()
-        self.__lastUse[eType] = time.time()
-        self.__log.verbose("Popped task %s from executor %s waiting queue" % (taskId, eType))
-        return (taskId, eType)
-      except IndexError:
-        continue
-      except KeyError:
-        continue
-    self.__lock.release()
-    # Not found. release and return None
+    try:
+      for eType in eTypes:
+        queue = self.__queues.get(eType)
+        taskIds = []
+        while queue and len(taskIds) < maxTasks:
+          taskId = heapq.heappop(queue)[1]
+          if taskId is self.__REMOVED:
+            continue
+          del self.__taskInQueue[taskId]
+          taskIds.append(taskId)
+        if taskIds:
+          self.__queueLen[eType] -= len(taskIds)
+          self.__lastUse[eType] = time.time()
+          self.__log.verbose("Popped tasks %s from executor %s waiting queue" % (taskIds, eType))
+          return (eType, taskIds)
+    finally:
+      self.__lock.release()
     return None
 
   def getState(self):
@@ -209,7 +257,7 @@ class ExecutorQueues:
     try:
       qInfo = {}
       for qName in self.__queues:
-        qInfo[qName] = list(self.__queues[qName])
+        qInfo[qName] = [entry[1] for entry in sorted(self.__queues[qName]) if entry[1] is not self.__REMOVED]
     finally:
       self.__lock.release()
     return qInfo
@@ -219,29 +267,21 @@ class ExecutorQueues:
     self.__lock.acquire()
     try:
       try:
-        eType = self.__taskInQueue[taskId]
-        del self.__taskInQueue[taskId]
-        self.__lastUse[eType] = time.time()
+        eType, entry = self.__taskInQueue.pop(taskId)
       except KeyError:
         return False
-      try:
-        iPos = self.__queues[eType].index(taskId)
-      except ValueError:
-        return False
-      del self.__queues[eType][iPos]
+      entry[1] = self.__REMOVED
+      self.__queueLen[eType] -= 1
+      self.__lastUse[eType] = time.time()
       return True
     finally:
       self.__lock.release()
 
   def waitingTasks(self, eType):
-    self.__lock.acquire()
     try:
-      try:
-        return len(self.__queues[eType])
-      except KeyError:
-        return 0
-    finally:
-      self.__lock.release()
+      return self.__queueLen[eType]
+    except KeyError:
+      return 0
 
 
 class ExecutorDispatcherCallbacks:
@@ -252,6 +292,9 @@ class ExecutorDispatcherCallbacks:
   def cbSendTask(self, taskId, taskObj, eId, eType):
     return S_ERROR("No send task callback defined")
 
+  def cbSendTasks(self, taskIds, taskObjs, eId, eType):
+    return S_ERROR("No send tasks callback defined")
+
   def cbDisconectExecutor(self, eId):
     return S_ERROR("No disconnect callback defined")
 
@@ -280,6 +323,8 @@ class ExecutorDispatcher:
       self.frozenMsg = False
       self.eType = False
       self.sendTime = 0
+      self.queueTime = 0
+      self.priority = 0
       self.retries = 0
 
     def __repr__(self):
@@ -296,14 +341,23 @@ class ExecutorDispatcher:
     self.__executorsLock = threading.Lock()
     self.__tasksLock = threading.Lock()
     self.__freezerLock = threading.Lock()
+    self.__freezerCond = threading.Condition(self.__freezerLock)
     self.__tasks = {}
     self.__log = gLogger.getSubLogger("ExecMind")
-    self.__taskFreezer = []
+    # taskId -> time to unfreeze it, and per executor type a heap of ( time to unfreeze, taskId )
+    self.__taskFreezer = {}
+    self.__frozenByType = {}
     self.__queues = ExecutorQueues(self.__log)
     self.__states = ExecutorState(self.__log)
+    self.__batchExecutors = set()
+    self.__waitTimes = {}
+    self.__taskTimes = {}
     self.__cbHolder = ExecutorDispatcherCallbacks()
     self.__monitor = monitor
     gThreadScheduler.addPeriodicTask(60, self.__doPeriodicStuff)
+    unfreezer = threading.Thread(target=self.__unfreezeWhenDue, name="ExecutorDispatcherUnfreezer")
+    unfreezer.setDaemon(True)
+    unfreezer.start()
     # If a task is frozen too many times, send error or forget task?
     self.__failedOnTooFrozen = True
     # If a task fails to properly dispatch, freeze or forget task?
@@ -331,7 +385,7 @@ class ExecutorDispatcher:
     return {'idMap': dict(self.__idMap),
             'execTypes': dict(self.__execTypes),
             'tasks': sorted(self.__tasks),
-            'freezer': list(self.__taskFreezer),
+            'freezer': sorted(self.__taskFreezer),
             'queues': self.__queues._internals(),
             'states': self.__states._internals(),
             'locked': {'exec': self.__executorsLock.locked(),  # pylint: disable=no-member
@@ -358,8 +412,38 @@ class ExecutorDispatcher:
       except KeyError:
         pass
     self.__monitor.addMark("executors", len(self.__idMap))
+    for eType in eTypes:
+      self.__monitor.addMark("queue-%s" % eType, self.__queues.waitingTasks(eType))
 
-  def addExecutor(self, eId, eTypes, maxTasks=1):
+  def getStats(self):
+    """ Queue depths and latencies of each executor type
+
+        :return: dict with, for each executor type, the number of connected Executors,
+                 of Waiting and of Frozen tasks, and the statistics of the times the tasks
+                 wait in the queue (WaitTime) and are processed by the executors (TaskTime),
+                 see :py:meth:`DIRAC.Core.Utilities.ThreadExecutor.Histogram.getStats`
+    """
+    frozen = {}
+    self.__freezerLock.acquire()
+    try:
+      for taskId in self.__taskFreezer:
+        try:
+          eType = self.__tasks[taskId].eType
+        except KeyError:
+          continue
+        frozen[eType] = frozen.get(eType, 0) + 1
+    finally:
+      self.__freezerLock.release()
+    stats = {}
+    for eType in self.__execTypes.keys():
+      stats[eType] = {'Executors': self.__execTypes.get(eType, 0),
+                      'Waiting': self.__queues.waitingTasks(eType),
+                      'Frozen': frozen.get(eType, 0),
+                      'WaitTime': self.__waitTimes[eType].getStats(),
+                      'TaskTime': self.__taskTimes[eType].getStats()}
+    return stats
+
+  def addExecutor(self, eId, eTypes, maxTasks=1, batchTasks=False):
     self.__log.verbose("Adding new %s executor to the pool %s" % (eId, ", ".join(eTypes)))
     self.__executorsLock.acquire()
     try:
@@ -368,9 +452,13 @@ class ExecutorDispatcher:
       if not isinstance(eTypes, (list, tuple)):
         eTypes = [eTypes]
       self.__idMap[eId] = list(eTypes)
-      self.__states.addExecutor(eId, eTypes, maxTasks)
+      self.__states.addExecutor(eId, eTypes, maxTasks, batchTasks)
+      if batchTasks:
+        self.__batchExecutors.add(eId)
       for eType in eTypes:
         if eType not in self.__execTypes:
+          self.__waitTimes[eType] = Histogram()
+          self.__taskTimes[eType] = Histogram()
           self.__execTypes[eType] = 0
           if self.__monitor:
             self.__monitor.registerActivity("executors-%s" % eType, "%s executor modules connected" % eType,
@@ -379,6 +467,10 @@ class ExecutorDispatcher:
                                             "Executors", "tasks", self.__monitor.OP_RATE, 300)
             self.__monitor.registerActivity("taskTime-%s" % eType, "Task processing time for %s" % eType,
                                             "Executors", "seconds", self.__monitor.OP_MEAN, 300)
+            self.__monitor.registerActivity("queue-%s" % eType, "Tasks waiting for %s" % eType,
+                                            "Executors", "tasks", self.__monitor.OP_MEAN, 300)
+            self.__monitor.registerActivity("waitTime-%s" % eType, "Task waiting time for %s" % eType,
+                                            "Executors", "seconds", self.__monitor.OP_MEAN, 300)
         self.__execTypes[eType] += 1
     finally:
       self.__executorsLock.release()
@@ -392,6 +484,7 @@ class ExecutorDispatcher:
       if eId not in self.__idMap:
         return
       eTypes = self.__idMap.pop(eId)
+      self.__batchExecutors.discard(eId)
       for eType in eTypes:
         self.__execTypes[eType] -= 1
       tasksInExec = self.__states.removeExecutor(eId)
@@ -400,9 +493,9 @@ class ExecutorDispatcher:
           eTask = self.__tasks[taskId]
         except KeyError:
           # Task already removed
-          pass
+          continue
         if eTask.eType:
-          self.__queues.pushTask(eTask.eType, taskId, ahead=True)
+          self.__queueTask(eTask, ahead=True)
         else:
           self.__dispatchTask(taskId)
     finally:
@@ -431,7 +524,10 @@ class ExecutorDispatcher:
       eTask.eType = eType
       isFrozen = False
       if eTask.frozenCount < 10:
-        self.__taskFreezer.append(taskId)
+        unfreezeTime = eTask.frozenSince + freezeTime
+        self.__taskFreezer[taskId] = unfreezeTime
+        heapq.heappush(self.__frozenByType.setdefault(eType, []), (unfreezeTime, taskId))
+        self.__freezerCond.notify()
         isFrozen = True
     finally:
       self.__freezerLock.release()
@@ -448,11 +544,9 @@ class ExecutorDispatcher:
   def __removeFromFreezer(self, taskId):
     self.__freezerLock.acquire()
     try:
-      try:
-        iP = self.__taskFreezer.index(taskId)
-      except ValueError:
+      # The entry in the heap of its executor type is dropped when unfreezing
+      if self.__taskFreezer.pop(taskId, None) is None:
         return False
-      self.__taskFreezer.pop(iP)
       try:
         eTask = self.__tasks[taskId]
       except KeyError:
@@ -462,43 +556,66 @@ class ExecutorDispatcher:
       self.__freezerLock.release()
     return True
 
-  def __unfreezeTasks(self, eType=False):
-    iP = 0
-    while iP < len(self.__taskFreezer):
+  def __unfreezeTasks(self, eTypes=False):
+    """ Dispatches again the frozen tasks of eTypes, all of them if False, whose freezing time is over
+    """
+    toUnfreeze = []
+    self.__freezerLock.acquire()
+    try:
+      if eTypes is False:
+        eTypes = self.__frozenByType.keys()
+      elif not isinstance(eTypes, (list, tuple)):
+        eTypes = [eTypes]
+      now = time.time()
+      for eType in eTypes:
+        frozen = self.__frozenByType.get(eType)
+        while frozen and frozen[0][0] <= now:
+          unfreezeTime, taskId = heapq.heappop(frozen)
+          # Skip the entries of the tasks removed from the freezer
+          if self.__taskFreezer.get(taskId) != unfreezeTime:
+            continue
+          del self.__taskFreezer[taskId]
+          try:
+            toUnfreeze.append(self.__tasks[taskId])
+          except KeyError:
+            self.__log.notice("Removing task %s from the freezer. Somebody has removed the task" % taskId)
+    finally:
+      self.__freezerLock.release()
+    # Out of the lock zone to minimize zone of exclusion
+    for eTask in toUnfreeze:
+      eTask.frozenTime += time.time() - eTask.frozenSince
+      self.__log.verbose("Unfreezed task %s" % eTask.taskId)
+      self.__dispatchTask(eTask.taskId, defrozeIfNeeded=False)
+
+  def __unfreezeWhenDue(self):
+    """ Unfreezes the tasks as soon as their freezing time is over, instead of waiting for
+        the next periodic pass. The tasks waiting for an executor type that has not connected
+        are left to the periodic pass, so that they are not retried continuously
+    """
+    while True:
       self.__freezerLock.acquire()
       try:
-        try:
-          taskId = self.__taskFreezer[iP]
-        except IndexError:
-          return
-        try:
-          eTask = self.__tasks[taskId]
-        except KeyError:
-          self.__log.notice("Removing task %s from the freezer. Somebody has removed the task" % taskId)
-          self.__taskFreezer.pop(iP)
-          continue
-        # Current taskId/eTask is the one to defrost
-        if eType and eType != eTask.eType:
-          iP += 1
-          continue
-        if time.time() - eTask.frozenSince < eTask.freezeTime:
-          iP += 1
+        eTypes = [False] + self.__execTypes.keys()
+        nextTime = min([self.__frozenByType[eType][0][0] for eType in eTypes if self.__frozenByType.get(eType)] or
+                       [None])
+        if nextTime is None or nextTime > time.time():
+          self.__freezerCond.wait(None if nextTime is None else nextTime - time.time())
           continue
-        self.__taskFreezer.pop(iP)
       finally:
         self.__freezerLock.release()
-      # Out of the lock zone to minimize zone of exclusion
-      eTask.frozenTime += time.time() - eTask.frozenSince
-      self.__log.verbose("Unfreezed task %s" % taskId)
-      self.__dispatchTask(taskId, defrozeIfNeeded=False)
+      try:
+        self.__unfreezeTasks(eTypes)
+      except BaseException:
+        self.__log.exception("Exception while unfreezing tasks")
 
-  def __addTaskIfNew(self, taskId, taskObj):
+  def __addTaskIfNew(self, taskId, taskObj, priority=0):
     self.__tasksLock.acquire()
     try:
       if taskId in self.__tasks:
         self.__log.verbose("Task %s was already known" % taskId)
         return False
       self.__tasks[taskId] = ExecutorDispatcher.ETask(taskId, taskObj)
+      self.__tasks[taskId].priority = priority
       self.__log.verbose("Added task %s" % taskId)
       return True
     finally:
@@ -545,10 +662,17 @@ class ExecutorDispatcher:
       self.__log.verbose("Executor type %s has not connected. Forgetting task %s" % (eType, taskId))
       return self.removeTask(taskId)
 
-    self.__queues.pushTask(eType, taskId)
+    try:
+      self.__queueTask(self.__tasks[taskId])
+    except KeyError:
+      return S_OK()
     self.__fillExecutors(eType, defrozeIfNeeded=defrozeIfNeeded)
     return S_OK()
 
+  def __queueTask(self, eTask, ahead=False):
+    eTask.queueTime = time.time()
+    return self.__queues.pushTask(eTask.eType, eTask.taskId, ahead=ahead, priority=eTask.priority)
+
   def __taskProcessedCallback(self, taskId, taskObj, eType):
     try:
       result = self.__cbHolder.cbTaskProcessed(taskId, taskObj, eType)
@@ -607,8 +731,10 @@ class ExecutorDispatcher:
   def getExecutorsConnected(self):
     return dict(self.__execTypes)
 
-  def addTask(self, taskId, taskObj):
-    if not self.__addTaskIfNew(taskId, taskObj):
+  def addTask(self, taskId, taskObj, priority=0):
+    """ Adds a task, the tasks of higher priority are sent first to the executors
+    """
+    if not self.__addTaskIfNew(taskId, taskObj, priority):
       self.__unfreezeTasks()
       return S_OK()
     return self.__dispatchTask(taskId)
@@ -625,12 +751,7 @@ class ExecutorDispatcher:
     self.__states.removeTask(taskId)
     self.__freezerLock.acquire()
     try:
-      try:
-        self.__taskFreezer.pop(self.__taskFreezer.index(taskId))
-      except KeyError:
-        pass
-      except ValueError:
-        pass
+      self.__taskFreezer.pop(taskId, None)
     finally:
       self.__freezerLock.release()
     if eId:
@@ -654,8 +775,9 @@ class ExecutorDispatcher:
       self.removeExecutor(eId)
       self.__dispatchTask(taskId)
       return S_ERROR(errMsg)
+    tTime = time.time() - eTask.sendTime
+    self.__taskTimes[eTask.eType].add(tTime)
     if self.__monitor:
-      tTime = time.time() - self.__tasks[taskId].sendTime
       self.__monitor.addMark("taskTime-%s" % eTask.eType, tTime)
       self.__monitor.addMark("taskTime", tTime)
       self.__monitor.addMark("tasks-%s" % eTask.eType, 1)
@@ -754,7 +876,7 @@ class ExecutorDispatcher:
         if not result['Value']:
           # No more tasks for eType
           break
-        self.__log.verbose("Task %s was sent to %s" % (result['Value'], eId))
+        self.__log.verbose("Tasks %s were sent to %s" % (result['Value'], eId))
       eId = self.__states.getIdleExecutor(eType)
     self.__log.verbose("No more idle executors for %s" % eType)
 
@@ -775,27 +897,46 @@ class ExecutorDispatcher:
         except ValueError:
           pass
         searchTypes.append(eType)
-    pData = self.__queues.popTask(searchTypes)
+    # The executors that accept several tasks per message get as many as they have free slots
+    numTasks = 1
+    if eId in self.__batchExecutors:
+      if not self.__states.wantsTasks(eId):
+        return S_OK()
+      numTasks = self.__states.freeSlots(eId)
+    pData = self.__queues.popTasks(searchTypes, numTasks)
     if pData is None:
       self.__log.verbose("No more tasks for %s" % eTypes)
       return S_OK()
-    taskId, eType = pData
-    self.__log.verbose("Sending task %s to %s=%s" % (taskId, eType, eId))
-    self.__states.addTask(eId, taskId)
-    result = self.__msgTaskToExecutor(taskId, eId, eType)
+    eType, taskIds = pData
+    self.__log.verbose("Sending tasks %s to %s=%s" % (taskIds, eType, eId))
+    for taskId in taskIds:
+      self.__states.addTask(eId, taskId)
+    result = self.__msgTasksToExecutor(taskIds, eId, eType)
     if not result['OK']:
-      self.__queues.pushTask(eType, taskId, ahead=True)
-      self.__states.removeTask(taskId)
+      for taskId in reversed(taskIds):
+        if taskId in self.__tasks:
+          self.__queueTask(self.__tasks[taskId], ahead=True)
+        self.__states.removeTask(taskId)
       return result
-    return S_OK(taskId)
+    return S_OK(taskIds)
 
-  def __msgTaskToExecutor(self, taskId, eId, eType):
-    try:
-      self.__tasks[taskId].sendTime = time.time()
-    except KeyError:
-      return S_ERROR("Task %s has been deleted" % taskId)
-    try:
-      result = self.__cbHolder.cbSendTask(taskId, self.__tasks[taskId].taskObj, eId, eType)
+  def __msgTasksToExecutor(self, taskIds, eId, eType):
+    now = time.time()
+    for taskId in taskIds:
+      try:
+        eTask = self.__tasks[taskId]
+      except KeyError:
+        return S_ERROR("Task %s has been deleted" % taskId)
+      eTask.sendTime = now
+      self.__waitTimes[eType].add(now - eTask.queueTime)
+      if self.__monitor:
+        self.__monitor.addMark("waitTime-%s" % eType, now - eTask.queueTime)
+    try:
+      if len(taskIds) == 1:
+        result = self.__cbHolder.cbSendTask(taskIds[0], self.__tasks[taskIds[0]].taskObj, eId, eType)
+      else:
+        result = self.__cbHolder.cbSendTasks(taskIds, [self.__tasks[taskId].taskObj for taskId in taskIds],
+                                             eId, eType)
     except BaseException:
       self.__log.exception("Exception while sending task to executor")
       return S_ERROR("Exception while sending task to executor")
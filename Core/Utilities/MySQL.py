@@ -48,6 +48,25 @@
     is used and is not  in the Queue
     Returns S_OK with number of updated registers in Value or S_ERROR upon failure.
 
+    _query and _update also accept parameterized statements: with
+    _update( "INSERT INTO T (A, B) VALUES (%s, %s)", args = ( a, b ) )
+    the values are escaped by the MySQL client library instead of being
+    escaped one by one and formatted in the statement by the caller.
+
+
+    _queryIter( cmd, [args], [chunkSize] )
+
+    Executes SQL command "cmd" with a server side cursor on a dedicated connection.
+    Generator of S_OK with tuples of at most chunkSize rows, for results that
+    are too large to be held in memory at once.
+
+
+    _updatemany( cmd, argsList )
+
+    Executes the parameterized SQL command "cmd" for every tuple of argsList.
+    INSERT statements are sent as a single multi-row INSERT.
+    Returns S_OK with number of updated registers in Value or S_ERROR upon failure.
+
 
     _createTables( tableDict )
 
@@ -148,14 +167,17 @@
 """
 
 import collections
+import re
 import time
 import threading
 import MySQLdb
+import MySQLdb.cursors
 
 from DIRAC import gLogger
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities.Time import fromString
 from DIRAC.Core.Utilities import DErrno
+from DIRAC.Core.Utilities.DBProfiler import gDBProfiler
 
 # This is for proper initialization of embedded server, it should only be called once
 try:
@@ -170,6 +192,21 @@ __RCSID__ = "$Id$"
 
 
 MAXCONNECTRETRY = 10
+# The callers of the statements in the profiles are the methods of the DB classes, not of this module
+gDBProfiler.ignoreCallerFile( __file__ )
+# Connections used less than PINGINTERVAL seconds ago are not checked before being reused
+PINGINTERVAL = 30
+# Minimum number of seconds between two cleanings of the connection pools
+CLEANINTERVAL = 10
+# MySQL client errors raised when the server closed the connection: the statement is sent again
+# once on a new connection. A lost connection may happen after an update was executed, it is
+# only retried for the queries
+CR_SERVER_GONE_ERROR = 2006
+CR_SERVER_LOST = 2013
+# Statements starting or ending a state of the connection (transaction, table or named locks)
+# that is lost with it: the statements are not retried while such a state may exist
+_sessionStartRE = re.compile( r"\s*(START\s+TRANSACTION|BEGIN\b|LOCK\s+TABLES?\b|SELECT\s+GET_LOCK)", re.I )
+_sessionEndRE = re.compile( r"\s*(COMMIT|ROLLBACK|UNLOCK\s+TABLES?\b|SELECT\s+RELEASE_LOCK)", re.I )
 
 def _checkFields( inFields, inValues ):
   """
@@ -218,16 +255,27 @@ class MySQL( object ):
     Management of connections per thread
     """
 
-    def __init__( self, host, user, passwd, port = 3306, graceTime = 600 ):
+    def __init__( self, host, user, passwd, port = 3306, graceTime = 600, minSpares = 0, maxSpares = 10 ):
       self.__host = host
       self.__user = user
       self.__passwd = passwd
       self.__port = port
       self.__graceTime = graceTime
+      # ( conn, dbName, lastUse ), the most recently used ones on the right
       self.__spares = collections.deque()
-      self.__maxSpares = 10
+      self.__sparesLock = threading.Lock()
+      self.__minSpares = minSpares
+      self.__maxSpares = maxSpares
       self.__lastClean = 0
       self.__assigned = {}
+      # Threads whose connection may have a transaction or locks
+      self.__sessions = set()
+
+    def setSpares( self, minSpares, maxSpares ):
+      """ The pool is shared by all the DBs on the same server, keep the largest limits asked for
+      """
+      self.__minSpares = max( self.__minSpares, minSpares )
+      self.__maxSpares = max( self.__maxSpares, maxSpares )
 
     @property
     def __thid( self ):
@@ -242,16 +290,18 @@ class MySQL( object ):
       self.__execute( conn, "SET AUTOCOMMIT=1" )
       return conn
 
-    def __execute( self, conn, cmd ):
+    def __execute( self, conn, cmd, commit = True ):
       cursor = conn.cursor()
       res = cursor.execute( cmd )
-      conn.commit()
+      if commit:
+        conn.commit()
       cursor.close()
       return res
 
     def get( self, dbName, retries = 10 ):
       retries = max( 0, min( MAXCONNECTRETRY, retries ) )
-      self.clean()
+      if time.time() - self.__lastClean > CLEANINTERVAL:
+        self.clean()
       return self.__getWithRetry( dbName, retries, retries )
 
 
@@ -260,13 +310,14 @@ class MySQL( object ):
       if sleepTime > 0:
         time.sleep( sleepTime )
       try:
-        conn, lastName, thid = self.__innerGet()
+        conn, lastName, thid, lastUse = self.__innerGet()
       except MySQLdb.MySQLError as excp:
         if retriesLeft >= 0:
           return self.__getWithRetry( dbName, totalRetries, retriesLeft - 1 )
         return S_ERROR( DErrno.EMYSQL, "Could not connect: %s" % excp )
 
-      if not self.__ping( conn ):
+      # A ping is a round trip to the server, only check the connections that were idle for a while
+      if time.time() - lastUse > PINGINTERVAL and not self.__ping( conn ):
         try:
           self.__assigned.pop( thid )
         except KeyError:
@@ -298,38 +349,106 @@ class MySQL( object ):
       except BaseException:
         return False
 
+    def getDedicated( self, dbName ):
+      """ Get a connection that is not shared with the other queries of the thread, a spare one
+          if there is one, the caller has to give it back with putDedicated
+      """
+      conn = None
+      with self.__sparesLock:
+        if self.__spares:
+          conn, lastName, lastUse = self.__spares.pop()
+      if conn is not None and time.time() - lastUse > PINGINTERVAL and not self.__ping( conn ):
+        self.__close( conn )
+        conn = None
+      try:
+        if conn is None:
+          conn = self.__newConn()
+          lastName = ""
+        if lastName != dbName:
+          conn.select_db( dbName )
+      except MySQLdb.MySQLError as excp:
+        return S_ERROR( DErrno.EMYSQL, "Could not connect: %s" % excp )
+      return S_OK( conn )
+
+    def putDedicated( self, conn, dbName, reusable = True ):
+      """ Give back a connection obtained with getDedicated: it is kept as a spare connection,
+          unless it is not reusable (e.g. a result not read to the end) or there are enough spares
+      """
+      if reusable:
+        with self.__sparesLock:
+          if len( self.__spares ) < self.__maxSpares:
+            self.__spares.append( ( conn, dbName, time.time() ) )
+            return
+      self.__close( conn )
+
+    def discard( self ):
+      """ Close the connection of the current thread, e.g. after the server closed it:
+          the next get opens a new one
+      """
+      try:
+        data = self.__assigned.pop( self.__thid )
+      except KeyError:
+        return
+      self.__close( data[0] )
+
+    def setSession( self, inSession ):
+      """ Whether the connection of the current thread may have a transaction or locks """
+      if inSession:
+        self.__sessions.add( self.__thid )
+      else:
+        self.__sessions.discard( self.__thid )
+
+    def inSession( self ):
+      return self.__thid in self.__sessions
+
+    def markStale( self ):
+      """ Make the next get of the current thread check its connection, e.g. after an error
+      """
+      try:
+        self.__assigned[ self.__thid ][2] = 0
+      except KeyError:
+        pass
+
     def __innerGet( self ):
       thid = self.__thid
       now = time.time()
       if thid in self.__assigned:
         data = self.__assigned[ thid ]
-        conn = data[0]
+        lastUse = data[2]
         data[2] = now
-        return data[0], data[1], thid
+        return data[0], data[1], thid, lastUse
       # Not cached
       try:
-        conn, dbName = self.__spares.pop()
+        with self.__sparesLock:
+          conn, dbName, lastUse = self.__spares.pop()
       except IndexError:
         conn = self.__newConn()
         dbName = ""
+        lastUse = now
 
       self.__assigned[ thid ] = [ conn, dbName, now ]
-      return conn, dbName, thid
+      return conn, dbName, thid, lastUse
 
     def __pop( self, thid ):
+      self.__sessions.discard( thid )
       try:
         data = self.__assigned.pop( thid )
-        if len( self.__spares ) < self.__maxSpares:
-          self.__spares.append( ( data[0], data[1] ) )
-        else:
-          try:
-            data[0].close()
-          except MySQLdb.ProgrammingError as exc:
-            gLogger.warn("ProgrammingError exception while closing MySQL connection: %s" % exc)
-          except BaseException as exc:
-            gLogger.warn("Exception while closing MySQL connection: %s" % exc)
       except KeyError:
-        pass
+        return
+      with self.__sparesLock:
+        if len( self.__spares ) < self.__maxSpares:
+          self.__spares.append( ( data[0], data[1], data[2] ) )
+          return
+      self.__close( data[0] )
+
+    @staticmethod
+    def __close( conn ):
+      try:
+        conn.close()
+      except MySQLdb.ProgrammingError as exc:
+        gLogger.warn("ProgrammingError exception while closing MySQL connection: %s" % exc)
+      except BaseException as exc:
+        gLogger.warn("Exception while closing MySQL connection: %s" % exc)
 
     def clean( self, now = False ):
       if not now:
@@ -344,6 +463,13 @@ class MySQL( object ):
           continue
         if now - data[2] > self.__graceTime:
           self.__pop( thid )
+      # Close the spare connections nobody needed for a while, the oldest ones are on the left
+      reaped = []
+      with self.__sparesLock:
+        while len( self.__spares ) > self.__minSpares and now - self.__spares[0][2] > self.__graceTime:
+          reaped.append( self.__spares.popleft()[0] )
+      for conn in reaped:
+        self.__close( conn )
 
     def transactionStart( self, dbName ):
       result = self.get( dbName )
@@ -351,11 +477,14 @@ class MySQL( object ):
         return result
       conn = result[ 'Value' ]
       try:
-        return S_OK( self.__execute( conn, "START TRANSACTION WITH CONSISTENT SNAPSHOT" ) )
+        # A commit would end the transaction right away
+        self.setSession( True )
+        return S_OK( self.__execute( conn, "START TRANSACTION WITH CONSISTENT SNAPSHOT", commit = False ) )
       except MySQLdb.MySQLError as excp:
         return S_ERROR( DErrno.EMYSQL, "Could not begin transaction: %s" % excp )
 
     def transactionCommit( self, dbName ):
+      self.setSession( False )
       result = self.get( dbName )
       if not result[ 'OK' ]:
         return result
@@ -367,6 +496,7 @@ class MySQL( object ):
         return S_ERROR( DErrno.EMYSQL, "Could not commit transaction: %s" % excp )
 
     def transactionRollback( self, dbName ):
+      self.setSession( False )
       result = self.get( dbName )
       if not result[ 'OK' ]:
         return result
@@ -379,9 +509,13 @@ class MySQL( object ):
 
   __connectionPools = {}
 
-  def __init__( self, hostName = 'localhost', userName = 'dirac', passwd = 'dirac', dbName = '', port = 3306, debug = False ):
+  def __init__( self, hostName = 'localhost', userName = 'dirac', passwd = 'dirac', dbName = '', port = 3306,
+                debug = False, minIdleConnections = 0, maxIdleConnections = 10 ):
     """
     set MySQL connection parameters and try to connect
+
+    minIdleConnections and maxIdleConnections bound the number of connections
+    kept open in the pool when no thread is using them
     """
     global gInstancesCount, gDebugFile
     gInstancesCount += 1
@@ -403,7 +537,10 @@ class MySQL( object ):
     self.__port = port
     cKey = ( self.__hostName, self.__userName, self.__passwd, self.__port )
     if cKey not in MySQL.__connectionPools:
-      MySQL.__connectionPools[ cKey ] = MySQL.ConnectionPool( *cKey )
+      MySQL.__connectionPools[ cKey ] = MySQL.ConnectionPool( *cKey, minSpares = minIdleConnections,
+                                                              maxSpares = maxIdleConnections )
+    else:
+      MySQL.__connectionPools[ cKey ].setSpares( minIdleConnections, maxIdleConnections )
     self.__connectionPool = MySQL.__connectionPools[ cKey ]
 
     self.__initialized = True
@@ -455,17 +592,18 @@ class MySQL( object ):
       return False
 
 
-  def __escapeString( self, myString ):
+  def __escapeString( self, myString, connection = None ):
     """
     To be used for escaping any MySQL string before passing it to the DB
     this should prevent passing non-MySQL accepted characters to the DB
     It also includes quotation marks " around the given string
     """
 
-    retDict = self._getConnection()
-    if not retDict['OK']:
-      return retDict
-    connection = retDict['Value']
+    if not connection:
+      retDict = self._getConnection()
+      if not retDict['OK']:
+        return retDict
+      connection = retDict['Value']
 
     try:
       myString = str( myString )
@@ -526,7 +664,7 @@ class MySQL( object ):
     """
     self.log.debug( '_escapeString:', '"%s"' % str( myString ) )
 
-    return self.__escapeString( myString )
+    return self.__escapeString( myString, conn )
 
 
   def _escapeValues( self, inValues = None ):
@@ -540,16 +678,22 @@ class MySQL( object ):
     if not inValues:
       return S_OK( inEscapeValues )
 
+    # All the values are escaped with the same connection
+    retDict = self._getConnection()
+    if not retDict['OK']:
+      return retDict
+    connection = retDict['Value']
+
     for value in inValues:
       if isinstance( value, basestring ):
-        retDict = self.__escapeString( value )
+        retDict = self.__escapeString( value, connection )
         if not retDict['OK']:
           return retDict
         inEscapeValues.append( retDict['Value'] )
       elif isinstance( value, ( tuple, list )):
         tupleValues = []
         for v in list( value ):
-          retDict = self.__escapeString( v )
+          retDict = self.__escapeString( v, connection )
           if not retDict['OK']:
             return retDict
           tupleValues.append( retDict['Value'] )
@@ -557,7 +701,7 @@ class MySQL( object ):
       elif isinstance( value, bool ):
         inEscapeValues = [str( value )]
       else:
-        retDict = self.__escapeString( str( value ) )
+        retDict = self.__escapeString( str( value ), connection )
         if not retDict['OK']:
           return retDict
         inEscapeValues.append( retDict['Value'] )
@@ -596,12 +740,15 @@ class MySQL( object ):
       return self._except( '_connect', x, 'Could not connect to DB.' )
 
 
-  def _query( self, cmd, conn = None, debug = False ):
+  def _query( self, cmd, conn = None, debug = False, args = None ):
     """
     execute MySQL query command
     return S_OK structure with fetchall result as tuple
     it returns an empty tuple if no matching rows are found
     return S_ERROR upon error
+
+    If args is given, cmd is a parameterized statement: the %s placeholders are
+    replaced by the escaped args (and a literal % must be written %%)
     """
     if debug:
       self.logger.debug( '_query: %s' % self._safeCmd( cmd ) )
@@ -611,44 +758,55 @@ class MySQL( object ):
       else:
         self.logger.verbose( '_query: %s' % self._safeCmd( cmd )[:min( len( cmd ) , 512 )] )
 
-    if gDebugFile:
-      start = time.time()
-
-    retDict = self._getConnection()
-    if not retDict['OK']:
-      return retDict
-    connection = retDict[ 'Value' ]
+    start = time.time()
 
-    try:
-      cursor = connection.cursor()
-      if cursor.execute( cmd ):
-        res = cursor.fetchall()
-      else:
-        res = ()
+    retry = True
+    while True:
+      retDict = self._getConnection()
+      if not retDict['OK']:
+        return retDict
+      connection = retDict[ 'Value' ]
 
-      # Log the result limiting it to just 10 records
-      if len( res ) <= 10:
-        if debug:
-          self.logger.debug( '_query: returns', res )
+      self.__trackSession( cmd )
+      try:
+        cursor = connection.cursor()
+        if cursor.execute( cmd, args ):
+          res = cursor.fetchall()
         else:
-          self.logger.verbose( '_query: returns', res )
-      else:
-        if debug:
-          self.logger.debug( '_query: Total %d records returned' % len( res ) )
-          self.logger.debug( '_query: %s ...' % str( res[:10] ) )
+          res = ()
+
+        # Log the result limiting it to just 10 records
+        if len( res ) <= 10:
+          if debug:
+            self.logger.debug( '_query: returns', res )
+          else:
+            self.logger.verbose( '_query: returns', res )
         else:
-          self.logger.verbose( '_query: Total %d records returned' % len( res ) )
-          self.logger.verbose( '_query: %s ...' % str( res[:10] ) )
+          if debug:
+            self.logger.debug( '_query: Total %d records returned' % len( res ) )
+            self.logger.debug( '_query: %s ...' % str( res[:10] ) )
+          else:
+            self.logger.verbose( '_query: Total %d records returned' % len( res ) )
+            self.logger.verbose( '_query: %s ...' % str( res[:10] ) )
+
+        retDict = S_OK( res )
+      except BaseException as x:
+        if retry and self.__retryAfter( x, ( CR_SERVER_GONE_ERROR, CR_SERVER_LOST ) ):
+          self.log.warn( '_query: connection closed by the server, retrying', str( x ) )
+          retry = False
+          continue
+        self.log.warn( '_query: %s' % self._safeCmd( cmd ) )
+        retDict = self._except( '_query', x, 'Execution failed.' )
+        self.__connectionPool.markStale()
 
-      retDict = S_OK( res )
-    except BaseException as x:
-      self.log.warn( '_query: %s' % self._safeCmd( cmd ) )
-      retDict = self._except( '_query', x, 'Execution failed.' )
+      try:
+        cursor.close()
+      except BaseException:
+        pass
+      break
 
-    try:
-      cursor.close()
-    except BaseException:
-      pass
+    gDBProfiler.record( self.__dbName, cmd, time.time() - start,
+                        rows = len( retDict['Value'] ) if retDict['OK'] else 0, error = not retDict['OK'] )
 
     if gDebugFile:
       print >> gDebugFile, time.time() - start, cmd.replace( '\n', '' )
@@ -657,10 +815,12 @@ class MySQL( object ):
     return retDict
 
 
-  def _update( self, cmd, conn = None, debug = False ):
+  def _update( self, cmd, conn = None, debug = False, args = None ):
     """ execute MySQL update command
         return S_OK with number of updated registers upon success
         return S_ERROR upon error
+
+        If args is given, cmd is a parameterized statement, see _query
     """
     if debug:
       self.logger.debug( '_update: %s' % self._safeCmd( cmd ) )
@@ -670,36 +830,159 @@ class MySQL( object ):
       else:
         self.logger.verbose( '_update: %s' % self._safeCmd( cmd )[:min( len( cmd ) , 512 )] )
 
+    start = time.time()
+
+    retry = True
+    while True:
+      retDict = self._getConnection()
+      if not retDict['OK']:
+        return retDict
+      connection = retDict['Value']
+
+      self.__trackSession( cmd )
+      try:
+        cursor = connection.cursor()
+        res = cursor.execute( cmd, args )
+        # connection.commit()
+        if debug:
+          self.log.debug( '_update:', res )
+        else:
+          self.log.verbose( '_update:', res )
+        retDict = S_OK( res )
+        if cursor.lastrowid:
+          retDict[ 'lastRowId' ] = cursor.lastrowid
+      except Exception as x:
+        if retry and self.__retryAfter( x, ( CR_SERVER_GONE_ERROR, ) ):
+          self.log.warn( '_update: connection closed by the server, retrying', str( x ) )
+          retry = False
+          continue
+        self.log.warn( '_update: %s: %s' % ( self._safeCmd( cmd ), str( x ) ) )
+        retDict = self._except( '_update', x, 'Execution failed.' )
+        self.__connectionPool.markStale()
+
+      try:
+        cursor.close()
+      except Exception:
+        pass
+      break
+
+    gDBProfiler.record( self.__dbName, cmd, time.time() - start,
+                        rows = retDict.get( 'Value', 0 ), error = not retDict['OK'] )
+
     if gDebugFile:
-      start = time.time()
+      print >> gDebugFile, time.time() - start, cmd.replace( '\n', '' )
+      gDebugFile.flush()
 
-    retDict = self._getConnection()
+    return retDict
+
+  def _queryIter( self, cmd, args = None, chunkSize = 1000 ):
+    """
+    execute MySQL query command and fetch the result by chunks with a server side
+    cursor, so that the complete result is never held in memory
+
+    It is a generator of S_OK( tuple of at most chunkSize rows ): nothing is yielded
+    if no matching rows are found, an S_ERROR is yielded and the iteration stops
+    upon error.
+    The query uses its own connection, taken from the spare connections of the pool and
+    given back at the end of the iteration: other queries can be done while iterating,
+    but not in the same transaction.
+    """
+    self.logger.verbose( '_queryIter: %s' % self._safeCmd( cmd )[:512] )
+
+    retDict = self.__connectionPool.getDedicated( self.__dbName )
     if not retDict['OK']:
-      return retDict
+      yield retDict
+      return
     connection = retDict['Value']
 
+    nbRows = 0
+    # Only the time spent fetching is accounted, not the time spent by the caller on the rows
+    elapsedTime = 0
+    error = False
+    complete = False
     try:
-      cursor = connection.cursor()
-      res = cursor.execute( cmd )
-      # connection.commit()
-      if debug:
-        self.log.debug( '_update:', res )
-      else:
-        self.log.verbose( '_update:', res )
-      retDict = S_OK( res )
-      if cursor.lastrowid:
-        retDict[ 'lastRowId' ] = cursor.lastrowid
+      start = time.time()
+      cursor = connection.cursor( MySQLdb.cursors.SSCursor )
+      cursor.execute( cmd, args )
+      while True:
+        rows = cursor.fetchmany( chunkSize )
+        elapsedTime += time.time() - start
+        if not rows:
+          break
+        nbRows += len( rows )
+        yield S_OK( rows )
+        start = time.time()
+      cursor.close()
+      complete = True
+      self.logger.verbose( '_queryIter: Total %d records returned' % nbRows )
     except Exception as x:
-      self.log.warn( '_update: %s: %s' % ( self._safeCmd( cmd ), str( x ) ) )
-      retDict = self._except( '_update', x, 'Execution failed.' )
+      error = True
+      self.log.warn( '_queryIter: %s' % self._safeCmd( cmd ) )
+      yield self._except( '_queryIter', x, 'Execution failed.' )
+    finally:
+      gDBProfiler.record( self.__dbName, cmd, elapsedTime, rows = nbRows, error = error )
+      # Closing a server side cursor would fetch the rows that were not read: the connection
+      # is only reused if the result was read to the end, otherwise it is closed
+      self.__connectionPool.putDedicated( connection, self.__dbName, reusable = complete )
+
+  def _updatemany( self, cmd, argsList, debug = False ):
+    """ execute a parameterized MySQL update command for each element of argsList
+
+        The values are escaped on the client side, no string is built by the caller.
+        For INSERT ... VALUES ( %s, ... ) statements, all the rows are sent in a single
+        multi-row INSERT.
+        return S_OK with the number of affected rows upon success, 'lastRowId' is the
+        id of the first inserted row
+        return S_ERROR upon error
+    """
+    if debug:
+      self.logger.debug( '_updatemany: %s (%d rows)' % ( self._safeCmd( cmd ), len( argsList ) ) )
+    else:
+      self.logger.verbose( '_updatemany: %s (%d rows)' % ( self._safeCmd( cmd )[:512], len( argsList ) ) )
 
-    try:
-      cursor.close()
-    except Exception:
-      pass
+    if not argsList:
+      return S_OK( 0 )
+
+    start = time.time()
+
+    retry = True
+    while True:
+      retDict = self._getConnection()
+      if not retDict['OK']:
+        return retDict
+      connection = retDict['Value']
+
+      self.__trackSession( cmd )
+      try:
+        cursor = connection.cursor()
+        res = cursor.executemany( cmd, argsList )
+        if debug:
+          self.log.debug( '_updatemany:', res )
+        else:
+          self.log.verbose( '_updatemany:', res )
+        retDict = S_OK( res )
+        if cursor.lastrowid:
+          retDict[ 'lastRowId' ] = cursor.lastrowid
+      except Exception as x:
+        if retry and self.__retryAfter( x, ( CR_SERVER_GONE_ERROR, ) ):
+          self.log.warn( '_updatemany: connection closed by the server, retrying', str( x ) )
+          retry = False
+          continue
+        self.log.warn( '_updatemany: %s: %s' % ( self._safeCmd( cmd ), str( x ) ) )
+        retDict = self._except( '_updatemany', x, 'Execution failed.' )
+        self.__connectionPool.markStale()
+
+      try:
+        cursor.close()
+      except Exception:
+        pass
+      break
+
+    gDBProfiler.record( self.__dbName, cmd, time.time() - start,
+                        rows = retDict.get( 'Value', 0 ), error = not retDict['OK'] )
 
     if gDebugFile:
-      print >> gDebugFile, time.time() - start, cmd.replace( '\n', '' )
+      print >> gDebugFile, time.time() - start, len( argsList ), cmd.replace( '\n', '' )
       gDebugFile.flush()
 
     return retDict
@@ -975,6 +1258,22 @@ class MySQL( object ):
     """
     return param[0].tostring()
 
+  def __trackSession( self, cmd ):
+    """ Remember whether the connection of the thread may have a transaction or locks """
+    if _sessionStartRE.match( cmd ):
+      self.__connectionPool.setSession( True )
+    elif _sessionEndRE.match( cmd ):
+      self.__connectionPool.setSession( False )
+
+  def __retryAfter( self, excp, errorCodes ):
+    """ After one of the errorCodes, the connection closed by the server is discarded. The statement
+        can be sent again on a new connection, unless the connection had a transaction or locks
+    """
+    if not isinstance( excp, MySQLdb.OperationalError ) or not excp.args or excp.args[0] not in errorCodes:
+      return False
+    self.__connectionPool.discard()
+    return not self.__connectionPool.inSession()
+
   def _getConnection( self ):
     """ Return  a new connection to the DB,
 
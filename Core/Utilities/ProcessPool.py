@@ -151,7 +151,7 @@ class WorkingProcess(multiprocessing.Process):
 
   """
 
-  def __init__(self, pendingQueue, resultsQueue, stopEvent, keepRunning):
+  def __init__(self, pendingQueue, resultsQueue, stopEvent, keepRunning, takenCounter=None):
     """ c'tor
 
     :param self: self reference
@@ -161,6 +161,8 @@ class WorkingProcess(multiprocessing.Process):
     :type resultsQueue: multiprocessing.Queue
     :param stopEvent: event to stop processing
     :type stopEvent: multiprocessing.Event
+    :param takenCounter: number of tasks taken out of the pending queue by all the workers
+    :type takenCounter: multiprocessing.Value
     """
     multiprocessing.Process.__init__(self)
     # # daemonize
@@ -177,6 +179,8 @@ class WorkingProcess(multiprocessing.Process):
     self.__stopEvent = stopEvent
     # # keep process running until stop event
     self.__keepRunning = keepRunning
+    # # tasks taken by all the workers
+    self.__takenCounter = takenCounter
     # # placeholder for watchdog thread
     self.__watchdogThread = None
     # # placeholder for process thread
@@ -277,27 +281,34 @@ class WorkingProcess(multiprocessing.Process):
           return
         continue
 
+      # # wake up call from the pool, see ProcessPool.finalize
+      if task is None:
+        continue
+
       # # toggle __working flag
       self.__working.value = 1
+      if self.__takenCounter is not None:
+        with self.__takenCounter.get_lock():
+          self.__takenCounter.value += 1
       # # save task
       self.task = task
       # # reset idle loop counter
       idleLoopCount = 0
 
-      # # process task in a separate thread
-      self.__processThread = threading.Thread(target=self.__processTask)
-      self.__processThread.start()
-
       timeout = False
       noResults = False
-      # # join processThread with or without timeout
       if self.task.getTimeOut():
+        # # process task in a separate thread that can be stopped
+        self.__processThread = threading.Thread(target=self.__processTask)
+        self.__processThread.start()
         self.__processThread.join(self.task.getTimeOut() + 10)
       else:
-        self.__processThread.join()
+        # # nothing to watch, no need for a thread
+        self.__processThread = None
+        self.__processTask()
 
       # # processThread is still alive? stop it!
-      if self.__processThread.is_alive():
+      if self.__processThread and self.__processThread.is_alive():
         self.__processThread._Thread__stop()
         self.task.setResult(S_ERROR(errno.ETIME, "Timed out"))
         timeout = True
@@ -618,6 +629,9 @@ class ProcessPool(object):
     self.__pendingQueue = multiprocessing.Queue(self.__maxQueuedRequests)
     # # results queue
     self.__resultsQueue = multiprocessing.Queue(0)
+    # # number of tasks put in the pending queue, and taken out of it by the workers
+    self.__queuedCounter = 0
+    self.__takenCounter = multiprocessing.Value('i', 0)
     # # stop event
     self.__stopEvent = multiprocessing.Event()
     # # keep processes running flag
@@ -733,7 +747,8 @@ class ProcessPool(object):
     """
     self.__prListLock.acquire()
     try:
-      worker = WorkingProcess(self.__pendingQueue, self.__resultsQueue, self.__stopEvent, self.__keepRunning)
+      worker = WorkingProcess(self.__pendingQueue, self.__resultsQueue, self.__stopEvent, self.__keepRunning,
+                              self.__takenCounter)
       while worker.pid is None:
         time.sleep(0.1)
       self.__workersDict[worker.pid] = worker
@@ -770,13 +785,12 @@ class ProcessPool(object):
         return
       self.__spawnWorkingProcess()
 
-    while self.hasPendingTasks() and \
-            self.getNumIdleProcesses() == 0 and \
+    # # one idle worker for each task not taken yet
+    while self.getNumPendingTasks() > self.getNumIdleProcesses() and \
             len(self.__workersDict) < self.__maxSize:
       if self.__draining or self.__stopEvent.is_set():
         return
       self.__spawnWorkingProcess()
-      time.sleep(0.1)
 
   def queueTask(self, task, blocking=True, usePoolCallbacks=False):
     """
@@ -795,15 +809,13 @@ class ProcessPool(object):
     self.__prListLock.acquire()
     try:
       self.__pendingQueue.put(task, block=blocking)
+      self.__queuedCounter += 1
     except Queue.Full:
-      self.__prListLock.release()
       return S_ERROR("Queue is full")
     finally:
       self.__prListLock.release()
 
     self.__spawnNeededWorkingProcesses()
-    # # throttle a bit to allow task state propagation
-    time.sleep(0.1)
     return S_OK()
 
   def createAndQueueTask(self,
@@ -833,16 +845,21 @@ class ProcessPool(object):
     task = ProcessTask(taskFunction, args, kwargs, taskID, callback, exceptionCallback, usePoolCallbacks, timeOut)
     return self.queueTask(task, blocking)
 
-  def hasPendingTasks(self):
+  def getNumPendingTasks(self):
     """
-    Check if taks are present in pending queue
+    Count the tasks queued and not taken by a worker yet
 
     :param self: self reference
+    """
+    return max(0, self.__queuedCounter - self.__takenCounter.value)
 
-    :warning: results may be misleading if elements put into the queue are big
+  def hasPendingTasks(self):
+    """
+    Check if taks are present in pending queue
 
+    :param self: self reference
     """
-    return not self.__pendingQueue.empty()
+    return self.getNumPendingTasks() > 0
 
   def isFull(self):
     """
@@ -861,16 +878,19 @@ class ProcessPool(object):
 
     :param self: self reference
     """
-    return not self.__pendingQueue.empty() or self.getNumWorkingProcesses()
+    return self.hasPendingTasks() or self.getNumWorkingProcesses()
 
-  def processResults(self):
+  def processResults(self, timeout=0):
     """
     Execute tasks' callbacks removing them from results queue
 
     :param self: self reference
+    :param float timeout: seconds to wait for a first result when there is none
     """
     processed = 0
     log = gLogger.getSubLogger('ProcessPool')
+    if timeout and self.__waitForResult(timeout):
+      processed += 1
     while True:
       if (
           not log.debug(
@@ -881,10 +901,9 @@ class ProcessPool(object):
       start = time.time()
       self.__cleanDeadProcesses()
       log.debug("__cleanDeadProcesses", 't=%.2f' % (time.time() - start))
-      if not self.__pendingQueue.empty():
+      if self.hasPendingTasks():
         self.__spawnNeededWorkingProcesses()
         log.debug("__spawnNeededWorkingProcesses", 't=%.2f' % (time.time() - start))
-      time.sleep(0.1)
       if self.__resultsQueue.empty():
         if self.__resultsQueue.qsize():
           log.warn("Results queue is empty but has non zero size: %d" % self.__resultsQueue.qsize())
@@ -899,20 +918,7 @@ class ProcessPool(object):
       # # get task
       task = self.__resultsQueue.get()
       log.debug("__resultsQueue.get", 't=%.2f' % (time.time() - start))
-      # # execute callbacks
-      try:
-        task.doExceptionCallback()
-        task.doCallback()
-        log.debug("doCallback", 't=%.2f' % (time.time() - start))
-        if task.usePoolCallbacks():
-          if self.__poolExceptionCallback and task.exceptionRaised():
-            self.__poolExceptionCallback(task.getTaskID(), task.taskException())
-          if self.__poolCallback and task.taskResults():
-            self.__poolCallback(task.getTaskID(), task.taskResults())
-            log.debug("__poolCallback", 't=%.2f' % (time.time() - start))
-      except Exception as error:
-        log.exception("Exception in callback", lException=error)
-        pass
+      self.__executeCallbacks(task)
       processed += 1
     if processed:
       log.info("Processed %d results" % processed)
@@ -920,6 +926,40 @@ class ProcessPool(object):
       log.debug("No results processed")
     return processed
 
+  def __waitForResult(self, timeout):
+    """
+    Block until a result comes back from the workers and execute its callbacks
+
+    :param self: self reference
+    :param float timeout: seconds to wait
+    :return: True if a result was processed
+    """
+    try:
+      task = self.__resultsQueue.get(block=True, timeout=timeout)
+    except Queue.Empty:
+      return False
+    self.__executeCallbacks(task)
+    return True
+
+  def __executeCallbacks(self, task):
+    """
+    Execute the callbacks of a task coming back from the workers
+
+    :param self: self reference
+    :param ProcessTask task: processed task
+    """
+    log = gLogger.getSubLogger('ProcessPool')
+    try:
+      task.doExceptionCallback()
+      task.doCallback()
+      if task.usePoolCallbacks():
+        if self.__poolExceptionCallback and task.exceptionRaised():
+          self.__poolExceptionCallback(task.getTaskID(), task.taskException())
+        if self.__poolCallback and task.taskResults():
+          self.__poolCallback(task.getTaskID(), task.taskResults())
+    except Exception as error:
+      log.exception("Exception in callback", lException=error)
+
   def processAllResults(self, timeout=10):
     """
     Process all enqueued tasks at once
@@ -927,9 +967,8 @@ class ProcessPool(object):
     :param self: self reference
     """
     start = time.time()
-    while self.getNumWorkingProcesses() or not self.__pendingQueue.empty():
-      self.processResults()
-      time.sleep(1)
+    while self.getNumWorkingProcesses() or self.hasPendingTasks():
+      self.processResults(timeout=0.1)
       if time.time() - start > timeout:
         break
     self.processResults()
@@ -950,6 +989,12 @@ class ProcessPool(object):
     self.processAllResults(timeout)
     # # set stop event, all idle workers should be terminated
     self.__stopEvent.set()
+    # # wake up the workers waiting for a task
+    for _worker in self.__workersDict.values():
+      try:
+        self.__pendingQueue.put(None, block=False)
+      except Queue.Full:
+        break
     # # join idle workers
     start = time.time()
     log = gLogger.getSubLogger("ProcessPool/finalize")
@@ -1014,8 +1059,8 @@ class ProcessPool(object):
     while True:
       if self.__draining:
         return
-      self.processResults()
-      time.sleep(1)
+      # # wait for the results rather than polling for them
+      self.processResults(timeout=1)
 
   def __del__(self):
     """
@@ -8,11 +8,45 @@
 
 __RCSID__ = "$Id$"
 
+import os
+
 from DIRAC import S_OK
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.ConfigurationSystem.Client.Helpers import CSGlobals
+from DIRAC.ConfigurationSystem.Client.Helpers.Memoize import csMemoized
+from DIRAC.Core.Security import Locations
+from DIRAC.Core.Security.ProxyInfo import getVOfromProxyGroup
 from DIRAC.DataManagementSystem.Utilities.DMSHelpers import DMSHelpers, siteGridName
 
+# ( proxy location, modification time of the proxy ) -> VO of its group, for the configuration snapshot
+_proxyVOs = {}
+_proxyVOsSnapshot = None
+
+
+def _getVO():
+  """ The mappings depend on the Operations section of the VO, found like Operations() does.
+      Reading the proxy is only done again when it changed, or when the configuration did
+  """
+  global _proxyVOs, _proxyVOsSnapshot  # pylint: disable=global-statement
+  vo = CSGlobals.getVO()
+  if vo:
+    return vo
+  proxyLocation = Locations.getProxyLocation()
+  try:
+    key = (proxyLocation, os.stat(proxyLocation).st_mtime if proxyLocation else None)
+  except OSError:
+    return getVOfromProxyGroup().get('Value')
+  snapshot = gConfigurationData.getSnapshot()
+  if snapshot is not _proxyVOsSnapshot:
+    _proxyVOs, _proxyVOsSnapshot = {}, snapshot
+  proxyVOs = _proxyVOs
+  if key not in proxyVOs:
+    proxyVOs[key] = getVOfromProxyGroup().get('Value')
+  return proxyVOs[key]
+
 
 #############################################################################
+@csMemoized(extraKey=_getVO)
 def getSiteSEMapping(gridName='', withSiteLocalSEMapping=False):
   """ Returns a dictionary of all sites and their localSEs as a list, e.g.
       {'LCG.CERN.ch':['CERN-RAW','CERN-RDST',...]}
@@ -31,6 +65,7 @@ def getSiteSEMapping(gridName='', withSiteLocalSEMapping=False):
 
 
 #############################################################################
+@csMemoized(extraKey=_getVO)
 def getSESiteMapping(gridName='', withSiteLocalSEMapping=False):
   """ Returns a dictionary of all SEs and their associated site(s), e.g.
       {'CERN-RAW':'LCG.CERN.ch','CERN-RDST':'LCG.CERN.ch',...]}
@@ -48,6 +83,7 @@ def getSESiteMapping(gridName='', withSiteLocalSEMapping=False):
 #############################################################################
 
 
+@csMemoized(extraKey=_getVO)
 def getSitesForSE(storageElement, gridName='', withSiteLocalSEMapping=False):
   """ Given a DIRAC SE name this method returns a list of corresponding sites.
       Optionally restrict to Grid specified by name.
@@ -61,6 +97,7 @@ def getSitesForSE(storageElement, gridName='', withSiteLocalSEMapping=False):
 
 
 #############################################################################
+@csMemoized(extraKey=_getVO)
 def getSEsForSite(siteName, withSiteLocalSEMapping=False):
   """ Given a DIRAC site name this method returns a list of corresponding SEs.
   """
@@ -83,6 +120,7 @@ def isSameSiteSE(se1, se2):
 #############################################################################
 
 
+@csMemoized(extraKey=_getVO)
 def getSEsForCountry(country):
   """ Determines the associated SEs from the country code
   """
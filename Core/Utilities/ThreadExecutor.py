@@ -0,0 +1,342 @@
+""" Pool of threads executing the tasks submitted in priority lanes
+
+    A ThreadExecutor runs callables in a pool of threads, and gives a future
+    (concurrent.futures.Future) for each of them::
+
+      executor = ThreadExecutor( 1, 10, lanes = ( ( 'Admin', 0 ), ( 'Queries', 500 ) ) )
+      result = executor.submit( function, args = ( arg1, arg2 ), lane = 'Queries' )
+      if result[ 'OK' ]:
+        future = result[ 'Value' ]
+        print future.result()
+
+    The lanes are given in priority order, with the maximum number of tasks waiting
+    in each of them (0 for no limit). Any idle thread takes the oldest task of the first
+    lane having one, so that the tasks of a lane never wait behind the ones of a less
+    important lane. When a lane is full, submit blocks until there is room for the task,
+    or fails if it is not blocking.
+
+    A thread is started when a task is submitted and no thread is idle, up to maxThreads.
+    When more than minThreads threads are idle, the exceeding ones stop. The threads wait
+    on a condition, there is no polling.
+
+    The time the tasks wait in their lane and the time they run are accounted in
+    histograms, see getStats().
+
+    generateJobAndQueueIt keeps the interface of the former ThreadPool: the callbacks are
+    called by the thread that executed the job.
+"""
+
+__RCSID__ = "$Id$"
+
+import bisect
+import collections
+import sys
+import threading
+import time
+
+from concurrent.futures import Future
+
+from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
+try:
+  from DIRAC.FrameworkSystem.Client.Logger import gLogger
+except ImportError:
+  gLogger = False
+
+DEFAULT_LANE = 'Default'
+
+
+class Histogram( object ):
+  """ Distribution of durations, in buckets of exponentially increasing sizes
+  """
+
+  BOUNDS = ( 0.001, 0.01, 0.1, 1., 10., 60. )
+
+  def __init__( self ):
+    self.__counts = [ 0 ] * ( len( self.BOUNDS ) + 1 )
+    self.__total = 0.
+    self.__max = 0.
+
+  def add( self, duration ):
+    self.__counts[ bisect.bisect_left( self.BOUNDS, duration ) ] += 1
+    self.__total += duration
+    self.__max = max( self.__max, duration )
+
+  def getStats( self ):
+    """ :returns: dict with the Count, Mean and Max of the durations, and the Buckets:
+                  list of ( upper bound in seconds, count ), the last bound is None
+    """
+    count = sum( self.__counts )
+    return { 'Count' : count,
+             'Mean' : self.__total / count if count else 0.,
+             'Max' : self.__max,
+             'Buckets' : zip( self.BOUNDS + ( None, ), self.__counts ) }
+
+
+class ThreadedJob( object ):
+
+  def __init__( self,
+                oCallable,
+                args = None,
+                kwargs = None,
+                sTJId = None,
+                oCallback = None,
+                oExceptionCallback = None ):
+    self.__jobFunction = oCallable
+    self.__jobArgs = args or []
+    self.__jobKwArgs = kwargs or {}
+    self.__tjID = sTJId
+    self.__resultCallback = oCallback
+    self.__exceptionCallback = oExceptionCallback
+    self.__done = False
+    self.__exceptionRaised = False
+    self.__jobResult = None
+    self.__jobException = None
+
+  def jobId( self ):
+    return self.__tjID
+
+  def hasCallback( self ):
+    return self.__resultCallback or self.__exceptionCallback
+
+  def exceptionRaised( self ):
+    return self.__exceptionRaised
+
+  def doExceptionCallback( self ):
+    if self.__done and self.__exceptionRaised and self.__exceptionCallback:
+      self.__exceptionCallback( self, self.__jobException )
+
+  def doCallback( self ):
+    if self.__done and not self.__exceptionRaised and self.__resultCallback:
+      self.__resultCallback( self, self.__jobResult )
+
+  def process( self ):
+    self.__done = True
+    try:
+      self.__jobResult = self.__jobFunction( *self.__jobArgs, **self.__jobKwArgs )
+    except Exception as lException:
+      self.__exceptionRaised = True
+      if not self.__exceptionCallback:
+        if gLogger:
+          gLogger.exception( "Exception in thread", lException = lException )
+      else:
+        self.__jobException = sys.exc_info()
+
+
+class _Lane( object ):
+
+  def __init__( self, maxQueued ):
+    self.maxQueued = max( 0, maxQueued )
+    # ( future, callable, args, kwargs, submission time )
+    self.tasks = collections.deque()
+    self.submitted = 0
+    self.rejected = 0
+    self.waitTimes = Histogram()
+    self.runTimes = Histogram()
+
+  def isFull( self ):
+    return self.maxQueued and len( self.tasks ) >= self.maxQueued
+
+
+class ThreadExecutor( object ):
+
+  def __init__( self, minThreads = 1, maxThreads = 0, lanes = None, defaultLane = None ):
+    """
+      :param int minThreads: number of threads kept even when idle
+      :param int maxThreads: maximum number of threads
+      :param lanes: list of ( name, maximum number of waiting tasks ), the most important first,
+                    by default a single lane without limit
+      :param str defaultLane: lane of the tasks submitted without one, by default the last one
+    """
+    self.__minThreads = max( 1, minThreads )
+    self.__maxThreads = max( self.__minThreads, maxThreads )
+    if not lanes:
+      lanes = ( ( DEFAULT_LANE, 0 ), )
+    self.__laneNames = [ laneName for laneName, _maxQueued in lanes ]
+    self.__lanes = dict( [ ( laneName, _Lane( maxQueued ) ) for laneName, maxQueued in lanes ] )
+    self.__defaultLane = defaultLane or self.__laneNames[-1]
+    self.__lock = threading.Lock()
+    # Idle threads wait for tasks
+    self.__taskCondition = threading.Condition( self.__lock )
+    # Submitters wait for room in a full lane
+    self.__roomCondition = threading.Condition( self.__lock )
+    # Waiting for all the tasks to be done
+    self.__idleCondition = threading.Condition( self.__lock )
+    self.__threads = 0
+    # Threads waiting for a task and not notified yet
+    self.__idleThreads = 0
+    self.__workingThreads = 0
+    self.__alive = True
+    with self.__lock:
+      for _i in range( self.__minThreads ):
+        self.__spawnThread()
+
+  def getMinThreads( self ):
+    return self.__minThreads
+
+  def getMaxThreads( self ):
+    return self.__maxThreads
+
+  def getLanes( self ):
+    return list( self.__laneNames )
+
+  def numWorkingThreads( self ):
+    return self.__workingThreads
+
+  def numWaitingThreads( self ):
+    return self.__threads - self.__workingThreads
+
+  def pendingJobs( self, lane = None ):
+    """ :returns: number of tasks waiting in the lane, or in all the lanes """
+    if lane:
+      return len( self.__lanes[ lane ].tasks )
+    return sum( [ len( laneObj.tasks ) for laneObj in self.__lanes.values() ] )
+
+  def isFull( self, lane = None ):
+    return self.__lanes[ lane or self.__defaultLane ].isFull()
+
+  def isWorking( self ):
+    return bool( self.__workingThreads or self.pendingJobs() )
+
+  def submit( self, oCallable, args = None, kwargs = None, lane = None, blocking = True ):
+    """ Execute oCallable( *args, **kwargs ) in a thread of the pool
+
+        :param str lane: lane of the task, by default the default lane
+        :param bool blocking: wait for room in the lane if it is full, instead of failing
+        :returns: S_OK( future of the result )
+    """
+    laneName = lane or self.__defaultLane
+    if laneName not in self.__lanes:
+      return S_ERROR( "Unknown lane %s" % laneName )
+    laneObj = self.__lanes[ laneName ]
+    future = Future()
+    with self.__lock:
+      if not self.__alive:
+        return S_ERROR( "Thread executor is stopped" )
+      while laneObj.isFull():
+        if not blocking:
+          laneObj.rejected += 1
+          return S_ERROR( "Queue is full" )
+        self.__roomCondition.wait()
+      laneObj.tasks.append( ( future, oCallable, args or (), kwargs or {}, time.time() ) )
+      laneObj.submitted += 1
+      if self.__idleThreads:
+        self.__idleThreads -= 1
+        self.__taskCondition.notify()
+      elif self.__threads < self.__maxThreads:
+        self.__spawnThread()
+    return S_OK( future )
+
+  def generateJobAndQueueIt( self,
+                             oCallable,
+                             args = None,
+                             kwargs = None,
+                             sTJId = None,
+                             oCallback = None,
+                             oExceptionCallback = None,
+                             blocking = True,
+                             lane = None ):
+    """ Interface of the former ThreadPool, the callbacks are called by the thread executing the job
+    """
+    return self.queueJob( ThreadedJob( oCallable, args, kwargs, sTJId, oCallback, oExceptionCallback ),
+                          blocking, lane = lane )
+
+  def queueJob( self, oTJob, blocking = True, lane = None ):
+    if not isinstance( oTJob, ThreadedJob ):
+      raise TypeError( "Jobs added to the thread pool must be ThreadedJob instances" )
+    result = self.submit( self.__processJob, args = ( oTJob, ), lane = lane, blocking = blocking )
+    if not result[ 'OK' ]:
+      return result
+    return S_OK()
+
+  @staticmethod
+  def __processJob( oTJob ):
+    oTJob.process()
+    oTJob.doExceptionCallback()
+    oTJob.doCallback()
+
+  def waitUntilIdle( self ):
+    """ Wait until no task is waiting nor running """
+    with self.__lock:
+      while self.__workingThreads or self.pendingJobs():
+        self.__idleCondition.wait()
+
+  def stop( self ):
+    """ The threads stop once the tasks already submitted are done """
+    with self.__lock:
+      self.__alive = False
+      self.__idleThreads = 0
+      self.__taskCondition.notifyAll()
+
+  def getStats( self ):
+    """ :returns: dict with the number of Threads, WorkingThreads, and per lane, the number of
+                  tasks Queued, Submitted, Rejected, and the histograms of their WaitTime in
+                  the lane and of their RunTime (see Histogram.getStats)
+    """
+    with self.__lock:
+      lanesStats = {}
+      for laneName, laneObj in self.__lanes.items():
+        lanesStats[ laneName ] = { 'Queued' : len( laneObj.tasks ),
+                                   'MaxQueued' : laneObj.maxQueued,
+                                   'Submitted' : laneObj.submitted,
+                                   'Rejected' : laneObj.rejected,
+                                   'WaitTime' : laneObj.waitTimes.getStats(),
+                                   'RunTime' : laneObj.runTimes.getStats() }
+      return { 'Threads' : self.__threads,
+               'WorkingThreads' : self.__workingThreads,
+               'Lanes' : lanesStats }
+
+  def __spawnThread( self ):
+    """ Must be called with the lock acquired """
+    thread = threading.Thread( target = self.__work )
+    thread.setDaemon( 1 )
+    self.__threads += 1
+    thread.start()
+
+  def __popTask( self ):
+    """ Must be called with the lock acquired
+
+        :returns: ( lane, task ) for the oldest task of the most important lane, None if there is none
+    """
+    for laneName in self.__laneNames:
+      laneObj = self.__lanes[ laneName ]
+      if laneObj.tasks:
+        task = laneObj.tasks.popleft()
+        if laneObj.maxQueued:
+          self.__roomCondition.notifyAll()
+        return laneObj, task
+    return None
+
+  def __work( self ):
+    with self.__lock:
+      while True:
+        nextTask = self.__popTask()
+        if not nextTask:
+          if not self.__alive or \
+             ( self.__idleThreads >= self.__minThreads and self.__threads > self.__minThreads ):
+            self.__threads -= 1
+            return
+          self.__idleThreads += 1
+          self.__taskCondition.wait()
+          continue
+        laneObj, ( future, oCallable, args, kwargs, submitTime ) = nextTask
+        if not future.set_running_or_notify_cancel():
+          continue
+        self.__workingThreads += 1
+        startTime = time.time()
+        laneObj.waitTimes.add( startTime - submitTime )
+        self.__lock.release()
+        try:
+          try:
+            result = oCallable( *args, **kwargs )
+          except Exception as lException:  # pylint: disable=broad-except
+            if gLogger:
+              gLogger.exception( "Exception in thread", lException = lException )
+            future.set_exception_info( *sys.exc_info()[1:] )
+          else:
+            future.set_result( result )
+        finally:
+          self.__lock.acquire()
+        laneObj.runTimes.add( time.time() - startTime )
+        self.__workingThreads -= 1
+        if not self.__workingThreads and not self.pendingJobs():
+          self.__idleCondition.notifyAll()
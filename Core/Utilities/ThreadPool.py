@@ -18,7 +18,12 @@ To start working with the ThreadPool first it has to be instanced::
                          If another request is added to the ThreadPool, the thread will
                          lock until another request is taken out of the queue.
 
-The ThreadPool will automatically increase and decrease the pool of workers as needed
+The ThreadPool will automatically increase and decrease the pool of workers as needed.
+Only the idle workers are stopped: the strictLimits argument of former versions is deprecated
+and ignored.
+
+No more than <maxQueuedRequests> + <maxThreads> results can be waiting to be processed,
+the workers wait for them to be processed before taking new requests.
 
 To add requests to the queue::
 
@@ -70,187 +75,61 @@ soon as the requests have finished. To enable this mode call::
 
    threadPool.daemonize()
 
+The ThreadPool is implemented on top of a ThreadExecutor, which new code should use directly:
+it gives futures for the results and supports priority lanes.
+
 """
 __RCSID__ = "$Id$"
 
 import time
-import sys
 import Queue
 import threading
-try:
-  from DIRAC.FrameworkSystem.Client.Logger import gLogger
-except:
-  gLogger = False
-from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
-
-
-class WorkingThread( threading.Thread ):
 
-  def __init__( self, oPendingQueue, oResultsQueue, **kwargs ):
-    threading.Thread.__init__( self, **kwargs )
-    self.setDaemon( 1 )
-    self.__pendingQueue = oPendingQueue
-    self.__resultsQueue = oResultsQueue
-    self.__threadAlive = True
-    self.__working = False
-    self.start()
-
-  def isWorking( self ):
-    return self.__working
+from DIRAC.Core.Utilities.ReturnValues import S_OK
+from DIRAC.FrameworkSystem.Client.Logger import gLogger
+from DIRAC.Core.Utilities.ThreadExecutor import ThreadExecutor, ThreadedJob, DEFAULT_LANE
 
-  def kill( self ):
-    self.__threadAlive = False
-
-  def run( self ):
-    while self.__threadAlive:
-      oJob = self.__pendingQueue.get( block = True )
-      if not self.__threadAlive:
-        self.__pendingQueue.put( oJob )
-        break
-      self.__working = True
-      oJob.process()
-      self.__working = False
-      if oJob.hasCallback():
-        self.__resultsQueue.put( oJob, block = True )
-
-
-class ThreadedJob:
-
-  def __init__( self,
-                oCallable,
-                args = None,
-                kwargs = None,
-                sTJId = None,
-                oCallback = None,
-                oExceptionCallback = None ):
-    self.__jobFunction = oCallable
-    self.__jobArgs = args or []
-    self.__jobKwArgs = kwargs or {}
-    self.__tjID = sTJId
-    self.__resultCallback = oCallback
-    self.__exceptionCallback = oExceptionCallback
-    self.__done = False
-    self.__exceptionRaised = False
-    self.__jobResult = None
-    self.__jobException = None
-
-  def __showException( self, threadedJob, exceptionInfo ):
-    if gLogger:
-      gLogger.exception( "Exception in thread", lExcInfo = exceptionInfo )
-
-  def jobId( self ):
-    return self.__tjID
-
-  def hasCallback( self ):
-    return self.__resultCallback or self.__exceptionCallback
-
-  def exceptionRaised( self ):
-    return self.__exceptionRaised
-
-  def doExceptionCallback( self ):
-    if self.__done and self.__exceptionRaised and self.__exceptionCallback:
-      self.__exceptionCallback( self, self.__jobException )
-
-  def doCallback( self ):
-    if self.__done and not self.__exceptionRaised and self.__resultCallback:
-      self.__resultCallback( self, self.__jobResult )
-
-  def process( self ):
-    self.__done = True
-    try:
-      self.__jobResult = self.__jobFunction( *self.__jobArgs, **self.__jobKwArgs )
-    except Exception as lException:
-      self.__exceptionRaised = True
-      if not self.__exceptionCallback:
-        if gLogger:
-          gLogger.exception( "Exception in thread", lException = lException )
-      else:
-        self.__jobException = sys.exc_info()
 
 class ThreadPool( threading.Thread ):
+  """ Interface on top of a ThreadExecutor, running the callbacks in the thread
+      processing the results
+  """
 
   def __init__( self, iMinThreads, iMaxThreads = 0, iMaxQueuedRequests = 0, strictLimits = True ):
     threading.Thread.__init__( self )
-    if iMinThreads < 1:
-      self.__minThreads = 1
-    else:
-      self.__minThreads = iMinThreads
-    if iMaxThreads < self.__minThreads:
-      self.__maxThreads = self.__minThreads
-    else:
-      self.__maxThreads = iMaxThreads
-    self.__strictLimits = strictLimits
-    self.__pendingQueue = Queue.Queue( iMaxQueuedRequests )
-    self.__resultsQueue = Queue.Queue( iMaxQueuedRequests + iMaxThreads )
-    self.__workingThreadsList = []
-    self.__spawnNeededWorkingThreads()
+    if not strictLimits:
+      gLogger.warn( "ThreadPool: strictLimits is deprecated and ignored, only the idle threads are stopped" )
+    self.__executor = ThreadExecutor( iMinThreads, iMaxThreads, lanes = ( ( DEFAULT_LANE, iMaxQueuedRequests ), ) )
+    self.__resultsQueue = Queue.Queue( iMaxQueuedRequests + self.__executor.getMaxThreads() )
 
   def getMaxThreads( self ):
-    return self.__maxThreads
+    return self.__executor.getMaxThreads()
 
   def getMinThreads( self ):
-    return self.__minThreads
+    return self.__executor.getMinThreads()
 
   def numWorkingThreads( self ):
-    return self.__countWorkingThreads()
+    return self.__executor.numWorkingThreads()
 
   def numWaitingThreads( self ):
-    return self.__countWaitingThreads()
-
-  def __spawnWorkingThread( self ):
-    self.__workingThreadsList.append( WorkingThread( self.__pendingQueue, self.__resultsQueue ) )
-
-  def __killWorkingThread( self ):
-    if self.__strictLimits:
-      for i in range( len( self.__workingThreadsList ) ):
-        wT = self.__workingThreadsList[i]
-        if not wT.isWorking():
-          wT.kill()
-          del self.__workingThreadsList[i]
-          break
-    else:
-      self.__workingThreadsList[0].kill()
-      del self.__workingThreadsList[0]
-
-  def __countWaitingThreads( self ):
-    iWaitingThreads = 0
-    for oWT in self.__workingThreadsList:
-      if not oWT.isWorking():
-        iWaitingThreads += 1
-    return iWaitingThreads
-
-  def __countWorkingThreads( self ):
-    iWorkingThreads = 0
-    for oWT in self.__workingThreadsList:
-      if oWT.isWorking():
-        iWorkingThreads += 1
-    return iWorkingThreads
-
-  def __spawnNeededWorkingThreads( self ):
-    while len( self.__workingThreadsList ) < self.__minThreads:
-      self.__spawnWorkingThread()
-    while self.__countWaitingThreads() == 0 and \
-          len( self.__workingThreadsList ) < self.__maxThreads:
-      self.__spawnWorkingThread()
-
-  def __killExceedingWorkingThreads( self ):
-    threadsToKill = len( self.__workingThreadsList ) - self.__maxThreads
-    for i in range ( max( threadsToKill, 0 ) ):
-      self.__killWorkingThread()
-    threadsToKill = self.__countWaitingThreads() - self.__minThreads
-    for i in range ( max( threadsToKill, 0 ) ):
-      self.__killWorkingThread()
+    return self.__executor.numWaitingThreads()
 
+  def getStats( self ):
+    return self.__executor.getStats()
 
   def queueJob( self, oTJob, blocking = True ):
     if not isinstance( oTJob, ThreadedJob ):
       raise TypeError( "Jobs added to the thread pool must be ThreadedJob instances" )
-    try:
-      self.__pendingQueue.put( oTJob, block = blocking )
-    except Queue.Full:
-      return S_ERROR( "Queue is full" )
+    result = self.__executor.submit( self.__processJob, args = ( oTJob, ), blocking = blocking )
+    if not result[ 'OK' ]:
+      return result
     return S_OK()
 
+  def __processJob( self, oTJob ):
+    oTJob.process()
+    if oTJob.hasCallback():
+      self.__resultsQueue.put( oTJob )
+
   def generateJobAndQueueIt( self,
                              oCallable,
                              args = None,
@@ -263,33 +142,42 @@ class ThreadPool( threading.Thread ):
     return self.queueJob( oTJ, blocking )
 
   def pendingJobs( self ):
-    return self.__pendingQueue.qsize()
+    return self.__executor.pendingJobs()
 
   def isFull( self ):
-    return self.__pendingQueue.full()
+    return self.__executor.isFull()
 
   def isWorking( self ):
-    return not self.__pendingQueue.empty() or self.__countWorkingThreads()
+    return self.__executor.isWorking()
 
   def processResults( self ):
     iProcessed = 0
     while True:
-      self.__spawnNeededWorkingThreads()
-      if self.__resultsQueue.empty():
-        self.__killExceedingWorkingThreads()
+      try:
+        oJob = self.__resultsQueue.get( block = False )
+      except Queue.Empty:
         break
-      oJob = self.__resultsQueue.get()
-      oJob.doExceptionCallback()
-      oJob.doCallback()
+      self.__doCallbacks( oJob )
       iProcessed += 1
-      self.__killExceedingWorkingThreads()
     return iProcessed
 
+  @staticmethod
+  def __doCallbacks( oJob ):
+    oJob.doExceptionCallback()
+    oJob.doCallback()
+
   def processAllResults( self ):
-    while not self.__pendingQueue.empty() or self.__countWorkingThreads():
-      self.processResults()
-      time.sleep( 0.1 )
-    self.processResults()
+    # The workers waiting for room in the results queue are still working: process
+    # the results while waiting for them. The callbacks may queue new jobs
+    while True:
+      working = self.isWorking()
+      if not self.processResults() and not working:
+        break
+      if working:
+        try:
+          self.__doCallbacks( self.__resultsQueue.get( timeout = 0.1 ) )
+        except Queue.Empty:
+          pass
 
   def daemonize( self ):
     self.setDaemon( 1 )
@@ -298,8 +186,7 @@ class ThreadPool( threading.Thread ):
   #This is the ThreadPool threaded function. YOU ARE NOT SUPPOSED TO CALL THIS FUNCTION!!!
   def run( self ):
     while True:
-      self.processResults()
-      time.sleep( 1 )
+      self.__doCallbacks( self.__resultsQueue.get() )
 
 
 gThreadPool = False
@@ -100,18 +100,28 @@ class ThreadScheduler(object):
           del( self.__hood[ i ] )
           break
 
-    executionTime = now + executeInSecs
-    inserted = False
+    self.__insertInHood( taskId, now + executeInSecs )
+    return S_OK()
+
+  @gSchedulerLock
+  def rescheduleTask( self, taskId, executeInSecs = 0 ):
+    """ Execute next a task in executeInSecs seconds instead of after its period """
+    if taskId not in self.__taskDict:
+      return S_ERROR( "Unknown task %s" % taskId )
     for i in range( len( self.__hood ) ):
-      if executionTime < self.__hood[i][1]:
-        self.__hood.insert( i, ( taskId, executionTime ) )
-        inserted = True
+      if self.__hood[i][0] == taskId:
+        del( self.__hood[i] )
         break
-    if not inserted:
-      self.__hood.append( ( taskId, executionTime ) )
-
+    self.__insertInHood( taskId, time.time() + executeInSecs )
     return S_OK()
 
+  def __insertInHood( self, taskId, executionTime ):
+    for i in range( len( self.__hood ) ):
+      if executionTime < self.__hood[i][1]:
+        self.__hood.insert( i, ( taskId, executionTime ) )
+        return
+    self.__hood.append( ( taskId, executionTime ) )
+
   def __executorThread( self ):
     while self.__hood:
       timeToNext = self.executeNextTask()
@@ -0,0 +1,73 @@
+""" Test the profiling of the database statements """
+
+from DIRAC.Core.Utilities.DBProfiler import DBProfiler, getFingerprint
+
+
+def test_fingerprint():
+  """ The values do not change the fingerprint of a statement """
+  assert getFingerprint("SELECT JobID FROM Jobs WHERE Status='Waiting' AND Site = \"LCG.CERN.ch\"") == \
+      "SELECT JobID FROM Jobs WHERE Status=? AND Site = ?"
+  assert getFingerprint("SELECT * FROM FC_Meta_12 WHERE FileID IN (1, 2,3) LIMIT 10") == \
+      "SELECT * FROM FC_Meta_12 WHERE FileID IN (...) LIMIT ?"
+  assert getFingerprint("INSERT INTO T (A, B) VALUES (1, 'a'), (2, 'b\\'s'),\n (3, 'c')") == \
+      "INSERT INTO T (A, B) VALUES (...), ..."
+  assert getFingerprint("UPDATE T SET A=-1.5e3 WHERE B=%s" % 7) == "UPDATE T SET A=? WHERE B=?"
+  # Huge statements are truncated before being normalized, even in the middle of a value
+  assert getFingerprint("INSERT INTO T (A, B) VALUES " + ", ".join(["(1, '%s')" % ('x' * 100)] * 100000)) == \
+      "INSERT INTO T (A, B) VALUES (...), ..., (?, ?"
+
+
+def callerMethod(profiler):
+  profiler.record('JobDB', "SELECT 1", 0.0005, rows=1)
+
+
+def test_record():
+  """ Executions of the same statement from the same method are aggregated """
+  profiler = DBProfiler()
+  profiler.setSampling('JobDB', 1)
+  profiler.setSampling('FileCatalogDB', 1)
+  profiler.record('JobDB', "SELECT Status FROM Jobs WHERE JobID=1", 0.02, rows=1)
+  profiler.record('JobDB', "SELECT Status FROM Jobs WHERE JobID=2", 2, rows=0, error=True)
+  profiler.record('FileCatalogDB', "SELECT 1", 0.5)
+  callerMethod(profiler)
+
+  profile = profiler.getProfile('JobDB')
+  assert len(profile) == 2
+  assert profile[0]['Statement'] == "SELECT Status FROM Jobs WHERE JobID=?"
+  assert profile[0]['Caller'] == 'Test_DBProfiler.test_record'
+  assert profile[0]['Count'] == 2
+  assert profile[0]['Errors'] == 1
+  assert profile[0]['Rows'] == 1
+  assert profile[0]['MaxTime'] == 2
+  assert profile[0]['Histogram'] == {'<1ms': 0, '<10ms': 0, '<100ms': 1, '<1s': 0, '<10s': 1, '>=10s': 0}
+  assert profile[1]['Caller'] == 'Test_DBProfiler.callerMethod'
+  assert profile[1]['Histogram']['<1ms'] == 1
+
+  assert [entry['DB'] for entry in profiler.getProfile(limit=2)] == ['JobDB', 'FileCatalogDB']
+  profiler.reset()
+  assert profiler.getProfile() == []
+
+
+def test_maxStatements():
+  """ The number of statements profiled is bounded """
+  profiler = DBProfiler(maxStatements=2)
+  profiler.setSampling('JobDB', 1)
+  for table in ('A', 'B', 'C', 'D'):
+    profiler.record('JobDB', "SELECT * FROM %s" % table, 0.1)
+  profile = profiler.getProfile()
+  assert len(profile) == 3
+  assert profile[0]['Statement'] == 'Other statements'
+  assert profile[0]['Count'] == 2
+
+
+def test_sampling():
+  """ Only the databases enabled are profiled, all their statements or a fraction of them """
+  profiler = DBProfiler()
+  profiler.record('JobDB', "SELECT 1", 0.1)
+  assert profiler.getProfile() == []
+  profiler.setSampling('JobDB', 0.5)
+  for _ in xrange(1000):
+    profiler.record('JobDB', "SELECT 1", 0.1)
+  assert 300 < profiler.getProfile()[0]['Count'] < 700
+  profiler.setSampling('JobDB', 0)
+  assert not profiler.isEnabled('JobDB')
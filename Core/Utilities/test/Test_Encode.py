@@ -13,7 +13,8 @@ import datetime
 import sys
 
 
-from DIRAC.Core.Utilities.DEncode import encode as disetEncode, decode as disetDecode, g_dEncodeFunctions
+from DIRAC.Core.Utilities.DEncode import encode as disetEncode, decode as disetDecode, g_dEncodeFunctions,\
+    g_dDecodeFunctions, StreamDecoder
 from DIRAC.Core.Utilities.JEncode import encode as jsonEncode, decode as jsonDecode, JSerializable
 
 from hypothesis import given
@@ -207,6 +208,46 @@ def test_nestedStructure(enc_dec, data):
   agnosticTestFunction(enc_dec, data)
 
 
+def legacyDisetDecode(data):
+  """ Decode using the recursive functions of DEncode """
+  return g_dDecodeFunctions[data[0]](data, 0)
+
+
+@given(data=nestedStrategy | floats(allow_nan=False))
+def test_fastDecodeMatchesLegacy(data):
+  """ The non recursive decoder gives exactly the same result as the recursive functions """
+  encodedData = disetEncode(data)
+  assert disetDecode(encodedData) == legacyDisetDecode(encodedData)
+
+
+@parametrize('chunkSize', [1, 3, 1024])
+@given(data=nestedStrategy | floats(allow_nan=False))
+def test_streamDecoder(chunkSize, data):
+  """ Decoding the data chunk by chunk gives the same result as decoding it at once """
+  encodedData = disetEncode(data)
+  decoder = StreamDecoder()
+  for index in xrange(0, len(encodedData), chunkSize):
+    decoder.feed(encodedData[index:index + chunkSize])
+  assert decoder.finish() == legacyDisetDecode(encodedData)
+
+
+def test_streamDecoderTrailingData():
+  """ Data after the end of the object is left aside, like decode does """
+  decoder = StreamDecoder()
+  assert not decoder.feed(memoryview("l"))
+  assert decoder.feed(bytearray("i1ee") + "extra")
+  assert decoder.getTrailingData() == "extra"
+  assert decoder.finish() == ([1], 5)
+
+
+def test_streamDecoderIncomplete():
+  """ Finishing before the end of the object raises an error """
+  decoder = StreamDecoder()
+  decoder.feed("ls3:ab")
+  with raises(ValueError):
+    decoder.finish()
+
+
 # DEncode raises KeyError.....
 # Others raise TypeError
 @parametrize('enc_dec', enc_dec_imp)
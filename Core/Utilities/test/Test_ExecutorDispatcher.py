@@ -4,9 +4,11 @@
 # pylint: disable=protected-access
 
 __RCSID__ = "$Id$"
+import time
 
-
-from DIRAC.Core.Utilities.ExecutorDispatcher import ExecutorState, ExecutorQueues
+from DIRAC import S_OK
+from DIRAC.Core.Utilities.ExecutorDispatcher import ExecutorState, ExecutorQueues, ExecutorDispatcher, \
+    ExecutorDispatcherCallbacks
 
 
 execState = ExecutorState()
@@ -51,3 +53,85 @@ def test_execQueues():
   for i in xrange(3):
     assert eQ.popTask("type1")[0] == "t1%s" % i
   assert eQ._internals()
+
+
+def test_execQueuesPriority():
+  """ test of the priorities and of the bulk pop of ExecutorQueues
+  """
+  queues = ExecutorQueues()
+  for i in xrange(6):
+    queues.pushTask("type0", "t%s" % i, priority=i % 2)
+  assert queues.pushTask("type0", "a0", ahead=True) == 7
+  assert queues.pushTask("type0", "a1", ahead=True, priority=1) == 8
+  assert queues.deleteTask("t3")
+  assert not queues.deleteTask("t3")
+  assert queues.waitingTasks("type0") == 7
+  assert queues.getState() == {"type0": ["a1", "t1", "t5", "a0", "t0", "t2", "t4"]}
+  assert queues.popTasks(["type1", "type0"], 3) == ("type0", ["a1", "t1", "t5"])
+  assert queues.popTask("type0") == ("a0", "type0")
+  assert queues.popTasks("type0", 10) == ("type0", ["t0", "t2", "t4"])
+  assert queues.waitingTasks("type0") == 0
+  assert queues.popTasks("type0", 10) is None
+
+
+class Callbacks(ExecutorDispatcherCallbacks):
+
+  def __init__(self):
+    self.messages = []
+
+  def cbDispatch(self, taskId, taskObj, pathExecuted):
+    if pathExecuted:
+      return S_OK()
+    return S_OK(taskObj)
+
+  def cbSendTask(self, taskId, taskObj, eId, eType):
+    self.messages.append((eId, [taskId]))
+    return S_OK()
+
+  def cbSendTasks(self, taskIds, taskObjs, eId, eType):
+    self.messages.append((eId, list(taskIds)))
+    return S_OK()
+
+
+def test_dispatcherBatch():
+  """ test of the dispatch of several tasks per message
+  """
+  dispatcher = ExecutorDispatcher()
+  callbacks = Callbacks()
+  assert dispatcher.setCallbacks(callbacks)['OK']
+  dispatcher.addExecutor("single", ["type1"], maxTasks=2)
+  for taskId in xrange(10):
+    assert dispatcher.addTask(taskId, "type1", priority=taskId % 2)['OK']
+  dispatcher.addExecutor("batch", ["type1"], maxTasks=4, batchTasks=True)
+  assert callbacks.messages == [("single", [0]), ("single", [1]), ("batch", [3, 5, 7, 9])]
+
+  # The batch executor gets new tasks once half of its slots are free
+  assert dispatcher.taskProcessed("batch", 5)['OK']
+  assert len(callbacks.messages) == 3
+  assert dispatcher.taskProcessed("batch", 7)['OK']
+  assert callbacks.messages[-1] == ("batch", [2, 4])
+  assert dispatcher.taskProcessed("single", 0)['OK']
+  assert callbacks.messages[-1] == ("single", [6])
+  stats = dispatcher.getStats()["type1"]
+  assert (stats["Executors"], stats["Waiting"], stats["Frozen"]) == (2, 1, 0)
+  assert stats["WaitTime"]["Count"] == 9
+  assert stats["TaskTime"]["Count"] == 3
+  assert dispatcher._internals()
+
+
+def test_dispatcherFreeze():
+  """ test of the unfreezing of the tasks as soon as their freezing time is over
+  """
+  dispatcher = ExecutorDispatcher()
+  callbacks = Callbacks()
+  assert dispatcher.setCallbacks(callbacks)['OK']
+  dispatcher.addExecutor("exec", ["type1"], maxTasks=1)
+  assert dispatcher.addTask(1, "type1")['OK']
+  assert dispatcher.freezeTask("exec", 1, 1)['OK']
+  assert dispatcher.getStats()["type1"]["Frozen"] == 1
+  assert callbacks.messages == [("exec", [1])]
+  for _ in xrange(50):
+    if len(callbacks.messages) > 1:
+      break
+    time.sleep(0.1)
+  assert callbacks.messages == [("exec", [1]), ("exec", [1])]
@@ -340,6 +340,45 @@ class TaskTimeOutTests( unittest.TestCase ):
     gLock.release()
 
 
+########################################################################
+class ShortTasksTests( unittest.TestCase ):
+  """
+  .. class:: ShortTasksTests
+
+  test case for ProcessPool overhead per task
+  """
+
+  def setUp( self ):
+    """c'tor
+
+    :param self: self reference
+    """
+    self.results = []
+    self.processPool = ProcessPool( 2, 4, 8, poolCallback = self.poolCallback )
+
+  def poolCallback( self, taskID, taskResult ):
+    self.results.append( taskResult )
+
+  def testShortTasks( self ):
+    """ many short tasks are executed without waiting between them """
+    start = time.time()
+    for i in range( 50 ):
+      result = self.processPool.createAndQueueTask( CallableFunc,
+                                                    taskID = i,
+                                                    args = ( i, 0.01 ),
+                                                    usePoolCallbacks = True,
+                                                    blocking = True )
+      self.assertTrue( result["OK"] )
+    self.processPool.processAllResults( 30 )
+    self.assertEqual( len( self.results ), 50 )
+    self.assertFalse( self.processPool.hasPendingTasks() )
+    self.assertTrue( time.time() - start < 5 )
+    start = time.time()
+    self.processPool.finalize( 10 )
+    ## idle workers are woken up rather than waiting for their next task
+    self.assertTrue( time.time() - start < 5 )
+
+
 ## SUT suite execution
 if __name__ == "__main__":
 
@@ -347,6 +386,7 @@ if __name__ == "__main__":
   suitePPCT = testLoader.loadTestsFromTestCase( ProcessPoolCallbacksTests )  
   suiteTCT = testLoader.loadTestsFromTestCase( TaskCallbacksTests )
   suiteTTOT = testLoader.loadTestsFromTestCase( TaskTimeOutTests )
-  suite = unittest.TestSuite( [ suitePPCT, suiteTCT, suiteTTOT ] )
+  suiteSTT = testLoader.loadTestsFromTestCase( ShortTasksTests )
+  suite = unittest.TestSuite( [ suitePPCT, suiteTCT, suiteTTOT, suiteSTT ] )
   unittest.TextTestRunner(verbosity=3).run(suite)
 
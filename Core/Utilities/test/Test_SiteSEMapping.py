@@ -0,0 +1,33 @@
+""" Test the VO the site and SE mappings are memoized for
+"""
+
+# pylint: disable=protected-access
+
+import os
+import time
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK
+from DIRAC.Core.Utilities import SiteSEMapping
+
+
+def test_getVO(tmpdir):
+  """ The proxy is only read again when it changed """
+  proxyFile = tmpdir.join('proxy')
+  proxyFile.write('proxy')
+  getVOfromProxyGroup = MagicMock(return_value=S_OK('vo'))
+  with patch.object(SiteSEMapping.CSGlobals, 'getVO', return_value=''), \
+          patch.object(SiteSEMapping.Locations, 'getProxyLocation', return_value=str(proxyFile)), \
+          patch.object(SiteSEMapping, 'getVOfromProxyGroup', new=getVOfromProxyGroup):
+    assert SiteSEMapping._getVO() == 'vo'
+    assert SiteSEMapping._getVO() == 'vo'
+    assert getVOfromProxyGroup.call_count == 1
+
+    os.utime(str(proxyFile), (time.time() + 10, time.time() + 10))
+    getVOfromProxyGroup.return_value = S_OK('otherVO')
+    assert SiteSEMapping._getVO() == 'otherVO'
+    assert getVOfromProxyGroup.call_count == 2
+
+  with patch.object(SiteSEMapping.CSGlobals, 'getVO', return_value='globalVO'):
+    assert SiteSEMapping._getVO() == 'globalVO'
@@ -0,0 +1,98 @@
+""" Test the pool of threads with priority lanes
+"""
+
+# pylint: disable=missing-docstring
+
+import threading
+import time
+
+import pytest
+
+from DIRAC.Core.Utilities.ThreadExecutor import ThreadExecutor, Histogram
+from DIRAC.Core.Utilities.ThreadPool import ThreadPool
+
+
+def waitFor(condition):
+  for _ in range(50):
+    if condition():
+      return True
+    time.sleep(0.1)
+  return False
+
+
+def test_futures():
+  executor = ThreadExecutor(1, 4)
+  futures = [executor.submit(pow, args=(2, i))['Value'] for i in range(10)]
+  assert [future.result(5) for future in futures] == [2 ** i for i in range(10)]
+  future = executor.submit(int, args=('notAnInt',))['Value']
+  with pytest.raises(ValueError):
+    future.result(5)
+  assert not executor.submit(int, lane='Unknown')['OK']
+  executor.waitUntilIdle()
+  assert not executor.isWorking()
+  # The threads above the minimum stop when they are idle
+  assert waitFor(lambda: executor.getStats()['Threads'] == 1)
+
+
+def test_lanes():
+  executor = ThreadExecutor(1, 1, lanes=(('Admin', 0), ('Bulk', 2)))
+  release = threading.Event()
+  order = []
+  executor.submit(release.wait, args=(5,), lane='Bulk')
+  assert waitFor(lambda: executor.numWorkingThreads() == 1)
+  for i in range(2):
+    assert executor.submit(order.append, args=('bulk%s' % i,), lane='Bulk')['OK']
+  # The lane is full
+  assert executor.isFull('Bulk')
+  assert not executor.submit(order.append, args=('bulk2',), lane='Bulk', blocking=False)['OK']
+  assert executor.submit(order.append, args=('admin',), lane='Admin')['OK']
+  release.set()
+  executor.waitUntilIdle()
+  # The admin task was submitted last but executed first
+  assert order == ['admin', 'bulk0', 'bulk1']
+
+  stats = executor.getStats()['Lanes']
+  assert (stats['Bulk']['Submitted'], stats['Bulk']['Rejected']) == (3, 1)
+  assert stats['Admin']['WaitTime']['Count'] == 1
+  assert stats['Bulk']['RunTime']['Count'] == 3
+  assert stats['Bulk']['RunTime']['Max'] > 0
+
+
+def test_histogram():
+  histogram = Histogram()
+  for duration in (0.0005, 0.002, 0.5, 100):
+    histogram.add(duration)
+  stats = histogram.getStats()
+  assert stats['Count'] == 4
+  assert stats['Max'] == 100
+  assert dict(stats['Buckets']) == {0.001: 1, 0.01: 1, 0.1: 0, 1.: 1, 10.: 0, 60.: 0, None: 1}
+
+
+def test_threadPool():
+  threadPool = ThreadPool(1, 3, 5)
+  results = []
+  exceptions = []
+  for i in range(10):
+    threadPool.generateJobAndQueueIt(pow, args=(2, i), oCallback=lambda _job, result: results.append(result))
+  threadPool.generateJobAndQueueIt(int, args=('notAnInt',),
+                                   oExceptionCallback=lambda _job, excInfo: exceptions.append(excInfo[0]))
+  threadPool.processAllResults()
+  assert sorted(results) == [2 ** i for i in range(10)]
+  assert exceptions == [ValueError]
+  assert threadPool.processResults() == 0
+
+
+def test_threadPoolBound():
+  """ The results waiting to be processed are bounded """
+  threadPool = ThreadPool(1, 2, 2)
+  results = []
+  queued = 0
+  for i in range(20):
+    if threadPool.generateJobAndQueueIt(pow, args=(2, i), oCallback=lambda _job, result: results.append(result),
+                                        blocking=False)['OK']:
+      queued += 1
+    time.sleep(0.01)
+  # 2 jobs waiting, 2 workers waiting for room in the results queue, 4 results
+  assert queued == 8
+  threadPool.processAllResults()
+  assert len(results) == queued
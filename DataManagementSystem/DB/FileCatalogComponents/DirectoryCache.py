@@ -0,0 +1,136 @@
+""" DIRAC FileCatalog component keeping the recently used directories in memory
+
+    Resolving the directory of an LFN is the first step of almost every catalog
+    operation, and the same production directories are resolved over and over.
+    The DirectoryCache keeps, per normalized path, the directory ID and level, and
+    the ownership and mode used to compute the permissions. It is shared by all the
+    threads of the service, its size is bounded, the least recently used paths being
+    dropped first, and its entries expire after a lifetime. The changes done through the
+    other instances of the service are only seen once the entries expire, so the cache
+    is meant for a single instance and is disabled by default.
+"""
+
+__RCSID__ = "$Id$"
+
+import collections
+import os
+import threading
+import time
+
+
+class DirectoryCache(object):
+  """ LRU cache of the directories: path -> directory ID, level and permission parameters
+  """
+
+  def __init__(self, maxSize=100000, lifetime=300):
+    """ :param int maxSize: maximum number of paths kept, 0 disables the cache
+        :param int lifetime: seconds after which an entry is not used any more
+    """
+    self.maxSize = maxSize
+    self.lifetime = lifetime
+    self.__lock = threading.Lock()
+    # path -> [ dirID, level, permission parameters, expiration time ]
+    self.__entries = collections.OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  @staticmethod
+  def __key(path):
+    return os.path.normpath(path)
+
+  def __get(self, path):
+    """ Live entry of the path, which becomes the most recently used, or None
+    """
+    key = self.__key(path)
+    entry = self.__entries.pop(key, None)
+    if entry is None:
+      return None
+    if entry[3] < time.time():
+      return None
+    self.__entries[key] = entry
+    return entry
+
+  def __set(self, path, dirID, level=None, parameters=None):
+    key = self.__key(path)
+    entry = self.__entries.pop(key, None)
+    if entry is None or entry[0] != dirID or entry[3] < time.time():
+      entry = [dirID, None, None, time.time() + self.lifetime]
+    if level is not None:
+      entry[1] = level
+    if parameters is not None:
+      entry[2] = parameters
+    self.__entries[key] = entry
+    while len(self.__entries) > self.maxSize:
+      self.__entries.popitem(last=False)
+      self.evictions += 1
+
+  def getDir(self, path):
+    """ :return: ( dirID, level or None ) of the path, or None if it is not known
+    """
+    if not self.maxSize:
+      return None
+    with self.__lock:
+      entry = self.__get(path)
+      if entry is None:
+        self.misses += 1
+        return None
+      self.hits += 1
+      return (entry[0], entry[1])
+
+  def setDir(self, path, dirID, level=None):
+    """ Keeps the ID, and the level if known, of an existing directory
+    """
+    if not self.maxSize or not dirID:
+      return
+    with self.__lock:
+      self.__set(path, dirID, level=level)
+
+  def getParameters(self, path):
+    """ :return: dict with the DirID, UID, GID and Mode of the directory, or None if they are not known
+    """
+    if not self.maxSize:
+      return None
+    with self.__lock:
+      entry = self.__get(path)
+      if entry is None or entry[2] is None:
+        self.misses += 1
+        return None
+      self.hits += 1
+      return dict(entry[2])
+
+  def setParameters(self, path, dirDict):
+    """ Keeps the permission parameters of a directory from its getDirectoryParameters dict
+    """
+    if not self.maxSize:
+      return
+    parameters = dict((key, dirDict[key]) for key in ('DirID', 'UID', 'GID', 'Mode'))
+    with self.__lock:
+      self.__set(path, parameters['DirID'], parameters=parameters)
+
+  def invalidate(self, path, recursive=False):
+    """ Forgets the path, and all the paths below it if recursive
+    """
+    with self.__lock:
+      key = self.__key(path)
+      self.__entries.pop(key, None)
+      if recursive:
+        prefix = key.rstrip('/') + '/'
+        for subKey in [subKey for subKey in self.__entries if subKey.startswith(prefix)]:
+          del self.__entries[subKey]
+
+  def clear(self):
+    with self.__lock:
+      self.__entries.clear()
+
+  def getStats(self):
+    """ :return: dict with the Size, MaxSize, Hits, Misses, Evictions and HitRate of the cache
+    """
+    with self.__lock:
+      lookups = self.hits + self.misses
+      return {'Size': len(self.__entries),
+              'MaxSize': self.maxSize,
+              'Hits': self.hits,
+              'Misses': self.misses,
+              'Evictions': self.evictions,
+              'HitRate': float(self.hits) / lookups if lookups else 0.}
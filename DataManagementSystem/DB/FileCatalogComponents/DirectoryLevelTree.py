@@ -6,6 +6,7 @@
 
 __RCSID__ = "$Id$"
 
+import errno
 import os
 from DIRAC import S_OK, S_ERROR
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryTreeBase import DirectoryTreeBase
@@ -29,6 +30,9 @@ class DirectoryLevelTree(DirectoryTreeBase):
   def findDir(self, path, connection=False):
     """  Find directory ID for the given path
     """
+    cached = self._findDirInCache(path)
+    if cached:
+      return cached
 
     dpath = self.db._escapeString(os.path.normpath(path))
     if not dpath['OK']:
@@ -44,13 +48,25 @@ class DirectoryLevelTree(DirectoryTreeBase):
 
     res = S_OK(result['Value'][0][0])
     res['Level'] = result['Value'][0][1]
+    self._addDirToCache(path, res['Value'], res['Level'])
     return res
 
   def findDirs(self, paths, connection=False):
     """ Find DirIDs for the given path list
     """
-    dpathList = []
+    dirDict = {}
+    toFind = []
     for path in paths:
+      cached = self._findDirInCache(path)
+      if cached:
+        dirDict[os.path.normpath(path)] = cached['Value']
+      else:
+        toFind.append(path)
+    if not toFind:
+      return S_OK(dirDict)
+
+    dpathList = []
+    for path in toFind:
       dpath = self.db._escapeString(os.path.normpath(path))
       if not dpath['OK']:
         return dpath
@@ -60,9 +76,9 @@ class DirectoryLevelTree(DirectoryTreeBase):
     result = self.db._query(req, connection)
     if not result['OK']:
       return result
-    dirDict = {}
     for dirName, dirID in result['Value']:
       dirDict[dirName] = dirID
+      self._addDirToCache(dirName, dirID)
 
     return S_OK(dirDict)
 
@@ -81,6 +97,7 @@ class DirectoryLevelTree(DirectoryTreeBase):
     dirID = result['Value']
     req = "DELETE FROM FC_DirectoryLevelTree WHERE DirID=%d" % dirID
     result = self.db._update(req)
+    self._invalidateDirCache(path)
     result['DirID'] = dirID
     return result
 
@@ -321,6 +338,8 @@ class DirectoryLevelTree(DirectoryTreeBase):
     result = self.__getNumericPath(dirID)
     if not result['OK']:
       return result
+    if 'Level' not in result:
+      return S_ERROR(errno.ENOENT, 'Directory with id %d not found' % dirID)
     level = result['Level']
     if level == 0:
       return S_OK([dirID])
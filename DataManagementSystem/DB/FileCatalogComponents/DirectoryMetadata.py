@@ -8,6 +8,7 @@ __RCSID__ = "$Id$"
 import os
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities.Time import queryTime
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.MetaQueryCache import queryKey, changesMetaQueries
 
 
 class DirectoryMetadata:
@@ -24,6 +25,7 @@ class DirectoryMetadata:
 #  Manage Metadata fields
 #
 
+  @changesMetaQueries
   def addMetadataField(self, pname, ptype, credDict):
     """ Add a new metadata parameter to the Metadata Database.
         pname - parameter name, ptype - parameter type in the MySQL notation
@@ -73,6 +75,7 @@ class DirectoryMetadata:
 
     return S_OK("Added new metadata: %d" % metadataID)
 
+  @changesMetaQueries
   def deleteMetadataField(self, pname, credDict):
     """ Remove metadata field
     """
@@ -104,6 +107,7 @@ class DirectoryMetadata:
 
     return S_OK(metaDict)
 
+  @changesMetaQueries
   def addMetadataSet(self, metaSetName, metaSetDict, credDict):
     """ Add a new metadata set with the contents from metaSetDict
     """
@@ -169,6 +173,7 @@ class DirectoryMetadata:
 #
 #############################################################################################
 
+  @changesMetaQueries
   def setMetadata(self, dpath, metadict, credDict):
     """ Set the value of a given metadata field for the the given directory path
     """
@@ -209,6 +214,7 @@ class DirectoryMetadata:
 
     return S_OK()
 
+  @changesMetaQueries
   def removeMetadata(self, dpath, metadata, credDict):
     """ Remove the specified metadata for the given directory
     """
@@ -559,10 +565,70 @@ class DirectoryMetadata:
     else:
       return S_OK(result['Value'][0][0])
 
+  def __findSubdirs(self, meta, value, pathSelection):
+    """ Find the directories satisfying one meta datum, and keep them in the cache
+    """
+    cache = getattr(self.db, 'metaQueryCache', None)
+    if cache is not None:
+      epoch = cache.getEpoch()
+    if value == "Missing":
+      result = self.__findSubdirMissingMeta(meta, pathSelection)
+    else:
+      result = self.__findSubdirByMeta(meta, value, pathSelection)
+    if result['OK'] and cache is not None:
+      cache.set(queryKey('Subdirs', meta, value, pathSelection), (result['Value'],), epoch)
+    return result
+
+  def __planMetaQuery(self, metaDict, pathSelection):
+    """ Order the meta data of a query so that the most selective ones are evaluated first:
+        those whose directories are in the cache, which cost nothing, from the fewest
+        directories, then equalities, lists of values, other comparisons, 'Any' and 'Missing'
+
+        :return: list of ( meta, value, list of directory IDs from the cache or None )
+    """
+    cache = getattr(self.db, 'metaQueryCache', None)
+    plan = []
+    for meta, value in metaDict.items():
+      cached = cache.get(queryKey('Subdirs', meta, value, pathSelection)) if cache is not None else None
+      if cached is not None:
+        cost = (0, len(cached[0]))
+        cached = cached[0]
+      elif value == "Missing":
+        cost = (1, 4)
+      elif value == "Any":
+        cost = (1, 3)
+      elif isinstance(value, dict) and set(value) - set(['in', '=']):
+        cost = (1, 2)
+      elif isinstance(value, (dict, list)):
+        cost = (1, 1)
+      else:
+        cost = (1, 0)
+      plan.append((cost, meta, value, cached))
+    return [step[1:] for step in sorted(plan, key=lambda step: step[0])]
+
   @queryTime
   def findDirIDsByMetadata(self, queryDict, path, credDict):
     """ Find Directories satisfying the given metadata and being subdirectories of
-        the given path
+        the given path. The result is kept in the metadata query cache of the catalog
+    """
+    cache = getattr(self.db, 'metaQueryCache', None)
+    key = queryKey('DirIDs', queryDict, path)
+    if cache is not None:
+      cached = cache.get(key)
+      if cached is not None:
+        result = S_OK(cached[0])
+        result['Selection'] = cached[1]
+        return result
+      epoch = cache.getEpoch()
+
+    result = self.__findDirIDsByMetadata(queryDict, path, credDict)
+    if result['OK'] and cache is not None:
+      cache.set(key, (result['Value'], result['Selection']), epoch)
+    return result
+
+  def __findDirIDsByMetadata(self, queryDict, path, credDict):
+    """ Find Directories satisfying the given metadata and being subdirectories of
+        the given path, see findDirIDsByMetadata
     """
 
     pathDirList = []
@@ -600,25 +666,21 @@ class DirectoryMetadata:
         if not result['OK']:
           return result
         pathSelection = result['Value']
-      dirList = []
-      first = True
-      for meta, value in finalMetaDict.items():
-        if value == "Missing":
-          result = self.__findSubdirMissingMeta(meta, pathSelection)
-        else:
-          result = self.__findSubdirByMeta(meta, value, pathSelection)
-        if not result['OK']:
-          return result
-        mList = result['Value']
-        if first:
-          dirList = mList
-          first = False
+      dirSet = None
+      for meta, value, mList in self.__planMetaQuery(finalMetaDict, pathSelection):
+        if mList is None:
+          result = self.__findSubdirs(meta, value, pathSelection)
+          if not result['OK']:
+            return result
+          mList = result['Value']
+        if dirSet is None:
+          dirSet = set(mList)
         else:
-          newList = []
-          for d in dirList:
-            if d in mList:
-              newList.append(d)
-          dirList = newList
+          dirSet.intersection_update(mList)
+        if not dirSet:
+          # No need to evaluate the other meta data
+          break
+      dirList = sorted(dirSet)
     else:
       if pathDirID:
         result = self.db.dtree.getSubdirectoriesByID(pathDirID, includeParent=True)
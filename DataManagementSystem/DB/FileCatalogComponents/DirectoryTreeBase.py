@@ -77,6 +77,42 @@ class DirectoryTreeBase:
     """ Get the string of the Directory Tree type
     """
     return self.treeTable
+
+  def _getDirCache( self ):
+    """ The DirectoryCache of the database, None if it has none
+    """
+    return getattr( self.db, 'dirCache', None )
+
+  def _findDirInCache( self, path ):
+    """ S_OK( dirID ), with its Level if known, of a directory known by the cache, None otherwise
+    """
+    dirCache = self._getDirCache()
+    if dirCache is None:
+      return None
+    cached = dirCache.getDir( path )
+    if cached is None:
+      return None
+    dirID, level = cached
+    result = S_OK( dirID )
+    if level is not None:
+      result['Level'] = level
+    return result
+
+  def _addDirToCache( self, path, dirID, level = None ):
+    dirCache = self._getDirCache()
+    if dirCache is not None:
+      dirCache.setDir( path, dirID, level )
+
+  def _invalidateDirCache( self, path = None, recursive = False ):
+    """ Forgets a path of the directory cache, all the paths if path is None
+    """
+    dirCache = self._getDirCache()
+    if dirCache is None:
+      return
+    if path is None:
+      dirCache.clear()
+    else:
+      dirCache.invalidate( path, recursive )
     
   def setDatabase(self,database):
     self.db = database  
@@ -213,6 +249,8 @@ class DirectoryTreeBase:
     successful = {}
     failed = {}
     for dir in dirs:
+      # The directory may have been removed through another instance of the service
+      self._invalidateDirCache( dir )
       result = self.makeDirectories( dir, credDict )
       if not result['OK']:
         failed[dir] = result['Message']
@@ -358,6 +396,11 @@ class DirectoryTreeBase:
           "ModificationDate=UTC_TIMESTAMP() WHERE DirID IN ( %s )" % \
           ( pname, pvalue, dirIDString )
     result = self.db._update( req )
+    # The paths of directories given by IDs are not known, forget all of them
+    if isinstance( path, basestring ) and path.startswith( '/' ):
+      self._invalidateDirCache( path )
+    else:
+      self._invalidateDirCache()
     return result
 
 #####################################################################
@@ -506,6 +549,21 @@ class DirectoryTreeBase:
 
     return S_OK( {'Successful':successful, 'Failed':failed} )
 
+  #####################################################################
+  def __getPermissionParameters( self, path ):
+    """ Get the DirID, UID, GID and Mode of the directory, from the directory cache if possible
+    """
+    dirCache = self._getDirCache()
+    if dirCache is None or not isinstance( path, basestring ):
+      return self.getDirectoryParameters( path )
+    parameters = dirCache.getParameters( path )
+    if parameters is not None:
+      return S_OK( parameters )
+    result = self.getDirectoryParameters( path )
+    if result['OK']:
+      dirCache.setParameters( path, result['Value'] )
+    return result
+
   #####################################################################
   def getDirectoryPermissions( self, path, credDict ):
     """ Get permissions for the given user/group to manipulate the given directory 
@@ -515,7 +573,7 @@ class DirectoryTreeBase:
       return result
     uid, gid = result['Value']
 
-    result = self.getDirectoryParameters( path )
+    result = self.__getPermissionParameters( path )
     if not result['OK']:
       if "not found" in result['Message'] or "not exist" in result['Message']:
         # If the directory does not exist, check the nearest parent for the permissions
@@ -633,15 +691,14 @@ class DirectoryTreeBase:
     result['LFNIDList'] = lfnIDList
     return result
 
-  def _getDirectoryContents( self, path, details = False ):
-    """ Get contents of a given directory
+  def __getDirectoryEntries( self, path, details = False ):
+    """ Get the ID of a given directory and its contents, but the files
     """
     result = self.findDir( path )
     if not result['OK']:
       return result
     directoryID = result['Value']
     directories = {}
-    files = {}
     links = {}
     result = self.getChildren( path )
     if not result['OK']:
@@ -662,15 +719,25 @@ class DirectoryTreeBase:
           directories[dirName] = result['Value']
       else:
         directories[dirName] = True
-    result = self.db.fileManager.getFilesInDirectory( directoryID, verbose = details )
-    if not result['OK']:
-      return result
-    files = result['Value']
     result = self.db.datasetManager.getDatasetsInDirectory( directoryID, verbose = details )
     if not result['OK']:
       return result
     datasets = result['Value']
-    pathDict = {'Files': files, 'SubDirs':directories, 'Links':links, 'Datasets':datasets }
+    pathDict = {'Files': {}, 'SubDirs':directories, 'Links':links, 'Datasets':datasets }
+
+    return S_OK( ( directoryID, pathDict ) )
+
+  def _getDirectoryContents( self, path, details = False ):
+    """ Get contents of a given directory
+    """
+    result = self.__getDirectoryEntries( path, details = details )
+    if not result['OK']:
+      return result
+    directoryID, pathDict = result['Value']
+    result = self.db.fileManager.getFilesInDirectory( directoryID, verbose = details )
+    if not result['OK']:
+      return result
+    pathDict['Files'] = result['Value']
 
     return S_OK( pathDict )
 
@@ -688,7 +755,29 @@ class DirectoryTreeBase:
         successful[path] = result['Value']
 
     return S_OK( {'Successful':successful, 'Failed':failed} )
-  
+
+  def iterListDirectory( self, lfns, verbose = False, chunkSize = 1000 ):
+    """ Get the directory listing by chunks, see listDirectory
+
+        It is a generator of S_OK( Successful/Failed dict ): the first chunk of a directory
+        has its subdirectories and datasets, the next ones at most chunkSize of its files.
+        A directory whose files cannot all be got ends up in the Failed dict.
+    """
+    for path in lfns:
+      result = self.__getDirectoryEntries( path, details = verbose )
+      if not result['OK']:
+        yield S_OK( {'Successful':{}, 'Failed':{path:result['Message']}} )
+        continue
+      directoryID, pathDict = result['Value']
+      yield S_OK( {'Successful':{path:pathDict}, 'Failed':{}} )
+      for result in self.db.fileManager.iterFilesInDirectory( directoryID, verbose = verbose,
+                                                              chunkSize = chunkSize ):
+        if not result['OK']:
+          yield S_OK( {'Successful':{}, 'Failed':{path:result['Message']}} )
+          break
+        pathDict = {'Files':result['Value'], 'SubDirs':{}, 'Links':{}, 'Datasets':{}}
+        yield S_OK( {'Successful':{path:pathDict}, 'Failed':{}} )
+
   def getDirectoryReplicas( self, lfns, allStatus = False ):
     """ Get replicas for files in the given directories
     """
@@ -721,6 +810,35 @@ class DirectoryTreeBase:
       
     return result
 
+  def iterDirectoryReplicas( self, lfns, allStatus = False, chunkSize = 1000 ):
+    """ Get replicas for files in the given directories by chunks, see getDirectoryReplicas
+
+        It is a generator of S_OK( Successful/Failed dict ) with the replicas of at most
+        chunkSize files of a directory each.
+        A directory whose replicas cannot all be got ends up in the Failed dict.
+    """
+    sePrefixDict = {}
+    if self.db.lfnPfnConvention:
+      resSE = self.db.seManager.getSEPrefixes()
+      if resSE['OK']:
+        sePrefixDict = resSE['Value']
+
+    for path in lfns:
+      result = self.findDir( path )
+      if not result['OK']:
+        yield S_OK( {'Successful':{}, 'Failed':{path:result['Message']}, 'SEPrefixes':sePrefixDict} )
+        continue
+      directoryID = result['Value']
+      if not directoryID:
+        yield S_OK( {'Successful':{}, 'Failed':{path:'Directory does not exist'}, 'SEPrefixes':sePrefixDict} )
+        continue
+      for result in self.db.fileManager.iterDirectoryReplicas( directoryID, allStatus = allStatus,
+                                                               chunkSize = chunkSize ):
+        if not result['OK']:
+          yield S_OK( {'Successful':{}, 'Failed':{path:result['Message']}, 'SEPrefixes':sePrefixDict} )
+          break
+        yield S_OK( {'Successful':{path:result['Value']}, 'Failed':{}, 'SEPrefixes':sePrefixDict} )
+
   def getDirectorySize( self, lfns, longOutput = False, rawFileTables = False ):
     """ Get the total size of the requested directories. If long flag
         is True, get also physical size per Storage Element
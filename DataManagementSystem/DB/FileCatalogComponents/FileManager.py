@@ -768,7 +768,7 @@ class FileManager( FileManagerBase ):
     return S_OK(fileIDDict)
 
   def _getDirectoryReplicas( self, dirID, allStatus=False, connection=False ):
-    """ Get replicas for files in a given directory
+    """ Get replicas for files in a given directory, by chunks
     """
     replicaStatusIDs = []
     if not allStatus:
@@ -800,5 +800,33 @@ class FileManager( FileManagerBase ):
       if fileStatusIDs:
         req += ' AND FF.Status in (%s)' % intListToString( fileStatusIDs )
 
-    result = self.db._query( req, connection )
-    return result
+    return self.db._queryIter( req )
+
+  def _iterDirectoryFileNames( self, dirID, allStatus = False, chunkSize = 1000 ):
+    """ Get the names of the files in a given directory, by chunks read from the database
+    """
+    req = "SELECT FileName FROM FC_Files WHERE DirID=%d" % dirID
+    if not allStatus:
+      statusIDs = []
+      for status in self.db.visibleFileStatus:
+        res = self._getStatusInt( status )
+        if res['OK']:
+          statusIDs.append( res['Value'] )
+      if statusIDs:
+        req += " AND Status IN (%s)" % intListToString( statusIDs )
+
+    for result in self.db._queryIter( req, chunkSize = chunkSize ):
+      if result['OK']:
+        result = S_OK( [ row[0] for row in result['Value'] ] )
+      yield result
+
+  def _getSEDumpPage( self, seID, lastKey, pageSize, connection = False ):
+    """ Get a page of the replicas at a given SE, the key being the RepID
+    """
+    connection = self._getConnection( connection )
+    treeTable = self.db.dtree.getTreeTable()
+    req = "SELECT FR.RepID,CONCAT(D.DirName,'/',FF.FileName),FI.Checksum,FF.Size FROM FC_Replicas as FR"
+    req += " JOIN FC_Files as FF ON FF.FileID=FR.FileID JOIN FC_FileInfo as FI ON FI.FileID=FF.FileID"
+    req += " JOIN %s as D ON D.DirID=FF.DirID" % treeTable
+    req += " WHERE FR.SEID=%d AND FR.RepID>%d ORDER BY FR.RepID LIMIT %d" % ( seID, lastKey, pageSize )
+    return self.db._query( req, connection )
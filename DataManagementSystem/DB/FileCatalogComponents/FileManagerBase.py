@@ -5,10 +5,13 @@ __RCSID__ = "$Id$"
 
 # pylint: disable=protected-access
 
+import errno
 import os
 import stat
+import threading
 
 from DIRAC import S_OK, S_ERROR, gLogger
+from DIRAC.Core.Utilities.DErrno import cmpError
 from DIRAC.Core.Utilities.List import intListToString
 from DIRAC.Core.Utilities.Pfn import pfnunparse
 
@@ -20,6 +23,12 @@ class FileManagerBase(object):
   def __init__(self, database=None):
     self.db = database
     self.statusDict = {}
+    # Changes of the directory usage which could not be applied: { ( dirID, seID ) : [ size, files ] }
+    self.__usageJournal = {}
+    self.__usageJournalLock = threading.Lock()
+    # Last directory whose usage was checked, and differences found at the last check: { dirID : { seID : diff } }
+    self.__usageCursor = 0
+    self.__usageDifferences = {}
 
   def _getConnection(self, connection):
     if connection:
@@ -171,9 +180,33 @@ class FileManagerBase(object):
   def _getDirectoryReplicas(self, dirID, allStatus=False, connection=False):
     """ To be implemented on derived class
 
-    Should return with only one value, being a list of all the replicas (FileName,FileID,SEID,PFN)
+    Should return an iterator of S_OK with a list of replicas (FileName,FileID,SEID,PFN),
+    so that the replicas of large directories are not all loaded at once
     """
 
+    return iter([S_ERROR("To be implemented on derived class")])
+
+  def _iterDirectoryFileNames(self, dirID, allStatus=False, chunkSize=1000):
+    """ Get the names of the files in a given directory, by chunks
+
+    It is a generator of S_OK( list of at most chunkSize file names ). This implementation
+    gets all the names at once, derived classes can stream them from the database
+    """
+    result = self._getDirectoryFiles(dirID, [], ['FileID'], allStatus=allStatus)
+    if not result['OK']:
+      yield result
+      return
+    fileNames = sorted(result['Value'])
+    for index in xrange(0, len(fileNames), chunkSize):
+      yield S_OK(fileNames[index:index + chunkSize])
+
+  def _getSEDumpPage(self, seID, lastKey, pageSize, connection=False):
+    """ To be implemented on derived class
+
+    Should return S_OK with a list of at most pageSize tuples (key, lfn, checksum, size) of the
+    replicas at the SE whose key is greater than lastKey, sorted by key. The key is the primary
+    key of the replicas, so that the pages are index range scans and that a dump can be resumed
+    """
     return S_ERROR("To be implemented on derived class")
 
   def countFilesInDir(self, dirId):
@@ -382,30 +415,209 @@ class FileManagerBase(object):
     return S_OK({'Successful': successful, 'Failed': failed})
 
   def _updateDirectoryUsage(self, directorySEDict, change, connection=False):
-    connection = self._getConnection(connection)
-    for directoryID in directorySEDict.keys():
-      result = self.db.dtree.getPathIDsByID(directoryID)
-      if not result['OK']:
-        return result
-      parentIDs = result['Value']
-      dirDict = directorySEDict[directoryID]
-      for seID in dirDict.keys():
-        seDict = dirDict[seID]
-        files = seDict['Files']
-        size = seDict['Size']
-        insertTuples = []
-        for dirID in parentIDs:
-          insertTuples.append('(%d,%d,%d,%d,UTC_TIMESTAMP())' % (dirID, seID, size, files))
-
-        req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) "
-        req += "VALUES %s" % ','.join(insertTuples)
-        req += " ON DUPLICATE KEY UPDATE SESize=SESize%s%d, SEFiles=SEFiles%s%d, LastUpdate=UTC_TIMESTAMP() " \
-            % (change, size, change, files)
-        res = self.db._update(req)
-        if not res['OK']:
-          gLogger.warn("Failed to update FC_DirectoryUsage", res['Message'])
+    """ Change the usage of the directories, and of their parent directories
+
+        The usage of all the directories is changed by a single statement, so that the usage
+        of a directory and of its parents are never out of step. If it fails, the change is kept
+        in the journal, and is applied by reconcileDirectoryUsage.
+
+        :param dict directorySEDict: { dirID : { seID : { 'Files' : files, 'Size' : size } } },
+                                     seID being 0 for the logical usage
+        :param str change: '+' or '-'
+    """
+    sign = 1 if change == '+' else -1
+    deltas = {}
+    for directoryID, dirDict in directorySEDict.items():
+      for seID, seDict in dirDict.items():
+        deltas[(directoryID, seID)] = [sign * seDict['Size'], sign * seDict['Files']]
+    res = self.__applyUsageDeltas(deltas, connection=connection)
+    if not res['OK']:
+      gLogger.warn("Failed to update FC_DirectoryUsage, the change is journaled", res['Message'])
+      with self.__usageJournalLock:
+        self.__mergeUsageDeltas(self.__usageJournal, deltas)
     return S_OK()
 
+  @staticmethod
+  def __mergeUsageDeltas(total, deltas):
+    """ Add the changes of usage to those of total: { ( dirID, seID ) : [ size, files ] }
+    """
+    for key, (size, files) in deltas.items():
+      entry = total.setdefault(key, [0, 0])
+      entry[0] += size
+      entry[1] += files
+
+  def __applyUsageDeltas(self, deltas, connection=False):
+    """ Apply the changes of usage of directories to them and to their parents, in one statement
+
+        :param dict deltas: { ( dirID, seID ) : [ size, files ] }
+    """
+    parentIDs = {}
+    total = {}
+    for (directoryID, seID), delta in deltas.items():
+      if directoryID not in parentIDs:
+        res = self.db.dtree.getPathIDsByID(directoryID)
+        if not res['OK']:
+          return res
+        parentIDs[directoryID] = res['Value']
+      self.__mergeUsageDeltas(total, dict(((dirID, seID), delta) for dirID in parentIDs[directoryID]))
+
+    # Sorted, so that concurrent updates lock the rows in the same order
+    insertTuples = ['(%d,%d,%d,%d,UTC_TIMESTAMP())' % (dirID, seID, size, files)
+                    for (dirID, seID), (size, files) in sorted(total.items()) if size or files]
+    if not insertTuples:
+      return S_OK()
+    req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) VALUES %s" % ','.join(insertTuples)
+    req += " ON DUPLICATE KEY UPDATE SESize=SESize+VALUES(SESize), SEFiles=SEFiles+VALUES(SEFiles),"
+    req += " LastUpdate=UTC_TIMESTAMP()"
+    return self.db._update(req, connection)
+
+  def __applyUsageJournal(self):
+    """ Apply the journaled changes of usage directory by directory. The changes of the directories
+        removed since then are dropped, the others stay in the journal until they can be applied.
+
+        :return: S_OK( number of changes applied ), or the first error
+    """
+    with self.__usageJournalLock:
+      journal = self.__usageJournal
+      self.__usageJournal = {}
+    byDirectory = {}
+    for (dirID, seID), delta in journal.items():
+      byDirectory.setdefault(dirID, {})[(dirID, seID)] = delta
+    applied = 0
+    try:
+      for dirID in sorted(byDirectory):
+        res = self.__applyUsageDeltas(byDirectory[dirID])
+        if not res['OK'] and not cmpError(res, errno.ENOENT):
+          return res
+        if res['OK']:
+          applied += len(byDirectory[dirID])
+        else:
+          gLogger.warn("Dropping the journaled usage of a removed directory", "%d: %s" % (dirID, byDirectory[dirID]))
+        del byDirectory[dirID]
+    finally:
+      # Whatever happened, the changes which were not applied are kept
+      with self.__usageJournalLock:
+        for deltas in byDirectory.values():
+          self.__mergeUsageDeltas(self.__usageJournal, deltas)
+    return S_OK(applied)
+
+  def clearDirectoryUsageJournal(self):
+    """ Forget the journaled changes of usage, when the usage is rebuilt from scratch
+    """
+    with self.__usageJournalLock:
+      self.__usageJournal.clear()
+    self.__usageDifferences = {}
+
+  def _getDirectoryUsageDifference(self, dirID, connection=False):
+    """ Difference between the usage of a directory, computed from its own files and replicas
+        and from the usage of its subdirectories, and its usage in FC_DirectoryUsage
+
+        :return: S_OK( { seID : ( size, files ) } ) for the SEs whose usage differs, 0 being the logical usage
+    """
+    expected = {}
+    req = "SELECT 0,SUM(Size),COUNT(*) FROM FC_Files WHERE DirID=%d" % dirID
+    res = self.db._query(req, connection)
+    if not res['OK']:
+      return res
+    rows = list(res['Value'])
+    req = "SELECT R.SEID,SUM(F.Size),COUNT(*) FROM FC_Files as F, FC_Replicas as R"
+    req += " WHERE F.FileID=R.FileID AND F.DirID=%d GROUP BY R.SEID" % dirID
+    res = self.db._query(req, connection)
+    if not res['OK']:
+      return res
+    rows += res['Value']
+    res = self.db.dtree.getChildren(dirID)
+    if not res['OK']:
+      return res
+    if res['Value']:
+      req = "SELECT SEID,SUM(SESize),SUM(SEFiles) FROM FC_DirectoryUsage WHERE DirID IN (%s) GROUP BY SEID" % \
+          intListToString(res['Value'])
+      res = self.db._query(req, connection)
+      if not res['OK']:
+        return res
+      rows += res['Value']
+    for seID, size, files in rows:
+      if size or files:
+        self.__mergeUsageDeltas(expected, {seID: [int(size or 0), int(files)]})
+
+    req = "SELECT SEID,SESize,SEFiles FROM FC_DirectoryUsage WHERE DirID=%d" % dirID
+    res = self.db._query(req, connection)
+    if not res['OK']:
+      return res
+    self.__mergeUsageDeltas(expected, dict((seID, [-int(size), -int(files)]) for seID, size, files in res['Value']))
+    return S_OK(dict((seID, tuple(delta)) for seID, delta in expected.items() if delta != [0, 0]))
+
+  def reconcileDirectoryUsage(self, maxDirectories=100):
+    """ Bring FC_DirectoryUsage in line with the files and replicas, a few directories at a time,
+        so that it can be done periodically in the background instead of rebuilding the usage:
+
+        - the changes of usage kept in the journal are applied;
+        - the usage of the next maxDirectories directories, by increasing ID, is checked, as well as
+          that of the directories whose usage differed at the last check. A difference found for a
+          directory twice in a row, thus not due to a change in progress, is corrected for the
+          directory and its parents.
+
+        :return: S_OK( { 'Journaled' : number of journaled changes applied,
+                         'Checked' : number of directories checked, 'Corrected' : number of directories corrected } )
+    """
+    res = self.__applyUsageJournal()
+    if not res['OK']:
+      return res
+    journaled = res['Value']
+
+    # Only one instance of the service checks the usage at a time, for a difference not to be corrected twice
+    res = self.db._query("SELECT GET_LOCK('FC_DirectoryUsageReconcile',0)")
+    if not res['OK']:
+      return res
+    if not res['Value'][0][0]:
+      return S_OK({'Journaled': journaled, 'Checked': 0, 'Corrected': 0})
+    try:
+      res = self.__checkDirectoryUsage(maxDirectories)
+    finally:
+      self.db._query("SELECT RELEASE_LOCK('FC_DirectoryUsageReconcile')")
+    if not res['OK']:
+      return res
+    checked, corrected = res['Value']
+    return S_OK({'Journaled': journaled, 'Checked': checked, 'Corrected': corrected})
+
+  def __checkDirectoryUsage(self, maxDirectories):
+    """ Check, and correct if needed, the usage of the directories whose usage differed at the last
+        check, and of the next maxDirectories directories, see reconcileDirectoryUsage
+
+        :return: S_OK( ( number of directories checked, number of directories corrected ) )
+    """
+    req = "SELECT DirID FROM %s WHERE DirID>%d ORDER BY DirID LIMIT %d" % (self.db.dtree.getTreeTable(),
+                                                                          self.__usageCursor, maxDirectories)
+    res = self.db._query(req)
+    if not res['OK']:
+      return res
+    dirIDs = [row[0] for row in res['Value']]
+    # Starts again from the first directory after the last one
+    self.__usageCursor = dirIDs[-1] if len(dirIDs) == maxDirectories else 0
+
+    lastDifferences = self.__usageDifferences
+    self.__usageDifferences = {}
+    corrections = {}
+    for dirID in sorted(set(dirIDs) | set(lastDifferences)):
+      res = self._getDirectoryUsageDifference(dirID)
+      if not res['OK']:
+        return res
+      if not res['Value']:
+        continue
+      if lastDifferences.get(dirID) == res['Value']:
+        for seID, delta in res['Value'].items():
+          corrections[(dirID, seID)] = list(delta)
+      else:
+        self.__usageDifferences[dirID] = res['Value']
+
+    correctedIDs = sorted(set(key[0] for key in corrections))
+    if corrections:
+      gLogger.info("Correcting the usage of directories", str(correctedIDs))
+      res = self.__applyUsageDeltas(corrections)
+      if not res['OK']:
+        return res
+    return S_OK((len(set(dirIDs) | set(lastDifferences)), len(correctedIDs)))
+
   def _populateFileAncestors(self, lfns, connection=False):
     connection = self._getConnection(connection)
     successful = {}
@@ -1130,9 +1342,28 @@ class FileManagerBase(object):
     return self._getDirectoryFileIDs(dirID, requestString=requestString)
 
   def getFilesInDirectory(self, dirID, verbose=False, connection=False):
+    return self.__getFilesInDirectory(dirID, [], verbose=verbose, connection=connection)
+
+  def iterFilesInDirectory(self, dirID, verbose=False, chunkSize=1000):
+    """ Get the files in the given directory by chunks, see getFilesInDirectory
+
+        It is a generator of S_OK( dict of at most chunkSize files ): the metadata and the
+        replicas are got for one chunk of file names at a time.
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    for result in self._iterDirectoryFileNames(dirID, chunkSize=chunkSize):
+      if result['OK']:
+        result = self.__getFilesInDirectory(dirID, result['Value'], verbose=verbose)
+      yield result
+      if not result['OK']:
+        return
+
+  def __getFilesInDirectory(self, dirID, fileNames, verbose=False, connection=False):
+    """ Get the given files, or all the files if fileNames is empty, of the given directory
+    """
     connection = self._getConnection(connection)
     files = {}
-    res = self._getDirectoryFiles(dirID, [], ['FileID', 'Size', 'GUID',
+    res = self._getDirectoryFiles(dirID, fileNames, ['FileID', 'Size', 'GUID',
                                               'Checksum', 'ChecksumType',
                                               'Type', 'UID',
                                               'GID', 'CreationDate',
@@ -1167,25 +1398,41 @@ class FileManagerBase(object):
                             If False, take the visibleFileStatus and visibleReplicaStatus values from the configuration
     """
     connection = self._getConnection(connection)
-    result = self._getDirectoryReplicas(dirID, allStatus, connection)
-    if not result['OK']:
-      return result
-
     resultDict = {}
     seDict = {}
-    for fileName, fileID, seID, pfn in result['Value']:
-      resultDict.setdefault(fileName, {})
-      if seID not in seDict:
-        res = self.db.seManager.getSEName(seID)
-        if not res['OK']:
-          seDict[seID] = 'Unknown'
-        else:
-          seDict[seID] = res['Value']
-      se = seDict[seID]
-      resultDict[fileName][se] = pfn
+    for result in self._getDirectoryReplicas(dirID, allStatus, connection):
+      if not result['OK']:
+        return result
+      for fileName, _fileID, seID, pfn in result['Value']:
+        resultDict.setdefault(fileName, {})
+        if seID not in seDict:
+          res = self.db.seManager.getSEName(seID)
+          if not res['OK']:
+            seDict[seID] = 'Unknown'
+          else:
+            seDict[seID] = res['Value']
+        se = seDict[seID]
+        resultDict[fileName][se] = pfn
 
     return S_OK(resultDict)
 
+  def iterDirectoryReplicas(self, dirID, allStatus=False, chunkSize=1000):
+    """ Get the replicas of the files in the given directory by chunks, see getDirectoryReplicas
+
+        It is a generator of S_OK( { fileName : { SE : PFN } } ) for at most chunkSize files each:
+        the replicas are got for one chunk of file names at a time.
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    for result in self._iterDirectoryFileNames(dirID, allStatus=allStatus, chunkSize=chunkSize):
+      if result['OK']:
+        result = self._getDirectoryFiles(dirID, result['Value'], ['FileID'], allStatus=allStatus)
+      if result['OK']:
+        fileIDNames = dict((fileDict['FileID'], fileName) for fileName, fileDict in result['Value'].iteritems())
+        result = self.__getReplicasForIDs(fileIDNames, allStatus)
+      yield result
+      if not result['OK']:
+        return
+
   def _getFileDirectories(self, lfns):
     """ For a list of lfn, returns a dictionary with key the directory, and value
         the files in that directory. It does not make any query, just splits the names
@@ -1353,4 +1600,38 @@ class FileManagerBase(object):
 
         :returns: S_OK with list of tuples (lfn, checksum, size)
     """
-    return S_ERROR("To be implemented on derived class")
+    dump = []
+    for result in self.iterSEDump(seName):
+      if not result['OK']:
+        return result
+      dump.extend(row[1:] for row in result['Value'])
+    return S_OK(tuple(dump))
+
+  def iterSEDump(self, seName, lastKey=0, pageSize=10000):
+    """
+         Return the files at a given SE, together with checksum and size, page by page
+
+        :param seName: name of the StorageElement
+        :param int lastKey: key of the last replica already dumped, to resume a dump
+        :param int pageSize: maximum number of replicas of each page
+
+        :returns: generator of S_OK with list of tuples (key, lfn, checksum, size), sorted by key.
+                  An S_ERROR is yielded and the iteration stops upon error
+    """
+    res = self.db.seManager.findSE(seName)
+    if not res['OK']:
+      yield res
+      return
+    seID = res['Value']
+
+    while True:
+      res = self._getSEDumpPage(seID, lastKey, pageSize)
+      if not res['OK']:
+        yield res
+        return
+      if not res['Value']:
+        return
+      yield res
+      if len(res['Value']) < pageSize:
+        return
+      lastKey = res['Value'][-1][0]
@@ -356,3 +356,14 @@ class FileManagerFlat( FileManagerBase ):
       if not replicas.has_key( fileID ):
         replicas[fileID] = {}
     return S_OK( replicas )
+
+  def _getSEDumpPage( self, seID, lastKey, pageSize, connection = False ):
+    """ Get a page of the replicas at a given SE, the key being the FileID,
+        as the replicas are identified by their ( FileID, SEID )
+    """
+    connection = self._getConnection( connection )
+    treeTable = self.db.dtree.getTreeTable()
+    req = "SELECT FR.FileID,CONCAT(D.DirName,'/',FF.FileName),FF.Checksum,FF.Size FROM FC_Replicas as FR"
+    req += " JOIN FC_Files as FF ON FF.FileID=FR.FileID JOIN %s as D ON D.DirID=FF.DirID" % treeTable
+    req += " WHERE FR.SEID=%d AND FR.FileID>%d ORDER BY FR.FileID LIMIT %d" % ( seID, lastKey, pageSize )
+    return self.db._query( req, connection )
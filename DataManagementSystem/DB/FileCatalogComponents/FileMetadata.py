@@ -15,6 +15,7 @@ from DIRAC.Core.Utilities.List import intListToString
 from DIRAC.DataManagementSystem.Client.MetaQuery import FILE_STANDARD_METAKEYS, \
                                                         FILES_TABLE_METAKEYS, \
                                                         FILEINFO_TABLE_METAKEYS
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.MetaQueryCache import queryKey, changesMetaQueries
 
 class FileMetadata:
 
@@ -30,6 +31,7 @@ class FileMetadata:
 #  Manage Metadata fields
 #
 ##############################################################################
+  @changesMetaQueries
   def addMetadataField( self, pname, ptype, credDict ):
     """ Add a new metadata parameter to the Metadata Database.
         pname - parameter name, ptype - parameter type in the MySQL notation
@@ -74,6 +76,7 @@ class FileMetadata:
 
     return S_OK( "Added new metadata: %d" % metadataID )
 
+  @changesMetaQueries
   def deleteMetadataField( self, pname, credDict ):
     """ Remove metadata field
     """
@@ -111,6 +114,7 @@ class FileMetadata:
 #
 ###########################################################
 
+  @changesMetaQueries
   def setMetadata( self, path, metadict, credDict ):
     """ Set the value of a given metadata field for the the given directory path
     """
@@ -143,6 +147,7 @@ class FileMetadata:
 
     return S_OK()
 
+  @changesMetaQueries
   def removeMetadata( self, path, metadata, credDict ):
     """ Remove the specified metadata for the given file
     """
@@ -581,13 +586,30 @@ class FileMetadata:
 
     return S_OK( fileList )
 
-  @queryTime
-  def findFilesByMetadata( self, metaDict, path, credDict, extra = False ):
-    """ Find Files satisfying the given metadata
+  def __findFileIDsOrDirIDs( self, metaDict, path, credDict ):
+    """ Find the IDs of the Files satisfying the given metadata or, if there is no
+        File metadata in the query, the IDs of the Directories satisfying it.
+        The result is kept in the metadata query cache of the catalog
+
+        :return: S_OK( ( list of file IDs, list of directory IDs ) )
     """
-    if not path:
-      path = '/'
+    cache = getattr( self.db, 'metaQueryCache', None )
+    key = queryKey( 'FileIDs', metaDict, path )
+    if cache is not None:
+      cached = cache.get( key )
+      if cached is not None:
+        return S_OK( cached )
+      epoch = cache.getEpoch()
+
+    result = self.__queryFileIDsOrDirIDs( metaDict, path, credDict )
+    if result['OK'] and cache is not None:
+      cache.set( key, result['Value'], epoch )
+    return result
 
+  def __queryFileIDsOrDirIDs( self, metaDict, path, credDict ):
+    """ Query the IDs of the Files or Directories satisfying the given metadata,
+        see __findFileIDsOrDirIDs
+    """
     # 1.- Get Directories matching the metadata query
     result = self.db.dmeta.findDirIDsByMetadata( metaDict, path, credDict )
     if not result['OK']:
@@ -604,8 +626,6 @@ class FileMetadata:
     fileMetaDict = dict( item for item in metaDict.items() if item[0] in fileMetaKeys )
 
     fileList = []
-    lfnIdDict = {}
-    lfnList = []
 
     if dirFlag != 'None':
       # None means that no Directory satisfies the given query, thus the search is empty
@@ -620,11 +640,28 @@ class FileMetadata:
           return result
         fileList = result['Value']
       elif dirList:
-        # 4.- if not File Metadata, return the list of files in given directories
-        return self.db.dtree.getFileLFNsInDirectoryByDirectory( dirList, credDict )
-      else:
-        # if there is no File Metadata and no Dir Metadata, return an empty list
-        lfnList = []
+        # 4.- if not File Metadata, the files are those of the given directories
+        return S_OK( ( [], dirList ) )
+
+    # if there is no File Metadata and no Dir Metadata, the search is empty
+    return S_OK( ( fileList, [] ) )
+
+  @queryTime
+  def findFilesByMetadata( self, metaDict, path, credDict, extra = False ):
+    """ Find Files satisfying the given metadata
+    """
+    if not path:
+      path = '/'
+
+    result = self.__findFileIDsOrDirIDs( metaDict, path, credDict )
+    if not result['OK']:
+      return result
+    fileList, dirList = result['Value']
+    if dirList:
+      return self.db.dtree.getFileLFNsInDirectoryByDirectory( dirList, credDict )
+
+    lfnIdDict = {}
+    lfnList = []
 
     if fileList:
       # 5.- get the LFN
@@ -640,3 +677,45 @@ class FileMetadata:
       result['LFNIDDict'] = lfnIdDict
 
     return result
+
+  def iterFindFilesByMetadata( self, metaDict, path, credDict, chunkSize = 1000 ):
+    """ Find Files satisfying the given metadata by chunks, see findFilesByMetadata
+
+        It is a generator of S_OK( list of at most chunkSize LFNs ): the LFNs are got
+        for one chunk of file IDs or, if there is no File metadata in the query,
+        for one chunk of the file names of a matching directory at a time.
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    if not path:
+      path = '/'
+
+    result = self.__findFileIDsOrDirIDs( metaDict, path, credDict )
+    if not result['OK']:
+      yield result
+      return
+    fileList, dirList = result['Value']
+
+    for index in xrange( 0, len( fileList ), chunkSize ):
+      result = self.db.fileManager._getFileLFNs( fileList[index:index + chunkSize] )
+      if not result['OK']:
+        yield result
+        return
+      yield S_OK( result['Value']['Successful'].values() )
+
+    lfnList = []
+    for dirID in dirList:
+      result = self.db.dtree.getDirectoryPath( dirID )
+      if not result['OK']:
+        yield result
+        return
+      dirPath = result['Value']
+      for result in self.db.fileManager._iterDirectoryFileNames( dirID, allStatus = True, chunkSize = chunkSize ):
+        if not result['OK']:
+          yield result
+          return
+        lfnList.extend( '%s/%s' % ( dirPath, fileName ) for fileName in result['Value'] )
+        while len( lfnList ) >= chunkSize:
+          yield S_OK( lfnList[:chunkSize] )
+          lfnList = lfnList[chunkSize:]
+    if lfnList:
+      yield S_OK( lfnList )
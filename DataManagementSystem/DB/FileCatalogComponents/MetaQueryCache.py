@@ -0,0 +1,129 @@
+""" DIRAC FileCatalog component keeping the results of the metadata queries in memory
+
+    The same metadata queries, e.g. those of the input data of the productions,
+    are issued over and over while the catalog does not change in between.
+    The MetaQueryCache keeps the IDs of the directories and files found for a query,
+    and the IDs of the directories found for each metadata predicate, as compact
+    arrays. Every write to the catalog which may change the result of a query starts
+    a new epoch: the entries computed in an older epoch are not used any more.
+    It is shared by all the threads of the service, its size is bounded, the least
+    recently used entries being dropped first, and its entries expire after a lifetime.
+    The epochs are those of the process: the changes done through the other instances
+    of the service are only seen once the entries expire, so the lifetime is short.
+"""
+
+__RCSID__ = "$Id$"
+
+import array
+import collections
+import functools
+import threading
+import time
+
+
+def queryKey(*args):
+  """ Hashable key of a query, independent of the order of the items of the dictionaries
+  """
+  def hashable(value):
+    if isinstance(value, dict):
+      return tuple(sorted((key, hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+      return tuple(hashable(item) for item in value)
+    return value
+  return hashable(args)
+
+
+def changesMetaQueries(method):
+  """ Decorator of the write methods of the catalog, and of its components, whose changes may
+      change the result of the metadata queries: a new epoch of the cache is started after them
+  """
+  @functools.wraps(method)
+  def newEpochAfter(self, *args, **kwargs):
+    try:
+      return method(self, *args, **kwargs)
+    finally:
+      cache = getattr(getattr(self, 'db', self), 'metaQueryCache', None)
+      if cache is not None:
+        cache.newEpoch()
+  return newEpochAfter
+
+
+class MetaQueryCache(object):
+  """ LRU cache of the metadata queries: query key -> tuple of ID lists and plain values
+  """
+
+  def __init__(self, maxSize=1000, lifetime=10, maxIDs=1000000):
+    """ :param int maxSize: maximum number of queries kept, 0 disables the cache
+        :param int lifetime: seconds after which an entry is not used any more
+        :param int maxIDs: the results with more IDs than that are not kept
+    """
+    self.maxSize = maxSize
+    self.lifetime = lifetime
+    self.maxIDs = maxIDs
+    self.__lock = threading.Lock()
+    self.__epoch = 0
+    # key -> ( epoch, expiration time, values )
+    self.__entries = collections.OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def getEpoch(self):
+    """ :return: the current epoch, to be given to set() with the result computed from now on
+    """
+    return self.__epoch
+
+  def newEpoch(self):
+    """ To be called after every write which may change the result of the metadata queries
+    """
+    with self.__lock:
+      self.__epoch += 1
+
+  def get(self, key):
+    """ :return: the tuple of values kept for the key in the current epoch, with lists of IDs, or None
+    """
+    if not self.maxSize:
+      return None
+    with self.__lock:
+      entry = self.__entries.pop(key, None)
+      if entry is None or entry[0] != self.__epoch or entry[1] < time.time():
+        self.misses += 1
+        return None
+      self.__entries[key] = entry
+      self.hits += 1
+      return tuple(list(value) if isinstance(value, array.array) else value for value in entry[2])
+
+  def set(self, key, values, epoch):
+    """ Keeps the values of a query, the lists being lists of IDs, unless
+        the catalog changed since the given epoch
+    """
+    if not self.maxSize:
+      return
+    if sum(len(value) for value in values if isinstance(value, list)) > self.maxIDs:
+      return
+    values = tuple(array.array('l', value) if isinstance(value, list) else value for value in values)
+    with self.__lock:
+      if epoch != self.__epoch:
+        return
+      self.__entries.pop(key, None)
+      self.__entries[key] = (epoch, time.time() + self.lifetime, values)
+      while len(self.__entries) > self.maxSize:
+        self.__entries.popitem(last=False)
+        self.evictions += 1
+
+  def clear(self):
+    with self.__lock:
+      self.__entries.clear()
+
+  def getStats(self):
+    """ :return: dict with the Size, MaxSize, Epoch, Hits, Misses, Evictions and HitRate of the cache
+    """
+    with self.__lock:
+      lookups = self.hits + self.misses
+      return {'Size': len(self.__entries),
+              'MaxSize': self.maxSize,
+              'Epoch': self.__epoch,
+              'Hits': self.hits,
+              'Misses': self.misses,
+              'Evictions': self.evictions,
+              'HitRate': float(self.hits) / lookups if lookups else 0.}
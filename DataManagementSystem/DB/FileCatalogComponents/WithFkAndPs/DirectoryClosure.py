@@ -38,6 +38,9 @@ class DirectoryClosure( DirectoryTreeBase ):
 
       :returns: S_OK(id) and res['Level'] as the depth
     """
+    cached = self._findDirInCache( path )
+    if cached:
+      return cached
 
     dpath = os.path.normpath( path )
     result = self.db.executeStoredProcedure( 'ps_find_dir', ( dpath, 'ret1', 'ret2' ), outputIds = [1, 2] )
@@ -49,6 +52,7 @@ class DirectoryClosure( DirectoryTreeBase ):
 
     res = S_OK( result['Value'][0] )
     res['Level'] = result['Value'][1]
+    self._addDirToCache( path, res['Value'], res['Level'] )
     return res
 
 
@@ -61,14 +65,22 @@ class DirectoryClosure( DirectoryTreeBase ):
     """
 
     dirDict = {}
-    if not paths:
+    toFind = []
+    for path in paths:
+      cached = self._findDirInCache( path )
+      if cached:
+        dirDict[os.path.normpath( path )] = cached['Value']
+      else:
+        toFind.append( path )
+    if not toFind:
       return S_OK( dirDict )
-    dpaths = stringListToString( [os.path.normpath( path ) for path in paths ] )
+    dpaths = stringListToString( [os.path.normpath( path ) for path in toFind ] )
     result = self.db.executeStoredProcedureWithCursor( 'ps_find_dirs', ( dpaths, ) )
     if not result['OK']:
       return result
     for dirName, dirID in result['Value']:
       dirDict[dirName] = dirID
+      self._addDirToCache( dirName, dirID )
 
     return S_OK( dirDict )
 
@@ -95,6 +107,7 @@ class DirectoryClosure( DirectoryTreeBase ):
 
     dirId = result['Value']
     result = self.db.executeStoredProcedure( 'ps_remove_dir', ( dirId, ), outputIds = [] )
+    self._invalidateDirCache( path )
     if not result['OK']:
       return result
 
@@ -512,6 +525,7 @@ class DirectoryClosure( DirectoryTreeBase ):
     # If there is an associated procedure, we go for it
     if psName:
       result = self.db.executeStoredProcedureWithCursor( psName, ( path, pvalue ) )
+      self._invalidateDirCache( path, recursive )
 
       if not result['OK']:
         return result
@@ -853,6 +853,10 @@ class FileManagerPs(FileManagerBase):
     """ This updates the directory usage, but is now done by triggers in the DB"""
     return S_OK()
 
+  def reconcileDirectoryUsage(self, maxDirectories=100):
+    """ Nothing to reconcile, the usage is changed by the triggers in the same transaction as the files"""
+    return S_OK({'Journaled': 0, 'Checked': 0, 'Corrected': 0})
+
   def _computeStorageUsageOnRemoveFile(self, lfns, connection=False):
     """Again nothing to compute, all done by the triggers"""
     directorySESizeDict = {}
@@ -922,18 +926,13 @@ class FileManagerPs(FileManagerBase):
 
     return S_OK({'Successful': successful, 'Failed': failed})
 
-  def getSEDump(self, seName):
-    """
-         Return all the files at a given SE, together with checksum and size
-
-        :param seName: name of the StorageElement
+  def _getSEDumpPage(self, seID, lastKey, pageSize, connection=False):
+    """ Get a page of the replicas at a given SE, the key being the RepID
 
-        :returns: S_OK with list of tuples (lfn, checksum, size)
+        It is not done with ps_get_se_dump, which returns all the replicas of the SE at once
     """
-
-    res = self.db.seManager.findSE(seName)
-    if not res['OK']:
-      return res
-    seID = res['Value']
-
-    return self.db.executeStoredProcedureWithCursor('ps_get_se_dump', (seID,))
+    connection = self._getConnection(connection)
+    req = "SELECT SQL_NO_CACHE r.RepID, CONCAT(d.Name, '/', f.FileName), f.Checksum, f.Size"
+    req += " FROM FC_Replicas r JOIN FC_Files f ON f.FileID = r.FileID JOIN FC_DirectoryList d ON d.DirID = f.DirID"
+    req += " WHERE r.SEID = %d AND r.RepID > %d ORDER BY r.RepID LIMIT %d" % (seID, lastKey, pageSize)
+    return self.db._query(req, connection)
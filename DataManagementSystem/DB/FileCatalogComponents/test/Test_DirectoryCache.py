@@ -0,0 +1,117 @@
+""" Test of the cache of the directories of the FileCatalog
+"""
+
+# pylint: disable=protected-access,missing-docstring
+
+import time
+
+from mock import MagicMock
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryCache import DirectoryCache
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryLevelTree import DirectoryLevelTree
+
+
+def test_lru():
+  cache = DirectoryCache(maxSize=2)
+  cache.setDir('/vo/data', 2, 2)
+  cache.setDir('/vo/mc/', 3)
+  assert cache.getDir('/vo/data') == (2, 2)
+  assert cache.getDir('/vo/mc') == (3, None)
+  # /vo/data is the least recently used
+  cache.setDir('/vo/user', 4, 2)
+  assert cache.getDir('/vo/data') is None
+  assert cache.getDir('/vo/user') == (4, 2)
+  stats = cache.getStats()
+  assert (stats['Size'], stats['Hits'], stats['Misses'], stats['Evictions']) == (2, 3, 1, 1)
+  assert stats['HitRate'] == 0.75
+
+
+def test_parametersAndInvalidation():
+  cache = DirectoryCache()
+  cache.setDir('/vo/mc', 3, 2)
+  cache.setParameters('/vo/mc', {'DirID': 3, 'UID': 1, 'GID': 2, 'Mode': 0o755, 'Owner': 'someone'})
+  cache.setParameters('/vo/mc/prod', {'DirID': 5, 'UID': 1, 'GID': 2, 'Mode': 0o775})
+  cache.setDir('/vo/mcother', 6, 2)
+  assert cache.getParameters('/vo/mc') == {'DirID': 3, 'UID': 1, 'GID': 2, 'Mode': 0o755}
+  assert cache.getDir('/vo/mc') == (3, 2)
+  assert cache.getDir('/vo/mc/prod') == (5, None)
+  assert cache.getParameters('/vo/mcother') is None
+
+  cache.invalidate('/vo/mc', recursive=True)
+  assert cache.getDir('/vo/mc') is None
+  assert cache.getDir('/vo/mc/prod') is None
+  assert cache.getDir('/vo/mcother') == (6, 2)
+  cache.clear()
+  assert cache.getStats()['Size'] == 0
+
+
+def test_lifetimeAndDisabled():
+  cache = DirectoryCache(lifetime=0.1)
+  cache.setDir('/vo', 1, 1)
+  assert cache.getDir('/vo') == (1, 1)
+  time.sleep(0.2)
+  assert cache.getDir('/vo') is None
+
+  cache = DirectoryCache(maxSize=0)
+  cache.setDir('/vo', 1, 1)
+  assert cache.getDir('/vo') is None
+  assert cache.getStats()['Size'] == 0
+
+
+def test_levelTree():
+  db = MagicMock()
+  db.dirCache = DirectoryCache()
+  db._escapeString.side_effect = lambda value: S_OK("'%s'" % value)
+  db.ugManager.getUserAndGroupID.return_value = S_OK((1, 2))
+  db.ugManager.getUserName.return_value = S_OK('someone')
+  db.ugManager.getGroupName.return_value = S_OK('somegroup')
+  db.globalReadAccess = True
+  directories = {'/vo': (1, 1), '/vo/data': (2, 2), '/vo/mc': (3, 2)}
+
+  def query(req, _connection=False):
+    if req.startswith('SELECT DirID,Level'):
+      name = req.split("'")[1]
+      return S_OK([directories[name]] if name in directories else [])
+    if req.startswith('SELECT DirName,DirID'):
+      names = [name for name in req.split("'")[1::2] if name in directories]
+      return S_OK([(name, directories[name][0]) for name in names])
+    if req.startswith('SELECT DirID,UID,GID'):
+      dirID = int(req.split('=')[-1])
+      return S_OK([(dirID, 1, 2, 0, 0o755, None, None)])
+    raise AssertionError(req)
+  db._query.side_effect = query
+  db._update.return_value = S_OK()
+  tree = DirectoryLevelTree(db)
+
+  for _ in xrange(3):
+    result = tree.findDir('/vo/data/')
+    assert (result['Value'], result['Level']) == (2, 2)
+  assert tree.findDir('/vo/nothing')['Value'] == ''
+  assert db._query.call_count == 2
+
+  # Only the directories not yet known are queried
+  assert tree.findDirs(['/vo/data', '/vo/mc', '/vo/nothing'])['Value'] == {'/vo/data': 2, '/vo/mc': 3}
+  assert "'/vo/data'" not in db._query.call_args[0][0]
+  db._query.reset_mock()
+  assert tree.findDirs(['/vo/data', '/vo/mc'])['Value'] == {'/vo/data': 2, '/vo/mc': 3}
+  assert not db._query.called
+
+  # The permissions of a new file are those of its directory
+  credDict = {'username': 'someone', 'group': 'somegroup'}
+  for _ in xrange(3):
+    result = tree.getPathPermissions(['/vo/data/file'], credDict)
+    assert result['Value']['Successful']['/vo/data/file'] == {'Read': True, 'Write': True, 'Execute': True}
+  # /vo/data/file, which is not a directory, each time, and the parameters of /vo/data once
+  assert db._query.call_count == 4
+
+  # Changing the mode forgets the parameters
+  assert tree._setDirectoryMode('/vo/data', 0o700)['OK']
+  db._query.reset_mock()
+  assert tree.getDirectoryPermissions('/vo/data', credDict)['OK']
+  assert db._query.call_count == 2
+
+  # Removing a directory forgets it
+  assert tree.removeDir('/vo/mc')['OK']
+  del directories['/vo/mc']
+  assert tree.findDir('/vo/mc')['Value'] == ''
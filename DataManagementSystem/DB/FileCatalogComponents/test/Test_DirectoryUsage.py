@@ -0,0 +1,170 @@
+""" Test of the incremental usage of the directories of the FileCatalog
+"""
+
+# pylint: disable=protected-access,missing-docstring
+
+import errno
+import re
+
+from mock import MagicMock
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManagerBase import FileManagerBase
+
+
+class FakeCatalog(object):
+  """ Tree / -> /vo -> /vo/data, with the files, replicas and FC_DirectoryUsage in memory """
+
+  parents = {1: [1], 2: [1, 2], 3: [1, 2, 3]}
+  children = {1: [2], 2: [3], 3: []}
+
+  def __init__(self):
+    # fileID -> ( dirID, size ), ( fileID, seID )
+    self.files = {1: (3, 10), 2: (3, 20), 3: (2, 7)}
+    self.replicas = set([(1, 5), (2, 5), (1, 6), (3, 6)])
+    # ( dirID, seID ) -> [ size, files ]
+    self.usage = {}
+    self.updates = 0
+    self.failing = False
+    self.dtree = MagicMock()
+    self.dtree.getPathIDsByID.side_effect = lambda dirID: S_OK(self.parents[dirID]) if dirID in self.parents else \
+        S_ERROR(errno.ENOENT, 'Directory with id %d not found' % dirID)
+    self.dtree.getChildren.side_effect = lambda dirID: S_OK(self.children[dirID])
+    self.dtree.getTreeTable.return_value = 'FC_DirectoryLevelTree'
+
+  def expectedUsage(self):
+    usage = {}
+    for fileID, (dirID, size) in self.files.items():
+      for seID in [0] + [seID for fID, seID in self.replicas if fID == fileID]:
+        for parentID in self.parents[dirID]:
+          entry = usage.setdefault((parentID, seID), [0, 0])
+          entry[0] += size
+          entry[1] += 1
+    return usage
+
+  def _update(self, req, _connection=False):
+    assert req.startswith('INSERT INTO FC_DirectoryUsage')
+    self.updates += 1
+    if self.failing:
+      return S_ERROR('Lock wait timeout exceeded')
+    for dirID, seID, size, files in re.findall(r'\((-?\d+),(-?\d+),(-?\d+),(-?\d+),UTC_TIMESTAMP\(\)\)', req):
+      entry = self.usage.setdefault((int(dirID), int(seID)), [0, 0])
+      entry[0] += int(size)
+      entry[1] += int(files)
+    return S_OK(1)
+
+  def _query(self, req, _connection=False):
+    numbers = [int(number) for number in re.findall(r'\d+', req.split('FROM', 1)[-1])]
+    if 'LOCK' in req:
+      return S_OK(((1,),))
+    if req.startswith('SELECT DirID FROM FC_DirectoryLevelTree'):
+      return S_OK(tuple((dirID,) for dirID in sorted(self.parents) if dirID > numbers[0])[:numbers[1]])
+    if req.startswith('SELECT 0,SUM(Size)'):
+      sizes = [size for dirID, size in self.files.values() if dirID == numbers[0]]
+      return S_OK(((0, sum(sizes) if sizes else None, len(sizes)),))
+    if req.startswith('SELECT R.SEID'):
+      rows = {}
+      for fileID, seID in self.replicas:
+        if self.files.get(fileID, (0,))[0] == numbers[0]:
+          row = rows.setdefault(seID, [seID, 0, 0])
+          row[1] += self.files[fileID][1]
+          row[2] += 1
+      return S_OK(tuple(tuple(row) for row in rows.values()))
+    if 'DirID IN' in req:
+      rows = {}
+      for (dirID, seID), (size, files) in self.usage.items():
+        if dirID in numbers:
+          row = rows.setdefault(seID, [seID, 0, 0])
+          row[1] += size
+          row[2] += files
+      return S_OK(tuple(tuple(row) for row in rows.values()))
+    if req.startswith('SELECT SEID,SESize,SEFiles'):
+      return S_OK(tuple((seID, size, files) for (dirID, seID), (size, files) in self.usage.items()
+                        if dirID == numbers[0]))
+    raise AssertionError(req)
+
+
+def test_ledger():
+  db = FakeCatalog()
+  fileManager = FileManagerBase(db)
+  # All the files are added, then the file 3 is removed
+  assert fileManager._updateDirectoryUsage({3: {0: {'Size': 30, 'Files': 2},
+                                                5: {'Size': 30, 'Files': 2},
+                                                6: {'Size': 10, 'Files': 1}},
+                                            2: {0: {'Size': 7, 'Files': 1},
+                                                6: {'Size': 7, 'Files': 1}}}, '+')['OK']
+  assert db.updates == 1
+  assert db.usage == db.expectedUsage()
+  del db.files[3]
+  db.replicas.remove((3, 6))
+  fileManager._updateDirectoryUsage({2: {0: {'Size': 7, 'Files': 1}, 6: {'Size': 7, 'Files': 1}}}, '-')
+  assert dict((key, value) for key, value in db.usage.items() if value != [0, 0]) == db.expectedUsage()
+
+  # The changes which cannot be applied are journaled and applied by the reconciliation
+  db.failing = True
+  db.files[3] = (2, 7)
+  assert fileManager._updateDirectoryUsage({2: {0: {'Size': 7, 'Files': 1}}}, '+')['OK']
+  db.failing = False
+  result = fileManager.reconcileDirectoryUsage(maxDirectories=2)
+  assert result['Value'] == {'Journaled': 1, 'Checked': 2, 'Corrected': 0}
+  assert db.usage == db.expectedUsage()
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=2)['Value']['Journaled'] == 0
+
+
+def test_reconciliation():
+  db = FakeCatalog()
+  db.usage = db.expectedUsage()
+  fileManager = FileManagerBase(db)
+
+  # The usage of a replica is lost, it is found twice in a row before being corrected
+  db.replicas.add((2, 6))
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value'] == \
+      {'Journaled': 0, 'Checked': 3, 'Corrected': 0}
+  updates = db.updates
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Corrected'] == 1
+  assert db.updates == updates + 1
+  assert db.usage == db.expectedUsage()
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Corrected'] == 0
+
+  # A change in progress is not corrected
+  db.files[4] = (3, 1)
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Corrected'] == 0
+  fileManager._updateDirectoryUsage({3: {0: {'Size': 1, 'Files': 1}}}, '+')
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Corrected'] == 0
+  assert db.usage == db.expectedUsage()
+
+  # The directories are checked a few at a time, and those which differed are checked again
+  db.replicas.add((4, 5))
+  assert [fileManager.reconcileDirectoryUsage(maxDirectories=2)['Value']['Checked'] for _ in xrange(3)] == [2, 1, 3]
+  assert db.usage == db.expectedUsage()
+
+
+def test_journal():
+  db = FakeCatalog()
+  db.usage = db.expectedUsage()
+  fileManager = FileManagerBase(db)
+  db.failing = True
+  db.files[4] = (3, 1)
+  fileManager._updateDirectoryUsage({3: {0: {'Size': 1, 'Files': 1}}}, '+')
+  # The directory 9 is removed before its change can be applied
+  fileManager._updateDirectoryUsage({9: {0: {'Size': 5, 'Files': 1}}}, '+')
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['OK'] is False
+
+  # Each directory is applied on its own, the changes of the removed one are dropped
+  db.failing = False
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Journaled'] == 1
+  assert db.usage == db.expectedUsage()
+
+  # The changes are kept whatever happens while applying them
+  db.failing = True
+  db.files[5] = (3, 2)
+  fileManager._updateDirectoryUsage({3: {0: {'Size': 2, 'Files': 1}}}, '+')
+  db.failing = False
+  db.dtree.getPathIDsByID.side_effect = RuntimeError('Connection lost')
+  try:
+    fileManager.reconcileDirectoryUsage(maxDirectories=10)
+  except RuntimeError:
+    pass
+  db.dtree.getPathIDsByID.side_effect = lambda dirID: S_OK(db.parents[dirID])
+  assert fileManager.reconcileDirectoryUsage(maxDirectories=10)['Value']['Journaled'] == 1
+  assert db.usage == db.expectedUsage()
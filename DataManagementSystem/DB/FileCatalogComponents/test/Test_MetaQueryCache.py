@@ -0,0 +1,156 @@
+""" Test of the cache of the metadata queries of the FileCatalog
+"""
+
+# pylint: disable=protected-access,missing-docstring
+
+from mock import MagicMock
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.MetaQueryCache import MetaQueryCache, queryKey, \
+    changesMetaQueries
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryMetadata import DirectoryMetadata
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileMetadata import FileMetadata
+from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+
+
+def test_epochs():
+  cache = MetaQueryCache(maxSize=2, maxIDs=3)
+  assert queryKey({'A': 1, 'B': {'in': [1, 2]}}, '/') == queryKey({'B': {'in': [1, 2]}, 'A': 1}, '/')
+
+  epoch = cache.getEpoch()
+  cache.set('q1', ([3, 1, 2], 'Done'), epoch)
+  ids, selection = cache.get('q1')
+  assert (ids, selection) == ([3, 1, 2], 'Done')
+  # The caller gets its own list
+  ids.append(4)
+  assert cache.get('q1')[0] == [3, 1, 2]
+
+  # Too many IDs
+  cache.set('q2', ([1, 2], [3, 4]), epoch)
+  assert cache.get('q2') is None
+
+  # A result computed before a write is not kept, those kept before are not used any more
+  cache.newEpoch()
+  cache.set('q2', ([1],), epoch)
+  assert cache.get('q2') is None
+  assert cache.get('q1') is None
+  epoch = cache.getEpoch()
+  for key in ('q1', 'q2', 'q3'):
+    cache.set(key, ([1],), epoch)
+  assert cache.get('q1') is None
+  stats = cache.getStats()
+  assert (stats['Size'], stats['Epoch'], stats['Evictions']) == (2, 1, 1)
+
+  cache = MetaQueryCache(maxSize=0)
+  cache.set('q1', ([1],), cache.getEpoch())
+  assert cache.get('q1') is None
+
+
+def test_changesMetaQueries():
+  class Writer(object):
+    def __init__(self):
+      self.db = MagicMock()
+      self.db.metaQueryCache = MetaQueryCache()
+
+    @changesMetaQueries
+    def write(self, fail):
+      if fail:
+        raise RuntimeError('Failed')
+      return S_OK()
+
+  writer = Writer()
+  assert writer.write(False)['OK']
+  try:
+    writer.write(True)
+  except RuntimeError:
+    pass
+  assert writer.db.metaQueryCache.getEpoch() == 2
+
+
+def test_findDirIDsByMetadata():
+  db = MagicMock()
+  db.metaQueryCache = MetaQueryCache()
+  db.dtree.getAllSubdirectoriesByID.return_value = S_OK([])
+  metaDirs = {'Energy': {'7': [2, 3, 4]}, 'Type': {'MC': [3, 4], 'Data': [2]}}
+  queries = []
+
+  def query(req, _connection=False):
+    queries.append(req)
+    if req.startswith('SELECT MetaName,MetaType'):
+      return S_OK([('Energy', 'VARCHAR(8)'), ('Type', 'VARCHAR(8)')])
+    if 'M.DirID IN (0)' in req:
+      return S_OK([])
+    meta = req.split('FC_Meta_')[1].split()[0]
+    if "Value='" in req:
+      value = req.split("Value='")[1].split("'")[0]
+      return S_OK([(dirID,) for dirID in metaDirs[meta].get(value, [])])
+    return S_OK([(dirID,) for dirIDs in metaDirs[meta].values() for dirID in dirIDs])
+  db._query.side_effect = query
+  dmeta = DirectoryMetadata(db)
+
+  def findSubdirQueries():
+    return [req for req in queries if req.startswith(' SELECT M.DirID')]
+
+  # The equality is evaluated first
+  result = dmeta.findDirIDsByMetadata({'Energy': 'Any', 'Type': 'MC'}, '/', {})
+  assert (result['Value'], result['Selection']) == ([3, 4], 'Done')
+  assert ['FC_Meta_Type' in req for req in findSubdirQueries()] == [True, False]
+
+  # Served by the cache
+  queries[:] = []
+  result = dmeta.findDirIDsByMetadata({'Type': 'MC', 'Energy': 'Any'}, '/', {})
+  assert (result['Value'], result['Selection'], queries) == ([3, 4], 'Done', [])
+
+  # Type=MC is known and costs nothing, Energy=8 is then queried
+  queries[:] = []
+  result = dmeta.findDirIDsByMetadata({'Energy': '8', 'Type': 'MC'}, '/', {})
+  assert (result['Value'], result['Selection']) == ([], 'None')
+  assert ['FC_Meta_Energy' in req for req in findSubdirQueries()] == [True]
+
+  # Energy=8 is known to match nothing, Type=Any is not evaluated
+  queries[:] = []
+  result = dmeta.findDirIDsByMetadata({'Energy': '8', 'Type': 'Any'}, '/', {})
+  assert result['Value'] == []
+  assert findSubdirQueries() == []
+  # Neither is Type=Any when nothing matches the equality
+  result = dmeta.findDirIDsByMetadata({'Energy': '9', 'Type': 'Any'}, '/', {})
+  assert result['Value'] == []
+  assert ['FC_Meta_Energy' in req for req in findSubdirQueries()] == [True]
+
+  # After a write, the query is evaluated again
+  metaDirs['Type']['MC'] = [4]
+  db.metaQueryCache.newEpoch()
+  result = dmeta.findDirIDsByMetadata({'Type': 'MC', 'Energy': 'Any'}, '/', {})
+  assert result['Value'] == [4]
+
+
+def test_setReplicaHost():
+  catalog = FileCatalogDB.__new__(FileCatalogDB)
+  catalog.metaQueryCache = MetaQueryCache()
+  catalog.seNames = {'SE1': 1, 'SE2': 2}
+  # FileID -> SEID of its replica
+  replicas = {1: 1, 2: 1}
+
+  def query(req, _connection=False):
+    if 'FC_FileMetaFields' in req:
+      return S_OK([])
+    return S_OK([(fileID,) for fileID, seID in sorted(replicas.items()) if 'SEID IN ( %d )' % seID in req])
+  catalog._query = MagicMock(side_effect=query)
+  catalog._checkPathPermissions = MagicMock(side_effect=lambda _operation, lfns, _credDict:
+                                            S_OK({'Successful': lfns, 'Failed': {}}))
+  catalog.dmeta = MagicMock()
+  catalog.dmeta.findDirIDsByMetadata.side_effect = lambda *_args: dict(S_OK([]), Selection='All')
+  catalog.fileManager = MagicMock()
+  catalog.fileManager._getFileLFNs.side_effect = lambda fileIDs: \
+      S_OK({'Successful': dict((fileID, '/vo/f%d' % fileID) for fileID in fileIDs), 'Failed': {}})
+
+  def setReplicaHost(lfns):
+    replicas[2] = catalog.seNames[lfns['/vo/f2']['NewSE']]
+    return S_OK({'Successful': {'/vo/f2': True}, 'Failed': {}})
+  catalog.fileManager.setReplicaHost.side_effect = setReplicaHost
+  catalog.fmeta = FileMetadata(catalog)
+
+  assert sorted(catalog.fmeta.findFilesByMetadata({'SE': 'SE2'}, '/', {})['Value']) == []
+  assert catalog.setReplicaHost({'/vo/f2': {'SE': 'SE1', 'NewSE': 'SE2'}}, {})['OK']
+  assert sorted(catalog.fmeta.findFilesByMetadata({'SE': 'SE2'}, '/', {})['Value']) == ['/vo/f2']
+  assert sorted(catalog.fmeta.findFilesByMetadata({'SE': 'SE1'}, '/', {})['Value']) == ['/vo/f1']
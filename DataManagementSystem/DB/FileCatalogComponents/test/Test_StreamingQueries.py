@@ -0,0 +1,103 @@
+""" Test of the queries of the FileCatalog done by chunks
+"""
+
+# pylint: disable=protected-access,missing-docstring
+
+from mock import MagicMock
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManagerBase import FileManagerBase
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryLevelTree import DirectoryLevelTree
+
+
+class FakeFileManager(FileManagerBase):
+  """ Serves the files of directory 1 from memory, and counts the files asked """
+
+  files = {'f%d' % index: {'FileID': index, 'Size': index} for index in xrange(5)}
+
+  def __init__(self, database=None):
+    super(FakeFileManager, self).__init__(database)
+    self.asked = []
+
+  def _getDirectoryFiles(self, dirID, fileNames, metadata, allStatus=False, connection=False):
+    assert dirID == 1
+    self.asked.append(len(fileNames))
+    names = fileNames or self.files.keys()
+    return S_OK(dict((name, dict((key, self.files[name][key]) for key in metadata if key in self.files[name]))
+                     for name in names))
+
+  def _getFileReplicas(self, fileIDs, fields_input=['PFN'], allStatus=False, connection=False):
+    return S_OK(dict((fileID, {'SE%d' % (fileID % 2): {'PFN': 'pfn%d' % fileID}}) for fileID in fileIDs if fileID))
+
+
+def test_fileManager():
+  db = MagicMock()
+  db.lfnPfnConvention = False
+  fileManager = FakeFileManager(db)
+  expected = fileManager.getFilesInDirectory(1, verbose=True)['Value']
+  assert len(expected) == 5 and expected['f3']['Replicas'] == {'SE1': {'PFN': 'pfn3'}}
+
+  fileManager.asked = []
+  results = list(fileManager.iterFilesInDirectory(1, verbose=True, chunkSize=2))
+  assert all(result['OK'] for result in results)
+  assert [len(result['Value']) for result in results] == [2, 2, 1]
+  merged = {}
+  for result in results:
+    merged.update(result['Value'])
+  assert merged == expected
+  # The names once, then the metadata of 2 files at most at once
+  assert fileManager.asked == [0, 2, 2, 1]
+
+  results = list(fileManager.iterDirectoryReplicas(1, chunkSize=3))
+  assert [result['Value'] for result in results] == [{'f1': {'SE1': 'pfn1'}, 'f2': {'SE0': 'pfn2'}},
+                                                     {'f3': {'SE1': 'pfn3'}, 'f4': {'SE0': 'pfn4'}}]
+
+  fileManager._getFileReplicas = MagicMock(return_value=S_ERROR('Database gone'))
+  results = list(fileManager.iterFilesInDirectory(1, verbose=True, chunkSize=2))
+  assert len(results) == 1 and results[0]['Message'] == 'Database gone'
+
+
+def test_iterListDirectory():
+  db = MagicMock()
+  db.dirCache = None
+  db.fileManager = FakeFileManager(db)
+  db.datasetManager.getDatasetsInDirectory.return_value = S_OK({})
+  tree = DirectoryLevelTree(db)
+  tree.findDir = MagicMock(side_effect=lambda path, connection=False: S_OK({'/vo/dir': 1}.get(path, '')))
+  tree.getChildren = MagicMock(side_effect=lambda path, connection=False:
+                               S_OK([2]) if path == '/vo/dir' else S_ERROR('Directory does not exist: %s' % path))
+  tree.getDirectoryPath = MagicMock(return_value=S_OK('/vo/dir/sub'))
+
+  expected = tree.listDirectory({'/vo/dir': True, '/vo/nothing': True})['Value']
+  results = list(tree.iterListDirectory({'/vo/dir': True, '/vo/nothing': True}, chunkSize=2))
+  assert all(result['OK'] for result in results)
+  failed = {}
+  files = {}
+  for result in results:
+    failed.update(result['Value']['Failed'])
+    if '/vo/dir' in result['Value']['Successful']:
+      pathDict = result['Value']['Successful']['/vo/dir']
+      assert len(pathDict['Files']) <= 2
+      files.update(pathDict['Files'])
+  assert failed == expected['Failed']
+  assert files == expected['Successful']['/vo/dir']['Files']
+  assert [result['Value']['Successful']['/vo/dir']['SubDirs'] for result in results
+          if '/vo/dir' in result['Value']['Successful']][0] == {'/vo/dir/sub': True}
+
+
+def test_seDump():
+  db = MagicMock()
+  db.seManager.findSE.return_value = S_OK(4)
+  rows = [(key, '/vo/f%d' % key, 'ad%d' % key, key * 10) for key in (3, 5, 8, 13, 21)]
+  fileManager = FakeFileManager(db)
+  fileManager._getSEDumpPage = MagicMock(side_effect=lambda seID, lastKey, pageSize:
+                                         S_OK([row for row in rows if row[0] > lastKey][:pageSize]))
+
+  assert fileManager.getSEDump('SE')['Value'] == tuple(row[1:] for row in rows)
+  assert [[row[0] for row in result['Value']] for result in fileManager.iterSEDump('SE', pageSize=2)] == \
+      [[3, 5], [8, 13], [21]]
+  # Resumed after the key 5, the last page being complete needs one more query
+  fileManager._getSEDumpPage.reset_mock()
+  assert [[row[0] for row in result['Value']] for result in fileManager.iterSEDump('SE', lastKey=5, pageSize=3)] == \
+      [[8, 13, 21]]
+  assert [call[0] for call in fileManager._getSEDumpPage.call_args_list] == [(4, 5, 3), (4, 21, 3)]
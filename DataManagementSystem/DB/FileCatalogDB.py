@@ -26,6 +26,8 @@ from DIRAC.DataManagementSystem.DB.FileCatalogComponents.UserAndGroupManager imp
     UserAndGroupManagerDB
 
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DatasetManager import DatasetManager
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryCache import DirectoryCache
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.MetaQueryCache import MetaQueryCache, changesMetaQueries
 from DIRAC.Resources.Catalog.Utilities import checkArgumentFormat
 
 #############################################################################
@@ -69,6 +71,14 @@ class FileCatalogDB(DB):
     self.validReplicaStatus = databaseConfig['ValidReplicaStatus']
     self.visibleFileStatus = databaseConfig['VisibleFileStatus']
     self.visibleReplicaStatus = databaseConfig['VisibleReplicaStatus']
+    # Directories resolved recently, shared by all the threads of the service. Disabled by default:
+    # the directories removed or changed through the other instances of the service stay cached
+    self.dirCache = DirectoryCache(databaseConfig.get('DirectoryCacheSize', 0),
+                                   databaseConfig.get('DirectoryCacheLifetime', 300))
+    # Results of the metadata queries, until the next write which may change them. The writes done
+    # by the other instances of the service are only seen once the results expire
+    self.metaQueryCache = MetaQueryCache(databaseConfig.get('MetaQueryCacheSize', 1000),
+                                         databaseConfig.get('MetaQueryCacheLifetime', 10))
 
     try:
       # Obtain the plugins to be used for DB interaction
@@ -277,6 +287,7 @@ class FileCatalogDB(DB):
   #  Path based read methods
   #
 
+  @changesMetaQueries
   def changePathOwner(self, paths, credDict, recursive=False):
     """ Bulk method to change Owner for the given paths
 
@@ -298,6 +309,7 @@ class FileCatalogDB(DB):
       successful = result['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def changePathGroup(self, paths, credDict, recursive=False):
     """ Bulk method to change Group for the given paths
 
@@ -319,6 +331,7 @@ class FileCatalogDB(DB):
       successful = result['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def changePathMode(self, paths, credDict, recursive=False):
     """ Bulk method to change Mode for the given paths
 
@@ -401,6 +414,7 @@ class FileCatalogDB(DB):
   #  File based write methods
   #
 
+  @changesMetaQueries
   def addFile(self, lfns, credDict):
     """
       Add a new File
@@ -426,6 +440,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def setFileStatus(self, lfns, credDict):
     """
       Set the status of a File
@@ -452,6 +467,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def removeFile(self, lfns, credDict):
     """
        Remove files
@@ -478,6 +494,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def addReplica(self, lfns, credDict):
     """
        Add a replica to a File
@@ -505,6 +522,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def removeReplica(self, lfns, credDict):
     """
        Remove replicas
@@ -532,6 +550,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def setReplicaStatus(self, lfns, credDict):
     """
       Set the status of a Replicas
@@ -558,6 +577,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def setReplicaHost(self, lfns, credDict):
     res = self._checkPathPermissions('setReplicaHost', lfns, credDict)
     if not res['OK']:
@@ -712,6 +732,27 @@ class FileCatalogDB(DB):
     return S_OK({'Successful': successful, 'Failed': failed,
                  'SEPrefixes': res['Value'].get('SEPrefixes', {})})
 
+  def iterReplicas(self, lfns, allStatus, credDict, chunkSize=1000):
+    """
+    Gets the replicas of a list of lfns by chunks, see getReplicas
+
+    :param int chunkSize: maximum number of lfns of each chunk
+
+    :return: generator of S_OK( Successful/Failed dict ) for at most chunkSize lfns each.
+             An S_ERROR is yielded and the iteration stops upon error
+    """
+
+    res = checkArgumentFormat(lfns)
+    if not res['OK']:
+      yield res
+      return
+    lfnList = sorted(res['Value'])
+    for index in xrange(0, len(lfnList), chunkSize):
+      res = self.getReplicas(lfnList[index:index + chunkSize], allStatus, credDict)
+      yield res
+      if not res['OK']:
+        return
+
   def getReplicaStatus(self, lfns, credDict):
     """
         Gets the status of a list of replicas
@@ -825,6 +866,7 @@ class FileCatalogDB(DB):
   #  Directory based Write methods
   #
 
+  @changesMetaQueries
   def createDirectory(self, lfns, credDict):
     """
         Create new directories
@@ -851,6 +893,7 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def removeDirectory(self, lfns, credDict):
     """
         Remove directories
@@ -923,6 +966,30 @@ class FileCatalogDB(DB):
     successful = res['Value']['Successful']
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  def iterListDirectory(self, lfns, credDict, verbose=False, chunkSize=1000):
+    """
+        List directories by chunks, see listDirectory
+
+        :param int chunkSize: maximum number of files of each chunk
+
+        :return: generator of S_OK( Successful/Failed dict ). The first chunk of a directory
+           has its "Subdirs", "Datasets" and "Links", the next ones its "Files".
+           An S_ERROR is yielded and the iteration stops upon error
+    """
+
+    res = self._checkPathPermissions('listDirectory', lfns, credDict)
+    if not res['OK']:
+      yield res
+      return
+    successful = res['Value']['Successful']
+    if res['Value']['Failed']:
+      yield S_OK({'Successful': {}, 'Failed': res['Value']['Failed']})
+
+    for res in self.dtree.iterListDirectory(successful, verbose=verbose, chunkSize=chunkSize):
+      yield res
+      if not res['OK']:
+        return
+
   def isDirectory(self, lfns, credDict):
     """
         Checks whether a list of LFNS are directories or not
@@ -969,6 +1036,29 @@ class FileCatalogDB(DB):
     return S_OK({'Successful': successful, 'Failed': failed,
                  'SEPrefixes': res['Value'].get('SEPrefixes', {})})
 
+  def iterDirectoryReplicas(self, lfns, allStatus, credDict, chunkSize=1000):
+    """
+        Gets the replicas of the files of directories by chunks, see getDirectoryReplicas
+
+        :param int chunkSize: maximum number of files of each chunk
+
+        :return: generator of S_OK( Successful/Failed dict ).
+           An S_ERROR is yielded and the iteration stops upon error
+    """
+
+    res = self._checkPathPermissions('getDirectoryReplicas', lfns, credDict)
+    if not res['OK']:
+      yield res
+      return
+    successful = res['Value']['Successful']
+    if res['Value']['Failed']:
+      yield S_OK({'Successful': {}, 'Failed': res['Value']['Failed']})
+
+    for res in self.dtree.iterDirectoryReplicas(successful, allStatus, chunkSize=chunkSize):
+      yield res
+      if not res['OK']:
+        return
+
   def getDirectorySize(self, lfns, longOutput, fromFiles, credDict):
     """
         Get the sizes of a list of directories
@@ -1025,9 +1115,15 @@ class FileCatalogDB(DB):
     """ Rebuild DirectoryUsage table from scratch
     """
 
+    self.fileManager.clearDirectoryUsageJournal()
     result = self.dtree._rebuildDirectoryUsage()
     return result
 
+  def reconcileDirectoryUsage(self, maxDirectories=100):
+    """ Bring the DirectoryUsage table in line with the files and replicas, a few directories at a time
+    """
+    return self.fileManager.reconcileDirectoryUsage(maxDirectories=maxDirectories)
+
   def repairCatalog(self, directoryFlag=True, credDict={}):
     """ Repair catalog inconsistencies
     """
@@ -1042,6 +1138,7 @@ class FileCatalogDB(DB):
   #  Catalog metadata methods
   #
 
+  @changesMetaQueries
   def setMetadata(self, path, metadataDict, credDict):
     """ Add metadata to the given path
     """
@@ -1065,6 +1162,7 @@ class FileCatalogDB(DB):
       # This is a file
       return self.fmeta.setMetadata(path, metadataDict, credDict)
 
+  @changesMetaQueries
   def setMetadataBulk(self, pathMetadataDict, credDict):
     """  Add metadata for the given paths
     """
@@ -1079,6 +1177,7 @@ class FileCatalogDB(DB):
 
     return S_OK({'Successful': successful, 'Failed': failed})
 
+  @changesMetaQueries
   def removeMetadata(self, pathMetadataDict, credDict):
     """ Remove metadata for the given paths
     """
@@ -1146,6 +1245,16 @@ class FileCatalogDB(DB):
     counterDict.update(res['Value'])
     return S_OK(counterDict)
 
+  def getDirectoryCacheStats(self, credDict):
+    """ Get the size and the hit rate of the cache of the directories
+    """
+    res = self._checkAdminPermission(credDict)
+    if not res['OK']:
+      return res
+    if not res['Value']:
+      return S_ERROR("Permission denied")
+    return S_OK(self.dirCache.getStats())
+
   ########################################################################
   #
   #  Security based methods
@@ -1186,3 +1295,15 @@ class FileCatalogDB(DB):
         :returns: S_OK with list of tuples (lfn, checksum, size)
     """
     return self.fileManager.getSEDump(seName)
+
+  def iterSEDump(self, seName, lastKey=0, pageSize=10000):
+    """
+         Return the files at a given SE, together with checksum and size, page by page
+
+        :param seName: name of the StorageElement
+        :param int lastKey: key of the last replica already dumped, to resume a dump
+        :param int pageSize: maximum number of replicas of each page
+
+        :returns: generator of S_OK with list of tuples (key, lfn, checksum, size)
+    """
+    return self.fileManager.iterSEDump(seName, lastKey=lastKey, pageSize=pageSize)
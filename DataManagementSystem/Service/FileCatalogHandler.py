@@ -14,10 +14,13 @@ __RCSID__ = "$Id$"
 # imports
 import cStringIO
 import csv
+import gzip
 import os
-from types import IntType, LongType, DictType, StringTypes, BooleanType, ListType
+from types import IntType, LongType, DictType, StringTypes, BooleanType, ListType, TupleType
 # from DIRAC
 from DIRAC.Core.DISET.RequestHandler import RequestHandler, getServiceOption
+from DIRAC.Core.Utilities import DEncode
+from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
 
 from DIRAC import gLogger, S_OK, S_ERROR
 from DIRAC.FrameworkSystem.Client.MonitoringClient import gMonitor
@@ -26,6 +29,28 @@ from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
 # This is a global instance of the FileCatalogDB class
 gFileCatalogDB = None
 
+# Queries whose result can be streamed by chunks with transfer_toClient, and the types of their arguments
+STREAMING_QUERIES = {'getReplicas': ((ListType, DictType) + StringTypes, BooleanType),
+                     'listDirectory': ((ListType, DictType) + StringTypes, BooleanType),
+                     'getDirectoryReplicas': ((ListType, DictType) + StringTypes, BooleanType),
+                     'findFilesByMetadata': (DictType, StringTypes),
+                     'getSEDump': (StringTypes, (IntType, LongType))}
+# Maximum number of entries of a chunk of a streamed query
+MAX_CHUNK_SIZE = 10000
+
+
+def _dumpToCSV(rows, compress=False):
+  """ Format the rows of an SE dump as CSV with '|' separation, compressed as a gzip member
+      if requested: the members of successive pages concatenated make a valid gzip file
+  """
+  csvOutput = cStringIO.StringIO()
+  output = gzip.GzipFile(fileobj=csvOutput, mode='wb') if compress else csvOutput
+  writer = csv.writer(output, delimiter='|')
+  writer.writerows(rows)
+  if compress:
+    output.close()
+  return csvOutput.getvalue()
+
 
 def initializeFileCatalogHandler(serviceInfo):
   """ handler initialisation """
@@ -62,7 +87,11 @@ def initializeFileCatalogHandler(serviceInfo):
                    'ValidFileStatus': ['AprioriGood', 'Trash', 'Removing', 'Probing'],
                    'ValidReplicaStatus': ['AprioriGood', 'Trash', 'Removing', 'Probing'],
                    'VisibleFileStatus': ['AprioriGood'],
-                   'VisibleReplicaStatus': ['AprioriGood']}
+                   'VisibleReplicaStatus': ['AprioriGood'],
+                   'DirectoryCacheSize': 0,
+                   'DirectoryCacheLifetime': 300,
+                   'MetaQueryCacheSize': 1000,
+                   'MetaQueryCacheLifetime': 10}
   for configKey in sorted(defaultConfig.keys()):
     defaultValue = defaultConfig[configKey]
     configValue = getServiceOption(serviceInfo, configKey, defaultValue)
@@ -101,9 +130,24 @@ def initializeFileCatalogHandler(serviceInfo):
   gMonitor.registerActivity("ListDirectory", "Amount of listDirectory calls",
                             "FileCatalogHandler", "calls/min", gMonitor.OP_SUM)
 
+  # The usage of the directories is reconciled with their files a few directories at a time
+  reconcilePeriod = getServiceOption(serviceInfo, 'DirectoryUsageReconcilePeriod', 300)
+  reconcileSize = getServiceOption(serviceInfo, 'DirectoryUsageReconcileSize', 1000)
+  if res['OK'] and reconcilePeriod and reconcileSize:
+    gThreadScheduler.addPeriodicTask(reconcilePeriod, lambda: _reconcileDirectoryUsage(reconcileSize))
+
   return res
 
 
+def _reconcileDirectoryUsage(maxDirectories):
+  """ Periodic task reconciling the usage of the directories """
+  result = gFileCatalogDB.reconcileDirectoryUsage(maxDirectories=maxDirectories)
+  if not result['OK']:
+    gLogger.error("Failed to reconcile the directory usage", result['Message'])
+  elif result['Value']['Journaled'] or result['Value']['Corrected']:
+    gLogger.info("Reconciled the directory usage", str(result['Value']))
+
+
 class FileCatalogHandler(RequestHandler):
   """
   ..class:: FileCatalogHandler
@@ -437,6 +481,12 @@ class FileCatalogHandler(RequestHandler):
     """ Get the number of registered directories, files and replicas in various tables """
     return gFileCatalogDB.getCatalogCounters(self.getRemoteCredentials())
 
+  types_getDirectoryCacheStats = []
+
+  def export_getDirectoryCacheStats(self):
+    """ Get the size and the hit rate of the cache of the directories """
+    return gFileCatalogDB.getDirectoryCacheStats(self.getRemoteCredentials())
+
   types_rebuildDirectoryUsage = []
 
   @staticmethod
@@ -730,42 +780,96 @@ class FileCatalogHandler(RequestHandler):
     """
     return gFileCatalogDB.datasetManager.getDatasetFiles(datasets, self.getRemoteCredentials())
 
-  def getSEDump(self, seName):
-    """
-         Return all the files at a given SE, together with checksum and size
-
-        :param seName: name of the StorageElement
-
-        :returns: S_OK with list of tuples (lfn, checksum, size)
-    """
-    return gFileCatalogDB.getSEDump(seName)['Value']
-
-  def transfer_toClient(self, seName, token, fileHelper):
+  def transfer_toClient(self, fileId, token, fileHelper):
     """ This method used to transfer the SEDump to the client,
-        formated as CSV with '|' separation
+        formated as CSV with '|' separation, or the result of a streaming query
 
-        :param seName: name of the se to dump
+        :param fileId: name of the se to dump, or ( query name, arguments, chunk size )
+                       of a query of STREAMING_QUERIES
 
         :returns: the result of the FileHelper
 
 
     """
 
-    retVal = self.getSEDump(seName)
+    if isinstance(fileId, (ListType, TupleType)):
+      return self.__streamQuery(fileId, fileHelper)
 
+    # The SE dump is sent page by page as it is read from the database
     try:
-      csvOutput = cStringIO.StringIO()
-      writer = csv.writer(csvOutput, delimiter='|')
-      for lfn in retVal:
-        writer.writerow(lfn)
-
-      csvOutput.seek(0)
-
-      ret = fileHelper.DataSourceToNetwork(csvOutput)
-      return ret
+      for result in gFileCatalogDB.iterSEDump(fileId):
+        if not result['OK']:
+          fileHelper.sendError(result['Message'])
+          return result
+        result = fileHelper.sendData(_dumpToCSV(row[1:] for row in result['Value']))
+        if not result['OK']:
+          return result
+      return fileHelper.sendEOF()
 
     except Exception as e:
       gLogger.exception("Exception while sending seDump", repr(e))
       return S_ERROR("Exception while sendind seDump: %s" % repr(e))
+
+  def __streamQuery(self, query, fileHelper):
+    """ Send the result of a query to the client chunk by chunk, as soon as each chunk is got
+        from the database, so that the complete result is never held in memory.
+        Each chunk is sent DEncoded: a Successful/Failed dict, a list of LFNs
+        for findFilesByMetadata, or ( key of the last replica, number of replicas,
+        page as a gzip member of CSV ) for getSEDump, the dump being resumed after the
+        key given as argument
+
+        :param query: ( query name, arguments, chunk size )
+
+        :returns: the result of the FileHelper
+    """
+    if len(query) != 3 or query[0] not in STREAMING_QUERIES:
+      return S_ERROR("Unknown streaming query %s" % str(query)[:128])
+    queryName, args, chunkSize = query
+    argTypes = STREAMING_QUERIES[queryName]
+    if not isinstance(args, (ListType, TupleType)) or len(args) != len(argTypes):
+      return S_ERROR("Wrong number of arguments for %s" % queryName)
+    for arg, argType in zip(args, argTypes):
+      if not isinstance(arg, argType):
+        return S_ERROR("Wrong type of argument for %s: %s" % (queryName, type(arg)))
+    if not isinstance(chunkSize, (IntType, LongType)) or chunkSize < 1:
+      return S_ERROR("Invalid chunk size %s" % chunkSize)
+    chunkSize = min(chunkSize, MAX_CHUNK_SIZE)
+
+    credDict = self.getRemoteCredentials()
+    if queryName == 'getReplicas':
+      chunks = gFileCatalogDB.iterReplicas(args[0], args[1], credDict, chunkSize=chunkSize)
+    elif queryName == 'listDirectory':
+      gMonitor.addMark('ListDirectory', 1)
+      chunks = gFileCatalogDB.iterListDirectory(args[0], credDict, verbose=args[1], chunkSize=chunkSize)
+    elif queryName == 'getDirectoryReplicas':
+      chunks = gFileCatalogDB.iterDirectoryReplicas(args[0], args[1], credDict, chunkSize=chunkSize)
+    elif queryName == 'findFilesByMetadata':
+      chunks = gFileCatalogDB.fmeta.iterFindFilesByMetadata(args[0], args[1], credDict, chunkSize=chunkSize)
+    else:
+      chunks = self.__compressedSEDump(args[0], args[1], chunkSize)
+
+    try:
+      for result in chunks:
+        if not result['OK']:
+          fileHelper.sendError(result['Message'])
+          return result
+        result = fileHelper.sendData(DEncode.encode(result['Value']))
+        if not result['OK']:
+          return result
+        if result.get('AbortTransfer'):
+          return S_OK()
+      return fileHelper.sendEOF()
     finally:
-      csvOutput.close()
+      # Releases the database cursors if the client went away
+      chunks.close()
+
+  @staticmethod
+  def __compressedSEDump(seName, lastKey, pageSize):
+    """ Generator of the pages of the SE dump as S_OK( ( key of the last replica, number of replicas,
+        gzip member of CSV ) )
+    """
+    for result in gFileCatalogDB.iterSEDump(seName, lastKey=lastKey, pageSize=pageSize):
+      if result['OK']:
+        rows = result['Value']
+        result = S_OK((rows[-1][0], len(rows), _dumpToCSV((row[1:] for row in rows), compress=True)))
+      yield result
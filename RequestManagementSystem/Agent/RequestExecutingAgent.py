@@ -342,8 +342,6 @@ class RequestExecutingAgent( AgentModule ):
               gMonitor.addMark( "Processed", 1 )
               # # update request counter
               taskCounter += 1
-              # # task created, a little time kick to proceed
-              time.sleep( 0.1 )
               break
 
     self.log.info( 'Flushing callbacks (%d requests still in cache)' % len( self.__requestCache ) )
@@ -41,6 +41,9 @@ class ElementInspectorAgent(AgentModule):
   # Max number of worker threads by default
   __maxNumberOfThreads = 15
 
+  # Number of elements whose policies are evaluated together by default, see PEP.enforceBulk
+  __elementsPerBatch = 20
+
   # Inspection freqs, defaults, the lower, the higher priority to be checked.
   # Error state usually means there is a glitch somewhere, so it has the highest
   # priority.
@@ -61,6 +64,7 @@ class ElementInspectorAgent(AgentModule):
     self.elementType = 'Resource'
     self.elementsToBeChecked = None
     self.threadPool = None
+    self.elementsPerBatch = self.__elementsPerBatch
     self.rsClient = None
     self.clients = {}
 
@@ -72,6 +76,7 @@ class ElementInspectorAgent(AgentModule):
     self.threadPool = ThreadPool(maxNumberOfThreads, maxNumberOfThreads)
 
     self.elementType = self.am_getOption('elementType', self.elementType)
+    self.elementsPerBatch = max(1, self.am_getOption('elementsPerBatch', self.elementsPerBatch))
 
     res = ObjectLoader().loadObject('DIRAC.ResourceStatusSystem.Client.ResourceStatusClient',
                                     'ResourceStatusClient')
@@ -122,6 +127,8 @@ class ElementInspectorAgent(AgentModule):
     # to be processed ( actually, it takes something like 1 sec per element ):
     # numberOfThreads = elements * 10(s/element) / pollingTime
     numberOfThreads = int(math.ceil(queueSize * 10. / pollingTime))
+    # but there is no point having more threads than batches of elements
+    numberOfThreads = min(numberOfThreads, int(math.ceil(queueSize / float(self.elementsPerBatch))))
 
     self.log.info('Needed %d threads to process %d elements' % (numberOfThreads, queueSize))
 
@@ -194,43 +201,57 @@ class ElementInspectorAgent(AgentModule):
   def _execute(self):
     """
       Method run by the thread pool. It enters a loop until there are no elements
-      on the queue. On each iteration, it evaluates the policies for such element
-      and enforces the necessary actions. If there are no more elements in the
-      queue, the loop is finished.
+      on the queue. On each iteration, it takes up to elementsPerBatch elements,
+      evaluates their policies and enforces the necessary actions all together.
+      If there are no more elements in the queue, the loop is finished.
     """
 
     pep = PEP(clients=self.clients)
 
     while True:
 
-      try:
-        element = self.elementsToBeChecked.get_nowait()
-      except Queue.Empty:
+      elements = []
+      while len(elements) < self.elementsPerBatch:
+        try:
+          elements.append(self.elementsToBeChecked.get_nowait())
+        except Queue.Empty:
+          break
+      if not elements:
         return S_OK()
 
-      self.log.verbose('%s ( %s / %s ) being processed' % (element['name'],
-                                                           element['status'],
-                                                           element['statusType']))
+      for element in elements:
+        self.log.verbose('%s ( %s / %s ) being processed' % (element['name'],
+                                                             element['status'],
+                                                             element['statusType']))
+
+      resEnforceBulk = pep.enforceBulk(elements)
+      if not resEnforceBulk['OK']:
+        resEnforceBulk = S_OK([resEnforceBulk] * len(elements))
 
-      resEnforce = pep.enforce(element)
-      if not resEnforce['OK']:
-        self.log.error('Failed policy enforcement', resEnforce['Message'])
+      for element, resEnforce in zip(elements, resEnforceBulk['Value']):
+        self._logEnforcement(element, resEnforce)
+        # Used together with join !
         self.elementsToBeChecked.task_done()
-        continue
 
-      resEnforce = resEnforce['Value']
+  def _logEnforcement(self, element, resEnforce):
+    """
+      Logs the result of the policy enforcement for an element
+    """
+
+    if not resEnforce['OK']:
+      self.log.error('Failed policy enforcement', resEnforce['Message'])
+      return
 
-      oldStatus = resEnforce['decisionParams']['status']
-      statusType = resEnforce['decisionParams']['statusType']
-      newStatus = resEnforce['policyCombinedResult']['Status']
-      reason = resEnforce['policyCombinedResult']['Reason']
+    resEnforce = resEnforce['Value']
 
-      if oldStatus != newStatus:
-        self.log.info('%s (%s) is now %s ( %s ), before %s' % (element['name'],
-                                                               statusType,
-                                                               newStatus,
-                                                               reason,
-                                                               oldStatus))
+    oldStatus = resEnforce['decisionParams']['status']
+    statusType = resEnforce['decisionParams']['statusType']
+    newStatus = resEnforce['policyCombinedResult']['Status']
+    reason = resEnforce['policyCombinedResult']['Reason']
 
-      # Used together with join !
-      self.elementsToBeChecked.task_done()
+    if oldStatus != newStatus:
+      self.log.info('%s (%s) is now %s ( %s ), before %s' % (element['name'],
+                                                             statusType,
+                                                             newStatus,
+                                                             reason,
+                                                             oldStatus))
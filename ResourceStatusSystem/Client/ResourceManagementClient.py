@@ -533,6 +533,21 @@ class ResourceManagementClient(object):
 
     return RPCClient("ResourceStatus/ResourceManagement").addOrModify('PolicyResult', self._prepare(locals()))
 
+  def addOrModifyPolicyResults(self, policyResults):
+    '''
+    addOrModifyPolicyResult of many policy results in a single call.
+
+    :param list policyResults: keyword arguments of addOrModifyPolicyResult for each policy result, e.g.
+      { 'element' : 'Resource', 'name' : 'ce.domain.ch', 'policyName' : 'AlwaysActive', ... }
+    :return: S_OK( { 'Failed' : { index in policyResults : error message } } ) || S_ERROR()
+    '''
+
+    paramsList = []
+    for policyResult in policyResults:
+      paramsList.append(dict((uppercase_first_letter(key), value)
+                             for key, value in policyResult.iteritems() if value))
+    return RPCClient("ResourceStatus/ResourceManagement").addOrModifyMany('PolicyResult', paramsList)
+
   # SpaceTokenOccupancyCache Methods ...........................................
 
   def selectSpaceTokenOccupancyCache(self, endpoint=None, token=None,
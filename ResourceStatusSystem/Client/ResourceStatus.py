@@ -6,8 +6,10 @@
 
 from datetime import datetime, timedelta
 import math
+import os
 from time import sleep
 
+import DIRAC
 from DIRAC import gConfig, gLogger, S_OK, S_ERROR
 from DIRAC.Core.Utilities.DIRACSingleton import DIRACSingleton
 from DIRAC.ConfigurationSystem.Client.CSAPI import CSAPI
@@ -43,7 +45,8 @@ class ResourceStatus(object):
     cacheLifeTime = int(self.rssConfig.getConfigCache())
 
     # RSSCache only affects the calls directed to RSS, if using the CS it is not used.
-    self.rssCache = RSSCache(cacheLifeTime, self.__updateRssCache)
+    self.rssCache = RSSCache(cacheLifeTime, self.__updateRssCache, self.__getRssCacheChanges,
+                             getSharedCacheFile('ResourceStatus'))
 
   def getElementStatus(self, elementName, elementType, statusType=None, default=None):
     """
@@ -157,6 +160,18 @@ class ResourceStatus(object):
       return rawCache
     return S_OK(getCacheDictFromRawData(rawCache['Value']))
 
+  def __getRssCacheChanges(self, sinceRevision):
+    """ Method used to update the rssCache with the changes of the statuses only.
+    """
+
+    changes = self.rssClient.getStatusChanges('Resource', sinceRevision)
+    if not changes['OK']:
+      return changes
+    changes = changes['Value']
+    changes['Changes'] = [((name, elementType, statusType), status or None)
+                          for name, statusType, elementType, status in changes['Changes']]
+    return S_OK(changes)
+
 ################################################################################
 
   def __getRSSElementStatus(self, elementName, elementType, statusType):
@@ -248,7 +263,7 @@ class ResourceStatus(object):
                                                     tokenOwner=tokenOwner, tokenExpiration=expiration)
 
       if res['OK']:
-        self.rssCache.refreshCache()
+        self.rssCache.refreshCache(useSharedCache=False)
 
       if not res['OK']:
         _msg = 'Error updating Element (%s,%s,%s)' % (elementName, statusType, status)
@@ -329,6 +344,21 @@ class ResourceStatus(object):
 ################################################################################
 
 
+def getSharedCacheFile(cacheName):
+  """
+  Gets the file where the processes of the host share the cache of the given name,
+  in the SharedCache directory of the RSS configuration, relative to the DIRAC
+  root directory if it is not absolute.
+
+  :return: path of the file, None if the caches are not shared
+  """
+
+  sharedCacheDir = RssConfiguration().getConfigSharedCache()
+  if not sharedCacheDir:
+    return None
+  return os.path.join(DIRAC.rootPath, sharedCacheDir, '%s.cache' % cacheName)
+
+
 def getDictFromList(fromList):
   """
   Auxiliary method that given a list returns a dictionary of dictionaries:
@@ -221,6 +221,28 @@ class ResourceStatusClient(object):
     '''
     return RPCClient("ResourceStatus/ResourceStatus").addOrModify(element + tableType, self._prepare(locals()))
 
+  def addOrModifyStatusElements(self, element, tableType, statusElements):
+    '''
+    addOrModifyStatusElement of many rows of <element><tableType> in a single call.
+
+    :Parameters:
+      **element** - `string`
+        it has to be a valid element ( ValidElement ), any of the defaults: `Site` \
+        | `Resource` | `Node`
+      **tableType** - `string`
+        it has to be a valid tableType [ 'Status', 'Log', 'History' ]
+      **statusElements** - `list( dict )`
+        keyword arguments of addOrModifyStatusElement for each row, e.g. \
+        { 'name' : 'ce.domain.ch', 'statusType' : 'all', 'status' : 'Active', ... }
+
+    :return: S_OK( { 'Failed' : { index in statusElements : error message } } ) || S_ERROR()
+    '''
+    paramsList = []
+    for statusElement in statusElements:
+      paramsList.append(dict((uppercase_first_letter(key), value)
+                             for key, value in statusElement.iteritems() if value))
+    return RPCClient("ResourceStatus/ResourceStatus").addOrModifyMany(element + tableType, paramsList)
+
   def modifyStatusElement(self, element, tableType, name=None, statusType=None,
                           status=None, elementType=None, reason=None,
                           dateEffective=None, lastCheckTime=None, tokenOwner=None,
@@ -299,6 +321,23 @@ class ResourceStatusClient(object):
     '''
     return RPCClient("ResourceStatus/ResourceStatus").addIfNotThere(element + tableType, self._prepare(locals()))
 
+  def getStatusChanges(self, element, sinceRevision):
+    '''
+    Gets the changes of the statuses in <element>Status since the given revision.
+
+    :Parameters:
+      **element** - `string`
+        it has to be a valid element ( ValidElement ), any of the defaults: `Site` \
+        | `Resource` | `Node`
+      **sinceRevision** - `int`
+        revision of the statuses already known, -1 to get the latest revision only
+
+    :return: S_OK( { 'Revision' : latest revision,
+                     'Complete' : False if the changes are not all known anymore,
+                     'Changes' : [ [ Name, StatusType, ElementType, Status ], ... ] } ) || S_ERROR()
+    '''
+    return RPCClient("ResourceStatus/ResourceStatus").getStatusChanges(element + 'Status', sinceRevision)
+
   ##############################################################################
   # Protected methods - Use carefully !!
 
@@ -18,7 +18,7 @@ from DIRAC.Core.Utilities import DErrno
 from DIRAC.Core.Security.ProxyInfo import getProxyInfo
 from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
 from DIRAC.ResourceStatusSystem.Client.ResourceStatusClient import ResourceStatusClient
-from DIRAC.ResourceStatusSystem.Client.ResourceStatus import ResourceStatus
+from DIRAC.ResourceStatusSystem.Client.ResourceStatus import ResourceStatus, getSharedCacheFile
 from DIRAC.ResourceStatusSystem.Utilities.RSSCacheNoThread import RSSCache
 from DIRAC.ResourceStatusSystem.Utilities.RssConfiguration import RssConfiguration
 
@@ -51,7 +51,8 @@ class SiteStatus(object):
     cacheLifeTime = int(self.rssConfig.getConfigCache())
 
     # RSSCache only affects the calls directed to RSS, if using the CS it is not used.
-    self.rssCache = RSSCache(cacheLifeTime, self.__updateRssCache)
+    self.rssCache = RSSCache(cacheLifeTime, self.__updateRssCache, self.__getRssCacheChanges,
+                             getSharedCacheFile('SiteStatus'))
 
   def __updateRssCache(self):
     """ Method used to update the rssCache.
@@ -73,6 +74,17 @@ class SiteStatus(object):
       return rawCache
     return S_OK(getCacheDictFromRawData(rawCache['Value']))
 
+  def __getRssCacheChanges(self, sinceRevision):
+    """ Method used to update the rssCache with the changes of the statuses only.
+    """
+
+    changes = self.rsClient.getStatusChanges('Site', sinceRevision)
+    if not changes['OK']:
+      return changes
+    changes = changes['Value']
+    changes['Changes'] = [(name, status or None) for name, _statusType, _elementType, status in changes['Changes']]
+    return S_OK(changes)
+
   def getSiteStatuses(self, siteNames=None):
     """
     Method that queries the database for status of the sites in a given list.
@@ -266,7 +278,7 @@ class SiteStatus(object):
                                                    tokenExpiration=tokenExpiration, reason=comment,
                                                    tokenOwner=tokenOwner)
         if result['OK']:
-          self.rssCache.refreshCache()
+          self.rssCache.refreshCache(useSharedCache=False)
         else:
           _msg = 'Error updating status of site %s to %s' % (site, status)
           gLogger.warn('RSS: %s' % _msg)
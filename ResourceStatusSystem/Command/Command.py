@@ -25,6 +25,9 @@ class Command(object):
     self.args.update(_args)
     self.log = gLogger.getSubLogger(self.__class__.__name__)
 
+    # Result of doCache when it was got together with the ones of other commands, see doBulkCache
+    self.bulkCacheResult = None
+
   def doNew(self, masterParams=None):
     """ To be extended/replaced by real commands
     """
@@ -35,6 +38,16 @@ class Command(object):
     """
     return S_OK(self.args)
 
+  def doBulkCache(self, commands):
+    """ doCache of many commands of this class, typically the same command for many elements.
+        Real commands may extend/replace it to get the cached values of all of them in a
+        single query. The clients of this command are used.
+
+        :param list commands: commands of the same class as this one
+        :return: S_OK( list with the result of doCache for each command ) / S_ERROR
+    """
+    return S_OK([command.doCache() for command in commands])
+
   def doMaster(self):
     """ To be extended/replaced by real commands
     """
@@ -45,8 +58,8 @@ class Command(object):
 
         What is done here is the following:
         if self.masterMode is set to True, then the "doMaster()" method is called.
-        if not, then the doCache() method is called, and if this returns an object this is returned,
-        and otherwise the "doNew" method is called.
+        if not, then the doCache() method is called (unless its result was already got by doBulkCache),
+        and if this returns an object this is returned, and otherwise the "doNew" method is called.
     """
 
     if self.masterMode:
@@ -54,7 +67,9 @@ class Command(object):
       return self.returnSObj(self.doMaster())
 
     self.log.verbose('doCache')
-    result = self.doCache()
+    result = self.bulkCacheResult
+    if result is None:
+      result = self.doCache()
     if not result['OK']:
       return self.returnERROR(result)
     # We may be interested on running the commands only from the cache,
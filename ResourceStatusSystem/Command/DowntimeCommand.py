@@ -274,6 +274,50 @@ class DowntimeCommand(Command):
 
     uniformResult = [dict(zip(result['Columns'], res)) for res in result['Value']]
 
+    return S_OK(self._selectDowntime(uniformResult, hours))
+
+  def doBulkCache(self, commands):
+    """
+      doCache of many DowntimeCommands, reading the cache table once per element
+      and service type instead of once per command.
+    """
+
+    paramsList = [command._prepareCommand() for command in commands]  # pylint: disable=protected-access
+
+    namesToSelect = {}
+    for params in paramsList:
+      if params['OK']:
+        element, elementName, _hours, gOCDBServiceType = params['Value']
+        namesToSelect.setdefault((element, gOCDBServiceType), set()).add(elementName)
+
+    downtimes = {}
+    for (element, gOCDBServiceType), elementNames in namesToSelect.iteritems():
+      result = self.rmClient.selectDowntimeCache(element=element, name=list(elementNames),
+                                                 gOCDBServiceType=gOCDBServiceType)
+      if not result['OK']:
+        return result
+      for res in result['Value']:
+        dt = dict(zip(result['Columns'], res))
+        downtimes.setdefault((element, gOCDBServiceType, dt['Name']), []).append(dt)
+
+    results = []
+    for params in paramsList:
+      if not params['OK']:
+        results.append(params)
+        continue
+      element, elementName, hours, gOCDBServiceType = params['Value']
+      uniformResult = list(downtimes.get((element, gOCDBServiceType, elementName), []))
+      results.append(S_OK(self._selectDowntime(uniformResult, hours)))
+
+    return S_OK(results)
+
+  @staticmethod
+  def _selectDowntime(uniformResult, hours):
+    """
+      Returns the downtime, among the cached ones of an element, that applies now or
+      in <hours>, None if there is none.
+    """
+
     # 'targetDate' can be either now or some 'hours' later in the future
     targetDate = datetime.utcnow()
 
@@ -325,7 +369,7 @@ class DowntimeCommand(Command):
       else:
         result = dtBottom
 
-    return S_OK(result)
+    return result
 
   def doMaster(self):
     """ Master method, which looks little bit spaghetti code, sorry !
@@ -132,6 +132,31 @@ class JobCommand(Command):
 
     return result
 
+  def doBulkCache(self, commands):
+    """
+      doCache of many JobCommands, reading the cache table once for all their sites.
+    """
+
+    paramsList = [command._prepareCommand() for command in commands]  # pylint: disable=protected-access
+    names = list(set(params['Value'] for params in paramsList if params['OK']))
+
+    jobsBySite = {}
+    if names:
+      result = self.rmClient.selectJobCache(names)
+      if not result['OK']:
+        return result
+      for res in result['Value']:
+        jobDict = dict(zip(result['Columns'], res))
+        jobsBySite.setdefault(jobDict['Site'], []).append(jobDict)
+
+    results = []
+    for params in paramsList:
+      if params['OK']:
+        params = S_OK(jobsBySite.get(params['Value'], []))
+      results.append(params)
+
+    return S_OK(results)
+
   def doMaster(self):
     """
       Master method.
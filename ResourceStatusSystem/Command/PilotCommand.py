@@ -147,6 +147,45 @@ class PilotCommand(Command):
 
     return result
 
+  def doBulkCache(self, commands):
+    """
+      doCache of many PilotCommands, reading the cache table once for all their sites
+      and once for all their CEs.
+    """
+
+    paramsList = [command._prepareCommand() for command in commands]  # pylint: disable=protected-access
+
+    names = {'Site': set(), 'Resource': set()}
+    for params in paramsList:
+      if params['OK']:
+        element, name = params['Value']
+        names[element].add(name)
+
+    pilots = {}
+    if names['Site']:
+      # WMS returns Site entries with CE = 'Multiple'
+      result = self.rmClient.selectPilotCache(list(names['Site']), 'Multiple')
+      if not result['OK']:
+        return result
+      for res in result['Value']:
+        pilotDict = dict(zip(result['Columns'], res))
+        pilots.setdefault(('Site', pilotDict['Site']), []).append(pilotDict)
+    if names['Resource']:
+      result = self.rmClient.selectPilotCache(None, list(names['Resource']))
+      if not result['OK']:
+        return result
+      for res in result['Value']:
+        pilotDict = dict(zip(result['Columns'], res))
+        pilots.setdefault(('Resource', pilotDict['CE']), []).append(pilotDict)
+
+    results = []
+    for params in paramsList:
+      if params['OK']:
+        params = S_OK(pilots.get(params['Value'], []))
+      results.append(params)
+
+    return S_OK(results)
+
   def doMaster(self):
 
     siteNames = getSites()
@@ -21,7 +21,7 @@ __RCSID__ = "$Id$"
 
 import datetime
 
-from sqlalchemy import desc
+from sqlalchemy import desc, func, or_
 from sqlalchemy.orm import sessionmaker, class_mapper
 from sqlalchemy.orm.query import Query
 from sqlalchemy.engine.reflection import Inspector
@@ -199,6 +199,47 @@ class NodeHistory(ElementStatusBaseWithID, rssBase):
   __tablename__ = 'NodeHistory'
 
 
+### table of the modifications of the statuses
+
+class StatusChanges(rssBase):
+  """ StatusChanges table
+
+      One line per status set or deleted in the tables of TABLESLIST. The ID of a line is
+      the revision of the statuses after the modification, the clients use it to update
+      their caches with the modifications only.
+  """
+
+  __tablename__ = 'StatusChanges'
+  __table_args__ = {'mysql_engine': 'InnoDB',
+                    'mysql_charset': 'utf8'}
+
+  id = Column( 'ID', BigInteger, nullable = False, autoincrement= True, primary_key = True )
+  tablename = Column( 'TableName', String( 32 ), nullable = False )
+  name = Column( 'Name', String( 64 ), nullable = False )
+  statustype = Column( 'StatusType', String( 128 ), nullable = False, server_default = 'all' )
+  elementtype = Column( 'ElementType', String( 32 ), nullable = False, server_default = '' )
+  # empty when the status was deleted
+  status = Column( 'Status', String( 8 ), nullable = False, server_default = '' )
+  dateeffective = Column( 'DateEffective', DateTime, nullable = False )
+
+  def fromStatusRow( self, table, statusRow, deleted = False ):
+    """
+    Fill the fields from the row of a status table
+
+    :param str table: name of the status table
+    :param statusRow: row of the status table
+    :type statusRow: ElementStatusBase
+    :param bool deleted: the status is deleted
+    """
+
+    self.tablename = table
+    self.name = statusRow.name
+    self.statustype = statusRow.statustype or 'all'
+    self.elementtype = statusRow.elementtype or ''
+    self.status = '' if deleted else statusRow.status
+    self.dateeffective = datetime.datetime.utcnow().replace(microsecond = 0)
+
+
 
 
 ### Interaction with the DB
@@ -297,6 +338,21 @@ class ResourceStatusDB( object ):
       else:
         gLogger.debug("Table %s already exists" % table)
 
+    if StatusChanges.__tablename__ not in tablesInDB:
+      StatusChanges.__table__.create( self.engine ) #pylint: disable=no-member
+
+  def __statusChange( self, table, statusRow, deleted = False ):
+    """
+    :return: StatusChanges row to add with the modification of a status, None if the table
+             is not a status table
+    """
+
+    if table not in self.tablesList:
+      return None
+    change = StatusChanges()
+    change.fromStatusRow( table, statusRow, deleted )
+    return change
+
 
 
  # SQL Methods ###############################################################
@@ -335,6 +391,10 @@ class ResourceStatusDB( object ):
 
     try:
       session.add(tableRow_o)
+      # the change is committed with the status, so that its revision is never missed
+      change = self.__statusChange(table, tableRow_o)
+      if change:
+        session.add(change)
       session.commit()
       return S_OK()
     except exc.IntegrityError as err:
@@ -498,6 +558,10 @@ class ResourceStatusDB( object ):
       if limit:
         deleteQuery = deleteQuery.limit(int(limit))
 
+      if table in self.tablesList:
+        for statusRow in deleteQuery.all():
+          session.add(self.__statusChange(table, statusRow, deleted = True))
+
       res = deleteQuery.delete(synchronize_session=False) #FIXME: unsure about it
       session.commit()
       return S_OK(res)
@@ -580,6 +644,10 @@ class ResourceStatusDB( object ):
           if isinstance(columnValue, datetime.datetime):
             columnValue = columnValue.replace(microsecond = 0)
           setattr(res, columnName.lower(), columnValue)
+      if changeDE:
+        change = self.__statusChange(table, res)
+        if change:
+          session.add(change)
       session.commit()
 
       # and since we modified, we now insert a new line in the log table
@@ -638,5 +706,87 @@ class ResourceStatusDB( object ):
     finally:
       session.close()
 
+  ## Status changes ############################################################
+
+  def getStatusChanges( self, table, sinceRevision, overlap = 60 ):
+    '''
+    Gets the modifications of the statuses of a table made after a revision.
+
+    The IDs are given when the modifications are made, but a modification may be
+    committed after a more recent one. So the modifications of the last <overlap>
+    seconds are always returned: applying them in the order of their revision
+    gives the same statuses again.
+
+    :param table: status table, e.g. ResourceStatus
+    :type table: str
+    :param sinceRevision: revision the caller is up to date with, -1 to get the latest revision only
+    :type sinceRevision: int
+    :param overlap: seconds of modifications always returned
+    :type overlap: int
+
+    :return: S_OK( { 'Revision' : latest revision,
+                     'Complete' : whether all the modifications since sinceRevision are known,
+                     'Changes' : [ [ Name, StatusType, ElementType, Status ], ... ] } )
+             When the modifications are not complete, the caller must read the whole table.
+             An empty Status means that the status was deleted.
+    '''
+
+    session = self.sessionMaker_o()
+    try:
+      revision = session.query(func.max(StatusChanges.id)).scalar() or 0
+      oldestRevision = session.query(func.min(StatusChanges.id)).scalar()
+      # the lines older than sinceRevision are purged first, see purgeStatusChanges
+      complete = 0 <= sinceRevision <= revision and \
+          (oldestRevision is None or oldestRevision <= sinceRevision + 1)
+
+      changes = []
+      if complete:
+        since = datetime.datetime.utcnow().replace(microsecond = 0) - datetime.timedelta(seconds = overlap)
+        select = Query(StatusChanges, session = session)
+        select = select.filter(StatusChanges.tablename == table)
+        select = select.filter(or_(StatusChanges.id > sinceRevision, StatusChanges.dateeffective >= since))
+        select = select.order_by(StatusChanges.id)
+        changes = [[change.name, change.statustype, change.elementtype, change.status] for change in select.all()]
+
+      return S_OK({'Revision': revision, 'Complete': complete, 'Changes': changes})
+
+    except exc.SQLAlchemyError as e:
+      session.rollback()
+      self.log.exception( "getStatusChanges: unexpected exception", lException = e )
+      return S_ERROR( "getStatusChanges: unexpected exception %s" % e )
+    finally:
+      session.close()
+
+  def purgeStatusChanges( self, olderThan = 24 ):
+    '''
+    Deletes the modifications of the statuses older than <olderThan> hours. The latest
+    one is kept so that the revision never goes back.
+
+    :param olderThan: hours
+    :type olderThan: int
+
+    :return: S_OK( number of lines deleted ) || S_ERROR()
+    '''
+
+    session = self.sessionMaker_o()
+    try:
+      revision = session.query(func.max(StatusChanges.id)).scalar()
+      if not revision:
+        return S_OK(0)
+      before = datetime.datetime.utcnow().replace(microsecond = 0) - datetime.timedelta(hours = olderThan)
+      deleteQuery = Query(StatusChanges, session = session)
+      deleteQuery = deleteQuery.filter(StatusChanges.dateeffective < before)
+      deleteQuery = deleteQuery.filter(StatusChanges.id < revision)
+      res = deleteQuery.delete(synchronize_session=False)
+      session.commit()
+      return S_OK(res)
+
+    except exc.SQLAlchemyError as e:
+      session.rollback()
+      self.log.exception( "purgeStatusChanges: unexpected exception", lException = e )
+      return S_ERROR( "purgeStatusChanges: unexpected exception %s" % e )
+    finally:
+      session.close()
+
 ################################################################################
 #EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
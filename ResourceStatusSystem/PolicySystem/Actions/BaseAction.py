@@ -50,5 +50,17 @@ class BaseAction(object):
 
     self.log.warn('%s: you may want to overwrite this method' % self.actionName)
 
+  def runBulk(self, actions):
+    '''
+      Runs many actions of this class, typically the same action for many elements.
+      Real actions may overwrite it to group their writes in a single call. The clients
+      of this action are used.
+
+      :param list actions: actions of the same class as this one
+      :return: list with the result of run for each action
+    '''
+
+    return [action.run() for action in actions]
+
 ################################################################################
 # EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
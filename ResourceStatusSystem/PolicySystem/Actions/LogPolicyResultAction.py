@@ -33,6 +33,55 @@ class LogPolicyResultAction( BaseAction ):
       database.
     '''
 
+    policyResults = self._getPolicyResults()
+    if not policyResults[ 'OK' ]:
+      return policyResults
+
+    for policyResult in policyResults[ 'Value' ]:
+      polUpdateRes = self.rmClient.addOrModifyPolicyResult( **policyResult )
+      if not polUpdateRes[ 'OK' ]:
+        return polUpdateRes
+
+    return S_OK()
+
+  def runBulk( self, actions ):
+    '''
+      Same as run for many LogPolicyResultActions, with a single addOrModify call
+      for all their policy results.
+    '''
+
+    results = [ S_OK() ] * len( actions )
+    policyResults = []
+    # index of the action of each policy result
+    actionIndexes = []
+    for index, action in enumerate( actions ):
+      actionPolicyResults = action._getPolicyResults() #pylint: disable=protected-access
+      if not actionPolicyResults[ 'OK' ]:
+        results[ index ] = actionPolicyResults
+        continue
+      policyResults.extend( actionPolicyResults[ 'Value' ] )
+      actionIndexes.extend( [ index ] * len( actionPolicyResults[ 'Value' ] ) )
+
+    if not policyResults:
+      return results
+
+    polUpdateRes = self.rmClient.addOrModifyPolicyResults( policyResults )
+    if not polUpdateRes[ 'OK' ]:
+      for index in set( actionIndexes ):
+        results[ index ] = polUpdateRes
+      return results
+
+    for position, message in polUpdateRes[ 'Value' ][ 'Failed' ].iteritems():
+      results[ actionIndexes[ position ] ] = S_ERROR( message )
+
+    return results
+
+  def _getPolicyResults( self ):
+    '''
+      Minor security checks of the parameters, returns the arguments of
+      addOrModifyPolicyResult for each single policy result.
+    '''
+
     element = self.decisionParams[ 'element' ]
     if element is None:
       return S_ERROR( 'element should not be None' )
@@ -45,6 +94,7 @@ class LogPolicyResultAction( BaseAction ):
     if statusType is None:
       return S_ERROR( 'statusType should not be None' )
 
+    policyResults = []
     for singlePolicyResult in self.singlePolicyResults:
 
       status = singlePolicyResult[ 'Status' ]
@@ -62,17 +112,14 @@ class LogPolicyResultAction( BaseAction ):
       #Truncate reason to fit in database column
       reason = ( reason[ :508 ] + '..') if len( reason ) > 508 else reason
 
-      polUpdateRes = self.rmClient.addOrModifyPolicyResult( element = element,
-                                                            name = name,
-                                                            policyName = policyName,
-                                                            statusType = statusType,
-                                                            status = status,
-                                                            reason = reason )
+      policyResults.append( { 'element' : element,
+                              'name' : name,
+                              'policyName' : policyName,
+                              'statusType' : statusType,
+                              'status' : status,
+                              'reason' : reason } )
 
-      if not polUpdateRes[ 'OK' ]:
-        return polUpdateRes
-
-    return S_OK()
+    return S_OK( policyResults )
 
 ################################################################################
 #EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
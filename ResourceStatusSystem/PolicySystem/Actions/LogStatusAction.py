@@ -3,7 +3,7 @@
 
 '''
 
-from DIRAC                                                      import S_ERROR
+from DIRAC                                                      import S_OK, S_ERROR
 from DIRAC.ResourceStatusSystem.Client.ResourceStatusClient     import ResourceStatusClient
 from DIRAC.ResourceStatusSystem.PolicySystem.Actions.BaseAction import BaseAction
 
@@ -31,7 +31,50 @@ class LogStatusAction( BaseAction ):
       Checks it has the parameters it needs and tries to addOrModify in the
       database.
     '''
-    # Minor security checks
+
+    statusElement = self._getStatusElement()
+    if not statusElement[ 'OK' ]:
+      return statusElement
+    element, statusElement = statusElement[ 'Value' ]
+
+    resLogUpdate = self.rsClient.addOrModifyStatusElement( element, 'Status', **statusElement )
+
+    return resLogUpdate
+
+  def runBulk( self, actions ):
+    '''
+      Same as run for many LogStatusActions, with one addOrModify call per element
+      table for all of them.
+    '''
+
+    results = [ None ] * len( actions )
+    statusElements = {}
+    for index, action in enumerate( actions ):
+      statusElement = action._getStatusElement() #pylint: disable=protected-access
+      if not statusElement[ 'OK' ]:
+        results[ index ] = statusElement
+        continue
+      element, statusElement = statusElement[ 'Value' ]
+      statusElements.setdefault( element, [] ).append( ( index, statusElement ) )
+
+    for element, indexedElements in statusElements.iteritems():
+      rows = [ statusElement for _index, statusElement in indexedElements ]
+      resLogUpdate = self.rsClient.addOrModifyStatusElements( element, 'Status', rows )
+      for position, ( index, _statusElement ) in enumerate( indexedElements ):
+        if not resLogUpdate[ 'OK' ]:
+          results[ index ] = resLogUpdate
+        elif position in resLogUpdate[ 'Value' ][ 'Failed' ]:
+          results[ index ] = S_ERROR( resLogUpdate[ 'Value' ][ 'Failed' ][ position ] )
+        else:
+          results[ index ] = S_OK()
+
+    return results
+
+  def _getStatusElement( self ):
+    '''
+      Minor security checks of the parameters, returns the element and the arguments
+      of addOrModifyStatusElement.
+    '''
 
     element = self.decisionParams[ 'element' ]
     if element is None:
@@ -60,13 +103,9 @@ class LogStatusAction( BaseAction ):
     #Truncate reason to fit in database column
     reason = ( reason[ :508 ] + '..') if len( reason ) > 508 else reason
 
-    resLogUpdate = self.rsClient.addOrModifyStatusElement( element, 'Status',
-                                                           name = name, statusType = statusType,
-                                                           status = status, elementType = elementType,
-                                                           reason = reason
-                                                           )
-
-    return resLogUpdate
+    return S_OK( ( element, { 'name' : name, 'statusType' : statusType,
+                              'status' : status, 'elementType' : elementType,
+                              'reason' : reason } ) )
 
 ################################################################################
 #EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
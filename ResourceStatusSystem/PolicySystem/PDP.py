@@ -141,8 +141,105 @@ class PDP( object ):
     policiesThatApply = policiesThatApply['Value']
     self.log.verbose( "Policies that apply: %s" % ', '.join( [po['name'] for po in policiesThatApply] ) )
 
+    return self._decide( policiesThatApply )
+
+  def takeDecisions( self, decisionParamsList ):
+    """ takeDecision for many elements at once. The policies are evaluated as in
+    takeDecision, but the commands of all the elements get their cached values together
+    ( see Command.doBulkCache ), with one query per kind of command instead of one per
+    policy and element. The PDP is left set up with the last decisionParams.
+
+    examples:
+      >>> pdp.takeDecisions( [ { 'element' : 'Resource', 'name' : 'ce1.domain.ch', ... },
+                               { 'element' : 'Resource', 'name' : 'ce2.domain.ch', ... } ] )['Value']
+          [ S_OK( { 'singlePolicyResults' : ..., 'policyCombinedResult' : ..., 'decisionParams' : ... } ),
+            S_ERROR( ... ) ]
+
+    :Parameters:
+      **decisionParamsList** - `list( dict )`
+        decisionParams of the elements, see setup
+
+    :return: S_OK( list with the result of takeDecision for each element )
+
+    """
+
+    # Policies and their commands, element by element............................
+
+    elements = []
+    commandsByClass = {}
+    for decisionParams in decisionParamsList:
+      if decisionParams is None:
+        elements.append( ( None, None, None ) )
+        continue
+      self.setup( decisionParams )
+
+      policiesThatApply = getPoliciesThatApply( self.decisionParams )
+      if not policiesThatApply['OK']:
+        elements.append( ( self.decisionParams, policiesThatApply, [] ) )
+        continue
+      policiesThatApply = policiesThatApply['Value']
+      self.log.verbose( "Policies that apply: %s" % ', '.join( [po['name'] for po in policiesThatApply] ) )
+
+      commands = []
+      for policyDict in policiesThatApply:
+        command = self.pCaller.commandInvocation( self.decisionParams, policyDict )
+        if not command['OK']:
+          # Left to policyInvocation, which fails the same way
+          commands.append( None )
+          continue
+        command = command['Value']
+        commands.append( command )
+        if command is not None:
+          commandsByClass.setdefault( command.__class__, [] ).append( command )
+
+      elements.append( ( self.decisionParams, S_OK( policiesThatApply ), commands ) )
+
+    # Cached values of the commands, kind by kind.................................
+
+    for commandClass, commands in commandsByClass.iteritems():
+      bulkCache = commands[0].doBulkCache( commands )
+      if not bulkCache['OK']:
+        # The commands will try again one by one
+        self.log.warn( "%s bulk cache failed: %s" % ( commandClass.__name__, bulkCache['Message'] ) )
+        continue
+      for command, cacheResult in zip( commands, bulkCache['Value'] ):
+        command.bulkCacheResult = cacheResult
+
+    # Decisions, element by element...............................................
+
+    decisions = []
+    for decisionParams, policiesThatApply, commands in elements:
+      if decisionParams is None:
+        self.decisionParams = None
+        decisions.append( self.takeDecision() )
+        continue
+      self.setup( decisionParams )
+      if not policiesThatApply['OK']:
+        decisions.append( policiesThatApply )
+        continue
+      decisions.append( self._decide( policiesThatApply['Value'], commands ) )
+
+    return S_OK( decisions )
+
+  def _decide( self, policiesThatApply, commands = None ):
+    """ evaluates the policies that apply to the element, combines their results and
+    finds the actions to be triggered, see takeDecision.
+
+    :Parameters:
+      **policiesThatApply** - `list( dict )`
+        policies that apply to the element
+
+      **commands** - [ None, `list` ]
+        command objects of the policies, created when evaluating them if None
+
+    :return: S_OK( { 'singlePolicyResults'  : `list`,
+                     'policyCombinedResult' : `dict`,
+                     'decisionParams'      : `dict` } ) / S_ERROR
+
+    """
+
     # Evaluate policies
-    singlePolicyResults = self._runPolicies( policiesThatApply )
+    singlePolicyResults = self._runPolicies( policiesThatApply, commands )
     if not singlePolicyResults['OK']:
       return singlePolicyResults
     singlePolicyResults = singlePolicyResults['Value']
@@ -173,7 +270,7 @@ class PDP( object ):
                   'decisionParams'       : self.decisionParams} )
 
 
-  def _runPolicies( self, policies ):
+  def _runPolicies( self, policies, commands = None ):
     """ Given a list of policy dictionaries, loads them making use of the PolicyCaller
     and evaluates them. This method requires to have run setup previously.
 
@@ -194,6 +291,10 @@ class PDP( object ):
         list of dictionaries containing the policies selected to be run. Check the
         examples to get an idea of how the policy dictionaries look like.
 
+      **commands** - [ None, `list` ]
+        command objects of the policies, in the same order. If None, PolicyCaller
+        creates them.
+
     :return: S_OK() / S_ERROR
 
     """
@@ -204,12 +305,15 @@ class PDP( object ):
     # that RSS does not understand.
     validStatus = self.rssMachine.getStates()
 
-    for policyDict in policies:
+    if commands is None:
+      commands = [ None ] * len( policies )
+
+    for policyDict, command in zip( policies, commands ):
 
       # Load and evaluate policy described in <policyDict> for element described
       # in <self.decisionParams>
       policyInvocationResult = self.pCaller.policyInvocation( self.decisionParams,
-                                                              policyDict )
+                                                              policyDict, command )
       if not policyInvocationResult['OK']:
         # We should never enter this line ! Just in case there are policies
         # missconfigured !
@@ -25,6 +25,11 @@ ResourceStatusClient = getattr(
 __RCSID__ = '$Id: $'
 
 
+def _lower(value):
+  """ value in lower case, if it is a string """
+  return value.lower() if isinstance(value, basestring) else value
+
+
 class PEP(object):
   """ PEP ( Policy Enforcement Point )
   """
@@ -84,25 +89,7 @@ class PEP(object):
       self.log.warn("No decision params...?")
       return S_OK()
 
-    standardParamsDict = {'element': None,
-                          'name': None,
-                          'elementType': None,
-                          'statusType': None,
-                          'status': None,
-                          'reason': None,
-                          'tokenOwner': None,
-                          # Last parameter allows policies to be de-activated
-                          'active': 'Active'}
-
-    standardParamsDict.update(decisionParams)
-
-    if standardParamsDict['element'] is not None:
-      self.log = gLogger.getSubLogger('PEP/%s' % standardParamsDict['element'])
-      if standardParamsDict['name'] is not None:
-        self.log = gLogger.getSubLogger('PEP/%s/%s' % (standardParamsDict['element'], standardParamsDict['name']))
-        self.log.verbose("Enforce - statusType: %s, status: %s" % (standardParamsDict['statusType'],
-                                                                   standardParamsDict['status']))
-    decisionParams = dict(standardParamsDict)
+    decisionParams = self.__getDecisionParams(decisionParams)
 
     # Setup PDP with new parameters dictionary
     self.pdp.setup(decisionParams)
@@ -127,16 +114,8 @@ class PEP(object):
 
     for policyActionName, policyActionType in policyCombinedResult['PolicyAction']:
 
-      try:
-        actionMod = Utils.voimport('DIRAC.ResourceStatusSystem.PolicySystem.Actions.%s' % policyActionType)
-      except ImportError:
-        self.log.error('Error importing %s action' % policyActionType)
-        continue
-
-      try:
-        action = getattr(actionMod, policyActionType)
-      except AttributeError:
-        self.log.error('Error importing %s action class' % policyActionType)
+      action = self.__getAction(policyActionType)
+      if action is None:
         continue
 
       actionObj = action(policyActionName, decisionParams, policyCombinedResult,
@@ -150,6 +129,117 @@ class PEP(object):
 
     return S_OK(resDecisions)
 
+  def enforceBulk(self, decisionParamsList):
+    """ enforce for many elements at once. The PDP takes the decisions of all of them
+    together ( see PDP.takeDecisions ), the elements which were updated meanwhile are
+    looked for with one query per element table, and the actions of the same kind run
+    together ( see BaseAction.runBulk ), so that the new statuses and the policy results
+    are written in bulk.
+
+    examples:
+       >>> pep.enforceBulk( [ { 'element' : 'Resource', 'name' : 'ce1.domain.ch', ... },
+                              { 'element' : 'Resource', 'name' : 'ce2.domain.ch', ... } ] )
+
+    :Parameters:
+      **decisionParamsList** - `list( dict )`
+        decisionParams of the elements, see enforce.
+
+    :return: S_OK( list with the result of enforce for each element ) / S_ERROR
+
+    """
+
+    results = [S_OK()] * len(decisionParamsList)
+
+    toDecide = []
+    for index, decisionParams in enumerate(decisionParamsList):
+      if not decisionParams:
+        self.log.warn("No decision params...?")
+        continue
+      toDecide.append((index, self.__getDecisionParams(decisionParams)))
+
+    # Run policies, get decisions, get actions to apply
+    resDecisions = self.pdp.takeDecisions([decisionParams for _index, decisionParams in toDecide])
+    if not resDecisions['OK']:
+      return resDecisions
+
+    decided = []
+    for (index, decisionParams), resDecision in zip(toDecide, resDecisions['Value']):
+      if not resDecision['OK']:
+        self.log.error("Something went wrong, not enforcing policies", '%s' % decisionParams)
+        results[index] = resDecision
+        continue
+      decided.append((index, resDecision['Value']))
+
+    # One more final check before proceeding, see enforce
+    areNotUpdated = self.__areNotUpdated([resDecision['decisionParams'] for _index, resDecision in decided])
+
+    actionsByClass = {}
+    for (index, resDecision), isNotUpdated in zip(decided, areNotUpdated):
+      if not isNotUpdated['OK']:
+        results[index] = isNotUpdated
+        continue
+      results[index] = S_OK(resDecision)
+
+      for policyActionName, policyActionType in resDecision['policyCombinedResult']['PolicyAction']:
+
+        action = self.__getAction(policyActionType)
+        if action is None:
+          continue
+
+        actionObj = action(policyActionName, resDecision['decisionParams'], resDecision['policyCombinedResult'],
+                           resDecision['singlePolicyResults'], self.clients)
+
+        self.log.debug((policyActionName, policyActionType))
+
+        actionsByClass.setdefault(action, []).append(actionObj)
+
+    for actions in actionsByClass.itervalues():
+      for actionResult in actions[0].runBulk(actions):
+        if not actionResult['OK']:
+          self.log.error(actionResult['Message'])
+
+    return S_OK(results)
+
+  def __getDecisionParams(self, decisionParams):
+    """ Returns the decisionParams with all the standard keys, see PDP.setup
+    """
+
+    standardParamsDict = {'element': None,
+                          'name': None,
+                          'elementType': None,
+                          'statusType': None,
+                          'status': None,
+                          'reason': None,
+                          'tokenOwner': None,
+                          # Last parameter allows policies to be de-activated
+                          'active': 'Active'}
+
+    standardParamsDict.update(decisionParams)
+
+    if standardParamsDict['element'] is not None:
+      self.log = gLogger.getSubLogger('PEP/%s' % standardParamsDict['element'])
+      if standardParamsDict['name'] is not None:
+        self.log = gLogger.getSubLogger('PEP/%s/%s' % (standardParamsDict['element'], standardParamsDict['name']))
+        self.log.verbose("Enforce - statusType: %s, status: %s" % (standardParamsDict['statusType'],
+                                                                   standardParamsDict['status']))
+    return dict(standardParamsDict)
+
+  def __getAction(self, policyActionType):
+    """ Returns the class of the action, None if it cannot be imported
+    """
+
+    try:
+      actionMod = Utils.voimport('DIRAC.ResourceStatusSystem.PolicySystem.Actions.%s' % policyActionType)
+    except ImportError:
+      self.log.error('Error importing %s action' % policyActionType)
+      return None
+
+    try:
+      return getattr(actionMod, policyActionType)
+    except AttributeError:
+      self.log.error('Error importing %s action class' % policyActionType)
+      return None
+
   def __isNotUpdated(self, decisionParams):
     """ Checks for the existence of the element as it was passed to the PEP. It may
     happen that while being the element processed by the PEP an user through the
@@ -189,4 +279,60 @@ class PEP(object):
 
     return S_OK()
 
+  def __areNotUpdated(self, decisionParamsList):
+    """ __isNotUpdated for many elements, with one query per element table instead
+    of one per element. The sites are checked one by one, as their statuses come from
+    the SiteStatus cache.
+
+    :Parameters:
+      **decisionParamsList** - `list( dict )`
+        decisionParams of the elements
+
+    :return: list of S_OK / S_ERROR, one per element
+
+    """
+
+    results = [None] * len(decisionParamsList)
+
+    namesByElement = {}
+    for index, decisionParams in enumerate(decisionParamsList):
+      if decisionParams['element'] == 'Site':
+        results[index] = self.__isNotUpdated(decisionParams)
+      else:
+        namesByElement.setdefault(decisionParams['element'], set()).add(decisionParams['name'])
+
+    rowsByElement = {}
+    for element, names in namesByElement.iteritems():
+      rows = self.clients['ResourceStatusClient'].selectStatusElement(element, 'Status', name=list(names))
+      if rows['OK']:
+        rowsByName = {}
+        for row in rows['Value']:
+          row = dict(zip(rows['Columns'], row))
+          rowsByName.setdefault(row['Name'].lower(), []).append(row)
+        rows = S_OK(rowsByName)
+      rowsByElement[element] = rows
+
+    for index, decisionParams in enumerate(decisionParamsList):
+      if results[index] is not None:
+        continue
+      rows = rowsByElement[decisionParams['element']]
+      if not rows['OK']:
+        results[index] = rows
+        continue
+
+      # The same exact match as __isNotUpdated, which ignores the empty parameters. Like the
+      # database, the strings are compared case-insensitively
+      selectParams = dict((key[0].upper() + key[1:], _lower(value)) for key, value in decisionParams.iteritems()
+                          if value and key not in ('element', 'active'))
+      for row in rows['Value'].get(decisionParams['name'].lower(), []):
+        if all(_lower(row.get(column)) == value for column, value in selectParams.iteritems()):
+          results[index] = S_OK()
+          break
+      else:
+        msg = '%(name)s  ( %(status)s / %(statusType)s ) has been updated after PEP started running' % decisionParams
+        self.log.error(msg)
+        results[index] = S_ERROR(msg)
+
+    return results
+
 # EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
@@ -28,7 +28,7 @@ class PolicyCaller( object ):
     if clients is not None:
       self.clients = clients
 
-  def policyInvocation( self, decisionParams, policyDict ):
+  def policyInvocation( self, decisionParams, policyDict, command = None ):
     '''
     Invokes a policy:
 
@@ -42,7 +42,7 @@ class PolicyCaller( object ):
 
     3. If commandIn is specified (normally it is), use
     :meth:`DIRAC.ResourceStatusSystem.Command.CommandCaller.CommandCaller.setCommandObject`
-    to get a command object
+    to get a command object, unless it is given ( see commandInvocation ).
     '''
 
     if not 'module' in policyDict:
@@ -67,10 +67,11 @@ class PolicyCaller( object ):
 
     policy  = getattr( policyModule, pModuleName )()
 
-    command = self.cCaller.commandInvocation( pCommand, pArgs, decisionParams, self.clients )
-    if not command[ 'OK' ]:
-      return command
-    command = command[ 'Value' ]
+    if command is None:
+      command = self.cCaller.commandInvocation( pCommand, pArgs, decisionParams, self.clients )
+      if not command[ 'OK' ]:
+        return command
+      command = command[ 'Value' ]
 
     evaluationResult = self.policyEvaluation( policy, command )
 
@@ -79,6 +80,19 @@ class PolicyCaller( object ):
 
     return evaluationResult
 
+  def commandInvocation( self, decisionParams, policyDict ):
+    '''
+    Creates the command object of a policy for the element described by decisionParams,
+    without evaluating the policy. It lets the PDP get the cached values of the commands
+    of many elements at once before evaluating their policies.
+    '''
+
+    if not 'command' in policyDict or not 'args' in policyDict:
+      return S_ERROR( 'Malformed policyDict %s' % policyDict )
+
+    return self.cCaller.commandInvocation( policyDict[ 'command' ], policyDict[ 'args' ],
+                                           decisionParams, self.clients )
+
   @staticmethod
   def policyEvaluation( policy, command ):
     '''
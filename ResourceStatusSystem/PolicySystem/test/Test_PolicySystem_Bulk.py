@@ -0,0 +1,161 @@
+""" Test the evaluation and the enforcement of the policies of many elements at once
+"""
+
+# pylint: disable=missing-docstring
+
+import datetime
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK
+from DIRAC.ResourceStatusSystem.Command.DowntimeCommand import DowntimeCommand
+from DIRAC.ResourceStatusSystem.Command.JobCommand import JobCommand
+from DIRAC.ResourceStatusSystem.Command.PilotCommand import PilotCommand
+from DIRAC.ResourceStatusSystem.PolicySystem.PDP import PDP
+from DIRAC.ResourceStatusSystem.PolicySystem.PEP import PEP
+
+
+def strip(results):
+  """ results without their call stacks """
+  return [(result['OK'], result.get('Value'), result.get('Message')) for result in results]
+
+
+def cacheTable(columns, rows, filterColumns):
+  """ select of a cache table, with the filters given as positional or keyword arguments """
+  def select(*args, **kwargs):
+    filters = dict(zip(filterColumns, args))
+    filters.update(kwargs)
+    selected = []
+    for row in rows:
+      rowDict = dict(zip(columns, row))
+      for key, value in filters.iteritems():
+        if not value:
+          continue
+        values = value if isinstance(value, list) else [value]
+        if rowDict[key[0].upper() + key[1:]] not in values:
+          break
+      else:
+        selected.append(row)
+    return {'OK': True, 'Value': selected, 'Columns': columns}
+  return MagicMock(side_effect=select)
+
+
+def test_doBulkCache():
+  now = datetime.datetime.utcnow()
+  rmClient = MagicMock()
+  rmClient.selectJobCache = cacheTable(['Site', 'Status', 'Efficiency'],
+                                       [('A', 'Active', 0.9), ('B', 'Banned', 0.1)],
+                                       ['site'])
+  rmClient.selectPilotCache = cacheTable(['Site', 'CE', 'Status'],
+                                         [('A', 'Multiple', 'Good'), ('A', 'ce1', 'Bad'), ('B', 'ce2', 'Good')],
+                                         ['site', 'cE'])
+  rmClient.selectDowntimeCache = cacheTable(['DowntimeID', 'Element', 'Name', 'StartDate', 'EndDate', 'Severity',
+                                             'gOCDBServiceType'],
+                                            [(1, 'Resource', 'ce1', now - datetime.timedelta(hours=1),
+                                              now + datetime.timedelta(hours=1), 'OUTAGE', None),
+                                             (2, 'Resource', 'ce2', now + datetime.timedelta(hours=1),
+                                              now + datetime.timedelta(hours=2), 'WARNING', None)],
+                                            ['downtimeID', 'element', 'name'])
+  clients = {'ResourceManagementClient': rmClient, 'GOCDBClient': MagicMock(), 'WMSAdministrator': MagicMock()}
+
+  for commandClass, argsList in ((JobCommand, [{'name': name} for name in ('A', 'B', 'C', 'A')] + [{}]),
+                                 (PilotCommand, [{'element': 'Site', 'name': 'A'},
+                                                 {'element': 'Resource', 'name': 'ce1'},
+                                                 {'element': 'Resource', 'name': 'ce3'},
+                                                 {'element': 'Node', 'name': 'A'}]),
+                                 (DowntimeCommand, [{'element': 'Resource', 'elementType': 'CE', 'name': name,
+                                                     'hours': hours}
+                                                    for name in ('ce1', 'ce2', 'ce3') for hours in (None, 2)])):
+    commands = [commandClass(args, clients) for args in argsList]
+    expected = [command.doCache() for command in commands]
+    rmClient.reset_mock()
+
+    bulkCache = commands[0].doBulkCache(commands)
+    assert bulkCache['OK']
+    assert strip(bulkCache['Value']) == strip(expected)
+    # A single query per kind of element
+    assert sum(select.call_count for select in (rmClient.selectJobCache, rmClient.selectPilotCache,
+                                                rmClient.selectDowntimeCache)) <= 2
+
+
+def siteParams(name):
+  return {'element': 'Site', 'name': name, 'elementType': 'Site', 'statusType': 'all',
+          'status': 'Active', 'reason': 'Init', 'tokenOwner': 'rs_svc'}
+
+
+@patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.RssConfiguration')
+@patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.getPolicyActionsThatApply')
+@patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.getPoliciesThatApply')
+def test_takeDecisions(mockPolicies, mockActions, mockConfiguration):
+  mockPolicies.return_value = S_OK([{'name': 'JobEfficiency', 'type': 'JobEfficiency',
+                                     'module': 'JobEfficiencyPolicy', 'command': ('JobCommand', 'JobCommand'),
+                                     'args': {'onlyCache': True}},
+                                    {'name': 'AlwaysActive', 'type': 'AlwaysActive',
+                                     'module': 'AlwaysActivePolicy', 'command': None, 'args': None}])
+  mockActions.return_value = S_OK([('LogStatusAction', 'LogStatusAction')])
+  mockConfiguration.getPolicies.return_value = S_OK({})
+
+  rmClient = MagicMock()
+  rmClient.selectJobCache = cacheTable(['Site', 'Completed', 'Done', 'Failed'],
+                                       [('A', 10, 10, 0), ('B', 1, 1, 18)], ['site'])
+  pdp = PDP({'ResourceManagementClient': rmClient, 'WMSAdministrator': MagicMock()})
+
+  decisionParamsList = [siteParams(name) for name in ('A', 'B', 'C')] + [None]
+  expected = []
+  for decisionParams in decisionParamsList:
+    pdp.decisionParams = None
+    pdp.setup(decisionParams)
+    expected.append(pdp.takeDecision())
+  rmClient.selectJobCache.reset_mock()
+
+  decisions = pdp.takeDecisions(decisionParamsList)
+  assert decisions['OK']
+  assert strip(decisions['Value']) == strip(expected)
+  assert [decision['Value']['policyCombinedResult'].get('Status') for decision in decisions['Value']] == \
+      ['Active', 'Banned', 'Active', None]
+  assert rmClient.selectJobCache.call_count == 1
+
+
+def test_enforceBulk():
+  rsClient = MagicMock()
+  rows = [('A', 'all', 'Active', 'Init', 'Resource', 'rs_svc'),
+          ('B', 'all', 'Banned', 'Init', 'Resource', 'rs_svc')]
+  rsClient.selectStatusElement.return_value = {'OK': True, 'Value': rows,
+                                               'Columns': ['Name', 'StatusType', 'Status', 'Reason',
+                                                           'ElementType', 'TokenOwner']}
+  rsClient.addOrModifyStatusElements.return_value = S_OK({'Failed': {}})
+  pep = PEP({'ResourceStatusClient': rsClient, 'ResourceManagementClient': MagicMock(), 'SiteStatus': MagicMock()})
+
+  def takeDecisions(decisionParamsList):
+    return S_OK([S_OK({'decisionParams': decisionParams,
+                       'singlePolicyResults': [],
+                       'policyCombinedResult': {'Status': 'Degraded', 'Reason': 'Because',
+                                                'PolicyAction': [('LogStatusAction', 'LogStatusAction')]}})
+                 for decisionParams in decisionParamsList])
+  pep.pdp = MagicMock()
+  pep.pdp.takeDecisions.side_effect = takeDecisions
+
+  elements = []
+  for name in ('A', 'B', 'C'):
+    elements.append({'element': 'Resource', 'name': name, 'elementType': 'Resource', 'statusType': 'all',
+                     'status': 'Active', 'reason': 'Init', 'tokenOwner': 'rs_svc'})
+  res = pep.enforceBulk(elements + [{}])
+  assert res['OK']
+  # B and C were updated meanwhile
+  assert [result['OK'] for result in res['Value']] == [True, False, False, True]
+  assert res['Value'][0]['Value']['policyCombinedResult']['Status'] == 'Degraded'
+  assert rsClient.selectStatusElement.call_count == 1
+
+  # The new status of A is written in bulk
+  assert rsClient.addOrModifyStatusElements.call_count == 1
+  element, tableType, statusElements = rsClient.addOrModifyStatusElements.call_args[0]
+  assert (element, tableType) == ('Resource', 'Status')
+  assert statusElements == [{'name': 'A', 'statusType': 'all', 'status': 'Degraded', 'elementType': 'Resource',
+                             'reason': 'Because'}]
+
+  # The database compares the strings case-insensitively, so does the check
+  rsClient.reset_mock()
+  res = pep.enforceBulk([dict(elements[0], name='a', status='active', reason='INIT', tokenOwner='RS_svc')])
+  assert res['OK']
+  assert [result['OK'] for result in res['Value']] == [True]
+  assert rsClient.addOrModifyStatusElements.call_count == 1
@@ -199,5 +199,33 @@ class ResourceManagementHandler( RequestHandler ):
 
     return res
 
+  types_addOrModifyMany = [ basestring, list ]
+  def export_addOrModifyMany( self, table, paramsList ):
+    '''
+    This method is a bridge to access :class:`ResourceManagementDB` remotely, doing
+    the addOrModify of many rows of the same table in a single call. If you need
+    to know more about this method, you must keep reading on the database documentation.
+
+    :Parameters:
+      **table** - `string`
+        should contain the table where to add or modify
+
+      **paramsList** - `list( dict )`
+        arguments of addOrModify for each row
+
+    :return: S_OK( { 'Failed' : { index in paramsList : error message } } ) || S_ERROR()
+    '''
+
+    gLogger.info( 'addOrModifyMany: %s %s rows' % ( table, len( paramsList ) ) )
+
+    failed = {}
+    for index, params in enumerate( paramsList ):
+      res = db.addOrModify( table, params )
+      self.__logResult( 'addOrModifyMany', res )
+      if not res[ 'OK' ]:
+        failed[ index ] = res[ 'Message' ]
+
+    return S_OK( { 'Failed' : failed } )
+
 ################################################################################
 #EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
@@ -10,6 +10,7 @@ __RCSID__ = '$Id: $'
 
 from DIRAC                                             import gLogger, S_OK
 from DIRAC.Core.DISET.RequestHandler                   import RequestHandler
+from DIRAC.Core.Utilities.ThreadScheduler              import gThreadScheduler
 from DIRAC.ResourceStatusSystem.DB.ResourceStatusDB    import ResourceStatusDB
 
 
@@ -53,8 +54,21 @@ def initializeResourceStatusHandler( _serviceInfo ):
   global db
   db = ResourceStatusDB()
 
+  # The clients only need the recent status changes, see export_getStatusChanges
+  gThreadScheduler.addPeriodicTask( 3600, purgeStatusChanges )
+
   return S_OK()
 
+def purgeStatusChanges():
+  '''
+    Deletes the status changes of more than a day
+  '''
+
+  res = db.purgeStatusChanges()
+  if not res[ 'OK' ]:
+    gLogger.error( 'purgeStatusChanges: %s' % res[ 'Message' ] )
+  return res
+
 ################################################################################
 
 class ResourceStatusHandler( RequestHandler ):
@@ -260,5 +274,58 @@ class ResourceStatusHandler( RequestHandler ):
     return res
 
 
+  types_getStatusChanges = [ basestring, ( int, long ) ]
+  def export_getStatusChanges( self, table, sinceRevision ):
+    '''
+    Gets the changes of the statuses of a table since a revision, so that the
+    clients can update their caches instead of reading the whole table again.
+    If you need to know more about this method, you must keep reading on the
+    database documentation.
+
+    :Parameters:
+      **table** - `string`
+        status table, e.g. ResourceStatus
+
+      **sinceRevision** - `int`
+        revision of the statuses known by the client, -1 to get the latest revision only
+
+    :return: S_OK( { 'Revision' : int, 'Complete' : bool, 'Changes' : list } ) || S_ERROR()
+    '''
+
+    gLogger.debug( 'getStatusChanges: %s %s' % ( table, sinceRevision ) )
+    res = db.getStatusChanges( table, sinceRevision )
+    self.__logResult( 'getStatusChanges', res )
+
+    return res
+
+
+  types_addOrModifyMany = [ basestring, list ]
+  def export_addOrModifyMany( self, table, paramsList ):
+    '''
+    This method is a bridge to access :class:`ResourceStatusDB` remotely, doing
+    the addOrModify of many rows of the same table in a single call. If you need
+    to know more about this method, you must keep reading on the database documentation.
+
+    :Parameters:
+      **table** - `string`
+        should contain the table where to add or modify
+
+      **paramsList** - `list( dict )`
+        arguments of addOrModify for each row
+
+    :return: S_OK( { 'Failed' : { index in paramsList : error message } } ) || S_ERROR()
+    '''
+
+    gLogger.info( 'addOrModifyMany: %s %s rows' % ( table, len( paramsList ) ) )
+
+    failed = {}
+    for index, params in enumerate( paramsList ):
+      res = db.addOrModify( table, params )
+      self.__logResult( 'addOrModifyMany', res )
+      if not res[ 'OK' ]:
+        failed[ index ] = res[ 'Message' ]
+
+    return S_OK( { 'Failed' : failed } )
+
 ################################################################################
 #EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF#EOF
@@ -6,14 +6,23 @@ empty and there is a new query. If not, it will remain in its previous state.
 However, Cache class internal cache: DictCache sets a validity to its entries.
 After that, the cache is empty.
 
+When the Cache is given a function returning the changes since a revision, the
+expired cache is updated with the changes only, instead of being read again as a
+whole. It can also be shared with the other processes of the host through a file:
+the first process finding the file too old updates it, the others read it.
+
 """
 
 __RCSID__ = '$Id$'
 
 import itertools
+import os
 import random
+import tempfile
+import time
 
 from DIRAC import gLogger, S_OK, S_ERROR
+from DIRAC.Core.Utilities import DEncode
 from DIRAC.Core.Utilities.DictCache import DictCache
 from DIRAC.Core.Utilities.LockRing import LockRing
 from DIRAC.ResourceStatusSystem.Utilities.RssConfiguration import RssConfiguration
@@ -27,7 +36,7 @@ class Cache(object):
     using them !
   """
 
-  def __init__(self, lifeTime, updateFunc):
+  def __init__(self, lifeTime, updateFunc, changesFunc=None, sharedCacheFile=None):
     """
     Constructor
 
@@ -37,6 +46,14 @@ class Cache(object):
       **updateFunc** - `function`
         This function MUST return a S_OK | S_ERROR object. In the case of the first,
         its value must be a dictionary.
+      **changesFunc** - `function`
+        Optional, called with the revision of the cache, -1 if not known. It MUST
+        return a S_OK | S_ERROR object. In the case of the first, its value must be
+        a dictionary with the latest Revision, Complete: if the changes since the
+        revision are all known, and the Changes: list of ( key, value ), the value
+        being None when the key is deleted.
+      **sharedCacheFile** - `string`
+        Optional, file where the cache is shared with the other processes.
 
     """
 
@@ -56,6 +73,13 @@ class Cache(object):
     self.__cacheLock = LockRing()
     self.__cacheLock.getLock(self.__class__.__name__)
 
+    # Incremental updates
+    self.__changesFunc = changesFunc
+    self.__sharedCacheFile = sharedCacheFile
+    # content of the cache at its revision
+    self.__revision = None
+    self.__content = {}
+
   # internal cache object getter
 
   def cacheKeys(self):
@@ -113,9 +137,15 @@ class Cache(object):
 
   # Cache refreshers
 
-  def refreshCache(self):
+  def refreshCache(self, useSharedCache=True):
     """
-    Purges the cache and gets fresh data from the update function.
+    Purges the cache and gets fresh data: from the shared cache file if another
+    process refreshed it recently, otherwise from the changes since the revision of
+    the cache, or from the update function if they are not available.
+
+    :Parameters:
+      **useSharedCache** - `bool`
+        False to ignore the shared cache file, e.g. right after changing a status
 
     :return: S_OK | S_ERROR. If the first, its content is the new cache.
     """
@@ -124,12 +154,18 @@ class Cache(object):
 
     self.__cache.purgeAll()
 
-    newCache = self.__updateFunc()
-    if not newCache['OK']:
-      self.log.error(newCache['Message'])
-      return newCache
+    newCache = self.__readSharedCache() if useSharedCache else None
+    if newCache is None:
+      newCache = self.__applyChanges()
+      if newCache is None:
+        result = self.__getWholeCache()
+        if not result['OK']:
+          self.log.error(result['Message'])
+          return result
+        newCache = result['Value']
+      self.__writeSharedCache()
 
-    newCache = self.__updateCache(newCache['Value'])
+    newCache = self.__updateCache(newCache)
 
     self.log.verbose('refreshed')
 
@@ -137,6 +173,108 @@ class Cache(object):
 
   # Private methods
 
+  def __getWholeCache(self):
+    """
+    Gets the whole cache from the update function. The revision is asked before,
+    so that the changes made in between are applied again at the next refresh.
+
+    :return: S_OK | S_ERROR. If the first, its content is the new cache.
+    """
+
+    revision = None
+    if self.__changesFunc:
+      result = self.__changesFunc(-1)
+      if result['OK']:
+        revision = result['Value']['Revision']
+      else:
+        self.log.verbose('Cannot get the revision', result['Message'])
+
+    newCache = self.__updateFunc()
+    if not newCache['OK']:
+      return newCache
+
+    self.__revision = revision
+    self.__content = newCache['Value']
+    return newCache
+
+  def __applyChanges(self):
+    """
+    Applies the changes since the revision of the cache to its content.
+
+    :return: dictionary with the new cache, None if the changes are not available
+    """
+
+    if not self.__changesFunc or self.__revision is None:
+      return None
+
+    result = self.__changesFunc(self.__revision)
+    if not result['OK']:
+      self.log.warn('Cannot get the changes', result['Message'])
+      return None
+    if not result['Value']['Complete']:
+      self.log.verbose('Changes since revision %s are not all known' % self.__revision)
+      return None
+
+    content = dict(self.__content)
+    for cacheKey, cacheValue in result['Value']['Changes']:
+      if cacheValue is None:
+        content.pop(cacheKey, None)
+      else:
+        content[cacheKey] = cacheValue
+    self.log.verbose('%d changes since revision %s' % (len(result['Value']['Changes']), self.__revision))
+
+    self.__revision = result['Value']['Revision']
+    self.__content = content
+    return content
+
+  def __readSharedCache(self):
+    """
+    Reads the cache shared by the processes of the host if it is recent enough,
+    i.e. another process refreshed it less than <lifeTime> seconds ago.
+
+    :return: dictionary with the new cache, None if it is not available
+    """
+
+    if not self.__sharedCacheFile:
+      return None
+
+    try:
+      fileStat = os.stat(self.__sharedCacheFile)
+      # Only trust a file written by the same user
+      if fileStat.st_uid != os.getuid() or time.time() - fileStat.st_mtime > self.__lifeTime:
+        return None
+      with open(self.__sharedCacheFile, 'rb') as sharedFile:
+        shared = DEncode.decode(sharedFile.read())[0]
+    except Exception as e:  # pylint: disable=broad-except
+      self.log.verbose('Cannot read the shared cache', repr(e))
+      return None
+
+    if self.__revision is not None and shared['Revision'] is not None and shared['Revision'] < self.__revision:
+      return None
+    self.__revision = shared['Revision']
+    self.__content = shared['Content']
+    return self.__content
+
+  def __writeSharedCache(self):
+    """
+    Replaces the cache shared by the processes of the host with the content of
+    this cache. The file is renamed, the readers never see it half written.
+    """
+
+    if not self.__sharedCacheFile:
+      return
+
+    sharedCacheDir = os.path.dirname(self.__sharedCacheFile)
+    try:
+      if not os.path.isdir(sharedCacheDir):
+        os.makedirs(sharedCacheDir)
+      fd, tmpName = tempfile.mkstemp(dir=sharedCacheDir)
+      with os.fdopen(fd, 'wb') as tmpFile:
+        tmpFile.write(DEncode.encode({'Revision': self.__revision, 'Content': self.__content}))
+      os.rename(tmpName, self.__sharedCacheFile)
+    except Exception as e:  # pylint: disable=broad-except
+      self.log.warn('Cannot write the shared cache', repr(e))
+
   def __updateCache(self, newCache):
     """
     Given the new cache dictionary, updates the internal cache with it. It sets
@@ -169,7 +307,7 @@ class RSSCache(Cache):
   methods are not !!
   """
 
-  def __init__(self, lifeTime, updateFunc):
+  def __init__(self, lifeTime, updateFunc, changesFunc=None, sharedCacheFile=None):
     """
     Constructor
 
@@ -184,10 +322,16 @@ class RSSCache(Cache):
         This function MUST return a S_OK | S_ERROR object. In the case of the first,
         its value must follow the dict format: ( key, value ) being key ( elementName,
         statusType ) and value status.
+      **changesFunc** - `function`
+        Optional, function returning the changes of the statuses since a revision,
+        see Cache.
+      **sharedCacheFile** - `string`
+        Optional, file where the cache is shared with the other processes.
 
     """
 
-    super(RSSCache, self).__init__(lifeTime, updateFunc)
+    super(RSSCache, self).__init__(lifeTime, updateFunc, changesFunc=changesFunc,
+                                   sharedCacheFile=sharedCacheFile)
 
     self.allStatusTypes = RssConfiguration().getConfigStatusType()
 
@@ -25,6 +25,7 @@ class RssConfiguration:
       {
         State        : Active | InActive,
         Cache        : 300,
+        SharedCache  : /opt/dirac/work/ResourceStatus,
         FromAddress  : 'email@site.domain'
         StatusType   :
         {
@@ -53,6 +54,14 @@ class RssConfiguration:
 
     return self.opsHelper.getValue('%s/Config/Cache' % _rssConfigPath, default)
 
+  def getConfigSharedCache(self, default=''):
+    """
+      Gets from <pathToRSSConfiguration>/Config the value of SharedCache, the
+      directory where the processes of a host share their caches
+    """
+
+    return self.opsHelper.getValue('%s/Config/SharedCache' % _rssConfigPath, default)
+
   def getConfigFromAddress(self, default=None):
     """
       Gets from <pathToRSSConfiguration>/Config the value of FromAddress
@@ -0,0 +1,87 @@
+""" Test the incremental updates of the RSS cache, and its sharing between processes
+"""
+
+# pylint: disable=missing-docstring,protected-access
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.ResourceStatusSystem.Utilities.RSSCacheNoThread import Cache
+
+
+class StatusFeed(object):
+  """ Statuses of the service, with their changes """
+
+  def __init__(self):
+    self.statuses = {'SE1': 'Active', 'SE2': 'Banned'}
+    self.changes = []
+    self.oldestRevision = 0
+    self.calls = []
+
+  def setStatus(self, name, status):
+    if status:
+      self.statuses[name] = status
+    else:
+      del self.statuses[name]
+    self.changes.append((name, status or None))
+
+  def update(self):
+    self.calls.append('update')
+    return S_OK(dict(self.statuses))
+
+  def getChanges(self, sinceRevision):
+    self.calls.append(sinceRevision)
+    revision = len(self.changes)
+    complete = self.oldestRevision <= sinceRevision <= revision
+    return S_OK({'Revision': revision,
+                 'Complete': complete,
+                 'Changes': self.changes[sinceRevision:] if complete else []})
+
+
+def test_changes():
+  feed = StatusFeed()
+  cache = Cache(300, feed.update, feed.getChanges)
+  assert cache.refreshCache()['Value'] == {'SE1': 'Active', 'SE2': 'Banned'}
+  assert feed.calls == [-1, 'update']
+
+  feed.setStatus('SE1', 'Degraded')
+  feed.setStatus('SE2', None)
+  feed.setStatus('SE3', 'Active')
+  assert cache.refreshCache()['Value'] == {'SE1': 'Degraded', 'SE3': 'Active'}
+  assert cache.get(['SE1', 'SE3'])['OK']
+  assert not cache.get(['SE2'])['OK']
+  # Only the changes are read
+  assert feed.calls == [-1, 'update', 0]
+
+  # The changes are not all known anymore, the whole cache is read
+  feed.setStatus('SE1', 'Active')
+  feed.oldestRevision = 4
+  assert cache.refreshCache()['Value'] == {'SE1': 'Active', 'SE3': 'Active'}
+  assert feed.calls == [-1, 'update', 0, 3, -1, 'update']
+
+
+def test_noChanges():
+  feed = StatusFeed()
+  # e.g. a service not providing the changes
+  cache = Cache(300, feed.update, lambda _revision: S_ERROR('Unknown method'))
+  assert cache.refreshCache()['OK']
+  feed.setStatus('SE1', 'Banned')
+  assert cache.refreshCache()['Value']['SE1'] == 'Banned'
+  assert feed.calls == ['update', 'update']
+
+
+def test_sharedCache(tmpdir):
+  sharedCacheFile = str(tmpdir.join('ResourceStatus', 'ResourceStatus.cache'))
+  feed = StatusFeed()
+  cache1 = Cache(300, feed.update, feed.getChanges, sharedCacheFile)
+  cache2 = Cache(300, feed.update, feed.getChanges, sharedCacheFile)
+  assert cache1.refreshCache()['OK']
+  assert feed.calls == [-1, 'update']
+  # The second process reads the cache refreshed by the first one
+  assert cache2.refreshCache()['Value'] == {'SE1': 'Active', 'SE2': 'Banned'}
+  assert feed.calls == [-1, 'update']
+
+  # and can follow the changes from its revision
+  feed.setStatus('SE1', 'Banned')
+  assert cache2.refreshCache(useSharedCache=False)['Value']['SE1'] == 'Banned'
+  assert feed.calls == [-1, 'update', 0]
+  assert cache1.refreshCache()['Value']['SE1'] == 'Banned'
+  assert feed.calls == [-1, 'update', 0]
@@ -2,13 +2,15 @@
 """
 
 import os
+import zlib
 
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.DISET.TransferClient import TransferClient
+from DIRAC.Core.Utilities import DEncode
 from DIRAC.Core.Security.ProxyInfo import getVOfromProxyGroup
 
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getVOMSAttributeForGroup, getDNForUsername
-from DIRAC.Resources.Catalog.Utilities import checkCatalogArguments
+from DIRAC.Resources.Catalog.Utilities import checkCatalogArguments, checkArgumentFormat
 from DIRAC.Resources.Catalog.FileCatalogClientBase import FileCatalogClientBase
 
 __RCSID__ = "$Id$"
@@ -91,7 +93,7 @@ class FileCatalogClient(FileCatalogClientBase):
       'rebuildDirectoryUsage']
 
   ADMIN_METHODS = ['addUser', 'deleteUser', 'addGroup', 'deleteGroup', 'getUsers', 'getGroups',
-                   'getCatalogCounters', 'repairCatalog', 'rebuildDirectoryUsage']
+                   'getCatalogCounters', 'getDirectoryCacheStats', 'repairCatalog', 'rebuildDirectoryUsage']
 
   def __init__(self, url=None, **kwargs):
     """ Constructor function.
@@ -114,7 +116,14 @@ class FileCatalogClient(FileCatalogClientBase):
     vo = getVOfromProxyGroup().get('Value', None)
 
     lfnDict = result['Value']
-    seDict = result['Value'].get('SEPrefixes', {})
+    self.__setReplicaPFNs(lfnDict, vo)
+    return S_OK(lfnDict)
+
+  @staticmethod
+  def __setReplicaPFNs(lfnDict, vo):
+    """ Construct the PFNs of the replicas that were not returned by the service
+    """
+    seDict = lfnDict.get('SEPrefixes', {})
     for lfn in lfnDict['Successful']:
       for se in lfnDict['Successful'][lfn]:
         if not lfnDict['Successful'][lfn][se]:
@@ -126,8 +135,6 @@ class FileCatalogClient(FileCatalogClientBase):
 
           lfnDict['Successful'][lfn][se] = prefix + lfn
 
-    return S_OK(lfnDict)
-
   @checkCatalogArguments
   def setReplicaProblematic(self, lfns, revert=False):
     """
@@ -208,15 +215,20 @@ class FileCatalogClient(FileCatalogClientBase):
     result = rpcClient.listDirectory(lfn, verbose)
     if not result['OK']:
       return result
-    # Force returned directory entries to be LFNs
+    self.__setDirectoryEntryLFNs(result['Value'])
+    return result
+
+  @staticmethod
+  def __setDirectoryEntryLFNs(lfnDict):
+    """ Force returned directory entries to be LFNs
+    """
     for entryType in ['Files', 'SubDirs', 'Links']:
-      for path in result['Value']['Successful']:
-        entryDict = result['Value']['Successful'][path][entryType]
+      for path in lfnDict['Successful']:
+        entryDict = lfnDict['Successful'][path][entryType]
         for fname in entryDict.keys():
           detailsDict = entryDict.pop(fname)
           lfn = os.path.join(path, os.path.basename(fname))
           entryDict[lfn] = detailsDict
-    return result
 
   @checkCatalogArguments
   def getDirectoryMetadata(self, lfns, timeout=120):
@@ -253,10 +265,16 @@ class FileCatalogClient(FileCatalogClientBase):
     result = rpcClient.getDirectoryReplicas(lfns, allStatus)
     if not result['OK']:
       return result
+    self.__setDirectoryReplicaLFNs(result['Value'])
+    return result
 
-    seDict = result['Value'].get('SEPrefixes', {})
-    for path in result['Value']['Successful']:
-      pathDict = result['Value']['Successful'][path]
+  @staticmethod
+  def __setDirectoryReplicaLFNs(lfnDict):
+    """ Index the replicas on the LFNs and construct the PFNs that were not returned by the service
+    """
+    seDict = lfnDict.get('SEPrefixes', {})
+    for path in lfnDict['Successful']:
+      pathDict = lfnDict['Successful'][path]
       for fname in pathDict.keys():
         detailsDict = pathDict.pop(fname)
         lfn = '%s/%s' % (path, os.path.basename(fname))
@@ -264,7 +282,6 @@ class FileCatalogClient(FileCatalogClientBase):
           if not detailsDict[se] and se in seDict:
             detailsDict[se] = seDict[se] + lfn
         pathDict[lfn] = detailsDict
-    return result
 
   def findFilesByMetadata(self, metaDict, path='/', timeout=120):
     """ Find files given the meta data query and the path
@@ -505,6 +522,10 @@ class FileCatalogClient(FileCatalogClientBase):
     """ Get the number of registered directories, files and replicas in various tables """
     return self._getRPC(timeout=timeout).getCatalogCounters()
 
+  def getDirectoryCacheStats(self, timeout=120):
+    """ Get the size and the hit rate of the cache of the directories of the service """
+    return self._getRPC(timeout=timeout).getDirectoryCacheStats()
+
   def rebuildDirectoryUsage(self, timeout=120):
     """ Rebuild DirectoryUsage table from scratch """
     return self._getRPC(timeout=timeout).rebuildDirectoryUsage()
@@ -675,3 +696,135 @@ class FileCatalogClient(FileCatalogClientBase):
 
     dfc = TransferClient(self.serverURL)
     return dfc.receiveFile(outputFilename, seName)
+
+  def downloadSEDump(self, seName, outputFilename, lastKey=0, compressed=True, pageSize=10000, timeout=120):
+    """
+        Dump the content of an SE in the given file, as getSEDump does, page by page.
+        The pages are compressed by the service and written to the file as they are received.
+
+        :param seName: name of the StorageElement
+        :param outputFilename: path to the file where to dump it
+        :param int lastKey: LastKey returned by a previous dump, to append to the file the
+                            replicas not dumped yet, or 0 to start the dump
+        :param bool compressed: if True, the file is gzip compressed
+        :param int pageSize: number of replicas of each page
+
+        :returns: S_OK( { 'LastKey' : key of the last replica dumped, 'Replicas' : number of replicas
+                  dumped by this call } ). If the dump fails, the S_ERROR has the LastKey to resume it
+    """
+    replicas = 0
+    try:
+      with open(outputFilename, 'ab' if lastKey else 'wb') as outputFile:
+        for result in self.__iterStreamingQuery('getSEDump', (seName, lastKey), pageSize, timeout):
+          if not result['OK']:
+            result['LastKey'] = lastKey
+            return result
+          pageKey, pageReplicas, page = result['Value']
+          if not compressed:
+            page = zlib.decompress(page, 16 + zlib.MAX_WBITS)
+          pageStart = outputFile.tell()
+          try:
+            outputFile.write(page)
+            outputFile.flush()
+          except IOError as e:
+            # No partial page is left in the file, the dump can be resumed from lastKey
+            try:
+              outputFile.truncate(pageStart)
+            except IOError:
+              pass
+            raise e
+          lastKey = pageKey
+          replicas += pageReplicas
+    except (IOError, zlib.error) as e:
+      result = S_ERROR("Failed to write the SE dump: %s" % repr(e))
+      result['LastKey'] = lastKey
+      return result
+    return S_OK({'LastKey': lastKey, 'Replicas': replicas})
+
+  #############################################################################
+  #
+  # Queries whose result is streamed by chunks by the service
+  #
+
+  def iterReplicas(self, lfns, allStatus=False, chunkSize=1000, timeout=120):
+    """ Get the replicas of the given files by chunks, see getReplicas
+
+        It is a generator of S_OK( Successful/Failed dict ) for at most chunkSize files each,
+        so that the memory used does not depend on the number of files.
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    result = checkArgumentFormat(lfns, generateMap=True)
+    if not result['OK']:
+      yield result
+      return
+    lfnDict, lfnMap = result['Value']
+    vo = getVOfromProxyGroup().get('Value', None)
+    for result in self.__iterStreamingQuery('getReplicas', (lfnDict.keys(), allStatus), chunkSize, timeout):
+      if result['OK']:
+        self.__setReplicaPFNs(result['Value'], vo)
+        self.__restorePaths(result['Value'], lfnMap)
+      yield result
+
+  def iterListDirectory(self, lfn, verbose=False, chunkSize=1000, timeout=120):
+    """ List the given directories' contents by chunks, see listDirectory
+
+        It is a generator of S_OK( Successful/Failed dict ): the first chunk of a directory
+        has its "SubDirs", "Links" and "Datasets", the next ones at most chunkSize of its "Files".
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    result = checkArgumentFormat(lfn, generateMap=True)
+    if not result['OK']:
+      yield result
+      return
+    lfnDict, lfnMap = result['Value']
+    for result in self.__iterStreamingQuery('listDirectory', (lfnDict.keys(), verbose), chunkSize, timeout):
+      if result['OK']:
+        self.__setDirectoryEntryLFNs(result['Value'])
+        self.__restorePaths(result['Value'], lfnMap)
+      yield result
+
+  def iterDirectoryReplicas(self, lfns, allStatus=False, chunkSize=1000, timeout=120):
+    """ Find the given directories' replicas by chunks, see getDirectoryReplicas
+
+        It is a generator of S_OK( Successful/Failed dict ) with the replicas of at most
+        chunkSize files of a directory each.
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    result = checkArgumentFormat(lfns, generateMap=True)
+    if not result['OK']:
+      yield result
+      return
+    lfnDict, lfnMap = result['Value']
+    for result in self.__iterStreamingQuery('getDirectoryReplicas', (lfnDict.keys(), allStatus), chunkSize, timeout):
+      if result['OK']:
+        self.__setDirectoryReplicaLFNs(result['Value'])
+        self.__restorePaths(result['Value'], lfnMap)
+      yield result
+
+  def iterFindFilesByMetadata(self, metaDict, path='/', chunkSize=1000, timeout=120):
+    """ Find files given the meta data query and the path by chunks, see findFilesByMetadata
+
+        It is a generator of S_OK( list of at most chunkSize LFNs ).
+        An S_ERROR is yielded and the iteration stops upon error.
+    """
+    return self.__iterStreamingQuery('findFilesByMetadata', (metaDict, path), chunkSize, timeout)
+
+  def __iterStreamingQuery(self, queryName, args, chunkSize, timeout):
+    """ Generator of the decoded chunks of the result of a query streamed by the service
+    """
+    transferClient = TransferClient(self.serverURL, timeout=timeout)
+    for result in transferClient.receiveChunks((queryName, args, chunkSize)):
+      if result['OK']:
+        result = S_OK(DEncode.decode(result['Value'])[0])
+      yield result
+      if not result['OK']:
+        return
+
+  @staticmethod
+  def __restorePaths(lfnDict, lfnMap):
+    """ Index the Successful and Failed dicts on the paths as given by the caller
+    """
+    if not lfnMap:
+      return
+    for key in ('Successful', 'Failed'):
+      lfnDict[key] = dict((lfnMap.get(lfn, lfn), value) for lfn, value in lfnDict[key].iteritems())
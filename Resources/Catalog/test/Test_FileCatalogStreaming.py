@@ -0,0 +1,213 @@
+""" Test the queries of the FileCatalog whose result is streamed by chunks, from the service to the client
+"""
+
+# pylint: disable=protected-access,missing-docstring
+
+import gzip
+
+from mock import MagicMock, patch
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.DISET.TransferClient import TransferClient
+from DIRAC.Core.DISET.private.FileHelper import FileHelper
+from DIRAC.DataManagementSystem.Service import FileCatalogHandler as handlerModule
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+
+class ServiceTransport(object):
+  """ Records what the service sends, the client acknowledging each packet """
+
+  def __init__(self):
+    self.messages = []
+
+  def sendData(self, data):
+    self.messages.append(data)
+    return S_OK()
+
+  def receiveData(self, maxBufferSize=0):  # pylint: disable=unused-argument
+    return S_OK()
+
+
+class ClientTransport(object):
+  """ Replays to the client what the service sent """
+
+  def __init__(self, messages):
+    self.messages = list(messages)
+
+  def sendData(self, _data):
+    return S_OK()
+
+  def receiveData(self, maxBufferSize=0):  # pylint: disable=unused-argument
+    return self.messages.pop(0)
+
+
+def transfer(fileId, catalogDB):
+  """ Serves the transfer as RequestHandler does, and returns what the client receives """
+  handler = handlerModule.FileCatalogHandler.__new__(handlerModule.FileCatalogHandler)
+  handler.getRemoteCredentials = MagicMock(return_value={'username': 'someone', 'group': 'somegroup'})
+  serviceTransport = ServiceTransport()
+  fileHelper = FileHelper(serviceTransport)
+  fileHelper.setDirection('toClient')
+  with patch.object(handlerModule, 'gFileCatalogDB', catalogDB):
+    result = handler.transfer_toClient(fileId, '', fileHelper)
+  return serviceTransport.messages + [result]
+
+
+def streamingClient(catalogDB, disconnected):
+  """ FileCatalogClient whose transfers are served by the handler """
+  def getTransferClient(*_args, **_kwargs):
+    transferClient = TransferClient.__new__(TransferClient)
+
+    def sendTransferHeader(actionName, fileInfo):
+      assert actionName == 'ToClient'
+      return S_OK((1, ClientTransport(transfer(fileInfo[0], catalogDB))))
+    transferClient._sendTransferHeader = sendTransferHeader
+    transferClient._disconnect = disconnected
+    return transferClient
+  return getTransferClient
+
+
+def chunks(values):
+  def iterValues(*_args, **kwargs):
+    assert kwargs.get('chunkSize', kwargs.get('pageSize')) == 2
+    for value in values:
+      yield value
+  return MagicMock(side_effect=iterValues)
+
+
+@patch('DIRAC.Resources.Catalog.FileCatalogClient.getVOfromProxyGroup', return_value=S_OK('vo'))
+def test_iterReplicas(_mockVO):
+  catalogDB = MagicMock()
+  catalogDB.iterReplicas = chunks([S_OK({'Successful': {'/vo/a': {'SE1': 'pfn'}, '/vo/b': {'SE2': ''}},
+                                         'Failed': {}, 'SEPrefixes': {'SE2': 'srm://se2'}}),
+                                   S_OK({'Successful': {}, 'Failed': {'/vo/c': 'No such file or directory'}})])
+  disconnected = MagicMock()
+  with patch('DIRAC.Resources.Catalog.FileCatalogClient.TransferClient', streamingClient(catalogDB, disconnected)):
+    results = list(FileCatalogClient().iterReplicas(['/vo/a', '/vo/b', 'LFN:/vo/c'], chunkSize=2))
+  assert all(result['OK'] for result in results)
+  assert [result['Value']['Successful'] for result in results] == \
+      [{'/vo/a': {'SE1': 'pfn'}, '/vo/b': {'SE2': 'srm://se2/vo/b'}}, {}]
+  # The paths are those given by the caller
+  assert results[1]['Value']['Failed'] == {'LFN:/vo/c': 'No such file or directory'}
+  lfns, allStatus, _credDict = catalogDB.iterReplicas.call_args[0]
+  assert (sorted(lfns), allStatus) == (['/vo/a', '/vo/b', '/vo/c'], False)
+  disconnected.assert_called_once_with(1)
+
+
+def test_iterListDirectory():
+  catalogDB = MagicMock()
+  catalogDB.iterListDirectory = chunks([S_OK({'Successful': {'/vo/dir': {'Files': {}, 'SubDirs': {'/vo/dir/sub': True},
+                                                                         'Links': {}, 'Datasets': {}}},
+                                              'Failed': {}}),
+                                        S_OK({'Successful': {'/vo/dir': {'Files': {'f1': {}, 'f2': {}}, 'SubDirs': {},
+                                                                         'Links': {}, 'Datasets': {}}},
+                                              'Failed': {}})])
+  with patch('DIRAC.Resources.Catalog.FileCatalogClient.TransferClient', streamingClient(catalogDB, MagicMock())):
+    results = list(FileCatalogClient().iterListDirectory('/vo/dir', chunkSize=2))
+  assert [sorted(result['Value']['Successful']['/vo/dir']['SubDirs']) for result in results] == [['/vo/dir/sub'], []]
+  assert [sorted(result['Value']['Successful']['/vo/dir']['Files']) for result in results] == \
+      [[], ['/vo/dir/f1', '/vo/dir/f2']]
+
+
+def test_iterErrors():
+  catalogDB = MagicMock()
+  catalogDB.fmeta.iterFindFilesByMetadata = chunks([S_OK(['/vo/a', '/vo/b']), S_ERROR('Database gone')])
+  disconnected = MagicMock()
+  with patch('DIRAC.Resources.Catalog.FileCatalogClient.TransferClient', streamingClient(catalogDB, disconnected)):
+    client = FileCatalogClient()
+    results = list(client.iterFindFilesByMetadata({'Meta': 1}, chunkSize=2))
+    assert [result['OK'] for result in results] == [True, False]
+    assert results[0]['Value'] == ['/vo/a', '/vo/b']
+    assert results[1]['Message'] == 'Database gone'
+
+    # Abandoning the iteration closes the connection
+    disconnected.reset_mock()
+    iterator = client.iterFindFilesByMetadata({'Meta': 1}, chunkSize=2)
+    assert next(iterator)['OK']
+    iterator.close()
+    disconnected.assert_called_once_with(1)
+
+    # Unknown query
+    results = list(client._FileCatalogClient__iterStreamingQuery('removeFile', (['/vo/a'],), 2, 120))
+    assert len(results) == 1 and not results[0]['OK']
+
+
+def sePages(rows, failAfter=None):
+  """ iterSEDump of the replicas rows: ( key, lfn, checksum, size ) """
+  def iterSEDump(_seName, lastKey=0, pageSize=10000):
+    remaining = [row for row in rows if row[0] > lastKey]
+    pages = 0
+    while remaining:
+      if pages == failAfter:
+        yield S_ERROR('Database gone')
+        return
+      yield S_OK(remaining[:pageSize])
+      remaining = remaining[pageSize:]
+      pages += 1
+  return MagicMock(side_effect=iterSEDump)
+
+
+class FailingFile(object):
+  """ File whose writes fail after the given number, writing half of the data """
+
+  def __init__(self, fd, failAfter):
+    self.fd = fd
+    self.failAfter = failAfter
+
+  def __getattr__(self, name):
+    return getattr(self.fd, name)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *excInfo):
+    self.fd.close()
+
+  def write(self, data):
+    if not self.failAfter:
+      self.fd.write(data[:len(data) // 2])
+      raise IOError(28, 'No space left on device')
+    self.failAfter -= 1
+    self.fd.write(data)
+
+
+def test_seDump(tmpdir):
+  rows = [(key, '/vo/f%d' % key, 'ad%d' % key, key * 10) for key in (3, 5, 8, 13, 21)]
+  expected = ''.join('/vo/f%d|ad%d|%d\r\n' % (key, key, key * 10) for key in (3, 5, 8, 13, 21))
+  catalogDB = MagicMock()
+
+  # The plain dump as served to getSEDump, page by page
+  catalogDB.iterSEDump = sePages(rows)
+  messages = transfer('SE1', catalogDB)
+  assert ''.join(message['Value'][1] for message in messages if message['Value'] and message['Value'][0]) == expected
+
+  dumpFile = str(tmpdir.join('dump.csv.gz'))
+  disconnected = MagicMock()
+  with patch('DIRAC.Resources.Catalog.FileCatalogClient.TransferClient', streamingClient(catalogDB, disconnected)):
+    client = FileCatalogClient()
+    # The dump fails after 2 pages of 2 replicas, and is resumed
+    catalogDB.iterSEDump = sePages(rows, failAfter=2)
+    result = client.downloadSEDump('SE1', dumpFile, pageSize=2)
+    assert not result['OK'] and result['LastKey'] == 13
+    catalogDB.iterSEDump = sePages(rows)
+    result = client.downloadSEDump('SE1', dumpFile, lastKey=result['LastKey'], pageSize=2)
+    assert result['OK'] and result['Value'] == {'LastKey': 21, 'Replicas': 1}
+    with gzip.open(dumpFile) as dumpFd:
+      assert dumpFd.read() == expected
+
+    # The page that could not be written is not left in the file
+    catalogDB.iterSEDump = sePages(rows)
+    with patch('DIRAC.Resources.Catalog.FileCatalogClient.open', create=True,
+               side_effect=lambda *args: FailingFile(open(*args), 1)):
+      result = client.downloadSEDump('SE1', dumpFile, pageSize=2)
+    assert not result['OK'] and result['LastKey'] == 5
+    catalogDB.iterSEDump = sePages(rows)
+    result = client.downloadSEDump('SE1', dumpFile, lastKey=result['LastKey'], pageSize=2)
+    assert result['OK'] and result['Value'] == {'LastKey': 21, 'Replicas': 3}
+    with gzip.open(dumpFile) as dumpFd:
+      assert dumpFd.read() == expected
+
+    result = client.downloadSEDump('SE1', dumpFile, compressed=False, pageSize=3)
+    assert result['Value'] == {'LastKey': 21, 'Replicas': 5}
+    with open(dumpFile) as dumpFd:
+      assert dumpFd.read() == expected
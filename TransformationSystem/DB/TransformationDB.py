@@ -553,24 +553,21 @@ class TransformationDB(DB):
 
       req = "%s %s" % (req, self.buildCondition(condDict, older, newer, timeStamp, orderAttribute, limit,
                                                 offset=offset))
-    res = self._query(req, connection)
-    if not res['OK']:
-      return res
-
-    transFiles = res['Value']
-    fileIDs = [int(row[1]) for row in transFiles]
     webList = []
     resultList = []
-    if not fileIDs:
-      originalFileIDs = {}
-    else:
-      if not originalFileIDs:
-        res = self.__getLfnsForFileIDs(fileIDs, connection=connection)
+    # Transformations can have millions of files: the rows are read and their LFNs looked up by chunks
+    for res in self._queryIter(req, chunkSize=10000):
+      if not res['OK']:
+        return res
+      transFiles = res['Value']
+      lfnDict = originalFileIDs
+      if not lfnDict:
+        res = self.__getLfnsForFileIDs([int(row[1]) for row in transFiles], connection=connection)
         if not res['OK']:
           return res
-        originalFileIDs = res['Value'][1]
+        lfnDict = res['Value'][1]
       for row in transFiles:
-        lfn = originalFileIDs[row[1]]
+        lfn = lfnDict[row[1]]
         # Prepare the structure for the web
         fDict = {'LFN': lfn}
         fDict.update(dict(zip(self.TRANSFILEPARAMS, row)))
@@ -28,6 +28,7 @@
     setInputData()
 
     insertNewJobIntoDB()
+    insertNewJobsIntoDB()
     removeJobFromDB()
 
     rescheduleJob()
@@ -46,12 +47,13 @@ from six.moves import range
 __RCSID__ = "$Id$"
 
 import operator
+import uuid
 
 from DIRAC.Core.Utilities import DErrno
 from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.Core.Utilities import Time
-from DIRAC.Core.Utilities.DErrno import EWMSSUBM
+from DIRAC.Core.Utilities.DErrno import EWMSSUBM, EWMSJDL
 from DIRAC.Core.Utilities.ObjectLoader import ObjectLoader
 from DIRAC.ConfigurationSystem.Client.Config import gConfig
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getVOForGroup, getVOOption, getGroupOption
@@ -71,6 +73,10 @@ class JobDB(DB):
   """ Interface to MySQL-based JobDB
   """
 
+  # Limits of the multi-row INSERTs of the bulk submission
+  BULK_INSERT_ROWS = 1000
+  BULK_INSERT_SIZE = 1024 * 1024
+
   def __init__(self):
     """ Standard Constructor
     """
@@ -986,29 +992,6 @@ class JobDB(DB):
 
     return result
 
-#############################################################################
-  def __insertNewJDL(self, jdl):
-    """Insert a new JDL in the system, this produces a new JobID
-    """
-
-    err = 'JobDB.__insertNewJDL: Failed to retrieve a new Id.'
-
-    result = self.insertFields('JobJDLs',
-                               ['JDL', 'JobRequirements', 'OriginalJDL'],
-                               ['', '', jdl])
-    if not result['OK']:
-      self.log.error('Can not insert New JDL', result['Message'])
-      return result
-
-    if 'lastRowId' not in result:
-      return S_ERROR('%s' % err)
-
-    jobID = int(result['lastRowId'])
-
-    self.log.info('JobDB: New JobID served "%s"' % jobID)
-
-    return S_OK(jobID)
-
 #############################################################################
   def getJobJDL(self, jobID, original=False, status=''):
     """ Get JDL for job specified by its jobID. By default the current job JDL
@@ -1057,31 +1040,197 @@ class JobDB(DB):
         :param str initialMinorStatus: optional initial minor job status
         :return: new job ID
     """
-    jobManifest = JobManifest()
-    result = jobManifest.load(jdl)
+    result = self.insertNewJobsIntoDB([jdl], owner, ownerDN, ownerGroup, diracSetup,
+                                      initialStatus=initialStatus,
+                                      initialMinorStatus=initialMinorStatus)
     if not result['OK']:
       return result
-    jobManifest.setOptionsFromDict({'OwnerName': owner,
-                                    'OwnerDN': ownerDN,
-                                    'OwnerGroup': ownerGroup,
-                                    'DIRACSetup': diracSetup})
-    result = jobManifest.check()
+    return result['Value'][0]
+
+  def insertNewJobsIntoDB(self, jdlList, owner, ownerDN, ownerGroup, diracSetup,
+                          initialStatus="Received",
+                          initialMinorStatus="Job accepted"):
+    """ Insert several jobs (e.g. the jobs of a parametric submission) in the Job database,
+        same as insertNewJobIntoDB but with multi-row INSERTs in a single transaction:
+        the JobIDs are obtained by inserting all the original JDLs at once.
+
+        :param list jdlList: job description JDLs
+        :param str owner: job owner user name
+        :param str ownerDN: job owner DN
+        :param str ownerGroup: job owner group
+        :param str diracSetup: setup in which context the jobs are submitted
+        :param str initialStatus: optional initial job status (Received by default)
+        :param str initialMinorStatus: optional initial minor job status
+        :return: S_OK with the list of the results of insertNewJobIntoDB for each JDL, in order
+    """
+    # 0.- Load and check all the manifests and JDLs before inserting anything
+    jobManifests = []
+    for jdl in jdlList:
+      jobManifest = JobManifest()
+      result = jobManifest.load(jdl)
+      if not result['OK']:
+        return result
+      jobManifest.setOptionsFromDict({'OwnerName': owner,
+                                      'OwnerDN': ownerDN,
+                                      'OwnerGroup': ownerGroup,
+                                      'DIRACSetup': diracSetup})
+      result = jobManifest.check()
+      if not result['OK']:
+        return result
+      result = self.__checkNewJob(jobManifest, owner, ownerDN, ownerGroup, diracSetup)
+      if not result['OK']:
+        return result
+      jobManifests.append(jobManifest)
+
+    result = self.transactionStart()
     if not result['OK']:
       return result
-    jobAttrNames = []
-    jobAttrValues = []
+    result = self.__insertNewJobs(jdlList, jobManifests, owner, ownerDN, ownerGroup, diracSetup,
+                                  initialStatus, initialMinorStatus)
+    if not result['OK']:
+      self.transactionRollback()
+      return result
+    commitResult = self.transactionCommit()
+    if not commitResult['OK']:
+      return commitResult
+    return result
+
+  def __insertNewJobs(self, jdlList, jobManifests, owner, ownerDN, ownerGroup, diracSetup,
+                      initialStatus, initialMinorStatus):
+    """ Insert the jobs, to be called within a transaction """
 
-    # 1.- insert original JDL on DB and get new JobID
+    # 1.- insert original JDLs on DB and get new JobIDs
     # Fix the possible lack of the brackets in the JDL
-    if jdl.strip()[0].find('[') != 0:
-      jdl = '[' + jdl + ']'
-    result = self.__insertNewJDL(jdl)
+    jdlList = [jdl if jdl.strip()[0].find('[') == 0 else '[' + jdl + ']' for jdl in jdlList]
+    result = self.__insertNewJDLs(jdlList)
     if not result['OK']:
       return S_ERROR(EWMSSUBM, 'Failed to insert JDL in to DB')
-    jobID = result['Value']
+    jobIDs = result['Value']
+
+    # 2.- Check JDLs and Prepare DIRAC JDLs, attributes, parameters and input data of each job
+    jobResults = []
+    jobJDLRows = []
+    jobAttrRows = {}
+    parameterRows = []
+    inputDataRows = []
+    for jobID, jobManifest in zip(jobIDs, jobManifests):
+      jobResult, jobAttrNames, jobAttrValues, jobJDL, parameters, inputData = \
+          self.__prepareNewJob(jobID, jobManifest, owner, ownerDN, ownerGroup, diracSetup,
+                               initialStatus, initialMinorStatus)
+      jobResults.append(jobResult)
+      jobAttrRows.setdefault(tuple(jobAttrNames), []).append(jobAttrValues)
+      # Also replaces the marker of __insertNewJDLs
+      jobJDLRows.append((jobID, jobJDL or '', '', ''))
+      parameterRows.extend((jobID, name, value) for name, value in parameters)
+      inputDataRows.extend((jobID, lfn) for lfn in inputData)
+
+    # 3.- Insert everything with multi-row INSERTs
+    result = self.__insertRows("INSERT INTO JobJDLs (JobID,JDL,JobRequirements,OriginalJDL) VALUES (%s,%s,%s,%s) "
+                               "ON DUPLICATE KEY UPDATE JDL=VALUES(JDL)", jobJDLRows)
+    if not result['OK']:
+      return result
+
+    # Adding the jobs in the Jobs table, jobs with the same attributes together
+    for jobAttrNames, rows in jobAttrRows.iteritems():
+      result = self.__insertRows("INSERT INTO Jobs (%s) VALUES (%s)" % (', '.join(jobAttrNames),
+                                                                          ', '.join(['%s'] * len(jobAttrNames))),
+                                 rows)
+      if not result['OK']:
+        return result
+
+    # Setting the Job parameters
+    result = self.__insertRows("REPLACE JobParameters (JobID,Name,Value) VALUES (%s,%s,%s)", parameterRows)
+    if not result['OK']:
+      return S_ERROR('JobDB.setJobParameters: operation failed.')
+
+    result = self.__insertRows("INSERT INTO InputData (JobID,LFN) VALUES (%s,%s)", inputDataRows)
+    if not result['OK']:
+      return result
 
+    return S_OK(jobResults)
+
+  def __insertNewJDLs(self, jdlList):
+    """ Insert new JDLs in the system, this produces new JobIDs
+
+        The JobIDs of the rows of a multi-row INSERT are not necessarily consecutive
+        (auto_increment_increment > 1, innodb_autoinc_lock_mode=2, Galera...): the rows of
+        each INSERT are marked with a unique JDL, and their JobIDs are read back
+    """
+    jobIDs = []
+    insertID = uuid.uuid4().hex
+    for chunkIndex, chunk in enumerate(self.__chunkRows([('', '', jdl) for jdl in jdlList])):
+      marker = 'Inserting %s.%d' % (insertID, chunkIndex)
+      result = self._updatemany("INSERT INTO JobJDLs (JDL,JobRequirements,OriginalJDL) VALUES (%s,%s,%s)",
+                                [(marker,) + row[1:] for row in chunk])
+      if not result['OK']:
+        self.log.error('Can not insert New JDL', result['Message'])
+        return result
+      if not result.get('lastRowId'):
+        return S_ERROR('JobDB.__insertNewJDLs: Failed to retrieve a new Id.')
+      # The first JobID of an INSERT is the smallest one, the others follow in the order of the rows
+      result = self._query("SELECT JobID FROM JobJDLs WHERE JobID>=%d AND JDL='%s' ORDER BY JobID" %
+                           (int(result['lastRowId']), marker))
+      if not result['OK']:
+        return result
+      if len(result['Value']) != len(chunk):
+        return S_ERROR('JobDB.__insertNewJDLs: Failed to retrieve the new Ids.')
+      jobIDs.extend(int(row[0]) for row in result['Value'])
+
+    self.log.info('JobDB: New JobIDs served "%s-%s"' % (jobIDs[0], jobIDs[-1]))
+
+    return S_OK(jobIDs)
+
+  def __chunkRows(self, rows):
+    """ Split the rows of a multi-row INSERT in chunks of at most BULK_INSERT_ROWS rows
+        and about BULK_INSERT_SIZE bytes
+    """
+    chunks = []
+    chunk = []
+    chunkSize = 0
+    for row in rows:
+      rowSize = sum(len(value) for value in row if isinstance(value, basestring))
+      if chunk and (len(chunk) >= self.BULK_INSERT_ROWS or chunkSize + rowSize > self.BULK_INSERT_SIZE):
+        chunks.append(chunk)
+        chunk = []
+        chunkSize = 0
+      chunk.append(row)
+      chunkSize += rowSize
+    if chunk:
+      chunks.append(chunk)
+    return chunks
+
+  def __insertRows(self, cmd, rows):
+    """ Execute a parameterized INSERT for each row, as multi-row INSERTs of at most
+        BULK_INSERT_ROWS rows and about BULK_INSERT_SIZE bytes
+    """
+    for chunk in self.__chunkRows(rows):
+      result = self._updatemany(cmd, chunk)
+      if not result['OK']:
+        return result
+    return S_OK()
+
+  def __checkNewJob(self, jobManifest, owner, ownerDN, ownerGroup, diracSetup):
+    """ Check the JDL of a new job before anything is inserted, as __prepareNewJob does it
+
+        :return: S_OK, or the S_ERROR of the first problem found
+    """
+    classAdJob = ClassAd(jobManifest.dumpAsJDL().replace('%j', '0'))
+    if not classAdJob.isOK():
+      return S_ERROR(EWMSJDL, 'Error in JDL syntax')
+    return self.__checkAndPrepareJob(0, classAdJob, ClassAd('[]'), owner, ownerDN, ownerGroup, diracSetup)
+
+  def __prepareNewJob(self, jobID, jobManifest, owner, ownerDN, ownerGroup, diracSetup,
+                      initialStatus, initialMinorStatus):
+    """ Prepare the records of a new job, without inserting them
+
+        :return: tuple ( result of insertNewJobIntoDB, attribute names, attribute values,
+                         JDL or None, list of ( name, value ) parameters, list of input LFNs )
+    """
     jobManifest.setOption('JobID', jobID)
 
+    jobAttrNames = []
+    jobAttrValues = []
+
     jobAttrNames.append('JobID')
     jobAttrValues.append(jobID)
 
@@ -1121,21 +1270,22 @@ class JobDB(DB):
       jobAttrNames.append('MinorStatus')
       jobAttrValues.append('Error in JDL syntax')
 
-      result = self.insertFields('Jobs', jobAttrNames, jobAttrValues)
-      if not result['OK']:
-        return result
-
       retVal['Status'] = 'Failed'
       retVal['MinorStatus'] = 'Error in JDL syntax'
-      return retVal
+      return retVal, jobAttrNames, jobAttrValues, None, [], []
 
     classAdJob.insertAttributeInt('JobID', jobID)
     result = self.__checkAndPrepareJob(jobID, classAdJob, classAdReq,
                                        owner, ownerDN,
-                                       ownerGroup, diracSetup,
-                                       jobAttrNames, jobAttrValues)
+                                       ownerGroup, diracSetup)
     if not result['OK']:
-      return result
+      # The job is recorded as failed
+      jobAttrNames.append('Status')
+      jobAttrValues.append(result['Status'])
+
+      jobAttrNames.append('MinorStatus')
+      jobAttrValues.append(result['MinorStatus'])
+      return result, jobAttrNames, jobAttrValues, None, [], []
 
     priority = classAdJob.getAttributeInt('Priority')
     if priority is None:
@@ -1172,55 +1322,24 @@ class JobDB(DB):
 
     jobJDL = classAdJob.asJDL()
 
-    result = self.setJobJDL(jobID, jobJDL)
-    if not result['OK']:
-      return result
-
-    # Adding the job in the Jobs table
-    result = self.insertFields('Jobs', jobAttrNames, jobAttrValues)
-    if not result['OK']:
-      return result
-
-    # Setting the Job parameters
-    result = self.__setInitialJobParameters(classAdJob, jobID)
-    if not result['OK']:
-      return result
+    # Initial job parameters as defined in the Classad
+    parameters = []
+    if classAdJob.lookupAttribute("Parameters"):
+      parameters = list(classAdJob.getDictionaryFromSubJDL("Parameters").items())
 
     # Looking for the Input Data
     inputData = []
     if classAdJob.lookupAttribute('InputData'):
-      inputData = classAdJob.getListFromExpression('InputData')
-    values = []
-
-    ret = self._escapeString(jobID)
-    if not ret['OK']:
-      return ret
-    e_jobID = ret['Value']
-
-    for lfn in inputData:
       # some jobs are setting empty string as InputData
-      if not lfn:
-        continue
-      ret = self._escapeString(lfn.strip())
-      if not ret['OK']:
-        return ret
-      lfn = ret['Value']
-
-      values.append('(%s, %s )' % (e_jobID, lfn))
-
-    if values:
-      cmd = 'INSERT INTO InputData (JobID,LFN) VALUES %s' % ', '.join(values)
-      result = self._update(cmd)
-      if not result['OK']:
-        return result
+      inputData = [lfn.strip() for lfn in classAdJob.getListFromExpression('InputData') if lfn]
 
     retVal['Status'] = initialStatus
     retVal['MinorStatus'] = initialMinorStatus
 
-    return retVal
+    return retVal, jobAttrNames, jobAttrValues, jobJDL, parameters, inputData
 
   def __checkAndPrepareJob(self, jobID, classAdJob, classAdReq, owner, ownerDN,
-                           ownerGroup, diracSetup, jobAttrNames, jobAttrValues):
+                           ownerGroup, diracSetup):
     """
       Check Consistency of Submitted JDL and set some defaults
       Prepare subJDL with Job Requirements
@@ -1304,16 +1423,6 @@ class JobDB(DB):
       retVal['JobId'] = jobID
       retVal['Status'] = 'Failed'
       retVal['MinorStatus'] = error
-
-      jobAttrNames.append('Status')
-      jobAttrValues.append('Failed')
-
-      jobAttrNames.append('MinorStatus')
-      jobAttrValues.append(error)
-      resultInsert = self.setJobAttributes(jobID, jobAttrNames, jobAttrValues)
-      if not resultInsert['OK']:
-        retVal['MinorStatus'] += '; %s' % resultInsert['Message']
-
       return retVal
 
     return S_OK()
@@ -1460,10 +1569,17 @@ class JobDB(DB):
     classAdJob.insertAttributeInt('JobID', jobID)
     result = self.__checkAndPrepareJob(jobID, classAdJob, classAdReq, resultDict['Owner'],
                                        resultDict['OwnerDN'], resultDict['OwnerGroup'],
-                                       resultDict['DIRACSetup'],
-                                       jobAttrNames, jobAttrValues)
+                                       resultDict['DIRACSetup'])
 
     if not result['OK']:
+      jobAttrNames.append('Status')
+      jobAttrValues.append(result['Status'])
+
+      jobAttrNames.append('MinorStatus')
+      jobAttrValues.append(result['MinorStatus'])
+      resultInsert = self.setJobAttributes(jobID, jobAttrNames, jobAttrValues)
+      if not resultInsert['OK']:
+        result['MinorStatus'] += '; %s' % resultInsert['Message']
       return result
 
     priority = classAdJob.getAttributeInt('Priority')
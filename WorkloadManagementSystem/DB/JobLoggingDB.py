@@ -2,6 +2,7 @@
     The following methods are provided
 
     addLoggingRecord()
+    addLoggingRecords()
     getJobLoggingInfo()
     deleteJob()
     getWMSTimeStamps()
@@ -53,6 +54,42 @@ class JobLoggingDB(DB):
     event = 'status/minor/app=%s/%s/%s' % (status, minor, application)
     self.gLogger.info("Adding record for job " + str(jobID) + ": '" + event + "' from " + source)
 
+    _date, time_order = self.__getDateAndTimeOrder(date)
+
+    cmd = "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, " + \
+          "StatusTime, StatusTimeOrder, StatusSource) VALUES (%d,'%s','%s','%s','%s',%f,'%s')" % \
+        (int(jobID), status, minor, application[:255],
+         str(_date), time_order, source)
+
+    return self._update(cmd)
+
+#############################################################################
+  def addLoggingRecords(self,
+                        jobIDs,
+                        status='idem',
+                        minor='idem',
+                        application='idem',
+                        date='',
+                        source='Unknown'):
+    """ Add the same entry for several jobs with a single multi-row INSERT,
+        e.g. for the jobs of a bulk submission. See addLoggingRecord
+    """
+    if not jobIDs:
+      return S_OK(0)
+
+    event = 'status/minor/app=%s/%s/%s' % (status, minor, application)
+    self.gLogger.info("Adding record for %d jobs: '%s' from %s" % (len(jobIDs), event, source))
+
+    _date, time_order = self.__getDateAndTimeOrder(date)
+
+    cmd = "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, " + \
+          "StatusTime, StatusTimeOrder, StatusSource) VALUES (%s,%s,%s,%s,%s,%s,%s)"
+    return self._updatemany(cmd, [(int(jobID), status, minor, application[:255], str(_date), time_order, source)
+                                  for jobID in jobIDs])
+
+  def __getDateAndTimeOrder(self, date):
+    """ UTC datetime and StatusTimeOrder of a logging record
+    """
     if not date:
       # Make the UTC datetime string and float
       _date = Time.dateTime()
@@ -81,12 +118,7 @@ class JobLoggingDB(DB):
         epoc = time.mktime(_date.timetuple()) - MAGIC_EPOC_NUMBER
         time_order = round(epoc, 3)
 
-    cmd = "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, " + \
-          "StatusTime, StatusTimeOrder, StatusSource) VALUES (%d,'%s','%s','%s','%s',%f,'%s')" % \
-        (int(jobID), status, minor, application[:255],
-         str(_date), time_order, source)
-
-    return self._update(cmd)
+    return _date, time_order
 
 #############################################################################
   def getJobLoggingInfo(self, jobID):
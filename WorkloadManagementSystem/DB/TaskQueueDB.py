@@ -5,6 +5,8 @@ __RCSID__ = "$Id"
 
 import random
 import string
+import threading
+import time
 
 from DIRAC import gConfig, S_OK, S_ERROR
 from DIRAC.Core.Base.DB import DB
@@ -14,6 +16,7 @@ from DIRAC.Core.Utilities.DictCache import DictCache
 from DIRAC.Core.Security import Properties, CS
 from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
 from DIRAC.WorkloadManagementSystem.private.SharesCorrector import SharesCorrector
+from DIRAC.WorkloadManagementSystem.private.TaskQueueIndex import TaskQueueIndex
 
 DEFAULT_GROUP_SHARE = 1000
 TQ_MIN_SHARE = 0.001
@@ -59,6 +62,12 @@ class TaskQueueDB(DB):
     self.__opsHelper = Operations()
     self.__ensureInsertionIsSingle = False
     self.__sharesCorrector = SharesCorrector(self.__opsHelper)
+    # In-memory index of the task queues, loaded at the first match
+    self.__tqIndex = TaskQueueIndex(singleValueDefFields, multiValueMatchFields, bannedJobMatchFields)
+    self.__tqIndexLock = threading.Lock()
+    self.__tqIndexLastTQId = None
+    self.__tqIndexLastUpdate = 0
+    self.__tqIndexLastReload = 0
     result = self.__initializeDB()
     if not result['OK']:
       raise Exception("Can't create tables: %s" % result['Message'])
@@ -85,6 +94,92 @@ class TaskQueueDB(DB):
   def getValidPilotTypes(self):
     return self.__getCSOption("AllPilotTypes", ['private'])
 
+  def __loadTaskQueuesForIndex(self, sqlCond=""):
+    """ Get the definition of the task queues, for the index
+
+        :param str sqlCond: condition on the TQId of the task queues to load
+        :returns: S_OK( { tqId : tqDefDict } ) / S_ERROR, tqDefDict also contains the Priority and Enabled fields
+    """
+    if sqlCond:
+      sqlCond = "WHERE %s" % sqlCond
+    fields = ['TQId', 'Priority', 'Enabled'] + list(singleValueDefFields)
+    result = self._query("SELECT %s FROM `tq_TaskQueues` %s" % (", ".join(fields), sqlCond))
+    if not result['OK']:
+      return result
+    tqDefs = {}
+    for record in result['Value']:
+      tqDefs[record[0]] = dict(zip(fields[1:], record[1:]))
+    if not tqDefs:
+      return S_OK(tqDefs)
+    sqlCmd = " UNION ALL ".join(["SELECT '%s', TQId, Value FROM `tq_TQTo%s` %s" % (field, field, sqlCond)
+                                 for field in multiValueDefFields])
+    result = self._query(sqlCmd)
+    if not result['OK']:
+      return result
+    for field, tqId, value in result['Value']:
+      if tqId in tqDefs:
+        tqDefs[tqId].setdefault(field, []).append(value)
+    return S_OK(tqDefs)
+
+  def __updateTQIndex(self):
+    """ Bring the index of the task queues up to date: the task queues created by other processes
+        are loaded every TaskQueueIndexUpdatePeriod seconds, and the whole index is reloaded every
+        TaskQueueIndexReloadPeriod seconds to forget the task queues other processes deleted.
+        The changes done by this process are applied to the index as they happen.
+    """
+    now = time.time()
+    loaded = self.__tqIndexLastTQId is not None
+    if loaded and now - self.__tqIndexLastUpdate < self.__getCSOption("TaskQueueIndexUpdatePeriod", 2):
+      return S_OK()
+    # Only one thread updates the index, the others keep matching with the current one
+    if not self.__tqIndexLock.acquire(not loaded):
+      return S_OK()
+    try:
+      fullReload = self.__tqIndexLastTQId is None or \
+          now - self.__tqIndexLastReload >= self.__getCSOption("TaskQueueIndexReloadPeriod", 120)
+      if not fullReload and now - self.__tqIndexLastUpdate < self.__getCSOption("TaskQueueIndexUpdatePeriod", 2):
+        return S_OK()
+      if fullReload:
+        result = self.__loadTaskQueuesForIndex()
+      else:
+        result = self.__loadTaskQueuesForIndex("TQId > %d" % self.__tqIndexLastTQId)
+      if not result['OK']:
+        return result
+      tqDefs = result['Value']
+      # New task queues are disabled until their job is inserted, and they may not be complete yet
+      knownTQIds = self.__tqIndex.getTaskQueueIds()
+      incompleteTQIds = [tqId for tqId in tqDefs if tqDefs[tqId]['Enabled'] < 1 and tqId not in knownTQIds]
+      for tqId in incompleteTQIds:
+        tqDefs.pop(tqId)
+      if incompleteTQIds:
+        lastTQId = min(incompleteTQIds) - 1
+      else:
+        lastTQId = max(tqDefs.keys() + [self.__tqIndexLastTQId or 0])
+      if fullReload:
+        self.__tqIndex.reset(tqDefs)
+        self.__tqIndexLastReload = now
+        self.log.info("Loaded %s task queues in the index" % len(tqDefs))
+      else:
+        for tqId, tqDefDict in tqDefs.iteritems():
+          self.__tqIndex.setTaskQueue(tqId, tqDefDict)
+      self.__tqIndexLastTQId = lastTQId
+      self.__tqIndexLastUpdate = now
+    finally:
+      self.__tqIndexLock.release()
+    return S_OK()
+
+  def __addToTQIndex(self, tqId):
+    """ Load in the index a task queue created by this process, if the index is used
+    """
+    if self.__tqIndexLastTQId is None:
+      return
+    result = self.__loadTaskQueuesForIndex("TQId = %d" % tqId)
+    if not result['OK']:
+      self.log.warn("Could not add TQ %s to the index" % tqId, result['Message'])
+      return
+    if tqId in result['Value']:
+      self.__tqIndex.setTaskQueue(tqId, result['Value'][tqId])
+
   def __initializeDB(self):
     """
     Create the tables
@@ -313,6 +408,8 @@ class TaskQueueDB(DB):
         "DELETE FROM `tq_TaskQueues` WHERE TQId in ( %s )" % ','.join(orphanedTQs), conn=connObj)
     if not result['OK']:
       return result
+    for otq in orphanedTQs:
+      self.__tqIndex.removeTaskQueue(int(otq))
     return S_OK()
 
   def __setTaskQueueEnabled(self, tqId, enabled=True, connObj=False):
@@ -388,6 +485,8 @@ class TaskQueueDB(DB):
         self.recalculateTQSharesForEntity(tqDefDict['OwnerDN'], tqDefDict['OwnerGroup'], connObj=connObj)
     finally:
       self.__setTaskQueueEnabled(tqId, True)
+      if newTQ:
+        self.__addToTQIndex(tqId)
     return S_OK()
 
   def __insertJobInTaskQueue(self, jobId, tqId, jobPriority, checkTQExists=True, connObj=False):
@@ -509,6 +608,7 @@ ORDER BY COUNT( `tq_Jobs`.JobID ) ASC" % (sqlCmd, result['Value'])
       negativeCond = {}
     # Make a copy to avoid modification of original if escaping needs to be done
     tqMatchDict = dict(tqMatchDict)
+    resourceDict = dict(tqMatchDict)
     retVal = self._checkMatchDefinition(tqMatchDict)
     if not retVal['OK']:
       self.log.error("TQ match request check failed", retVal['Message'])
@@ -526,17 +626,15 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
       noJobsFound = False
       if 'JobID' in tqMatchDict:
         # A certain JobID is required by the resource, so all TQ are to be considered
-        retVal = self.matchAndGetTaskQueue(tqMatchDict,
-                                           numQueuesToGet=0,
-                                           skipMatchDictDef=True,
-                                           connObj=connObj)
+        retVal = self.__matchTaskQueues(resourceDict, tqMatchDict,
+                                        numQueuesToGet=0,
+                                        connObj=connObj)
         preJobSQL = "%s AND `tq_Jobs`.JobId = %s " % (preJobSQL, tqMatchDict['JobID'])
       else:
-        retVal = self.matchAndGetTaskQueue(tqMatchDict,
-                                           numQueuesToGet=numQueuesPerTry,
-                                           skipMatchDictDef=True,
-                                           negativeCond=negativeCond,
-                                           connObj=connObj)
+        retVal = self.__matchTaskQueues(resourceDict, tqMatchDict,
+                                        numQueuesToGet=numQueuesPerTry,
+                                        negativeCond=negativeCond,
+                                        connObj=connObj)
       if not retVal['OK']:
         return retVal
       tqList = retVal['Value']
@@ -587,9 +685,12 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
     # Make a copy to avoid modification of original if escaping needs to be done
     tqMatchDict = dict(tqMatchDict)
     if not skipMatchDictDef:
+      resourceDict = dict(tqMatchDict)
       retVal = self._checkMatchDefinition(tqMatchDict)
       if not retVal['OK']:
         return retVal
+      return self.__matchTaskQueues(resourceDict, tqMatchDict, numQueuesToGet=numQueuesToGet,
+                                    negativeCond=negativeCond, connObj=connObj)
     retVal = self.__generateTQMatchSQL(tqMatchDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
     if not retVal['OK']:
       return retVal
@@ -599,6 +700,21 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
       return retVal
     return S_OK([(row[0], row[1], row[2]) for row in retVal['Value']])
 
+  def __matchTaskQueues(self, resourceDict, tqMatchDict, numQueuesToGet=1, negativeCond=None, connObj=False):
+    """ Get the queues that match the requirements, from the index of the task queues
+        unless JobScheduling/UseTaskQueueIndex is disabled
+
+        :param dict resourceDict: checked match definition
+        :param dict tqMatchDict: the same, with the values escaped for the SQL match
+    """
+    if self.__getCSOption("UseTaskQueueIndex", True):
+      result = self.__updateTQIndex()
+      if result['OK']:
+        return self.__tqIndex.match(resourceDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
+      self.log.warn("Could not update the task queue index, matching in the DB", result['Message'])
+    return self.matchAndGetTaskQueue(tqMatchDict, numQueuesToGet=numQueuesToGet, skipMatchDictDef=True,
+                                     negativeCond=negativeCond, connObj=connObj)
+
   @staticmethod
   def __generateSQLSubCond(sqlString, value, boolOp='OR'):
     if not isinstance(value, (list, tuple)):
@@ -992,6 +1108,7 @@ WHERE j.JobId = %s AND t.TQId = j.TQId" %
       retVal = self._update("DELETE FROM `tq_TaskQueues` WHERE TQId = %s" % tqId, conn=connObj)
       if not retVal['OK']:
         return retVal
+      self.__tqIndex.removeTaskQueue(tqId)
       self.recalculateTQSharesForEntity(tqOwnerDN, tqOwnerGroup, connObj=connObj)
       self.log.info("Deleted empty and enabled TQ %s" % tqId)
       return S_OK()
@@ -1029,6 +1146,7 @@ WHERE j.JobId = %s AND t.TQId = j.TQId" %
       if not retVal['OK']:
         return retVal
     if delTQ > 0:
+      self.__tqIndex.removeTaskQueue(tqId)
       self.recalculateTQSharesForEntity(tqOwnerDN, tqOwnerGroup, connObj=connObj)
       return S_OK(True)
     return S_OK(False)
@@ -1273,6 +1391,7 @@ FROM `tq_TaskQueues` t, `tq_Jobs` j WHERE "
       tqList = ", ".join([str(tqId) for tqId in prioDict[prio]])
       updateSQL = "UPDATE `tq_TaskQueues` SET Priority=%.4f WHERE TQId in ( %s )" % (prio, tqList)
       self._update(updateSQL, conn=connObj)
+      self.__tqIndex.setPriority(prioDict[prio], float("%.4f" % prio))
     return S_OK()
 
   @staticmethod
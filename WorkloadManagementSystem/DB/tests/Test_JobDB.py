@@ -34,3 +34,26 @@ class JobDBTest( unittest.TestCase ):
     print result
     self.assertTrue( result['OK'] )
     self.assertEqual( result['Value'], [ '/vo/user/lfn1', '/vo/user/lfn2' ] )
+
+  def test_insertNewJDLs( self ):
+    # Galera: the JobIDs of a multi-row INSERT go by 3
+    self.jobDB.BULK_INSERT_ROWS = 2
+    inserted = []
+    def updatemany( cmd, rows ):
+      inserted.append( rows )
+      return { 'OK' : True, 'Value' : len( rows ), 'lastRowId' : 10 * len( inserted ) }
+    self.jobDB._updatemany = MagicMock( side_effect = updatemany )
+    jobIDs = { '10' : [ ( 10, ), ( 13, ) ], '20' : [ ( 20, ) ] }
+    self.jobDB._query.side_effect = lambda cmd: S_OK( jobIDs[cmd.split( '>=' )[1].split()[0]] )
+    result = self.jobDB._JobDB__insertNewJDLs( [ 'jdl1', 'jdl2', 'jdl3' ] )
+    self.assertTrue( result['OK'] )
+    self.assertEqual( result['Value'], [ 10, 13, 20 ] )
+    # Each INSERT is marked
+    self.assertEqual( [ row[2] for rows in inserted for row in rows ], [ 'jdl1', 'jdl2', 'jdl3' ] )
+    self.assertNotEqual( inserted[0][0][0], inserted[1][0][0] )
+    self.assertIn( "JDL='%s'" % inserted[1][0][0], self.jobDB._query.call_args[0][0] )
+
+    # Rows of another INSERT cannot be taken for ours
+    self.jobDB._query.side_effect = None
+    self.jobDB._query.return_value = S_OK( [ ( 10, ) ] )
+    self.assertFalse( self.jobDB._JobDB__insertNewJDLs( [ 'jdl1', 'jdl2' ] )['OK'] )
@@ -176,35 +176,52 @@ class JobManagerHandler(RequestHandler):
       initialStatus = 'Received'
       initialMinorStatus = 'Job accepted'
 
-    for jobDescription in jobDescList:  # jobDescList because there might be a list generated by a parametric job
-      result = gJobDB.insertNewJobIntoDB(jobDescription,
-                                         self.owner,
-                                         self.ownerDN,
-                                         self.ownerGroup,
-                                         self.diracSetup,
-                                         initialStatus=initialStatus,
-                                         initialMinorStatus=initialMinorStatus)
-      if not result['OK']:
-        return result
+    # jobDescList because there might be a list generated by a parametric job, inserted all at once
+    result = gJobDB.insertNewJobsIntoDB(jobDescList,
+                                        self.owner,
+                                        self.ownerDN,
+                                        self.ownerGroup,
+                                        self.diracSetup,
+                                        initialStatus=initialStatus,
+                                        initialMinorStatus=initialMinorStatus)
+    if not result['OK']:
+      return result
 
-      jobID = result['JobID']
-      gLogger.info('Job %s added to the JobDB for %s/%s' % (jobID, self.ownerDN, self.ownerGroup))
+    # The jobs are checked before anything is inserted, those failing nevertheless are recorded as Failed
+    jobsByStatus = {}
+    failedResult = None
+    for jobResult in result['Value']:
+      jobID = jobResult.get('JobID', jobResult.get('JobId'))
+      jobsByStatus.setdefault((jobResult['Status'], jobResult['MinorStatus']), []).append(jobID)
+      if not jobResult['OK']:
+        failedResult = failedResult or jobResult
+        continue
+      jobIDList.append(jobID)
+    gLogger.info('Jobs %s added to the JobDB for %s/%s' % (','.join(str(jobID) for jobID in jobIDList),
+                                                           self.ownerDN, self.ownerGroup))
 
-      gJobLoggingDB.addLoggingRecord(jobID, result['Status'], result['MinorStatus'], source='JobManager')
+    for (status, minorStatus), jobIDs in jobsByStatus.iteritems():
+      gJobLoggingDB.addLoggingRecords(jobIDs, status, minorStatus, source='JobManager')
 
-      jobIDList.append(jobID)
+    if not jobIDList:
+      return failedResult
 
     # Set persistency flag
     retVal = gProxyManager.getUserPersistence(self.ownerDN, self.ownerGroup)
     if 'Value' not in retVal or not retVal['Value']:
       gProxyManager.setPersistency(self.ownerDN, self.ownerGroup, True)
 
-    if parametricJob:
+    if failedResult:
+      # The inserted jobs are returned with the failure, so that they can still be confirmed
+      result = failedResult
+      result['JobID'] = jobIDList
+    elif parametricJob:
       result = S_OK(jobIDList)
+      result['JobID'] = result['Value']
     else:
       result = S_OK(jobIDList[0])
+      result['JobID'] = result['Value']
 
-    result['JobID'] = result['Value']
     result['requireProxyUpload'] = self.__checkIfProxyUploadIsRequired()
     # Ensure non-parametric jobs (i.e. non-bulk) get sent to optimizer immediately
     if not parametricJob:
@@ -0,0 +1,270 @@
+""" In-memory index of the task queues, to match resources without querying the TaskQueueDB
+
+    Matching a resource in the DB needs a subquery per requirement of the task queues
+    (sites, platforms, tags, banned sites...) for every pilot. The index keeps, for each
+    value of each task queue field, the set of task queues having that value, so that the
+    task queues matching a resource are found with set intersections and differences.
+    The DB is then only used to pop a job from the matched task queues.
+
+    The matching rules are the ones of the SQL generated by the TaskQueueDB. Like in the
+    MySQL columns they come from, values are compared case insensitively.
+"""
+
+__RCSID__ = "$Id$"
+
+import heapq
+import random
+import re
+import string
+import threading
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.Security import Properties, CS
+
+_punctuationRE = re.compile("[%s]" % re.escape(string.punctuation))
+
+
+def _toList(value):
+  if isinstance(value, (list, tuple, set)):
+    return list(value)
+  return [value]
+
+
+def _normalize(value):
+  if isinstance(value, basestring):
+    return value.lower()
+  return value
+
+
+def _isAny(values):
+  """ Whether one of the values of a resource means "whatever the task queue requires" """
+  return any(isinstance(value, basestring) and _punctuationRE.sub('', value).lower() == 'any'
+             for value in values)
+
+
+class TaskQueueIndex(object):
+
+  def __init__(self, singleValueDefFields, multiValueMatchFields, bannedJobMatchFields):
+    """
+      :param tuple singleValueDefFields: single value fields of the task queues
+      :param tuple multiValueMatchFields: resource fields matched against the tq_TQTo<field>s values
+      :param tuple bannedJobMatchFields: resource fields also matched against the tq_TQToBanned<field>s values
+    """
+    self.__singleValueDefFields = singleValueDefFields
+    self.__multiValueMatchFields = multiValueMatchFields
+    self.__bannedJobMatchFields = bannedJobMatchFields
+    self.__lock = threading.Lock()
+    # tqId -> { 'OwnerDN', 'OwnerGroup', 'CPUTime', 'Priority', 'Values' : { field : set of normalized values } }
+    self.__taskQueues = {}
+    # field -> normalized value -> set of tqIds
+    self.__tqIdsByValue = {}
+    # field -> set of tqIds having at least a value
+    self.__tqIdsWithField = {}
+
+  def __len__(self):
+    return len(self.__taskQueues)
+
+  def getTaskQueueIds(self):
+    with self.__lock:
+      return set(self.__taskQueues)
+
+  def reset(self, tqDefs):
+    """ Replace the content of the index
+
+        :param dict tqDefs: { tqId : task queue definition }, see setTaskQueue
+    """
+    with self.__lock:
+      self.__taskQueues = {}
+      self.__tqIdsByValue = {}
+      self.__tqIdsWithField = {}
+      for tqId, tqDef in tqDefs.iteritems():
+        self.__addTaskQueue(tqId, tqDef)
+
+  def setTaskQueue(self, tqId, tqDef):
+    """ Add or replace a task queue
+
+        :param int tqId: task queue ID
+        :param dict tqDef: the single value fields and the Priority of the task queue,
+                           and the list of values of its multi value fields
+    """
+    with self.__lock:
+      self.__removeTaskQueue(tqId)
+      self.__addTaskQueue(tqId, tqDef)
+
+  def removeTaskQueue(self, tqId):
+    with self.__lock:
+      self.__removeTaskQueue(tqId)
+
+  def setPriority(self, tqIdList, priority):
+    with self.__lock:
+      for tqId in tqIdList:
+        if tqId in self.__taskQueues:
+          self.__taskQueues[tqId]['Priority'] = priority
+
+  def __addTaskQueue(self, tqId, tqDef):
+    values = {}
+    for field, fieldValues in tqDef.iteritems():
+      if field in ('Priority', 'Enabled'):
+        continue
+      fieldValues = set([_normalize(value) for value in _toList(fieldValues)])
+      if not fieldValues:
+        continue
+      values[field] = fieldValues
+      self.__tqIdsWithField.setdefault(field, set()).add(tqId)
+      byValue = self.__tqIdsByValue.setdefault(field, {})
+      for value in fieldValues:
+        byValue.setdefault(value, set()).add(tqId)
+    self.__taskQueues[tqId] = {'OwnerDN': tqDef['OwnerDN'],
+                               'OwnerGroup': tqDef['OwnerGroup'],
+                               'CPUTime': tqDef['CPUTime'],
+                               'Priority': tqDef.get('Priority', 1),
+                               'Values': values}
+
+  def __removeTaskQueue(self, tqId):
+    tqData = self.__taskQueues.pop(tqId, None)
+    if not tqData:
+      return
+    for field, fieldValues in tqData['Values'].iteritems():
+      self.__tqIdsWithField[field].discard(tqId)
+      byValue = self.__tqIdsByValue[field]
+      for value in fieldValues:
+        byValue[value].discard(tqId)
+        if not byValue[value]:
+          del byValue[value]
+
+  def __withValue(self, field, value):
+    return self.__tqIdsByValue.get(field, {}).get(_normalize(value), set())
+
+  def __withAnyValue(self, field, values):
+    """ Task queues having at least one of the values for field """
+    tqIds = set()
+    for value in values:
+      tqIds |= self.__withValue(field, value)
+    return tqIds
+
+  def __withAllValues(self, field, values):
+    """ Task queues having all the values for field """
+    tqIds = None
+    for value in values:
+      if tqIds is None:
+        tqIds = set(self.__withValue(field, value))
+      else:
+        tqIds &= self.__withValue(field, value)
+    return tqIds or set()
+
+  def __withOtherValues(self, field, values):
+    """ Task queues having a value for field that is not one of values """
+    values = set([_normalize(value) for value in values])
+    tqIds = set()
+    for value, valueTQIds in self.__tqIdsByValue.get(field, {}).iteritems():
+      if value not in values:
+        tqIds |= valueTQIds
+    return tqIds
+
+  def match(self, resourceDict, numQueuesToGet=1, negativeCond=None):
+    """ Get the task queues matching a resource, ordered randomly according to their priority
+
+        :param dict resourceDict: match definition, the same as for TaskQueueDB.matchAndGetTaskQueue
+        :param int numQueuesToGet: maximum number of task queues to return, 0 for all of them
+        :param negativeCond: conditions the task queues must not fulfil, dict or list of dicts
+        :returns: S_OK( [ ( tqId, OwnerDN, OwnerGroup ) ] ) / S_ERROR
+    """
+    with self.__lock:
+      result = self.__getMatchingTaskQueues(resourceDict, negativeCond)
+      if not result['OK']:
+        return result
+      # The equivalent of ORDER BY RAND() / Priority
+      ordered = [(random.random() / max(self.__taskQueues[tqId]['Priority'], 1e-9), tqId)
+                 for tqId in result['Value']]
+      if numQueuesToGet:
+        ordered = heapq.nsmallest(numQueuesToGet, ordered)
+      else:
+        ordered.sort()
+      return S_OK([(tqId, self.__taskQueues[tqId]['OwnerDN'], self.__taskQueues[tqId]['OwnerGroup'])
+                   for _, tqId in ordered])
+
+  def __getMatchingTaskQueues(self, resourceDict, negativeCond):
+    tqIds = set(self.__taskQueues)
+
+    # If OwnerDN and OwnerGroup are defined only use those combinations that make sense
+    if 'OwnerDN' in resourceDict and 'OwnerGroup' in resourceDict:
+      ownerTQIds = set()
+      dnTQIds = self.__withAnyValue('OwnerDN', _toList(resourceDict['OwnerDN']))
+      for group in _toList(resourceDict['OwnerGroup']):
+        if Properties.JOB_SHARING in CS.getPropertiesForGroup(group):
+          ownerTQIds |= self.__withValue('OwnerGroup', group)
+        else:
+          ownerTQIds |= self.__withValue('OwnerGroup', group) & dnTQIds
+      tqIds &= ownerTQIds
+    else:
+      for field in ('OwnerGroup', 'OwnerDN'):
+        if field in resourceDict:
+          tqIds &= self.__withAnyValue(field, _toList(resourceDict[field]))
+    if 'Setup' in resourceDict:
+      tqIds &= self.__withAnyValue('Setup', _toList(resourceDict['Setup']))
+    if resourceDict.get('CPUTime'):
+      cpuTime = max(_toList(resourceDict['CPUTime']))
+      tqIds = set([tqId for tqId in tqIds if self.__taskQueues[tqId]['CPUTime'] <= cpuTime])
+
+    # The tags of the task queue must all be provided by the resource
+    tags = []
+    if 'Tag' in resourceDict or 'RequiredTag' not in resourceDict:
+      tags = _toList(resourceDict.get('Tag', []))
+      if not _isAny(tags):
+        tqIds -= self.__withOtherValues('Tags', tags)
+
+    for field in self.__multiValueMatchFields:
+      if field == 'Tag':
+        continue
+      if not resourceDict.get(field) or _isAny(_toList(resourceDict[field])):
+        continue
+      values = _toList(resourceDict[field])
+      # Task queues either without requirement or with one of the values
+      tqField = '%ss' % field
+      tqIds -= self.__tqIdsWithField.get(tqField, set()) - self.__withAnyValue(tqField, values)
+      # and where not all the values are banned
+      if field in self.__bannedJobMatchFields:
+        tqIds -= self.__withAllValues('Banned%ss' % field, values)
+
+    # The tags required by the resource must all be in the task queue
+    requiredTags = _toList(resourceDict.get('RequiredTag', []))
+    if requiredTags and not _isAny(requiredTags):
+      if not set(requiredTags).issubset(set(tags)):
+        return S_ERROR('Wrong conditions')
+      tqIds &= self.__withAllValues('Tags', requiredTags)
+
+    # Resource banning conditions
+    for field in self.__multiValueMatchFields:
+      bannedField = "Banned%s" % field
+      if not resourceDict.get(bannedField) or _isAny(_toList(resourceDict[bannedField])):
+        continue
+      tqIds -= self.__withAllValues('%ss' % field, _toList(resourceDict[bannedField]))
+
+    if negativeCond:
+      result = self.__getExcludedTaskQueues(negativeCond)
+      if not result['OK']:
+        return result
+      tqIds -= result['Value']
+    return S_OK(tqIds)
+
+  def __getExcludedTaskQueues(self, negativeCond):
+    """ Task queues excluded by negative conditions. A condition dict is fulfilled if, for one
+        of its fields, the task queue has none of the values. A list of dicts is fulfilled if
+        one of the dicts is.
+    """
+    if isinstance(negativeCond, dict):
+      negativeCond = [negativeCond]
+    elif not isinstance(negativeCond, (list, tuple)):
+      return S_ERROR("negativeCond has to be either a list or a dict or a tuple, and it's %s" % type(negativeCond))
+    excluded = None
+    for condDict in negativeCond:
+      for field, values in condDict.iteritems():
+        if field in self.__multiValueMatchFields:
+          failing = [self.__withAnyValue('%ss' % field, _toList(values))]
+        elif field in self.__singleValueDefFields:
+          failing = [self.__withValue(field, value) for value in _toList(values)]
+        else:
+          continue
+        for tqIds in failing:
+          excluded = set(tqIds) if excluded is None else excluded & tqIds
+    return S_OK(excluded or set())
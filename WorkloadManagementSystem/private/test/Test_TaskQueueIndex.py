@@ -0,0 +1,108 @@
+""" Test the in-memory index of the task queues, with the cases of the TaskQueueDB integration test """
+
+# pylint: disable=missing-docstring
+
+from mock import patch
+from pytest import fixture
+
+from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import singleValueDefFields, multiValueMatchFields, \
+    bannedJobMatchFields
+from DIRAC.WorkloadManagementSystem.private.TaskQueueIndex import TaskQueueIndex
+
+BASE_DEF = {'OwnerDN': '/my/DN', 'OwnerGroup': 'user', 'Setup': 'aSetup', 'CPUTime': 86400, 'Priority': 1.}
+BASE_MATCH = {'Setup': 'aSetup', 'CPUTime': 9999999}
+
+
+def tqDef(**fields):
+  definition = dict(BASE_DEF)
+  definition.update(fields)
+  return definition
+
+
+def match(tqIndex, **fields):
+  resourceDict = dict(BASE_MATCH)
+  negativeCond = fields.pop('negativeCond', None)
+  resourceDict.update(fields)
+  result = tqIndex.match(resourceDict, numQueuesToGet=0, negativeCond=negativeCond)
+  assert result['OK'], result
+  return set([tq[0] for tq in result['Value']])
+
+
+@fixture
+def tqIndex():
+  yield TaskQueueIndex(singleValueDefFields, multiValueMatchFields, bannedJobMatchFields)
+
+
+def test_sites(tqIndex):
+  tqIndex.setTaskQueue(1, tqDef(BannedSites=['LCG.CERN.ch', 'CLOUD.IN2P3.fr']))
+  tqIndex.setTaskQueue(2, tqDef(BannedSites=['CLOUD.IN2P3.fr', 'DIRAC.Test.org']))
+  tqIndex.setTaskQueue(3, tqDef(Sites=['Site_1', 'Site_2'], Platforms=['centos7']))
+  tqIndex.setTaskQueue(4, tqDef(Sites=['Site_1'], Platforms=['slc6', 'centos7']))
+
+  assert match(tqIndex) == {1, 2, 3, 4}
+  assert match(tqIndex, Platform='centos7') == {1, 2, 3, 4}
+  assert match(tqIndex, Platform='slc6') == {1, 2, 4}
+  assert match(tqIndex, Site='DIRAC.Test.org') == {1}
+  assert match(tqIndex, Site='lcg.cern.CH') == {2}
+  assert match(tqIndex, Site='CLOUD.IN2P3.fr') == set()
+  assert match(tqIndex, Site=['Site_2', 'CLOUD.IN2P3.fr']) == {1, 2, 3}
+  assert match(tqIndex, Site='ANY') == {1, 2, 3, 4}
+  assert match(tqIndex, BannedSite=['Site_1']) == {1, 2}
+  assert match(tqIndex, CPUTime=10) == set()
+
+  tqIndex.removeTaskQueue(1)
+  assert match(tqIndex, Site='DIRAC.Test.org') == set()
+  assert len(tqIndex) == 3
+
+
+def test_tags(tqIndex):
+  tqIndex.setTaskQueue(1, tqDef(Tags=['MultiProcessor']))
+  tqIndex.setTaskQueue(2, tqDef(Tags=['SingleProcessor']))
+  tqIndex.setTaskQueue(3, tqDef(Tags=['SingleProcessor', 'MultiProcessor']))
+  tqIndex.setTaskQueue(4, tqDef(Tags=['MultiProcessor', 'GPU']))
+  tqIndex.setTaskQueue(5, tqDef())
+
+  assert match(tqIndex, Tag='aNy') == {1, 2, 3, 4, 5}
+  assert match(tqIndex, Tag=['MultiProcessor', 'ANY']) == {1, 2, 3, 4, 5}
+  assert match(tqIndex) == {5}
+  assert match(tqIndex, Tag='') == {5}
+  assert match(tqIndex, Tag=[]) == {5}
+  assert match(tqIndex, Tag='MultiProcessor') == {1, 5}
+  assert match(tqIndex, Tag=['MultiProcessor', 'GPU']) == {1, 4, 5}
+  assert match(tqIndex, Tag='MultiProcessor', RequiredTag='MultiProcessor') == {1}
+  assert match(tqIndex, Tag=['MultiProcessor', 'GPU'], RequiredTag='MultiProcessor') == {1, 4}
+  assert not tqIndex.match(dict(BASE_MATCH, RequiredTag='MultiProcessor'))['OK']
+
+
+def test_owners(tqIndex):
+  tqIndex.setTaskQueue(1, tqDef(OwnerGroup='admin'))
+  tqIndex.setTaskQueue(2, tqDef(OwnerGroup='prod', OwnerDN='/my/other/DN'))
+  tqIndex.setTaskQueue(3, tqDef())
+
+  assert match(tqIndex, OwnerGroup=['admin', 'user']) == {1, 3}
+  assert match(tqIndex, OwnerDN='/my/DN') == {1, 3}
+  with patch("DIRAC.WorkloadManagementSystem.private.TaskQueueIndex.CS.getPropertiesForGroup",
+             side_effect=lambda group: ['JobSharing'] if group == 'prod' else []):
+    assert match(tqIndex, OwnerDN='/my/DN', OwnerGroup=['prod', 'user']) == {2, 3}
+    assert match(tqIndex, OwnerDN='/my/DN', OwnerGroup=['admin']) == {1}
+
+
+def test_negativeCond(tqIndex):
+  tqIndex.setTaskQueue(1, tqDef(JobTypes=['MonteCarlo']))
+  tqIndex.setTaskQueue(2, tqDef(JobTypes=['User', 'Test']))
+  tqIndex.setTaskQueue(3, tqDef(OwnerGroup='prod'))
+
+  assert match(tqIndex, negativeCond={'JobType': 'MonteCarlo'}) == {2, 3}
+  assert match(tqIndex, negativeCond={'JobType': ['MonteCarlo', 'Test']}) == {3}
+  assert match(tqIndex, negativeCond={'JobType': 'User', 'OwnerGroup': ['user']}) == {1, 3}
+  assert match(tqIndex, negativeCond=[{'JobType': 'User'}, {'OwnerGroup': ['prod']}]) == {1, 2, 3}
+  assert match(tqIndex, negativeCond=[{'JobType': 'User'}, {'OwnerGroup': ['user']}]) == {1, 3}
+
+
+def test_priorities(tqIndex):
+  tqIndex.reset({1: tqDef(Priority=1000.), 2: tqDef(Priority=0.001)})
+  assert [tq[0] for tq in tqIndex.match(BASE_MATCH, numQueuesToGet=2)['Value']] == [1, 2]
+  tqIndex.setPriority([1], 0.001)
+  tqIndex.setPriority([2], 1000.)
+  result = tqIndex.match(BASE_MATCH, numQueuesToGet=1)
+  assert result['Value'] == [(2, '/my/DN', 'user')]
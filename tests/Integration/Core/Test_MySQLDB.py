@@ -157,6 +157,43 @@ try:
   assert RESULT['OK']
   assert len( RESULT['Value'] ) == 0
 
+  print 'Parameterized statements'
+
+  RESULT = TESTDB._updatemany( "INSERT INTO `TestTable` (Name, Surname, Count) VALUES (%s, %s, %s)",
+                               [ ( 'Many', "O'Surn%d" % J, J ) for J in range( 50 ) ] )
+  assert RESULT['OK']
+  assert RESULT['Value'] == 50
+  assert RESULT['lastRowId']
+
+  RESULT = TESTDB._query( "SELECT Surname FROM `TestTable` WHERE Name = %s AND Count < %s ORDER BY Count",
+                          args = ( 'Many', 2 ) )
+  assert RESULT['OK']
+  assert RESULT['Value'] == ( ( "O'Surn0", ), ( "O'Surn1", ) )
+
+  CHUNKS = []
+  for RESULT in TESTDB._queryIter( "SELECT Count FROM `TestTable` WHERE Name = %s", args = ( 'Many', ),
+                                   chunkSize = 20 ):
+    assert RESULT['OK']
+    CHUNKS.append( len( RESULT['Value'] ) )
+  assert CHUNKS == [ 20, 20, 10 ]
+
+  # The connection is given back to the pool, or closed if the iteration is abandoned
+  for RESULT in TESTDB._queryIter( "SELECT Count FROM `TestTable` WHERE Name = %s", args = ( 'Many', ),
+                                   chunkSize = 20 ):
+    break
+  CHUNKS = [ len( RESULT['Value'] )
+             for RESULT in TESTDB._queryIter( "SELECT Count FROM `TestTable` WHERE Name = 'Many'", chunkSize = 60 ) ]
+  assert CHUNKS == [ 50 ]
+
+  RESULT = TESTDB._update( "UPDATE `TestTable` SET Surname = %s WHERE Name = %s AND Count >= %s",
+                           args = ( 'Surn%', 'Many', 40 ) )
+  assert RESULT['OK']
+  assert RESULT['Value'] == 10
+
+  RESULT = TESTDB._update( "DELETE FROM `TestTable` WHERE Name = %s", args = ( 'Many', ) )
+  assert RESULT['OK']
+  assert RESULT['Value'] == 50
+
   RESULT = TESTDB.deleteEntries( NAME )
   assert RESULT['OK']
   assert RESULT['Value'] == 2
@@ -76,6 +76,29 @@ def test_insertAndRemoveJobIntoDB():
     assert res['OK'] is True
 
 
+def test_insertNewJobsIntoDB():
+
+  res = jobDB.insertNewJobsIntoDB([jdl] * 5, 'owner', '/DN/OF/owner', 'ownerGroup', 'someSetup',
+                                  initialStatus='Submitting', initialMinorStatus='Bulk transaction confirmation')
+  assert res['OK'] is True
+  assert len(res['Value']) == 5
+  jobIDs = [jobResult['JobID'] for jobResult in res['Value']]
+  # The JobIDs are new and in the order of the JDLs, not necessarily consecutive
+  assert jobIDs == sorted(set(jobIDs))
+  for jobID in jobIDs:
+    res = jobDB.getJobAttributes(jobID, ['Status', 'MinorStatus', 'JobName', 'Owner'])
+    assert res['OK'] is True
+    assert res['Value'] == {'Status': 'Submitting', 'MinorStatus': 'Bulk transaction confirmation',
+                            'JobName': 'helloWorld', 'Owner': 'owner'}
+    res = jobDB.getJobJDL(jobID)
+    assert res['OK'] is True
+    assert 'JobRequirements' in res['Value']
+
+  for jobID in jobIDs:
+    res = jobDB.removeJobFromDB(jobID)
+    assert res['OK'] is True
+
+
 def test_rescheduleJob():
 
   res = jobDB.insertNewJobIntoDB(jdl, 'owner', '/DN/OF/owner', 'ownerGroup', 'someSetup')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+""" Compares the DEncode encoder and decoders on payloads shaped like real DISET replies.
+
+    It does not need any DIRAC installation or service, only the DIRAC python code.
+    For each payload, it prints the best time out of several runs for:
+
+      * encode: DEncode.encode
+      * legacy decode: the recursive functions of g_dDecodeFunctions
+      * decode: DEncode.decode
+      * stream decode: DEncode.StreamDecoder, fed with chunks of the transport read size
+
+    Tunable parameters:
+      * nbFiles: number of files in the payloads
+      * repeat: number of runs for each measurement
+      * chunkSize: size of the chunks fed to the stream decoder
+"""
+
+import datetime
+import timeit
+
+from DIRAC.Core.Utilities import DEncode
+
+nbFiles = 50000
+repeat = 5
+chunkSize = 16384
+
+
+def getReplicasPayload():
+  """ Reply of FileCatalog.getReplicas """
+  successful = {}
+  for fileID in xrange(nbFiles):
+    lfn = '/lhcb/data/2018/RAW/FULL/LHCb/COLLISION18/%06d/%06d_%010d.raw' % (fileID / 1000, fileID / 1000, fileID)
+    successful[lfn] = {'CERN-RAW': 'root://eoslhcb.cern.ch//eos/lhcb/grid/prod%s' % lfn,
+                       'CNAF-RAW': 'srm://storm-fe-lhcb.cr.cnaf.infn.it:8444/srm/managerv2?SFN=/t1d0%s' % lfn}
+  return {'OK': True, 'Value': {'Successful': successful, 'Failed': {}}}
+
+
+def listDirectoryPayload():
+  """ Reply of FileCatalog.listDirectory with verbose metadata """
+  now = datetime.datetime.utcnow().replace(microsecond=0)
+  files = {}
+  for fileID in xrange(nbFiles):
+    files['/lhcb/MC/2018/ALLSTREAMS.DST/00078989/0000/00078989_%08d_1.allstreams.dst' % fileID] = {
+        'MetaData': {'Size': 3000000000 + fileID, 'Checksum': '%08x' % fileID, 'ChecksumType': 'AD',
+                     'GUID': '6F2A1B3C-%04X-11E8-9F1A-0CC47A6C8B0E' % (fileID % 65536), 'Status': 'AprioriGood',
+                     'Owner': 'lhcbprod', 'OwnerGroup': 'lhcb_prod', 'UID': 2, 'GID': 1, 'Mode': 509,
+                     'FileID': fileID, 'CreationDate': now, 'ModificationDate': now}}
+  return {'OK': True, 'Value': {'Successful': {'/lhcb/MC/2018/ALLSTREAMS.DST/00078989/0000': {'Files': files,
+                                                                                              'SubDirs': {},
+                                                                                              'Links': {}}},
+                                'Failed': {}}}
+
+
+def jobParametersPayload():
+  """ Reply of JobMonitoring.getJobsParameters, with numbers and tuples """
+  jobs = {}
+  for jobID in xrange(nbFiles / 10):
+    jobs[jobID] = {'JobID': jobID, 'Status': 'Done', 'MinorStatus': 'Execution Complete',
+                   'CPUTime': 1234.5 * jobID, 'WallClockTime': 1.5e+20, 'Site': ('LCG.CERN.cern', 'LCG.CNAF.it')}
+  return {'OK': True, 'Value': jobs}
+
+
+def streamDecode(encoded):
+  """ Decode the data as it would be received by the transport """
+  decoder = DEncode.StreamDecoder()
+  for index in xrange(0, len(encoded), chunkSize):
+    decoder.feed(encoded[index:index + chunkSize])
+  return decoder.finish()
+
+
+def legacyDecode(encoded):
+  """ Decode with the recursive functions """
+  return DEncode.g_dDecodeFunctions[encoded[0]](encoded, 0)
+
+
+def bench(func, arg):
+  """ Best time of func(arg) out of the runs """
+  return min(timeit.repeat(lambda: func(arg), number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+  print "%-20s %10s %10s %14s %10s %14s" % ('Payload', 'Size (MB)', 'encode', 'legacy decode', 'decode',
+                                            'stream decode')
+  for payloadFunc in (getReplicasPayload, listDirectoryPayload, jobParametersPayload):
+    payload = payloadFunc()
+    encoded = DEncode.encode(payload)
+    assert DEncode.decode(encoded) == legacyDecode(encoded) == streamDecode(encoded)
+    print "%-20s %10.1f %10.3f %14.3f %10.3f %14.3f" % (payloadFunc.__name__.replace('Payload', ''),
+                                                        len(encoded) / 1048576.,
+                                                        bench(DEncode.encode, payload),
+                                                        bench(legacyDecode, encoded),
+                                                        bench(DEncode.decode, encoded),
+                                                        bench(streamDecode, encoded))
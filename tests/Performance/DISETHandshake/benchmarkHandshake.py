@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+""" Measures the cost of establishing DISET SSL connections.
+
+    It needs a DIRAC installation with a host certificate and the CAs (the certificate is used
+    on both sides), but no service running: a listening SSLTransport is started in a thread.
+    For each scenario, it opens nbConnections connections and prints the connections per second
+    and the CPU time per connection (client and server are in this process):
+
+      * full handshake: sessions are not resumed, the peer credentials are not cached
+      * full handshake + credentials cache: the server caches the credentials of the chains
+      * resumed session + credentials cache: the client resumes its SSL session
+
+    Tunable parameters:
+      * nbConnections: number of connections for each scenario
+      * host: name used to connect, must match the host certificate
+      * port: port of the listening transport
+"""
+
+import socket
+import threading
+import time
+
+from DIRAC.Core.Base import Script
+Script.parseCommandLine()
+
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.Core.DISET.private.Transports.SSLTransport import SSLTransport
+from DIRAC.Core.DISET.private.Transports.SSL.PeerCredentialsCache import gPeerCredentialsCache
+
+nbConnections = 500
+host = socket.getfqdn()
+port = 9199
+
+
+def serve(serverTransport):
+  """ Accept the connections, handshake and get the credentials, like a service does """
+  while True:
+    result = serverTransport.acceptConnection()
+    if not result['OK']:
+      continue
+    clientTransport = result['Value']
+    clientTransport.handshake()
+    clientTransport.getConnectingCredentials()
+    clientTransport.close()
+
+
+def connect(enableSessions):
+  """ Open and close a connection to the listening transport """
+  clientTransport = SSLTransport((host, port), useCertificates=True, enableSessions=enableSessions)
+  result = clientTransport.initAsClient()
+  if not result['OK']:
+    raise RuntimeError(result['Message'])
+  # Make sure the server is done with the connection before the next one
+  clientTransport.receiveData()
+  clientTransport.close()
+
+
+def measure(title, enableSessions, cacheLifeTime):
+  gConfigurationData.setOptionInCFG('/DIRAC/Security/PeerCredentialsCacheLifeTime', str(cacheLifeTime))
+  gPeerCredentialsCache.purge()
+  # One connection to fill the caches
+  connect(enableSessions)
+  startWall = time.time()
+  startCPU = time.clock()
+  for _ in xrange(nbConnections):
+    connect(enableSessions)
+  wallTime = time.time() - startWall
+  cpuTime = time.clock() - startCPU
+  print "%-40s %8.1f connections/s %8.2f ms CPU/connection" % (title, nbConnections / wallTime,
+                                                              1000 * cpuTime / nbConnections)
+
+
+def main():
+  serverTransport = SSLTransport(("", port), bServerMode=True, SSLSessionTimeout=3600)
+  result = serverTransport.initAsServer()
+  if not result['OK']:
+    raise RuntimeError(result['Message'])
+  serverThread = threading.Thread(target=serve, args=(serverTransport,))
+  serverThread.setDaemon(True)
+  serverThread.start()
+
+  measure("full handshake", False, 0)
+  measure("full handshake + credentials cache", False, 300)
+  measure("resumed session + credentials cache", True, 300)
+  print "Credentials cache:", gPeerCredentialsCache.getStats()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+""" Measures how fast the ExecutorDispatcher goes through a burst of tasks.
+
+    It does not need any DIRAC installation or service: the executors are fakes that
+    process each task as soon as it is sent, and each message sent to them takes
+    msgLatency seconds.
+    For executors taking one task per message and executors taking several tasks per
+    message (batchTasks), it prints the time to dispatch and process all the tasks,
+    the number of messages sent and the statistics of the dispatcher.
+
+    Tunable parameters:
+      * nbTasks: number of tasks added at once
+      * nbExecutors: number of executors connected
+      * maxTasks: number of tasks each executor can hold
+      * msgLatency: duration of sending a message to an executor, in seconds
+"""
+
+import time
+
+from DIRAC import S_OK
+from DIRAC.Core.Utilities.ExecutorDispatcher import ExecutorDispatcher, ExecutorDispatcherCallbacks
+
+nbTasks = 20000
+nbExecutors = 4
+maxTasks = 10
+msgLatency = 0.0002
+
+
+class Callbacks(ExecutorDispatcherCallbacks):
+  """ Sends the tasks to the fake executors, which process them right away """
+
+  def __init__(self):
+    self.messages = 0
+    self.sent = []
+
+  def cbDispatch(self, taskId, taskObj, pathExecuted):
+    if pathExecuted:
+      return S_OK()
+    return S_OK("Optimizer")
+
+  def cbSendTask(self, taskId, taskObj, eId, eType):
+    return self.cbSendTasks([taskId], [taskObj], eId, eType)
+
+  def cbSendTasks(self, taskIds, taskObjs, eId, eType):
+    self.messages += 1
+    time.sleep(msgLatency)
+    self.sent.extend((eId, taskId) for taskId in taskIds)
+    return S_OK()
+
+
+def run(batchTasks):
+  dispatcher = ExecutorDispatcher()
+  callbacks = Callbacks()
+  dispatcher.setCallbacks(callbacks)
+  for eId in xrange(1, nbExecutors + 1):
+    dispatcher.addExecutor(eId, ["Optimizer"], maxTasks=maxTasks, batchTasks=batchTasks)
+  startTime = time.time()
+  for taskId in xrange(nbTasks):
+    dispatcher.addTask(taskId, None)
+  done = 0
+  while done < nbTasks:
+    sent, callbacks.sent = callbacks.sent, []
+    for eId, taskId in sent:
+      dispatcher.taskProcessed(eId, taskId)
+    done += len(sent)
+  return time.time() - startTime, callbacks.messages, dispatcher.getStats()["Optimizer"]
+
+
+if __name__ == '__main__':
+  print "%d tasks, %d executors of %d tasks, %.1f ms per message" % (nbTasks, nbExecutors, maxTasks,
+                                                                      msgLatency * 1000)
+  print "%-12s %10s %10s %16s" % ('Mode', 'Time (s)', 'Messages', 'Mean wait (s)')
+  for batchTasks in (False, True):
+    elapsed, messages, stats = run(batchTasks)
+    print "%-12s %10.2f %10d %16.3f" % ('batch' if batchTasks else 'single', elapsed, messages,
+                                        stats['WaitTime']['Mean'])
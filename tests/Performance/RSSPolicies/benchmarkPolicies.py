@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+""" Compares the element by element and the bulk evaluation of the RSS policies.
+
+    It does not need any DIRAC installation or service, only the DIRAC python code: the
+    elements are synthetic computing elements, the policies are the job, pilot and downtime
+    ones, and the RSS clients are fakes serving cache tables from memory, each call taking
+    rpcLatency seconds like a call to the RSS services would.
+    For each mode, it prints the time to evaluate and enforce the policies of all the
+    elements, and the number of calls to the RSS services:
+
+      * enforce: PEP.enforce for each element, as the ElementInspectorAgent used to do
+      * enforceBulk: PEP.enforceBulk for batches of elementsPerBatch elements
+
+    Tunable parameters:
+      * nbElements: number of elements
+      * elementsPerBatch: number of elements of each PEP.enforceBulk
+      * rpcLatency: duration of each call to the RSS services, in seconds
+"""
+
+import datetime
+import time
+
+from mock import patch
+
+from DIRAC import S_OK
+from DIRAC.ResourceStatusSystem.PolicySystem.PEP import PEP
+
+nbElements = 2000
+elementsPerBatch = 100
+rpcLatency = 0.002
+
+POLICIES = [{'name': 'JobEfficiency', 'type': 'JobEfficiency', 'module': 'JobEfficiencyPolicy',
+             'command': ('JobCommand', 'JobCommand'), 'args': {'onlyCache': True}},
+            {'name': 'JobDoneRatio', 'type': 'JobDoneRatio', 'module': 'JobDoneRatioPolicy',
+             'command': ('JobCommand', 'JobCommand'), 'args': {'onlyCache': True}},
+            {'name': 'PilotInstantEfficiency', 'type': 'PilotEfficiency', 'module': 'PilotEfficiencyPolicy',
+             'command': ('PilotCommand', 'PilotCommand'), 'args': {'onlyCache': True}},
+            {'name': 'DTScheduled', 'type': 'DTPolicy', 'module': 'DowntimePolicy',
+             'command': ('DowntimeCommand', 'DowntimeCommand'), 'args': {'hours': 12, 'onlyCache': True}}]
+
+
+class FakeClient(object):
+  """ Serves the selects of the cache tables from memory, and counts the calls """
+
+  def __init__(self, tables):
+    self.tables = tables
+    self.calls = 0
+
+  def __getattr__(self, method):
+    def call(*args, **kwargs):
+      self.calls += 1
+      time.sleep(rpcLatency)
+      if method.startswith('select'):
+        return self.select(method[len('select'):], *args, **kwargs)
+      if method.startswith('addOrModify') and method.endswith('s'):
+        return S_OK({'Failed': {}})
+      return S_OK()
+    return call
+
+  def select(self, table, *args, **kwargs):
+    if table == 'StatusElement':
+      table = args[0] + args[1]
+      args = ()
+    columns, filterColumns, rows = self.tables[table]
+    filters = dict(zip(filterColumns, args))
+    filters.update(kwargs)
+    filters = dict((key[0].upper() + key[1:], value if isinstance(value, list) else [value])
+                   for key, value in filters.iteritems() if value)
+    selected = [row for row in rows
+                if all(row[columns.index(column)] in values for column, values in filters.iteritems())]
+    return {'OK': True, 'Value': selected, 'Columns': columns}
+
+
+def getElements():
+  """ The synthetic elements, as given to the PEP by the ElementInspectorAgent """
+  now = datetime.datetime.utcnow().replace(microsecond=0)
+  elements = []
+  tables = {'JobCache': (['Site', 'Completed', 'Done', 'Failed'], ['site'], []),
+            'PilotCache': (['Site', 'CE', 'Aborted', 'Done', 'Failed'], ['site', 'cE'], []),
+            'DowntimeCache': (['DowntimeID', 'Element', 'Name', 'StartDate', 'EndDate', 'Severity', 'Description',
+                               'Link', 'GOCDBServiceType'], ['downtimeID', 'element', 'name'], []),
+            'ResourceStatus': (['Name', 'StatusType', 'Status', 'Reason', 'ElementType', 'TokenOwner',
+                                'LastCheckTime'], [], [])}
+  for index in xrange(nbElements):
+    name = 'ce%05d.domain.ch' % index
+    elements.append({'element': 'Resource', 'name': name, 'statusType': 'all', 'status': 'Active',
+                     'reason': 'Init', 'elementType': 'CE', 'tokenOwner': 'rs_svc', 'lastCheckTime': now})
+    tables['ResourceStatus'][2].append((name, 'all', 'Active', 'Init', 'CE', 'rs_svc', now))
+    tables['JobCache'][2].append((name, index % 50, index % 20, index % 7))
+    tables['PilotCache'][2].append(('Site%d' % (index % 100), name, index % 3, index % 40, index % 5))
+    if not index % 10:
+      tables['DowntimeCache'][2].append((str(index), 'Resource', name, now - datetime.timedelta(hours=1),
+                                         now + datetime.timedelta(hours=1), 'OUTAGE', 'Intervention',
+                                         'https://goc.egi.eu/%d' % index, None))
+  return elements, tables
+
+
+def runEnforce(pep, elements):
+  for element in elements:
+    assert pep.enforce(element)['OK']
+
+
+def runEnforceBulk(pep, elements):
+  for index in xrange(0, len(elements), elementsPerBatch):
+    result = pep.enforceBulk(elements[index:index + elementsPerBatch])
+    assert result['OK']
+    assert all(res['OK'] for res in result['Value'])
+
+
+if __name__ == '__main__':
+  elements, tables = getElements()
+  print "%d elements, %d policies each, %.1f ms per call" % (len(elements), len(POLICIES), rpcLatency * 1000)
+  print "%-12s %10s %10s" % ('Mode', 'Time (s)', 'Calls')
+  with patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.getPoliciesThatApply', return_value=S_OK(POLICIES)), \
+          patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.getPolicyActionsThatApply',
+                return_value=S_OK([('LogStatusAction', 'LogStatusAction'),
+                                   ('LogPolicyResultAction', 'LogPolicyResultAction')])), \
+          patch('DIRAC.ResourceStatusSystem.PolicySystem.PDP.RssConfiguration.getPolicies', return_value=S_OK({})):
+    for runFunc in (runEnforce, runEnforceBulk):
+      client = FakeClient(tables)
+      pep = PEP({'ResourceStatusClient': client, 'ResourceManagementClient': client, 'SiteStatus': client,
+                 'GOCDBClient': client, 'WMSAdministrator': client})
+      startTime = time.time()
+      runFunc(pep, elements)
+      print "%-12s %10.2f %10d" % (runFunc.__name__[3:4].lower() + runFunc.__name__[4:],
+                                   time.time() - startTime, client.calls)